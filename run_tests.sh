@@ -2,3 +2,25 @@
 # 运行测试，启用asyncio支持
 pytest tests/test_character_routes.py -v -p pytest_asyncio
 pytest tests/test_event_routes.py -v -p pytest_asyncio
+pytest tests/test_json_stream.py -v
+pytest tests/test_structured_output.py -v
+pytest tests/test_import_time.py -v
+pytest tests/test_metrics.py -v
+pytest tests/test_query_monitor.py -v
+pytest tests/test_llm_telemetry.py -v
+pytest tests/test_tracing.py -v
+pytest tests/test_logging_config.py -v
+pytest tests/test_token_cache.py -v
+pytest tests/test_rate_limit.py -v
+pytest tests/test_sms_dispatch.py -v
+pytest tests/test_json_encoding.py -v
+pytest tests/test_life_path_buckets.py -v
+pytest tests/test_life_path_index.py -v
+pytest tests/test_event_model.py -v
+pytest tests/test_event_window.py -v
+pytest tests/test_emotion_decay.py -v
+pytest tests/test_emotion_history.py -v
+pytest tests/test_emotion_analytics.py -v
+pytest tests/test_event_deduplicator.py -v
+pytest tests/test_scheduler.py -v
+pytest tests/test_life_path_batch.py -v
@@ -0,0 +1,135 @@
+"""
+API冷启动导入耗时基准
+在独立子进程中以 -X importtime 导入 src.api.main 及各路由模块，输出按模块/按包的耗时明细，
+超过预算或导入了应延迟加载的重型依赖时以非零状态码退出，可用于CI防止启动耗时回退。
+
+数据库和模型客户端均在首次使用时才创建，导入阶段不会访问MongoDB/MySQL/大模型接口，
+因此无需启动任何外部服务。
+
+用法:
+    python scripts/benchmark_import_time.py
+    python scripts/benchmark_import_time.py --budget-ms 1500 --repeat 5 --top 20
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 需要测量的入口模块
+DEFAULT_MODULES = [
+    "src.api.main",
+    "src.api.character.routes",
+    "src.api.event.routes",
+    "src.api.user.routes",
+    "src.api.invited_code.routes",
+    "src.api.interaction.routes",
+    "src.api.emotion.routes",
+]
+
+# 应延迟到实际调用时才导入的重型依赖
+DEFERRED_MODULES = [
+    "autogen_agentchat",
+    "autogen_ext",
+    "autogen_core",
+    "openai",
+    "pypinyin",
+    "numpy",
+]
+
+
+def measure_import(module: str) -> dict:
+    """在新的解释器中导入模块并解析 -X importtime 输出
+
+    Args:
+        module: 模块名
+
+    Returns:
+        dict: total_us为总耗时(微秒)，modules为{模块名: (自身耗时, 累计耗时)}
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = project_root + os.pathsep + env.get("PYTHONPATH", "")
+    env.setdefault("OPENAI_API_KEY", "benchmark")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=project_root,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入{module}失败:\n{result.stderr[-2000:]}")
+
+    modules = {}
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        stripped = name.strip()
+        modules[stripped] = (int(self_us), int(cumulative_us))
+        if stripped == module:
+            total_us = int(cumulative_us)
+    return {"total_us": total_us, "modules": modules}
+
+
+def group_by_package(modules: dict) -> dict:
+    """按顶层包汇总自身耗时，src下的模块按二级包汇总"""
+    packages = defaultdict(int)
+    for name, (self_us, _) in modules.items():
+        parts = name.split(".")
+        key = ".".join(parts[:2]) if parts[0] == "src" else parts[0]
+        packages[key] += self_us
+    return packages
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="API冷启动导入耗时基准")
+    parser.add_argument("--modules", nargs="*", default=DEFAULT_MODULES, help="需要测量的模块")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_TIME_BUDGET_MS", "1500")),
+                        help="src.api.main导入耗时预算(毫秒)")
+    parser.add_argument("--repeat", type=int, default=3, help="每个模块重复测量次数，取最小值")
+    parser.add_argument("--top", type=int, default=15, help="输出耗时最高的模块/包数量")
+    args = parser.parse_args()
+
+    failures = []
+    for module in args.modules:
+        runs = [measure_import(module) for _ in range(max(args.repeat, 1))]
+        best = min(runs, key=lambda run: run["total_us"])
+        total_ms = best["total_us"] / 1000
+
+        print(f"\n=== {module}: {total_ms:.1f} ms (最优 {len(runs)} 次) ===")
+        print("按包汇总:")
+        packages = sorted(group_by_package(best["modules"]).items(), key=lambda item: item[1], reverse=True)
+        for name, self_us in packages[:args.top]:
+            print(f"  {self_us / 1000:9.1f} ms  {name}")
+        print("按模块(自身耗时):")
+        slowest = sorted(best["modules"].items(), key=lambda item: item[1][0], reverse=True)
+        for name, (self_us, cumulative_us) in slowest[:args.top]:
+            print(f"  {self_us / 1000:9.1f} ms  (累计 {cumulative_us / 1000:9.1f} ms)  {name}")
+
+        loaded = sorted({
+            name.split(".")[0] for name in best["modules"]
+            if name.split(".")[0] in DEFERRED_MODULES
+        })
+        if loaded:
+            failures.append(f"{module} 在导入时加载了应延迟的依赖: {', '.join(loaded)}")
+
+        if module == "src.api.main" and total_ms > args.budget_ms:
+            failures.append(f"{module} 导入耗时 {total_ms:.1f} ms 超过预算 {args.budget_ms:.1f} ms")
+
+    if failures:
+        print("\n导入耗时检查失败:")
+        for failure in failures:
+            print(f"  - {failure}")
+        return 1
+
+    print("\n导入耗时检查通过")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
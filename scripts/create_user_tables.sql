@@ -20,7 +20,7 @@ CREATE TABLE IF NOT EXISTS users (
 CREATE TABLE IF NOT EXISTS user_tokens (
     id INT NOT NULL AUTO_INCREMENT PRIMARY KEY COMMENT '自增ID',
     user_id VARCHAR(36) NOT NULL COMMENT '用户ID',
-    token TEXT NOT NULL COMMENT 'JWT令牌',
+    token_hash CHAR(64) NOT NULL COMMENT 'JWT令牌的SHA-256摘要(十六进制)',
     expire_time DATETIME NOT NULL COMMENT '过期时间',
     created_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP COMMENT '创建时间',
     updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP COMMENT '更新时间',
@@ -32,6 +32,7 @@ CREATE TABLE IF NOT EXISTS user_tokens (
 CREATE INDEX idx_users_phone_number ON users(phone_number);
 CREATE INDEX idx_user_tokens_user_id ON user_tokens(user_id);
 CREATE INDEX idx_user_tokens_expire_time ON user_tokens(expire_time);
+CREATE UNIQUE INDEX uk_user_tokens_token_hash ON user_tokens(token_hash);
 
 -- 提示信息
 SELECT '用户表和用户令牌表创建成功！' AS message;
@@ -0,0 +1,89 @@
+"""
+生活轨迹分桶迁移
+将event_profiles文档中的life_path数组按事件开始时间拆分写入life_path_buckets集合(每个事件配置每月一个文档)，
+写入成功后从事件配置文档中移除life_path字段。
+
+写入分桶使用$addToSet，中途失败后可直接重新执行，已迁移的事件不会重复写入。
+迁移前后服务均可正常读取：尚未迁移的事件配置会从life_path数组中读取事件。
+
+用法:
+    python scripts/migrate_life_path_buckets.py --dry-run
+    python scripts/migrate_life_path_buckets.py --batch-size 100
+"""
+
+import argparse
+import os
+import sys
+
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.character.db.life_path_dao import DAO as life_path_dao, event_month  # noqa: E402
+
+
+def migrate(batch_size: int, dry_run: bool) -> dict:
+    """迁移所有仍包含life_path数组的事件配置
+
+    Args:
+        batch_size: 每批处理的事件配置数量
+        dry_run: 只统计不写入
+
+    Returns:
+        dict: 迁移的事件配置数、事件数和分桶数
+    """
+    profiles_collection = life_path_dao.event_profiles_collection
+    buckets_collection = life_path_dao.life_path_buckets_collection
+    stats = {'profiles': 0, 'events': 0, 'buckets': 0}
+
+    projection = {'id': 1, 'character_id': 1, 'life_path': 1}
+    query = {'life_path': {'$exists': True}}
+
+    while True:
+        if dry_run:
+            # 只统计时不会移除life_path，一次遍历所有待迁移的配置
+            profiles = profiles_collection.find(query, projection, batch_size=batch_size)
+        else:
+            # 已迁移的配置不再包含life_path，每批都从头查询剩余的配置
+            profiles = list(profiles_collection.find(query, projection).limit(batch_size))
+            if not profiles:
+                break
+
+        profile_events = {}
+        for profile in profiles:
+            events = profile.get('life_path') or []
+            profile_events[profile['id']] = (profile.get('character_id'), events)
+            stats['profiles'] += 1
+            stats['events'] += len(events)
+            stats['buckets'] += len({event_month(event) for event in events})
+
+        if dry_run:
+            break
+
+        life_path_dao.add_events_bulk(profile_events, deduplicate=True)
+        profile_ids = list(profile_events)
+        # $addToSet不维护count，按事件数组重新计算
+        buckets_collection.update_many(
+            {'profile_id': {'$in': profile_ids}},
+            [{'$set': {'count': {'$size': '$events'}}}]
+        )
+        profiles_collection.update_many({'id': {'$in': profile_ids}}, {'$unset': {'life_path': ''}})
+        print(f"已迁移{stats['profiles']}个事件配置，{stats['events']}个事件")
+
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="生活轨迹分桶迁移")
+    parser.add_argument("--batch-size", type=int, default=100, help="每批处理的事件配置数量")
+    parser.add_argument("--dry-run", action="store_true", help="只统计需要迁移的数据，不写入")
+    args = parser.parse_args()
+
+    life_path_dao.ensure_indexes()
+    stats = migrate(max(args.batch_size, 1), args.dry_run)
+    print(f"{'待迁移' if args.dry_run else '迁移完成'}: 事件配置{stats['profiles']}个，"
+          f"事件{stats['events']}个，分桶{stats['buckets']}个")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,29 @@
+-- 将user_tokens从按TEXT类型的token原文查询迁移为按SHA-256摘要查询
+-- 新版本代码只读写token_hash列，需在部署新版本之前执行步骤1-4，确认运行正常后再执行步骤5删除token列
+-- SHA2(token, 256)与Python中hashlib.sha256(token.encode('utf-8')).hexdigest()的结果一致
+
+USE soluna;
+
+-- 1. 添加token_hash列，原token列改为可空，新版本代码写入时不再提供原文
+ALTER TABLE user_tokens
+    ADD COLUMN token_hash CHAR(64) NULL COMMENT 'JWT令牌的SHA-256摘要(十六进制)' AFTER user_id,
+    MODIFY COLUMN token TEXT NULL COMMENT 'JWT令牌(已废弃，迁移完成后删除)';
+
+-- 2. 已过期的令牌不再需要迁移，直接删除
+DELETE FROM user_tokens WHERE expire_time <= CURRENT_TIMESTAMP;
+
+-- 3. 回填摘要，重复的令牌只保留id最大的一条
+UPDATE user_tokens SET token_hash = SHA2(token, 256) WHERE token_hash IS NULL;
+
+DELETE t1 FROM user_tokens t1
+JOIN user_tokens t2 ON t1.token_hash = t2.token_hash AND t1.id < t2.id;
+
+-- 4. 设置非空并创建唯一索引
+ALTER TABLE user_tokens
+    MODIFY COLUMN token_hash CHAR(64) NOT NULL COMMENT 'JWT令牌的SHA-256摘要(十六进制)',
+    ADD UNIQUE INDEX uk_user_tokens_token_hash (token_hash);
+
+-- 5. 确认新版本运行正常后删除原token列
+-- ALTER TABLE user_tokens DROP COLUMN token;
+
+SELECT 'user_tokens迁移完成！' AS message;
@@ -0,0 +1,18 @@
+-- 为emotions表添加情绪时间衰减所需的列
+-- 情绪在读取时按半衰期向基线回归，数据库只保存最后一次写入的PAD值和写入时间，衰减不产生写入
+-- 基线默认为0(中性)，执行后调用 POST /api/emotion/characters/baselines/refresh 按角色人格计算基线
+
+USE soluna;
+
+-- 1. 添加基线、半衰期倍率和PAD写入时间列
+ALTER TABLE emotions
+    ADD COLUMN baseline_pleasure SMALLINT NOT NULL DEFAULT 0 COMMENT '基线愉悦度，由大五人格计算',
+    ADD COLUMN baseline_arousal SMALLINT NOT NULL DEFAULT 0 COMMENT '基线激活度，由大五人格计算',
+    ADD COLUMN baseline_dominance SMALLINT NOT NULL DEFAULT 0 COMMENT '基线支配感，由大五人格计算',
+    ADD COLUMN half_life_scale FLOAT NOT NULL DEFAULT 1 COMMENT '半衰期倍率，由情绪波动类型决定',
+    ADD COLUMN pad_updated_at DATETIME NULL COMMENT 'PAD值最后写入时间，衰减从这一时刻开始计算';
+
+-- 2. 已有记录以最后更新时间作为衰减起点
+UPDATE emotions SET pad_updated_at = updated_at WHERE pad_updated_at IS NULL;
+
+SELECT 'emotions衰减列添加完成！' AS message;
@@ -0,0 +1,36 @@
+-- 情绪历史时间序列表和按小时、按天的汇总表
+-- emotion_history只追加写入；汇总表在写入历史时通过INSERT ... ON DUPLICATE KEY UPDATE增量累加，
+-- 情绪变化曲线从汇总表读取，不扫描原始历史
+
+USE soluna;
+
+CREATE TABLE IF NOT EXISTS `emotion_history` (
+  `id` bigint(20) NOT NULL AUTO_INCREMENT,
+  `character_id` varchar(64) NOT NULL,
+  `pleasure_score` smallint NOT NULL COMMENT '写入后的愉悦度',
+  `arousal_score` smallint NOT NULL COMMENT '写入后的激活度',
+  `dominance_score` smallint NOT NULL COMMENT '写入后的支配感',
+  `emotion_score` smallint NOT NULL COMMENT '写入后的综合情绪分数',
+  `source` varchar(20) NOT NULL COMMENT '来源：event/interaction/manual',
+  `recorded_at` datetime NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_character_recorded` (`character_id`, `recorded_at`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='情绪历史记录(只追加)';
+
+CREATE TABLE IF NOT EXISTS `emotion_rollup_hourly` (
+  `character_id` varchar(64) NOT NULL,
+  `bucket_start` datetime NOT NULL COMMENT '小时起始时间',
+  `sample_count` int NOT NULL DEFAULT 0,
+  `sum_pleasure` bigint NOT NULL DEFAULT 0,
+  `sum_arousal` bigint NOT NULL DEFAULT 0,
+  `sum_dominance` bigint NOT NULL DEFAULT 0,
+  `sum_emotion_score` bigint NOT NULL DEFAULT 0,
+  `min_emotion_score` smallint NOT NULL,
+  `max_emotion_score` smallint NOT NULL,
+  PRIMARY KEY (`character_id`, `bucket_start`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COMMENT='情绪按小时汇总';
+
+CREATE TABLE IF NOT EXISTS `emotion_rollup_daily` LIKE `emotion_rollup_hourly`;
+ALTER TABLE `emotion_rollup_daily` COMMENT='情绪按天汇总';
+
+SELECT '情绪历史表创建完成！' AS message;
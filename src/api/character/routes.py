@@ -1,6 +1,7 @@
 import os
 import sys
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from src.api.models.character import GenerateCharacterRequest, SaveCharacterRequest, CharacterListRequest
 import json
 
@@ -16,12 +17,18 @@ from src.db.mongo_client import mongo_client
 from src.service.character.service import character_service as verify_service
 from src.service.emotion.service import emotion_service
 from src.service.event.service import EventService
+from src.utils.tracing import start_span, mark_span_error
+from src.api.rate_limit.dependencies import rate_limit
 import asyncio
 
 # 创建路由
 router = APIRouter(prefix="/api/characters", tags=["characters"])
 
-@router.post("/generate", response_model=ApiResponse)
+# 角色生成和保存都会调用大模型，按客户端IP限流
+CHARACTER_LLM_RATE_LIMIT = int(os.getenv("CHARACTER_LLM_RATE_LIMIT_PER_MINUTE", "10"))
+character_llm_rate_limit = Depends(rate_limit("character_llm", CHARACTER_LLM_RATE_LIMIT, 60))
+
+@router.post("/generate", response_model=ApiResponse, dependencies=[character_llm_rate_limit])
 async def generate_character(
     request_data: GenerateCharacterRequest
 ):
@@ -44,12 +51,52 @@ async def generate_character(
         return ApiResponse.error(recode=500, msg="角色生成失败")
     return ApiResponse.success(data=character, msg="角色生成成功")
 
-@router.post("/save", response_model=ApiResponse)
+def _format_sse(event: str, data) -> str:
+    """格式化为SSE消息"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@router.post("/generate/stream", dependencies=[character_llm_rate_limit])
+async def generate_character_stream(
+    request_data: GenerateCharacterRequest
+):
+    """流式生成角色（SSE）
+
+    事件类型:
+    - start: 请求已受理，生成开始
+    - field: 某个角色字段已生成完成，data为{"field": 字段名, "value": 字段值}
+    - character: 生成完成并校验通过，data为与/generate一致的ApiResponse
+    - error: 生成失败，data为ApiResponse错误响应
+    """
+    async def event_stream():
+        yield _format_sse("start", {"msg": "角色生成中"})
+        async for event, data in character_service.generate_character_stream(
+            name=request_data.name,
+            age=request_data.age,
+            gender=request_data.gender,
+            occupation=request_data.occupation,
+            language=request_data.language
+        ):
+            if event == "field":
+                yield _format_sse("field", data)
+            elif event == "character":
+                yield _format_sse("character", ApiResponse.success(data=data.to_dict(), msg="角色生成成功").to_dict())
+            else:
+                yield _format_sse("error", ApiResponse.error(recode=500, msg="角色生成失败").to_dict())
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/save", response_model=ApiResponse, dependencies=[character_llm_rate_limit])
 async def save_character(request: SaveCharacterRequest):
     """保存角色到数据库（加密版）"""
     try:
         # 从加密请求中获取角色对象
-        character = request.get_character()
+        with start_span("character.decrypt"):
+            character = request.get_character()
         
         # 提交角色到服务层
         result = character_service.submit_character(character)
@@ -70,17 +117,19 @@ async def save_character(request: SaveCharacterRequest):
         retry_delay = 0.1  # 100ms
         
         saved_character = None
-        for attempt in range(max_retries):
-            saved_character = verify_service.get_character_by_id(character.character_id)
-            if saved_character:
-                # 验证关键字段一致性
-                if (saved_character.character_id == character.character_id and 
-                    saved_character.name == character.name):
-                    break
-                else:
-                    print(f"角色数据验证失败，第{attempt+1}次重试")
-            if attempt < max_retries - 1:
-                await asyncio.sleep(retry_delay)
+        with start_span("character.verify_saved") as span:
+            for attempt in range(max_retries):
+                span.set_attribute("verify.attempts", attempt + 1)
+                saved_character = verify_service.get_character_by_id(character.character_id)
+                if saved_character:
+                    # 验证关键字段一致性
+                    if (saved_character.character_id == character.character_id and 
+                        saved_character.name == character.name):
+                        break
+                    else:
+                        print(f"角色数据验证失败，第{attempt+1}次重试")
+                if attempt < max_retries - 1:
+                    await asyncio.sleep(retry_delay)
         
         if not saved_character:
             return ApiResponse.error(recode=500, msg="角色保存后验证失败，数据库写入可能存在延迟")
@@ -128,6 +177,7 @@ async def save_character(request: SaveCharacterRequest):
     except Exception as e:
         # 捕获并记录详细错误信息，但向客户端返回更通用的错误消息
         print(f"保存角色时发生错误: {str(e)}")
+        mark_span_error(str(e))
         return ApiResponse.error(recode=400, msg="角色数据无效或保存失败")
 
 @router.post("/get/{character_id}", response_model=ApiResponse)
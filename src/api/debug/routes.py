@@ -0,0 +1,48 @@
+import os
+import sys
+from fastapi import APIRouter, Query
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(project_root)
+
+from src.api.responds.base_response import ApiResponse
+from src.db.query_monitor import query_stats, SLOW_QUERY_THRESHOLD_MS
+
+router = APIRouter(prefix="/api/debug", tags=["debug"])
+
+
+def _debug_enabled() -> bool:
+    """调试接口默认关闭，需设置DEBUG_ENDPOINTS_ENABLED=true开启"""
+    return os.getenv("DEBUG_ENDPOINTS_ENABLED", "false").lower() == "true"
+
+
+@router.get("/queries")
+async def get_top_queries(
+    limit: int = Query(20, ge=1, le=200),
+    sort_by: str = Query("total_time", pattern="^(total_time|max_time|avg_time|count|errors)$")
+):
+    """获取按指纹汇总的数据库语句统计
+
+    Args:
+        limit: 返回数量
+        sort_by: 排序字段，total_time、max_time、avg_time、count、errors
+
+    Returns:
+        ApiResponse: 包含语句统计列表的响应
+    """
+    if not _debug_enabled():
+        return ApiResponse.not_found()
+    return ApiResponse.success({
+        "slow_query_threshold_ms": SLOW_QUERY_THRESHOLD_MS,
+        "queries": query_stats.top(limit, sort_by)
+    })
+
+
+@router.delete("/queries")
+async def reset_query_stats():
+    """清空数据库语句统计"""
+    if not _debug_enabled():
+        return ApiResponse.not_found()
+    query_stats.reset()
+    return ApiResponse.success(msg="统计已清空")
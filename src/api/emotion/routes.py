@@ -9,6 +9,7 @@ from typing import List, Dict, Any
 from src.service.emotion.service import emotion_service
 from src.service.emotion.emotion_update_service import emotion_update_service
 from src.api.responds.base_response import ApiResponse
+from src.emotion.model.emotion_history import SOURCE_MANUAL
 from datetime import datetime
 
 router = APIRouter(prefix="/api/emotion", tags=["emotion"])
@@ -96,7 +97,7 @@ async def update_emotion_from_event(request_data: dict):
             
         # 使用业务服务层更新情绪
         success = emotion_service.update_emotion_from_event(
-            character_id, pleasure_change, arousal_change, dominance_change
+            character_id, pleasure_change, arousal_change, dominance_change, source=SOURCE_MANUAL
         )
         
         if success:
@@ -254,4 +255,70 @@ async def update_emotions_from_recent_events(
         return ApiResponse.success(data=result, msg=f"成功更新{result.get('updated_count', 0)}个角色的情绪")
         
     except Exception as e:
-        return ApiResponse.error(code=500, msg=str(e))
\ No newline at end of file
+        return ApiResponse.error(code=500, msg=str(e))
+
+
+@router.post("/characters/baselines/refresh")
+async def refresh_emotion_baselines(
+    character_ids: List[str] = Body(..., description="角色ID列表")
+):
+    """
+    9. 根据角色人格重新计算基线情绪
+    
+    基线情绪由大五人格和情绪波动类型计算，情绪在没有新事件时按半衰期向基线回归
+    
+    请求体:
+    ["角色ID1", "角色ID2", ...]
+    
+    返回更新的记录数
+    """
+    try:
+        if not character_ids:
+            return ApiResponse.bad_request(msg="缺少character_ids参数")
+        
+        updated_count = emotion_service.refresh_emotion_baselines(character_ids)
+        return ApiResponse.success(data={"updated_count": updated_count}, msg="基线情绪更新完成")
+        
+    except Exception as e:
+        return ApiResponse.error(recode=500, msg=str(e))
+
+
+@router.post("/character/history")
+async def get_character_emotion_history(request_data: dict):
+    """
+    10. 获取角色情绪变化曲线
+    
+    请求体:
+    {
+        "character_id": "角色ID",
+        "start_time": "2024-01-01 00:00:00",
+        "end_time": "2024-01-08 00:00:00",  # 如不传则使用当前时间
+        "resolution": "auto",               # auto/raw/hour/day，auto按时间范围选择小时或天汇总
+        "max_points": 200                   # 可选，超过时合并相邻的点
+    }
+    
+    返回降采样后的情绪曲线、平均PAD和趋势
+    """
+    try:
+        character_id = request_data.get("character_id")
+        start_time_str = request_data.get("start_time")
+        if not character_id or not start_time_str:
+            return ApiResponse.bad_request(msg="缺少character_id或start_time参数")
+        
+        end_time_str = request_data.get("end_time")
+        try:
+            start_time = datetime.strptime(start_time_str, "%Y-%m-%d %H:%M:%S")
+            end_time = datetime.strptime(end_time_str, "%Y-%m-%d %H:%M:%S") if end_time_str else datetime.now()
+            max_points = request_data.get("max_points")
+            result = emotion_service.get_emotion_history(
+                character_id, start_time, end_time,
+                resolution=request_data.get("resolution", "auto"),
+                max_points=int(max_points) if max_points is not None else None
+            )
+        except ValueError as e:
+            return ApiResponse.bad_request(msg=str(e))
+        
+        return ApiResponse.success(data=result, msg="获取情绪历史成功")
+        
+    except Exception as e:
+        return ApiResponse.error(recode=500, msg=str(e))
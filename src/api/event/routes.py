@@ -22,17 +22,41 @@ life_path_router = APIRouter(prefix="/api/life-paths", tags=["life-paths"])
 
 # 事件配置相关接口
 @profile_router.post("/get-by-character-id", response_model=ApiResponse) 
-async def get_event_profiles_by_character(character_id: str):
-    """根据角色ID获取事件配置列表"""
-    result = event_service.get_event_profiles_by_character_id(character_id)
+async def get_event_profiles_by_character(
+    character_id: str,
+    life_path: str = "full",
+    limit: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """根据角色ID获取事件配置列表
+
+    参数:
+    - life_path: 生活轨迹加载方式，full(默认，完整轨迹)/none(只返回配置)/latest(最近limit个事件)/range(start_date至end_date内的事件)
+    - limit: life_path为latest时返回的事件数量
+    - start_date/end_date: life_path为range时的日期范围 (格式: YYYY-MM-DD)
+    """
+    try:
+        result = event_service.get_event_profiles_by_character_id(character_id, life_path, limit, start_date, end_date)
+    except ValueError as e:
+        return ApiResponse.error(recode=400, msg=str(e))
     if result is None:
         return ApiResponse.not_found(msg="未找到该角色的事件配置")
     return ApiResponse.success(data=result, msg="事件配置获取成功")
 
 @profile_router.post("/get-by-character-ids", response_model=ApiResponse) 
-async def get_event_profiles_by_character_ids(character_ids: list[str] = Body(...)):
-    """根据角色ID数组批量获取事件配置列表"""
-    result = event_service.get_event_profiles_by_character_ids(character_ids)
+async def get_event_profiles_by_character_ids(
+    character_ids: list[str] = Body(...),
+    life_path: str = "full",
+    limit: Optional[int] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None
+):
+    """根据角色ID数组批量获取事件配置列表，生活轨迹加载参数同get-by-character-id"""
+    try:
+        result = event_service.get_event_profiles_by_character_ids(character_ids, life_path, limit, start_date, end_date)
+    except ValueError as e:
+        return ApiResponse.error(recode=400, msg=str(e))
     if result is None:
         return ApiResponse.not_found(msg="未找到事件配置")
     return ApiResponse.success(data=result, msg="事件配置批量获取成功")
@@ -84,7 +108,7 @@ async def create_life_path(
     return ApiResponse.success(data={"success": True}, msg="生活轨迹创建成功")
 
 @life_path_router.post("/batch-generate-all", response_model=ApiResponse)
-async def batch_create_life_paths(start_date: str = Body(...), end_date: str = Body(...), max_events: int = Body(3), limit: int = Body(0)):
+async def batch_create_life_paths(start_date: str = Body(...), end_date: str = Body(...), max_events: int = Body(3), limit: int = Body(0), batch_size: int = Body(1)):
     """批量生成所有角色生活轨迹（用于定时任务）
     
     参数:
@@ -92,6 +116,7 @@ async def batch_create_life_paths(start_date: str = Body(...), end_date: str = B
     - end_date: 结束时间 (格式: YYYY-MM-DD)
     - max_events: 每个角色生成的最大事件数 (默认: 3)
     - limit: 限制处理的角色数量 (默认: 0，表示处理所有角色)
+    - batch_size: 每次LLM请求打包的角色数量 (默认: 1，表示逐个角色生成；大于1时启用多角色批量模式，未通过校验的角色自动回退为单角色生成)
     
     返回:
     - 处理成功的角色数量
@@ -100,7 +125,7 @@ async def batch_create_life_paths(start_date: str = Body(...), end_date: str = B
     """
     try:
         # 调用服务层的批量生成方法
-        result = await event_service.batch_generate_life_paths(start_date, end_date, max_events, limit)
+        result = await event_service.batch_generate_life_paths(start_date, end_date, max_events, limit, batch_size)
         
         # 检查结果是否包含错误信息
         if result.get("success") is False:
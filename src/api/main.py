@@ -1,5 +1,6 @@
 import os
 import sys
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -7,8 +8,87 @@ from fastapi.middleware.cors import CORSMiddleware
 project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.path.append(project_root)
 
+from src.db.mongo_client import get_mongo_client
+from src.db.mysql_client import get_mysql_client
+from src.utils.tracing import setup_tracing, shutdown_tracing
+from src.utils.logging_config import setup_logging, shutdown_logging
+from src.user.yunpian_service import sms_dispatcher
+from src.service.maintenance.jobs import MAINTENANCE_SCHEDULER_ENABLED, maintenance_db, maintenance_scheduler
+
+
+def _llm_clients():
+    """获取持有模型客户端的模块级实例，用于关闭时释放连接"""
+    from src.character.event import event_profile_generator, life_path_manager, llm_event_gen
+    from src.service.event import service as event_service_module
+    return [
+        event_profile_generator.generator,
+        life_path_manager.manager,
+        llm_event_gen.profile_generator,
+        llm_event_gen.lifepath_manager,
+        event_service_module.generator
+    ]
+
+
+def _shutdown_emotion_update():
+    """关闭时保存情绪事件去重快照，重启后不需要查表恢复去重状态，并关闭情绪更新使用的独立连接"""
+    from src.service.emotion.emotion_update_service import emotion_update_service
+    emotion_update_service.deduplicator.save_snapshot()
+    emotion_update_service.db.close_connection()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期管理
+
+    数据库和模型客户端均在首次使用时创建；启动时可通过DB_WARMUP_ON_STARTUP预先建立数据库连接，
+    连接失败只记录日志，不阻止服务启动。启动时开启后台短信发送队列和维护任务调度。
+    关闭时等待正在执行的维护任务和队列中的短信发送完成，保存情绪事件去重快照，释放所有已创建的连接，导出剩余的追踪数据并写出队列中的日志。
+    """
+    setup_logging()
+    setup_tracing()
+    await sms_dispatcher.start()
+
+    if os.getenv("DB_WARMUP_ON_STARTUP", "false").lower() == "true":
+        try:
+            get_mongo_client().get_database()
+        except Exception as e:
+            print(f"启动时连接MongoDB失败，将在首次使用时重试: {e}")
+        try:
+            mysql_client = get_mysql_client()
+            if not mysql_client.ping():
+                mysql_client.connect()
+        except Exception as e:
+            print(f"启动时连接MySQL失败，将在首次使用时重试: {e}")
+
+    if MAINTENANCE_SCHEDULER_ENABLED:
+        await maintenance_scheduler.start()
+
+    yield
+
+    await maintenance_scheduler.stop()
+    await sms_dispatcher.stop()
+    _shutdown_emotion_update()
+    for client in _llm_clients():
+        try:
+            await client.close()
+        except Exception as e:
+            print(f"关闭模型客户端失败: {e}")
+    get_mongo_client().close_connection()
+    get_mysql_client().close_connection()
+    maintenance_db.close_connection()
+    shutdown_tracing()
+    shutdown_logging()
+
+
 # 初始化FastAPI应用
-app = FastAPI(title="Soluna Character API", version="1.0")
+from src.api.responds.orjson_response import ORJSONApiResponse
+app = FastAPI(title="Soluna Character API", version="1.0", lifespan=lifespan,
+              default_response_class=ORJSONApiResponse)
+
+# 限流异常统一返回recode=429
+from src.utils.rate_limit import RateLimitExceeded
+from src.api.rate_limit.dependencies import rate_limit_exceeded_handler
+app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
 # 添加CORS中间件
 app.add_middleware(
@@ -19,6 +99,14 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 添加指标采集、链路追踪和请求ID中间件
+from src.api.metrics.middleware import PrometheusMiddleware
+from src.api.tracing.middleware import TracingMiddleware
+from src.api.request_id.middleware import RequestIdMiddleware
+app.add_middleware(PrometheusMiddleware)
+app.add_middleware(TracingMiddleware)
+app.add_middleware(RequestIdMiddleware)
+
 # 导入并注册路由
 from src.api.character.routes import router as character_router
 from src.api.event.routes import router as event_router
@@ -26,6 +114,8 @@ from src.api.user.routes import router as user_router
 from src.api.invited_code.routes import router as invite_code_router
 from src.api.interaction.routes import router as interaction_router
 from src.api.emotion.routes import router as emotion_router
+from src.api.metrics.routes import router as metrics_router
+from src.api.debug.routes import router as debug_router
 
 app.include_router(character_router)
 app.include_router(event_router)
@@ -33,6 +123,8 @@ app.include_router(user_router)
 app.include_router(invite_code_router)
 app.include_router(interaction_router)
 app.include_router(emotion_router)
+app.include_router(metrics_router)
+app.include_router(debug_router)
 
 # 根路由
 @app.get("/")
@@ -0,0 +1,65 @@
+import time
+
+from starlette.routing import Match
+
+from src.utils.metrics import HTTP_REQUESTS_IN_PROGRESS, observe_http_request
+
+# 不统计的路由，避免抓取请求本身影响指标
+EXCLUDED_ROUTES = {"/metrics"}
+
+
+def resolve_route(scope) -> str:
+    """将请求路径解析为路由模板，避免以原始路径作为标签导致指标数量无限增长"""
+    app = scope.get("app")
+    if app is None:
+        return "unmatched"
+    partial = None
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+        if match == Match.PARTIAL and partial is None:
+            partial = route.path
+    return partial or "unmatched"
+
+
+class PrometheusMiddleware:
+    """记录每个路由的请求数、耗时、并发数和错误数
+
+    以ASGI中间件实现，不会缓冲响应体，流式响应(SSE)的耗时统计到推送结束
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        route = resolve_route(scope)
+        if route in EXCLUDED_ROUTES:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+        error = None
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method=method, route=route)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            in_progress.dec()
+            observe_http_request(method, route, status_code, time.perf_counter() - start, error)
@@ -0,0 +1,19 @@
+import os
+import sys
+from fastapi import APIRouter
+from fastapi.responses import Response
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(project_root)
+
+from src.utils.metrics import render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus指标抓取接口"""
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
@@ -0,0 +1,31 @@
+from fastapi import Request
+
+from src.api.responds.base_response import ApiResponse
+from src.api.responds.orjson_response import ORJSONApiResponse
+from src.utils.rate_limit import RateLimitExceeded, check_rate_limit
+
+
+def rate_limit(name: str, limit: int, window_seconds: float):
+    """按客户端IP限流的FastAPI依赖
+
+    Args:
+        name: 限流规则名称
+        limit: 窗口内允许的最大请求数
+        window_seconds: 窗口长度(秒)
+
+    Returns:
+        可用于Depends的依赖函数
+    """
+    async def dependency(request: Request):
+        client_ip = request.client.host if request.client else "unknown"
+        check_rate_limit(name, client_ip, limit, window_seconds)
+
+    return dependency
+
+
+async def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded):
+    """将限流异常转换为统一的ApiResponse，并通过Retry-After告知客户端等待时间"""
+    return ORJSONApiResponse(
+        content=ApiResponse.error(recode=429, msg=str(exc)).model_dump(),
+        headers={"Retry-After": str(exc.retry_after)}
+    )
@@ -1,10 +1,13 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, PlainSerializer
 from typing import Any, Optional
+from typing_extensions import Annotated
+from src.utils.json_encoding import to_jsonable
 
 class ApiResponse(BaseModel):
     recode: int
     msg: str
-    data: Optional[Any] = None
+    # 序列化为JSON时由pydantic-core直接处理ObjectId和datetime，无需预先调用convert_object_id
+    data: Annotated[Optional[Any], PlainSerializer(to_jsonable, when_used="json")] = None
 
     def get(self, key: str, default: Any = None) -> Any:
         """安全地获取data字段中的值"""
@@ -0,0 +1,12 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from src.utils.json_encoding import dumps
+
+
+class ORJSONApiResponse(JSONResponse):
+    """使用orjson渲染的JSON响应，原生支持datetime，并将ObjectId转换为字符串"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,40 @@
+from opentelemetry import propagate, trace
+from opentelemetry.trace import Status, StatusCode
+
+from src.api.metrics.middleware import resolve_route
+from src.utils.tracing import TRACING_ENABLED, start_span
+
+
+class TracingMiddleware:
+    """为每个HTTP请求创建服务端span，支持从traceparent请求头继续上游链路，并在响应头中返回X-Trace-Id"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not TRACING_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope.get("headers", [])}
+        route = resolve_route(scope)
+        attributes = {
+            "http.method": scope["method"],
+            "http.route": route,
+            "http.target": scope["path"],
+        }
+
+        with start_span(f"{scope['method']} {route}", attributes, kind=trace.SpanKind.SERVER,
+                        context=propagate.extract(headers)) as span:
+            trace_id = format(span.get_span_context().trace_id, "032x").encode()
+
+            async def send_wrapper(message):
+                if message["type"] == "http.response.start":
+                    status_code = message["status"]
+                    span.set_attribute("http.status_code", status_code)
+                    if status_code >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                    message["headers"] = list(message.get("headers", [])) + [(b"x-trace-id", trace_id)]
+                await send(message)
+
+            await self.app(scope, receive, send_wrapper)
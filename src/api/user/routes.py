@@ -4,6 +4,8 @@ from fastapi import APIRouter, Depends, Request
 from src.api.models.user import SendVerificationCodeRequest, LoginRequest, AutoLoginRequest, LogoutRequest, UserInfoRequest
 from src.api.responds.base_response import ApiResponse
 from src.service.user.service import user_service
+from src.user.yunpian_service import SmsQueueUnavailable
+from src.utils.rate_limit import RateLimitExceeded
 
 # 将项目根目录添加到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
@@ -17,13 +19,18 @@ async def send_verification_code(fastapi_request: Request, request: SendVerifica
     try:
         # 获取客户端IP地址
         client_ip = fastapi_request.client.host if fastapi_request.client else "unknown"
-        # 调用服务层发送验证码
+        # 调用服务层发送验证码，短信加入后台队列发送，不在请求中等待
+        # 数据库连接是进程内共享的，不是线程安全的，不放到线程池中执行
         result = user_service.send_verification_code(request.phone_number, client_ip)
         
         if result:
             return ApiResponse.success(data="", msg="验证码发送成功")
         else:
             return ApiResponse.error(recode=500, msg="验证码发送失败")
+    except RateLimitExceeded as e:
+        return ApiResponse.error(recode=429, msg=str(e))
+    except SmsQueueUnavailable as e:
+        return ApiResponse.error(recode=503, msg=str(e))
     except Exception as e:
         print(f"发送验证码时发生错误: {str(e)}")
         return ApiResponse.error(recode=500, msg="验证码发送失败")
@@ -74,7 +81,6 @@ async def logout(request: LogoutRequest):
         return ApiResponse.success(msg="登出成功")
 
 
-
 @router.post("/info", response_model=ApiResponse)
 async def get_user_info(request: UserInfoRequest):
     """获取用户信息"""
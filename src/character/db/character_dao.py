@@ -1,13 +1,29 @@
 import time
+import logging
 from src.db.mongo_client import mongo_client
 from src.character.model.character import Character
+from src.utils.tracing import traced_class
+from src.utils.logging_config import log_sampled
 
+logger = logging.getLogger(__name__)
+
+@traced_class()
 class CharacterDAO:
     def __init__(self):
-        # 获取数据库连接
-        self.db = mongo_client.get_database()
-        # 获取角色集合
-        self.characters_collection = self.db['characters']
+        # 数据库连接在首次访问集合时建立
+        self._db = None
+
+    @property
+    def db(self):
+        """获取数据库连接"""
+        if self._db is None:
+            self._db = mongo_client.get_database()
+        return self._db
+
+    @property
+    def characters_collection(self):
+        """获取角色集合"""
+        return self.db['characters']
 
     def save_character(self, character):
         """保存角色到MongoDB
@@ -37,7 +53,7 @@ class CharacterDAO:
                     {'character_id': character_dict.get('character_id')},
                     {'$set': character_dict}
                 )
-                print(f"更新角色成功: {character_dict.get('name')}")
+                log_sampled(logger, logging.INFO, "character.update", "更新角色成功: %s", character_dict.get('name'))
                 return character_dict.get('character_id')
             else:
                 # 对于新角色，如果没有设置created_at，则设置为当前时间
@@ -48,10 +64,10 @@ class CharacterDAO:
                 
                 # 插入新角色
                 result = self.characters_collection.insert_one(character_dict)
-                print(f"插入角色成功: {character_dict.get('name')}")
+                log_sampled(logger, logging.INFO, "character.insert", "插入角色成功: %s", character_dict.get('name'))
                 return character_dict.get('character_id')
         except Exception as e:
-            print(f"保存角色失败: {e}")
+            logger.error("保存角色失败: %s", e)
             raise
 
     def get_character_by_id(self, character_id):
@@ -72,7 +88,7 @@ class CharacterDAO:
                 return Character(**character_dict)
             return None
         except Exception as e:
-            print(f"获取角色失败: {e}")
+            logger.error("获取角色失败: %s", e)
             raise
 
     def get_all_characters(self, limit: int=10, offset: int=0, first_letter: str = "*"):
@@ -106,7 +122,26 @@ class CharacterDAO:
                 'total': total
             }
         except Exception as e:
-            print(f"获取所有角色失败: {e}")
+            logger.error("获取所有角色失败: %s", e)
+            raise
+
+    def get_personality_traits(self, character_ids):
+        """批量获取角色的大五人格和情绪波动类型
+
+        Args:
+            character_ids: 角色ID列表
+
+        Returns:
+            dict: 以角色ID为键，值包含big5和mood_swings
+        """
+        try:
+            cursor = self.characters_collection.find(
+                {'character_id': {'$in': list(character_ids)}},
+                {'_id': 0, 'character_id': 1, 'big5': 1, 'mood_swings': 1}
+            )
+            return {doc['character_id']: doc for doc in cursor}
+        except Exception as e:
+            logger.error("获取角色人格特质失败: %s", e)
             raise
 
     def delete_character(self, character_id):
@@ -120,10 +155,10 @@ class CharacterDAO:
         """
         try:
             result = self.characters_collection.delete_one({'character_id': character_id})
-            print(f"删除角色成功: {character_id}")
+            logger.info("删除角色成功: %s", character_id)
             return result.deleted_count > 0
         except Exception as e:
-            print(f"删除角色失败: {e}")
+            logger.error("删除角色失败: %s", e)
             return False
 
 # 创建DAO实例
@@ -142,6 +177,10 @@ def get_character_by_id(character_id):
     """根据ID获取角色的便捷函数"""
     return dao.get_character_by_id(character_id)
 
+def get_personality_traits(character_ids):
+    """批量获取角色人格特质的便捷函数"""
+    return dao.get_personality_traits(character_ids)
+
 def delete_character(character_id):
     """删除角色的便捷函数"""
     return dao.delete_character(character_id)
\ No newline at end of file
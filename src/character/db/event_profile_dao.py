@@ -1,15 +1,96 @@
 from src.character.model.event_profile import EventProfile, Event
 from src.db.mongo_client import mongo_client
 import os
+import logging
 from src.character.utils import convert_object_id
-from pymongo import UpdateOne
+from src.utils.tracing import traced_class
+from src.utils.logging_config import log_sampled
+from src.character.db.life_path_dao import LifePathDAO, sort_events_by_time
 
+logger = logging.getLogger(__name__)
+
+# 读取事件配置时生活轨迹的加载方式
+LIFE_PATH_FULL = 'full'      # 完整生活轨迹
+LIFE_PATH_NONE = 'none'      # 只返回配置本身
+LIFE_PATH_LATEST = 'latest'  # 最近的N个事件
+LIFE_PATH_RANGE = 'range'    # 指定时间范围内的事件
+LIFE_PATH_VIEWS = (LIFE_PATH_FULL, LIFE_PATH_NONE, LIFE_PATH_LATEST, LIFE_PATH_RANGE)
+
+# 不加载完整生活轨迹时排除未迁移的life_path数组
+PROFILE_HEADER_PROJECTION = {'life_path': 0}
+
+@traced_class()
 class EventProfileDAO:
     def __init__(self):
-        # 获取数据库连接
-        self.db = mongo_client.get_database()
-        # 获取事件配置集合
-        self.event_profiles_collection = self.db['event_profiles']
+        # 数据库连接在首次访问集合时建立
+        self._db = None
+        # 生活轨迹事件按月份分桶单独存储，不再写入事件配置文档
+        self.life_path_dao = LifePathDAO()
+
+    @property
+    def db(self):
+        """获取数据库连接"""
+        if self._db is None:
+            self._db = mongo_client.get_database()
+        return self._db
+
+    @property
+    def event_profiles_collection(self):
+        """获取事件配置集合"""
+        return self.db['event_profiles']
+
+    @staticmethod
+    def _event_to_dict(event):
+        if isinstance(event, dict):
+            return event
+        return event.to_dict() if hasattr(event, 'to_dict') else event.__dict__
+
+    @staticmethod
+    def _profile_projection(life_path):
+        """完整加载时需要读取未迁移的life_path数组，其余方式只读取配置本身"""
+        if life_path not in LIFE_PATH_VIEWS:
+            raise ValueError(f"不支持的生活轨迹加载方式: {life_path}")
+        return None if life_path == LIFE_PATH_FULL else PROFILE_HEADER_PROJECTION
+
+    def _attach_life_paths(self, profiles, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
+        """按加载方式为事件配置附加生活轨迹
+
+        Args:
+            profiles: 事件配置列表，life_path为full以外的方式时应已排除life_path字段
+            life_path: 加载方式，full/none/latest/range
+            limit: latest方式下返回的事件数量
+            start_time: range方式下的开始时间
+            end_time: range方式下的结束时间
+
+        Returns:
+            list: 附加了life_path的事件配置列表，none方式下不包含life_path字段
+        """
+        if not profiles or life_path == LIFE_PATH_NONE:
+            return profiles
+
+        profile_ids = [profile['id'] for profile in profiles]
+        if life_path == LIFE_PATH_LATEST:
+            for profile in profiles:
+                profile['life_path'] = self.life_path_dao.get_latest_events(profile['id'], limit or 0)
+        elif life_path == LIFE_PATH_RANGE:
+            events_by_profile = {profile_id: [] for profile_id in profile_ids}
+            for event in self.life_path_dao.get_events_in_range(start_time, end_time, profile_ids=profile_ids):
+                event.pop('character_id', None)
+                events_by_profile.setdefault(event.pop('profile_id', None), []).append(event)
+            for profile in profiles:
+                profile['life_path'] = events_by_profile.get(profile['id'], [])
+        else:
+            # 合并分桶中的事件和尚未迁移的life_path数组中的事件
+            bucket_events = self.life_path_dao.get_events_by_profile_ids(profile_ids)
+            for profile in profiles:
+                events = bucket_events.get(profile['id'], [])
+                legacy_events = profile.get('life_path') or []
+                profile['life_path'] = sort_events_by_time(legacy_events + events) if legacy_events else events
+        return profiles
+
+    def _find_profiles(self, query, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
+        profiles = list(self.event_profiles_collection.find(query, self._profile_projection(life_path)))
+        return self._attach_life_paths(profiles, life_path, limit, start_time, end_time)
 
     def save_event_profile(self, event_profile):
         """保存事件配置到MongoDB
@@ -28,15 +109,11 @@ class EventProfileDAO:
                 # 尝试调用to_dict方法，否则使用__dict__
                 event_profile_dict = event_profile.to_dict() if hasattr(event_profile, 'to_dict') else event_profile.__dict__
 
-            # 转换嵌套的Event对象为字典
-            if 'life_path' in event_profile_dict and event_profile_dict['life_path']:
-                event_profile_dict['life_path'] = [
-                    event.to_dict() if hasattr(event, 'to_dict') else (event.__dict__ if not isinstance(event, dict) else event)
-                    for event in event_profile_dict['life_path']
-                ]
-
+            # 生活轨迹单独写入分桶集合，事件配置文档中只保留配置本身
+            event_profile_dict = dict(event_profile_dict)
+            life_path = event_profile_dict.pop('life_path', None)
+            life_path_dicts = convert_object_id([self._event_to_dict(event) for event in life_path]) if life_path is not None else None
 
-            
             event_profile_dict = convert_object_id(event_profile_dict)
 
             # 检查是否已存在此事件配置
@@ -44,70 +121,87 @@ class EventProfileDAO:
 
             if existing_profile:
                 # 更新现有事件配置
+                event_profile_dict.pop('_id', None)
                 result = self.event_profiles_collection.update_one(
                     {'id': event_profile_dict.get('id')},
                     {'$set': event_profile_dict}
                 )
-                print(f"更新事件配置成功: {event_profile_dict.get('id')}")
+                if life_path_dicts is not None:
+                    self.life_path_dao.replace_events(event_profile_dict.get('id'), event_profile_dict.get('character_id'), life_path_dicts)
+                    # 传入的生活轨迹已写入分桶，再删除尚未迁移的life_path数组；只更新配置时保留该数组
+                    self.event_profiles_collection.update_one(
+                        {'id': event_profile_dict.get('id')},
+                        {'$unset': {'life_path': ''}}
+                    )
+                log_sampled(logger, logging.INFO, "event_profile.update", "更新事件配置成功: %s", event_profile_dict.get('id'))
                 return event_profile_dict.get('id')
             else:
                 # 插入新事件配置
                 result = self.event_profiles_collection.insert_one(event_profile_dict)
-                print(f"插入事件配置成功: {event_profile_dict.get('id')}")
+                if life_path_dicts:
+                    self.life_path_dao.add_events(event_profile_dict.get('id'), event_profile_dict.get('character_id'), life_path_dicts)
+                log_sampled(logger, logging.INFO, "event_profile.insert", "插入事件配置成功: %s", event_profile_dict.get('id'))
                 return event_profile_dict.get('id')
         except Exception as e:
-            print(f"保存事件配置失败: {e}")
+            logger.error("保存事件配置失败: %s", e)
             raise
 
-    def get_event_profile_by_id(self, profile_id):
+    def get_event_profile_by_id(self, profile_id, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
         """根据ID获取事件配置
 
         Args:
             profile_id: 事件配置ID
+            life_path: 生活轨迹加载方式，full(默认)/none/latest/range
+            limit: latest方式下返回的事件数量
+            start_time: range方式下的开始时间
+            end_time: range方式下的结束时间
 
         Returns:
             dict: 事件配置数据
         """
         try:
-            return self.event_profiles_collection.find_one({'id': profile_id})
+            profiles = self._find_profiles({'id': profile_id}, life_path, limit, start_time, end_time)
+            return profiles[0] if profiles else None
         except Exception as e:
-            print(f"获取事件配置失败: {e}")
+            logger.error("获取事件配置失败: %s", e)
             raise
 
-    def get_event_profiles_by_character_id(self, character_id):
+    def get_event_profiles_by_character_id(self, character_id, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
         """根据角色ID获取事件配置
 
         Args:
             character_id: 角色ID
+            life_path: 生活轨迹加载方式，参数同get_event_profile_by_id
 
         Returns:
             list: 事件配置列表
         """
         try:
-            return list(self.event_profiles_collection.find({'character_id': character_id}))
+            return self._find_profiles({'character_id': character_id}, life_path, limit, start_time, end_time)
         except Exception as e:
-            print(f"获取事件配置列表失败: {e}")
+            logger.error("获取事件配置列表失败: %s", e)
             raise
 
-    def get_event_profiles_by_character_ids(self, character_ids):
+    def get_event_profiles_by_character_ids(self, character_ids, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
         """根据角色ID数组批量获取事件配置
 
         Args:
             character_ids: 角色ID数组
+            life_path: 生活轨迹加载方式，参数同get_event_profile_by_id
 
         Returns:
             dict: 以角色ID为键、事件配置列表为值的字典
         """
         try:
             # 使用$in操作符进行批量查询
-            profiles = list(self.event_profiles_collection.find({'character_id': {'$in': character_ids}}))
+            profiles = self._find_profiles({'character_id': {'$in': character_ids}}, life_path, limit, start_time, end_time)
             # 按角色ID分组
             result = {character_id: [] for character_id in character_ids}
             for profile in profiles:
                 result[profile['character_id']].append(profile)
             return result
         except Exception as e:
-            print(f"批量获取事件配置列表失败: {e}")
+            logger.error("批量获取事件配置列表失败: %s", e)
             raise
 
     def delete_event_profile_by_character_id(self, character_id):
@@ -120,11 +214,13 @@ class EventProfileDAO:
             bool: 是否删除成功
         """
         try:
+            profile_ids = [profile['id'] for profile in self.event_profiles_collection.find({"character_id": character_id}, {'id': 1})]
+            self.life_path_dao.delete_events_by_profile_ids(profile_ids)
             result = self.event_profiles_collection.delete_many({"character_id": character_id})
-            print(f"删除角色 {character_id} 的事件配置成功，共删除 {result.deleted_count} 条记录")
+            logger.info("删除角色 %s 的事件配置成功，共删除 %s 条记录", character_id, result.deleted_count)
             return result.deleted_count > 0
         except Exception as e:
-            print(f"删除事件配置失败: {e}")
+            logger.error("删除事件配置失败: %s", e)
             return False
 
     def get_event_profile_by_event_id(self, event_id):
@@ -137,9 +233,15 @@ class EventProfileDAO:
             dict: 事件配置数据
         """
         try:
-            return self.event_profiles_collection.find_one({'life_path.event_id': event_id})
+            profile_id = self.life_path_dao.find_profile_id_by_event_id(event_id)
+            if profile_id:
+                return self.get_event_profile_by_id(profile_id)
+            profile = self.event_profiles_collection.find_one({'life_path.event_id': event_id})
+            if profile:
+                self._attach_life_paths([profile])
+            return profile
         except Exception as e:
-            print(f"根据事件ID获取事件配置失败: {e}")
+            logger.error("根据事件ID获取事件配置失败: %s", e)
             raise
 
     def delete_event_profile(self, profile_id):
@@ -153,14 +255,15 @@ class EventProfileDAO:
         """
         try:
             result = self.event_profiles_collection.delete_one({'id': profile_id})
+            self.life_path_dao.delete_events_by_profile_ids([profile_id])
             success = result.deleted_count > 0
             if success:
-                print(f"删除事件配置成功: {profile_id}")
+                logger.info("删除事件配置成功: %s", profile_id)
             else:
-                print(f"未找到要删除的事件配置: {profile_id}")
+                logger.warning("未找到要删除的事件配置: %s", profile_id)
             return success
         except Exception as e:
-            print(f"删除事件配置失败: {e}")
+            logger.error("删除事件配置失败: %s", e)
             raise
 
     def add_event_to_profile(self, profile_id, event):
@@ -174,19 +277,18 @@ class EventProfileDAO:
             bool: 是否添加成功
         """
         try:
-            event_dict = event.to_dict() if hasattr(event, 'to_dict') else event.__dict__
-            result = self.event_profiles_collection.update_one(
-                {'id': profile_id},
-                {'$push': {'life_path': event_dict}}
-            )
-            success = result.modified_count > 0
+            event_dict = self._event_to_dict(event)
+            profile = self.event_profiles_collection.find_one({'id': profile_id}, {'character_id': 1})
+            success = profile is not None
+            if success:
+                self.life_path_dao.add_events(profile_id, profile.get('character_id'), [event_dict])
             if success:
-                print(f"向事件配置添加事件成功: {event_dict.get('event_id')}")
+                log_sampled(logger, logging.INFO, "event_profile.add_event", "向事件配置添加事件成功: %s", event_dict.get('event_id'))
             else:
-                print(f"添加事件失败，未找到事件配置: {profile_id}")
+                logger.warning("添加事件失败，未找到事件配置: %s", profile_id)
             return success
         except Exception as e:
-            print(f"添加事件失败: {e}")
+            logger.error("添加事件失败: %s", e)
             raise
 
     def remove_event_from_profile(self, profile_id, event_id):
@@ -200,18 +302,21 @@ class EventProfileDAO:
             bool: 是否移除成功
         """
         try:
-            result = self.event_profiles_collection.update_one(
-                {'id': profile_id},
-                {'$pull': {'life_path': {'event_id': event_id}}}
-            )
-            success = result.modified_count > 0
+            success = self.life_path_dao.remove_event(profile_id, event_id)
+            if not success:
+                # 尚未迁移到分桶的事件仍保存在事件配置文档中
+                result = self.event_profiles_collection.update_one(
+                    {'id': profile_id},
+                    {'$pull': {'life_path': {'event_id': event_id}}}
+                )
+                success = result.modified_count > 0
             if success:
-                print(f"从事件配置移除事件成功: {event_id}")
+                logger.info("从事件配置移除事件成功: %s", event_id)
             else:
-                print(f"移除事件失败，未找到事件或事件配置")
+                logger.warning("移除事件失败，未找到事件或事件配置")
             return success
         except Exception as e:
-            print(f"移除事件失败: {e}")
+            logger.error("移除事件失败: %s", e)
             raise
 
     def batch_add_events_to_profiles(self, profile_events_map):
@@ -228,42 +333,32 @@ class EventProfileDAO:
             failed_count = 0
             failed_profiles = []
             
-            # 准备批量更新操作
-            bulk_operations = []
-            for profile_id, events in profile_events_map.items():
-                if events:
-                    # 转换事件对象为字典
-                    event_dicts = []
-                    for event in events:
-                        event_dict = event.to_dict() if hasattr(event, 'to_dict') else event.__dict__
-                        event_dicts.append(event_dict)
-                    
-                    # 添加批量更新操作
-                    bulk_operations.append(
-                        UpdateOne(
-                            {'id': profile_id},
-                            {'$push': {'life_path': {'$each': event_dicts}}}
-                        )
-                    )
-            
-            # 执行批量更新
-            if bulk_operations:
-                result = self.event_profiles_collection.bulk_write(bulk_operations)
-                success_count = result.modified_count
-                failed_count = len(bulk_operations) - success_count
-                
-                if failed_count > 0:
-                    # 收集失败的配置ID（在实际应用中可能需要更精确的错误处理）
-                    failed_profiles = [op['update_one']['filter']['id'] for op in bulk_operations]
-            
-            print(f"批量添加事件完成: 成功{success_count}个配置, 失败{failed_count}个配置")
+            profile_ids = [profile_id for profile_id, events in profile_events_map.items() if events]
+            if profile_ids:
+                # 一次查询获取所有事件配置对应的角色ID，不存在的配置计为失败
+                character_ids = {
+                    profile['id']: profile.get('character_id')
+                    for profile in self.event_profiles_collection.find({'id': {'$in': profile_ids}}, {'id': 1, 'character_id': 1})
+                }
+                failed_profiles = [profile_id for profile_id in profile_ids if profile_id not in character_ids]
+
+                profile_events = {
+                    profile_id: (character_ids[profile_id], [self._event_to_dict(event) for event in profile_events_map[profile_id]])
+                    for profile_id in profile_ids if profile_id in character_ids
+                }
+                # 按事件配置和月份分桶批量写入
+                self.life_path_dao.add_events_bulk(profile_events)
+                success_count = len(profile_events)
+                failed_count = len(failed_profiles)
+
+            logger.info("批量添加事件完成: 成功%s个配置, 失败%s个配置", success_count, failed_count)
             return {
                 'success_count': success_count,
                 'failed_count': failed_count,
                 'failed_profiles': failed_profiles
             }
         except Exception as e:
-            print(f"批量添加事件失败: {e}")
+            logger.error("批量添加事件失败: %s", e)
             raise
 
 # 创建DAO实例
@@ -273,13 +368,13 @@ def save_event_profile(event_profile):
     """保存事件配置的便捷函数"""
     return DAO.save_event_profile(event_profile)
 
-def get_event_profile_by_id(profile_id):
+def get_event_profile_by_id(profile_id, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
     """根据ID获取事件配置的便捷函数"""
-    return DAO.get_event_profile_by_id(profile_id)
+    return DAO.get_event_profile_by_id(profile_id, life_path, limit, start_time, end_time)
 
-def get_event_profiles_by_character_id(character_id):
+def get_event_profiles_by_character_id(character_id, life_path=LIFE_PATH_FULL, limit=None, start_time=None, end_time=None):
     """根据角色ID获取事件配置的便捷函数"""
-    return DAO.get_event_profiles_by_character_id(character_id)
+    return DAO.get_event_profiles_by_character_id(character_id, life_path, limit, start_time, end_time)
 
 def delete_event_profile(profile_id):
     """删除事件配置的便捷函数"""
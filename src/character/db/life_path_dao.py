@@ -1,174 +1,442 @@
 from datetime import datetime
-from typing import List, Dict, Any
-from src.character.db.event_profile_dao import EventProfileDAO
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+from pymongo import UpdateOne, ASCENDING, DESCENDING
 from src.db.mongo_client import mongo_client
+from src.utils.tracing import traced_class
 
+# 无法解析开始时间的事件统一放入该分桶
+UNKNOWN_MONTH = "unknown"
+
+# 情绪计算只需要的事件字段
+PAD_EVENT_FIELDS = ('event_id', 'event_type', 'start_time', 'pleasure_score', 'arousal_score', 'dominance_score')
+
+# 支持的时间字符串格式
+TIME_FORMATS = [
+    '%Y-%m-%dT%H:%M:%S.%fZ',      # ISO 8601格式 (UTC)
+    '%Y-%m-%dT%H:%M:%S.%f%z',    # ISO 8601格式 (带时区)
+    '%Y-%m-%dT%H:%M:%S%z',       # ISO 8601格式 (无毫秒)
+    '%Y-%m-%dT%H:%M:%S.%f',      # ISO 8601格式 (带微秒，无时区)
+    '%Y-%m-%dT%H:%M:%S',         # ISO 8601格式 (无时区)
+    '%Y-%m-%d %H:%M:%S',         # 标准格式
+    '%Y-%m-%d %H:%M',            # 无秒格式
+    '%Y/%m/%d %H:%M:%S',         # 斜杠分隔格式
+    '%Y/%m/%d %H:%M',            # 斜杠分隔无秒格式
+    '%d/%m/%Y %H:%M:%S',         # 欧洲格式
+    '%d/%m/%Y %H:%M',            # 欧洲格式无秒
+    '%Y-%m-%d',                  # 仅日期
+]
+
+
+def parse_time_string(time_str: str) -> datetime:
+    """
+    解析时间字符串，支持多种格式
+
+    Args:
+        time_str: 时间字符串
+
+    Returns:
+        datetime: 解析后的datetime对象
+
+    Raises:
+        ValueError: 当无法解析时间字符串时
+    """
+    # 首先尝试标准格式
+    for fmt in TIME_FORMATS:
+        try:
+            return datetime.strptime(time_str, fmt)
+        except ValueError:
+            continue
+
+    # 如果标准格式都失败，尝试使用dateutil作为后备
+    try:
+        from dateutil.parser import parse
+        return parse(time_str)
+    except Exception:
+        raise ValueError(f"无法解析时间字符串: {time_str}")
+
+
+def parse_event_time(value) -> Optional[datetime]:
+    """解析事件中的时间字段，支持datetime、字符串和Unix时间戳（秒或毫秒），无法解析时返回None"""
+    try:
+        if isinstance(value, datetime):
+            return value
+        if isinstance(value, str):
+            return parse_time_string(value)
+        if isinstance(value, int) and not isinstance(value, bool):
+            if value > 1000000000000:  # 毫秒
+                return datetime.fromtimestamp(value / 1000)
+            return datetime.fromtimestamp(value)
+    except (ValueError, TypeError, OverflowError, OSError):
+        pass
+    return None
+
+
+def event_month(event: Dict[str, Any]) -> str:
+    """获取事件所属的月份分桶，格式为YYYY-MM"""
+    start_time = parse_event_time(event.get('start_time'))
+    return start_time.strftime('%Y-%m') if start_time else UNKNOWN_MONTH
+
+
+def months_between(start_time: datetime, end_time: datetime) -> List[str]:
+    """获取时间范围覆盖的所有月份分桶"""
+    months = []
+    year, month = start_time.year, start_time.month
+    while (year, month) <= (end_time.year, end_time.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def sort_events_by_time(events: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """按开始时间排序事件，无法解析时间的事件排在最后"""
+    def sort_key(event):
+        start_time = parse_event_time(event.get('start_time'))
+        if start_time is None:
+            return (1, datetime.min)
+        return (0, start_time.replace(tzinfo=None))
+    return sorted(events, key=sort_key)
+
+
+def _time_in_range(moment: datetime, start_time: datetime, end_time: datetime) -> bool:
+    try:
+        # 直接比较时间，不进行时区处理
+        return start_time <= moment <= end_time
+    except TypeError:
+        return False
+
+
+def event_in_range(event: Dict[str, Any], start_time: datetime, end_time: datetime) -> bool:
+    """判断事件的开始时间是否在指定时间范围内，无法解析或无法比较时返回False"""
+    event_start_time = parse_event_time(event.get('start_time'))
+    if event_start_time is None:
+        return False
+    return _time_in_range(event_start_time, start_time, end_time)
+
+
+def bucket_id(profile_id: str, month: str) -> str:
+    return f"{profile_id}:{month}"
+
+
+@traced_class()
 class LifePathDAO:
-    """生活轨迹数据访问对象，负责从MongoDB中获取生活轨迹数据"""
-    
+    """生活轨迹数据访问对象
+
+    生活轨迹事件按"事件配置 + 月份"分桶存储在life_path_buckets集合中，每个分桶文档结构为:
+    {_id: "<profile_id>:<YYYY-MM>", profile_id, character_id, month, events: [...], count}
+    避免事件配置文档随事件数量无限增长，按时间范围读取时只访问相关月份的分桶。
+    尚未迁移的事件配置仍可能在event_profiles.life_path中保存事件，读取时会一并返回。
+    """
+
     def __init__(self):
         """初始化生活轨迹DAO"""
-        self.db = mongo_client.get_database()
-        self.event_profiles_collection = self.db['event_profiles']
-    
+        # 数据库连接在首次访问集合时建立
+        self._db = None
+        self._indexes_ensured = False
+
+    @property
+    def db(self):
+        """获取数据库连接"""
+        if self._db is None:
+            self._db = mongo_client.get_database()
+        return self._db
+
+    @property
+    def event_profiles_collection(self):
+        """获取事件配置集合"""
+        return self.db['event_profiles']
+
+    @property
+    def life_path_buckets_collection(self):
+        """获取生活轨迹分桶集合，首次访问时创建索引"""
+        collection = self.db['life_path_buckets']
+        if not self._indexes_ensured:
+            self.ensure_indexes(collection)
+        return collection
+
+    def ensure_indexes(self, collection=None):
+        """创建分桶集合的索引，重复调用无副作用"""
+        collection = collection if collection is not None else self.db['life_path_buckets']
+        try:
+            collection.create_index([('profile_id', ASCENDING), ('month', ASCENDING)])
+            collection.create_index([('character_id', ASCENDING), ('month', ASCENDING)])
+            collection.create_index([('month', ASCENDING)])
+            collection.create_index([('events.event_id', ASCENDING)])
+            self._indexes_ensured = True
+        except Exception as e:
+            print(f"创建生活轨迹分桶索引失败: {e}")
+
     def _parse_time_string(self, time_str: str) -> datetime:
+        """解析时间字符串，见parse_time_string"""
+        return parse_time_string(time_str)
+
+    @staticmethod
+    def _group_by_month(events: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        groups = {}
+        for event in events:
+            groups.setdefault(event_month(event), []).append(event)
+        return groups
+
+    @staticmethod
+    def _bucket_update(profile_id: str, character_id: str, month: str, events: List[Dict[str, Any]],
+                       deduplicate: bool = False) -> UpdateOne:
+        """构建向分桶追加事件的upsert操作，deduplicate为True时使用$addToSet，便于迁移脚本重复执行"""
+        if deduplicate:
+            update = {'$addToSet': {'events': {'$each': events}}}
+        else:
+            update = {'$push': {'events': {'$each': events}}, '$inc': {'count': len(events)}}
+        update['$setOnInsert'] = {'profile_id': profile_id, 'month': month}
+        update['$set'] = {'character_id': character_id}
+        return UpdateOne({'_id': bucket_id(profile_id, month)}, update, upsert=True)
+
+    def add_events_bulk(self, profile_events: Dict[str, tuple], deduplicate: bool = False) -> int:
+        """批量向多个事件配置追加事件
+
+        Args:
+            profile_events: 字典，键为事件配置ID，值为(角色ID, 事件字典列表)
+            deduplicate: 是否跳过分桶中已存在的相同事件
+
+        Returns:
+            int: 写入的分桶数量
         """
-        解析时间字符串，支持多种格式
-        
+        operations = []
+        for profile_id, (character_id, events) in profile_events.items():
+            for month, month_events in self._group_by_month(events).items():
+                operations.append(self._bucket_update(profile_id, character_id, month, month_events, deduplicate))
+        if not operations:
+            return 0
+        result = self.life_path_buckets_collection.bulk_write(operations, ordered=False)
+        return result.modified_count + result.upserted_count
+
+    def add_events(self, profile_id: str, character_id: str, events: List[Dict[str, Any]], deduplicate: bool = False) -> int:
+        """向事件配置追加事件，事件按开始时间写入对应月份的分桶
+
         Args:
-            time_str: 时间字符串
-            
+            profile_id: 事件配置ID
+            character_id: 角色ID
+            events: 事件字典列表
+            deduplicate: 是否跳过分桶中已存在的相同事件
+
         Returns:
-            datetime: 解析后的datetime对象
-            
-        Raises:
-            ValueError: 当无法解析时间字符串时
+            int: 写入的分桶数量
         """
-        formats = [
-            '%Y-%m-%dT%H:%M:%S.%fZ',      # ISO 8601格式 (UTC)
-            '%Y-%m-%dT%H:%M:%S.%f%z',    # ISO 8601格式 (带时区)
-            '%Y-%m-%dT%H:%M:%S%z',       # ISO 8601格式 (无毫秒)
-            '%Y-%m-%dT%H:%M:%S',         # ISO 8601格式 (无时区)
-            '%Y-%m-%d %H:%M:%S',         # 标准格式
-            '%Y-%m-%d %H:%M',            # 无秒格式
-            '%Y/%m/%d %H:%M:%S',         # 斜杠分隔格式
-            '%Y/%m/%d %H:%M',            # 斜杠分隔无秒格式
-            '%d/%m/%Y %H:%M:%S',         # 欧洲格式
-            '%d/%m/%Y %H:%M',            # 欧洲格式无秒
-            '%Y-%m-%d',                  # 仅日期
-        ]
-        
-        # 首先尝试标准格式
-        for fmt in formats:
-            try:
-                return datetime.strptime(time_str, fmt)
-            except ValueError:
-                continue
-        
-        # 如果标准格式都失败，尝试使用dateutil作为后备
-        try:
-            from dateutil.parser import parse
-            return parse(time_str)
-        except Exception:
-            raise ValueError(f"无法解析时间字符串: {time_str}")
-    
+        return self.add_events_bulk({profile_id: (character_id, events)}, deduplicate)
+
+    def replace_events(self, profile_id: str, character_id: str, events: List[Dict[str, Any]]) -> int:
+        """用给定事件替换事件配置的全部生活轨迹"""
+        self.delete_events_by_profile_ids([profile_id])
+        return self.add_events(profile_id, character_id, events)
+
+    def remove_event(self, profile_id: str, event_id: str) -> bool:
+        """从事件配置的分桶中移除事件
+
+        Returns:
+            bool: 是否找到并移除了事件
+        """
+        result = self.life_path_buckets_collection.update_one(
+            {'profile_id': profile_id, 'events.event_id': event_id},
+            {'$pull': {'events': {'event_id': event_id}}, '$inc': {'count': -1}}
+        )
+        return result.modified_count > 0
+
+    def delete_events_by_profile_ids(self, profile_ids: List[str]) -> int:
+        """删除事件配置的所有分桶
+
+        Returns:
+            int: 删除的分桶数量
+        """
+        if not profile_ids:
+            return 0
+        result = self.life_path_buckets_collection.delete_many({'profile_id': {'$in': list(profile_ids)}})
+        return result.deleted_count
+
+    def find_profile_id_by_event_id(self, event_id: str) -> Optional[str]:
+        """根据事件ID查找所属的事件配置ID"""
+        bucket = self.life_path_buckets_collection.find_one({'events.event_id': event_id}, {'profile_id': 1})
+        return bucket['profile_id'] if bucket else None
+
+    def get_events_by_profile_ids(self, profile_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """获取事件配置的全部分桶事件，按开始时间排序
+
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 以事件配置ID为键，事件列表为值的字典
+        """
+        result = {profile_id: [] for profile_id in profile_ids}
+        if not profile_ids:
+            return result
+        buckets = self.life_path_buckets_collection.find(
+            {'profile_id': {'$in': list(profile_ids)}},
+            {'profile_id': 1, 'events': 1}
+        ).sort('month', ASCENDING)
+        for bucket in buckets:
+            result.setdefault(bucket['profile_id'], []).extend(bucket.get('events', []))
+        return {profile_id: sort_events_by_time(events) for profile_id, events in result.items()}
+
+    def get_events_in_range(self, start_time: datetime, end_time: datetime,
+                            profile_ids: Optional[List[str]] = None,
+                            character_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """获取指定时间范围内的事件，只读取范围覆盖的月份分桶
+
+        Args:
+            start_time: 开始时间
+            end_time: 结束时间
+            profile_ids: 限定的事件配置ID列表，不传时不限
+            character_ids: 限定的角色ID列表，不传时不限
+
+        Returns:
+            List[Dict[str, Any]]: 按开始时间排序的事件列表，每个事件包含character_id和profile_id
+        """
+        query = {'month': {'$in': months_between(start_time, end_time)}}
+        if profile_ids is not None:
+            query['profile_id'] = {'$in': list(profile_ids)}
+        if character_ids is not None:
+            query['character_id'] = {'$in': list(character_ids)}
+
+        events = []
+        for bucket in self.life_path_buckets_collection.find(query, {'profile_id': 1, 'character_id': 1, 'events': 1}):
+            for event in bucket.get('events', []):
+                if event_in_range(event, start_time, end_time):
+                    event_with_character = dict(event)
+                    event_with_character['character_id'] = bucket.get('character_id')
+                    event_with_character['profile_id'] = bucket['profile_id']
+                    events.append(event_with_character)
+
+        events.extend(self._get_legacy_events_in_range(start_time, end_time, profile_ids, character_ids))
+        return sort_events_by_time(events)
+
+    def iter_pad_events(self, start_time: datetime, end_time: datetime,
+                        character_ids: Optional[List[str]] = None) -> Iterator[Tuple[str, Dict[str, Any], datetime]]:
+        """遍历指定时间范围内的事件，只读取情绪计算需要的字段，用于批量情绪计算
+
+        只从数据库读取事件ID、类型、时间和PAD评分字段，事件文档直接来自查询结果，不复制事件字典，
+        也不补充character_id等字段
+
+        Yields:
+            tuple: (角色ID, 事件文档, 解析后的开始时间)
+        """
+        query = {'month': {'$in': months_between(start_time, end_time)}}
+        if character_ids is not None:
+            query['character_id'] = {'$in': list(character_ids)}
+        projection = {'character_id': 1}
+        projection.update({f'events.{field}': 1 for field in PAD_EVENT_FIELDS})
+        for bucket in self.life_path_buckets_collection.find(query, projection):
+            character_id = bucket.get('character_id')
+            for event in bucket.get('events', []):
+                event_start_time = parse_event_time(event.get('start_time'))
+                if event_start_time is not None and _time_in_range(event_start_time, start_time, end_time):
+                    yield character_id, event, event_start_time
+
+        legacy_query = {'life_path.0': {'$exists': True}}
+        if character_ids is not None:
+            legacy_query['character_id'] = {'$in': list(character_ids)}
+        legacy_projection = {'character_id': 1}
+        legacy_projection.update({f'life_path.{field}': 1 for field in PAD_EVENT_FIELDS})
+        for profile in self.event_profiles_collection.find(legacy_query, legacy_projection):
+            character_id = profile.get('character_id')
+            for event in profile.get('life_path', []):
+                event_start_time = parse_event_time(event.get('start_time'))
+                if event_start_time is not None and _time_in_range(event_start_time, start_time, end_time):
+                    yield character_id, event, event_start_time
+
+    def get_event_window(self, start_time: datetime, end_time: datetime,
+                         character_ids: Optional[List[str]] = None):
+        """获取指定时间范围内事件的列式窗口，用于批量情绪计算
+
+        Returns:
+            EventWindow: 按列保存角色下标、开始时间和PAD评分的事件窗口
+        """
+        # NumPy只在情绪计算时使用，延迟导入以免拖慢API启动
+        from src.emotion.model.event_window import EventWindowBuilder
+
+        builder = EventWindowBuilder()
+        for character_id, event, event_start_time in self.iter_pad_events(start_time, end_time, character_ids):
+            builder.add(character_id, event, event_start_time)
+        return builder.build()
+
+    def get_latest_events(self, profile_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """获取事件配置中开始时间最晚的limit个事件，从最近的月份分桶向前读取
+
+        Returns:
+            List[Dict[str, Any]]: 按开始时间升序排列的事件列表
+        """
+        if limit <= 0:
+            return []
+        events = []
+        buckets = self.life_path_buckets_collection.find(
+            {'profile_id': profile_id, 'month': {'$ne': UNKNOWN_MONTH}},
+            {'events': 1}
+        ).sort('month', DESCENDING)
+        for bucket in buckets:
+            events.extend(bucket.get('events', []))
+            if len(events) >= limit:
+                break
+
+        # 未迁移的life_path数组按追加顺序保存，只取末尾的limit个
+        legacy_profile = self.event_profiles_collection.find_one({'id': profile_id}, {'life_path': {'$slice': -limit}})
+        if legacy_profile:
+            events.extend(legacy_profile.get('life_path') or [])
+
+        dated_events = [event for event in events if parse_event_time(event.get('start_time'))]
+        return sort_events_by_time(dated_events)[-limit:]
+
+    def _get_legacy_events_in_range(self, start_time: datetime, end_time: datetime,
+                                    profile_ids: Optional[List[str]] = None,
+                                    character_ids: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """读取尚未迁移到分桶的event_profiles.life_path中的事件"""
+        query = {'life_path.0': {'$exists': True}}
+        if profile_ids is not None:
+            query['id'] = {'$in': list(profile_ids)}
+        if character_ids is not None:
+            query['character_id'] = {'$in': list(character_ids)}
+
+        events = []
+        for profile in self.event_profiles_collection.find(query, {'id': 1, 'character_id': 1, 'life_path': 1}):
+            for event in profile.get('life_path', []):
+                if event_in_range(event, start_time, end_time):
+                    event_with_character = dict(event)
+                    event_with_character['character_id'] = profile.get('character_id')
+                    event_with_character['profile_id'] = profile.get('id')
+                    events.append(event_with_character)
+        return events
+
     def get_life_paths_by_time_range(self, start_time: datetime, end_time: datetime) -> List[Dict[str, Any]]:
         """
         获取指定时间范围内的所有生活轨迹事件
-        
+
         Args:
             start_time: 开始时间
             end_time: 结束时间
-            
+
         Returns:
             List[Dict[str, Any]]: 包含角色ID和事件信息的生活轨迹列表
         """
         try:
-            # 创建EventProfileDAO实例
-            event_profile_dao = EventProfileDAO()
-            
-            # 查询所有事件配置
-            profiles = list(event_profile_dao.event_profiles_collection.find({}))
-            
-            # 提取生活轨迹事件
-            events = []
-            for profile in profiles:
-                character_id = profile.get('character_id')
-                life_path = profile.get('life_path', [])
-                
-                # 筛选在指定时间范围内的事件
-                for event in life_path:
-                    event_start_time = event.get('start_time')
-                    if event_start_time:
-                        # 处理多种时间格式
-                            try:
-                                if isinstance(event_start_time, str):
-                                    # 使用多种格式尝试解析时间字符串
-                                    event_start_time = self._parse_time_string(event_start_time)
-                                elif isinstance(event_start_time, int):
-                                    # 处理Unix时间戳（毫秒或秒）
-                                    if event_start_time > 1000000000000:  # 毫秒
-                                        event_start_time = datetime.fromtimestamp(event_start_time / 1000)
-                                    else:  # 秒
-                                        event_start_time = datetime.fromtimestamp(event_start_time)
-                                elif not isinstance(event_start_time, datetime):
-                                    # 其他格式，跳过
-                                    continue
-                                
-                                # 直接比较时间，不进行时区处理
-                                if start_time <= event_start_time <= end_time:
-                                    # 添加角色ID到事件中
-                                    event_with_character = dict(event)
-                                    event_with_character['character_id'] = character_id
-                                    events.append(event_with_character)
-                            except (ValueError, TypeError) as e:
-                                # 处理时间解析错误，跳过无效格式
-                                continue
-            
-            return events
-            
+            return self.get_events_in_range(start_time, end_time)
         except Exception as e:
             print(f"获取生活轨迹失败: {e}")
             return []
-    
-    def get_life_paths_by_character_and_time_range(self, character_ids: List[str], 
+
+    def get_life_paths_by_character_and_time_range(self, character_ids: List[str],
                                                    start_time: datetime, end_time: datetime) -> Dict[str, List[Dict[str, Any]]]:
         """
         获取指定角色在指定时间范围内的生活轨迹事件
-        
+
         Args:
             character_ids: 角色ID列表
             start_time: 开始时间
             end_time: 结束时间
-            
+
         Returns:
             Dict[str, List[Dict[str, Any]]]: 以角色ID为键，事件列表为值的字典
         """
         try:
-            # 创建EventProfileDAO实例
-            event_profile_dao = EventProfileDAO()
-            
-            # 获取指定角色的事件配置
-            profiles = event_profile_dao.get_event_profiles_by_character_ids(character_ids)
-            
-            # 构建结果字典
             result = {character_id: [] for character_id in character_ids}
-            
-            for character_id, profile_list in profiles.items():
-                for profile in profile_list:
-                    life_path = profile.get('life_path', [])
-                    
-                    # 筛选在指定时间范围内的事件
-                    filtered_events = []
-                    for event in life_path:
-                        event_start_time = event.get('start_time')
-                        if event_start_time:
-                            # 处理多种时间格式
-                            try:
-                                if isinstance(event_start_time, str):
-                                    # 使用自定义的时间解析方法
-                                    event_start_time = self._parse_time_string(event_start_time)
-                                elif isinstance(event_start_time, int):
-                                    # 处理Unix时间戳（毫秒或秒）
-                                    if event_start_time > 1000000000000:  # 毫秒
-                                        event_start_time = datetime.fromtimestamp(event_start_time / 1000)
-                                    else:  # 秒
-                                        event_start_time = datetime.fromtimestamp(event_start_time)
-                                elif not isinstance(event_start_time, datetime):
-                                    # 其他格式，跳过
-                                    continue
-                                
-                                # 直接比较时间，不进行时区处理
-                                if start_time <= event_start_time <= end_time:
-                                    filtered_events.append(event)
-                            except (ValueError, TypeError) as e:
-                                # 处理时间解析错误，跳过无效格式
-                                continue
-                    
-                    result[character_id].extend(filtered_events)
-            
+            for event in self.get_events_in_range(start_time, end_time, character_ids=character_ids):
+                character_id = event.pop('character_id', None)
+                event.pop('profile_id', None)
+                if character_id in result:
+                    result[character_id].append(event)
             return result
-            
+
         except Exception as e:
             print(f"获取角色生活轨迹失败: {e}")
             return {character_id: [] for character_id in character_ids}
@@ -180,8 +448,16 @@ def get_life_paths_by_time_range(start_time: datetime, end_time: datetime) -> Li
     """获取指定时间范围内的所有生活轨迹事件的便捷函数"""
     return DAO.get_life_paths_by_time_range(start_time, end_time)
 
-def get_life_paths_by_character_and_time_range(character_ids: List[str], 
-                                             start_time: datetime, 
+def get_life_paths_by_character_and_time_range(character_ids: List[str],
+                                             start_time: datetime,
                                              end_time: datetime) -> Dict[str, List[Dict[str, Any]]]:
     """获取指定角色在指定时间范围内的生活轨迹事件的便捷函数"""
-    return DAO.get_life_paths_by_character_and_time_range(character_ids, start_time, end_time)
\ No newline at end of file
+    return DAO.get_life_paths_by_character_and_time_range(character_ids, start_time, end_time)
+
+def get_event_window_by_time_range(start_time: datetime, end_time: datetime):
+    """获取指定时间范围内事件列式窗口的便捷函数"""
+    return DAO.get_event_window(start_time, end_time)
+
+def get_latest_life_path_events(profile_id: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """获取事件配置最近limit个生活轨迹事件的便捷函数"""
+    return DAO.get_latest_events(profile_id, limit)
@@ -4,18 +4,17 @@ import uuid
 from datetime import datetime, timedelta
 from bson import ObjectId
 from src.character.utils import convert_object_id
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.conditions import MaxMessageTermination
-from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from src.character.model.event_profile import EventProfile, Event
 from src.character.db.character_dao import get_character_by_id
 from src.character.db.event_profile_dao import (
     save_event_profile,
     get_event_profiles_by_character_id,
     get_event_profile_by_id,
-    delete_event_profile
+    delete_event_profile,
+    LIFE_PATH_NONE
 )
+from src.utils.structured_output import StructuredOutputError, extract_json_from_messages, validate_fields
+from src.utils.llm_telemetry import record_llm_parse_failure, track_llm_call
 from dotenv import load_dotenv
 from .prompts import (
     GENERATOR_SYSTEM_MESSAGE_TEMPLATE,
@@ -24,6 +23,15 @@ from .prompts import (
 
 load_dotenv()
 
+# 事件配置的内容字段
+EVENT_PROFILE_FIELDS = ('current_stage', 'next_trend', 'event_triggers', 'life_path')
+
+
+def _validate_event_profile_data(data):
+    """校验事件配置JSON：至少包含一个配置字段，避免误用审查意见等其他JSON"""
+    return validate_fields(data, any_of_fields=EVENT_PROFILE_FIELDS)
+
+
 class EventProfileLLMGenerator:
     """事件配置生成器类，负责为角色生成详细的事件配置(EventProfile)
 
@@ -32,27 +40,42 @@ class EventProfileLLMGenerator:
     def __init__(self):
         """初始化事件配置生成器
 
-        设置模型客户端、初始化agent和团队
+        初始化agent，模型客户端延迟创建和团队
         """
-        # 初始化模型客户端
-        self.model_client = OpenAIChatCompletionClient(
-            model="qwen-plus",
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("BASE_URL"),
-            model_info={
-                "vision": False,
-                "function_calling": False,
-                "json_output": True,
-                "family": "qwen",
-                "structured_output": True
-            }
-        )
+        # 模型客户端在首次使用时创建，避免导入模块时就初始化
+        self._model_client = None
         # 初始化两个agent
         self.generator_agent = None
         self.reviewer_agent = None
         # 创建团队
         self.team = None
 
+    @property
+    def model_client(self):
+        """获取模型客户端，首次访问时创建"""
+        if self._model_client is None:
+            # autogen导入较慢，在首次创建客户端时才导入
+            from autogen_ext.models.openai import OpenAIChatCompletionClient
+            self._model_client = OpenAIChatCompletionClient(
+                model="qwen-plus",
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("BASE_URL"),
+                model_info={
+                    "vision": False,
+                    "function_calling": False,
+                    "json_output": True,
+                    "family": "qwen",
+                    "structured_output": True
+                }
+            )
+        return self._model_client
+
+    async def close(self):
+        """关闭模型客户端"""
+        if self._model_client is not None:
+            await self._model_client.close()
+            self._model_client = None
+
     def _create_generator_agent(self, character_info):
         """创建用于生成事件配置字段的agent
 
@@ -64,6 +87,7 @@ class EventProfileLLMGenerator:
         Returns:
             AssistantAgent: 事件配置生成agent实例
         """
+        from autogen_agentchat.agents import AssistantAgent
         # 生成系统消息
         system_message = GENERATOR_SYSTEM_MESSAGE_TEMPLATE.format(character_info=character_info)
 
@@ -84,6 +108,7 @@ class EventProfileLLMGenerator:
         Returns:
             AssistantAgent: 事件配置审查agent实例
         """
+        from autogen_agentchat.agents import AssistantAgent
         system_message = REVIEWER_SYSTEM_MESSAGE.format(character_info=character_info)
 
         return AssistantAgent(
@@ -108,6 +133,8 @@ class EventProfileLLMGenerator:
         Raises:
             ValueError: 当角色不存在或无法解析生成结果时抛出
         """
+        from autogen_agentchat.conditions import MaxMessageTermination
+        from autogen_agentchat.teams import RoundRobinGroupChat
         # 获取角色信息
         character = get_character_by_id(character_id)
         if not character:
@@ -136,43 +163,21 @@ class EventProfileLLMGenerator:
             initial_task += " 请确保所有字段内容都使用中文输出。"
 
         # 运行团队生成事件配置
-        result = await self.team.run(task=initial_task)
-
-        # 解析结果中的JSON
-        event_profile_data = None
-        original_result = result
-        result_message = None
-        
-        # 查找EventProfileGenerator的消息
-        if original_result and hasattr(original_result, 'messages') and original_result.messages:
-            for message in original_result.messages:
-                if hasattr(message, 'source') and message.source == 'EventProfileGenerator':
-                    result_message = message
-                    break
-            # 如果没找到，使用最后一条消息
-            if not result_message:
-                result_message = original_result.messages[-1]
-        
-        # 从找到的消息中提取JSON
-        if result_message and hasattr(result_message, 'content') and result_message.content:
-            if isinstance(result_message.content, str) and '{' in result_message.content:
-                try:
-                    # 提取JSON部分
-                    start_idx = result_message.content.find('{')
-                    end_idx = result_message.content.rfind('}') + 1
-                    json_str = result_message.content[start_idx:end_idx]
-                    event_profile_data = json.loads(json_str)
-                except json.JSONDecodeError:
-                    pass
-
-        # 错误处理和日志记录
-        error_message = None
-        if not event_profile_data:
-            if result_message and hasattr(result_message, 'content'):
-                error_message = f"无法从EventProfileGenerator的响应中解析出有效的JSON。响应内容: {str(result_message.content)[:200]}..."
-            else:
-                error_message = "未收到EventProfileGenerator的有效响应"
-            raise ValueError(error_message)
+        with track_llm_call("event_profile") as call:
+            result = await self.team.run(task=initial_task)
+            call.record_result(result)
+
+        # 解析结果中的JSON，优先使用EventProfileGenerator的输出
+        try:
+            event_profile_data = extract_json_from_messages(
+                result.messages if result else [],
+                preferred_source='EventProfileGenerator',
+                expected_type=dict,
+                validator=_validate_event_profile_data
+            )
+        except StructuredOutputError as e:
+            record_llm_parse_failure("event_profile")
+            raise ValueError(f"无法从EventProfileGenerator的响应中解析出有效的JSON: {e}")
 
         # 创建EventProfile对象
         event_profile = EventProfile(character_id=character_id)
@@ -262,7 +267,7 @@ class EventProfileLLMGenerator:
             ValueError: 当角色不存在时抛出
         """
         # 检查是否已存在事件配置
-        existing_profiles = get_event_profiles_by_character_id(character_id)
+        existing_profiles = get_event_profiles_by_character_id(character_id, life_path=LIFE_PATH_NONE)
         if existing_profiles and len(existing_profiles) > 0:
             print(f"角色{character_id}已存在事件配置，返回第一个配置ID")
             return str(existing_profiles[0])
@@ -288,6 +293,8 @@ class EventProfileLLMGenerator:
         Raises:
             ValueError: 当事件配置不存在、角色不存在或无法解析更新结果时抛出
         """
+        from autogen_agentchat.conditions import MaxMessageTermination
+        from autogen_agentchat.teams import RoundRobinGroupChat
         # 获取现有的事件配置
         existing_profile = get_event_profile_by_id(profile_id)
         if not existing_profile:
@@ -317,23 +324,21 @@ class EventProfileLLMGenerator:
         update_task = f"请根据以下更新需求修改事件配置：\n{json.dumps(updates, ensure_ascii=False)}\n\n当前事件配置：\n{json.dumps(existing_profile_dict, ensure_ascii=False)}"
 
         # 运行团队更新事件配置
-        result = await self.team.run(task=update_task)
-
-        # 解析结果中的JSON
-        updated_profile_data = None
-        for message in result.messages:
-            if message.content and isinstance(message.content, str) and '{' in message.content:
-                try:
-                    start_idx = message.content.find('{')
-                    end_idx = message.content.rfind('}') + 1
-                    json_str = message.content[start_idx:end_idx]
-                    updated_profile_data = json.loads(json_str)
-                    break
-                except json.JSONDecodeError:
-                    pass
-
-        if not updated_profile_data:
-            raise ValueError("无法从更新结果中解析出有效的EventProfile JSON")
+        with track_llm_call("event_profile_update") as call:
+            result = await self.team.run(task=update_task)
+            call.record_result(result)
+
+        # 解析结果中的JSON，任务消息中的当前配置不参与解析
+        try:
+            updated_profile_data = extract_json_from_messages(
+                result.messages,
+                preferred_source='EventProfileGenerator',
+                expected_type=dict,
+                validator=_validate_event_profile_data
+            )
+        except StructuredOutputError as e:
+            record_llm_parse_failure("event_profile_update")
+            raise ValueError(f"无法从更新结果中解析出有效的EventProfile JSON: {e}")
 
         # 创建更新后的EventProfile对象
         event_profile = EventProfile(character_id=existing_profile['character_id'])
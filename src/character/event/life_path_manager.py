@@ -1,30 +1,45 @@
 import os
 import json
 import uuid
-import re
 from datetime import datetime, timedelta
 from bson import ObjectId
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_agentchat.conditions import MaxMessageTermination
-from autogen_agentchat.agents import AssistantAgent
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from src.character.model.event_profile import EventProfile, Event
 from src.character.db.character_dao import get_character_by_id
 from src.character.db.event_profile_dao import (
     get_event_profile_by_id,
+    LIFE_PATH_NONE,
+    LIFE_PATH_LATEST,
     add_event_to_profile,
     remove_event_from_profile,
     batch_add_events_to_profiles
 )
+from src.character.db.life_path_dao import DAO as life_path_dao, event_in_range
 from src.character.utils import convert_object_id
+from src.utils.structured_output import StructuredOutputError, extract_json, extract_json_from_messages
+from src.utils.llm_telemetry import record_llm_parse_failure, record_llm_retry, track_llm_call
 from dotenv import load_dotenv
 from .prompts import (
     DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE,
-    LIFE_PATH_REVIEWER_SYSTEM_MESSAGE
+    LIFE_PATH_REVIEWER_SYSTEM_MESSAGE,
+    BATCH_DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE
 )
 
 load_dotenv()
 
+
+def _validate_events_data(data) -> list:
+    """将事件JSON规范化为事件字典列表，单个事件对象会被包装为列表
+
+    Raises:
+        StructuredOutputError: 当没有任何包含描述的事件时抛出
+    """
+    events = [data] if isinstance(data, dict) else data
+    events = [event for event in events if isinstance(event, dict) and event.get('description')]
+    if not events:
+        raise StructuredOutputError("响应中没有包含描述的事件数据")
+    return events
+
+
 class LifePathManager:
     """生活轨迹管理器类，负责为角色的事件配置添加和管理生活轨迹事件
 
@@ -33,24 +48,41 @@ class LifePathManager:
     def __init__(self):
         """初始化生活轨迹管理器
 
-        设置模型客户端、初始化agent
+        初始化agent，模型客户端延迟创建
         """
-        # 初始化模型客户端
-        self.model_client = OpenAIChatCompletionClient(
-            model="qwen-plus",
-            api_key=os.getenv("OPENAI_API_KEY"),
-            base_url=os.getenv("BASE_URL"),
-            model_info={
-                "vision": False,
-                "function_calling": False,
-                "json_output": True,
-                "family": "qwen",
-                "structured_output": True
-            }
-        )
+        # 模型客户端在首次使用时创建，避免导入模块时就初始化
+        self._model_client = None
         # 初始化agents
         self.daily_event_agent = None
         self.daily_event_reviewer_agent = None
+        # 批量模式下每次请求打包的角色数量
+        self.batch_size = int(os.getenv("LIFE_PATH_BATCH_SIZE", "5"))
+
+    @property
+    def model_client(self):
+        """获取模型客户端，首次访问时创建"""
+        if self._model_client is None:
+            # autogen导入较慢，在首次创建客户端时才导入
+            from autogen_ext.models.openai import OpenAIChatCompletionClient
+            self._model_client = OpenAIChatCompletionClient(
+                model="qwen-plus",
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("BASE_URL"),
+                model_info={
+                    "vision": False,
+                    "function_calling": False,
+                    "json_output": True,
+                    "family": "qwen",
+                    "structured_output": True
+                }
+            )
+        return self._model_client
+
+    async def close(self):
+        """关闭模型客户端"""
+        if self._model_client is not None:
+            await self._model_client.close()
+            self._model_client = None
 
     def _create_daily_event_generator_agent(self, character_info, existing_profile, start_time, end_time, max_events, existing_events_info=""):
         """创建用于生成日常事件的agent
@@ -68,6 +100,7 @@ class LifePathManager:
         Returns:
             AssistantAgent: 日常事件生成agent实例
         """
+        from autogen_agentchat.agents import AssistantAgent
         system_message = DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE.format(
             character_info=character_info,
             existing_profile=existing_profile,
@@ -95,6 +128,7 @@ class LifePathManager:
         Returns:
             AssistantAgent: 生活轨迹审查agent实例
         """
+        from autogen_agentchat.agents import AssistantAgent
         # 生成系统消息
         system_message = LIFE_PATH_REVIEWER_SYSTEM_MESSAGE.format(
             character_info=character_info,
@@ -146,6 +180,104 @@ class LifePathManager:
 
         return success_count > 0  # 如果至少添加成功一个事件，则返回True
 
+    async def add_events_to_life_paths_batch(self, profile_ids: list, start_time: str, end_time: str, max_events: int = 3, batch_size: int = None) -> dict:
+        """批量向多个事件配置的life_path添加事件
+
+        将每batch_size个角色的精简摘要打包进一次LLM请求，要求模型以character_id为键返回各角色的事件，
+        再按角色拆分结果。对于缺失或未通过校验的角色，回退到单角色生成(add_event_to_life_path)
+
+        Args:
+            profile_ids: 事件配置ID列表
+            start_time: 事件开始时间 (格式: YYYY-MM-DD)
+            end_time: 事件结束时间 (格式: YYYY-MM-DD)
+            max_events: 每个角色的最大事件数量 (默认: 3)
+            batch_size: 每次请求打包的角色数量，默认使用LIFE_PATH_BATCH_SIZE环境变量
+
+        Returns:
+            dict: 以事件配置ID为键、是否添加成功为值的字典
+        """
+        batch_size = max(1, batch_size or self.batch_size)
+        results = {}
+
+        for i in range(0, len(profile_ids), batch_size):
+            chunk = profile_ids[i:i + batch_size]
+            results.update(await self._add_events_for_profile_chunk(chunk, start_time, end_time, max_events))
+
+        return results
+
+    async def _add_events_for_profile_chunk(self, profile_ids: list, start_time: str, end_time: str, max_events: int) -> dict:
+        """为一组事件配置发起一次批量生成请求并写入结果
+
+        Args:
+            profile_ids: 本批次的事件配置ID列表
+            start_time: 事件开始时间 (格式: YYYY-MM-DD)
+            end_time: 事件结束时间 (格式: YYYY-MM-DD)
+            max_events: 每个角色的最大事件数量
+
+        Returns:
+            dict: 以事件配置ID为键、是否添加成功为值的字典
+        """
+        results = {}
+        # 角色ID -> 事件配置ID
+        character_profile_map = {}
+        digests = []
+
+        for profile_id in profile_ids:
+            try:
+                profile = self._validate_and_get_profile(profile_id)
+                existing_events = self._filter_and_sort_existing_events(profile, start_time, end_time)
+                digest = self._build_character_digest(profile, existing_events)
+                character_profile_map[digest['character_id']] = profile_id
+                digests.append(digest)
+            except Exception as e:
+                print(f"准备事件配置{profile_id}的批量生成上下文失败: {e}")
+                results[profile_id] = False
+
+        if not digests:
+            return results
+
+        # 一次请求生成本批次所有角色的事件
+        try:
+            batch_events = await self._generate_batch_events_with_agents(digests, start_time, end_time, max_events)
+        except Exception as e:
+            print(f"批量生成事件失败，将回退到单角色生成: {e}")
+            batch_events = {}
+
+        # 按角色拆分并校验结果
+        profile_events_map = {}
+        fallback_profile_ids = []
+        for character_id, profile_id in character_profile_map.items():
+            events_json = self._validate_batch_events(batch_events.get(character_id), start_time, end_time)
+            if events_json:
+                profile_events_map[profile_id] = self._build_events_from_json(events_json, max_events)
+            else:
+                fallback_profile_ids.append(profile_id)
+
+        # 一次bulk_write写入所有通过校验的角色事件
+        if profile_events_map:
+            try:
+                write_result = batch_add_events_to_profiles(profile_events_map)
+                failed_profiles = set(write_result.get('failed_profiles', []))
+                for profile_id in profile_events_map:
+                    results[profile_id] = profile_id not in failed_profiles
+            except Exception as e:
+                print(f"批量写入事件失败: {e}")
+                for profile_id in profile_events_map:
+                    results[profile_id] = False
+
+        # 未通过校验的角色回退到单角色生成
+        if fallback_profile_ids:
+            print(f"批量结果中{len(fallback_profile_ids)}个角色未通过校验，回退到单角色生成")
+            record_llm_retry("daily_life_path_batch", len(fallback_profile_ids))
+        for profile_id in fallback_profile_ids:
+            try:
+                results[profile_id] = await self.add_event_to_life_path(profile_id, start_time, end_time, max_events)
+            except Exception as e:
+                print(f"事件配置{profile_id}单角色生成失败: {e}")
+                results[profile_id] = False
+
+        return results
+
     def _validate_and_get_profile(self, profile_id: str) -> dict:
         """验证并获取事件配置
 
@@ -159,7 +291,8 @@ class LifePathManager:
             ValueError: 当事件配置不存在时抛出
             TypeError: 当事件配置类型不正确时抛出
         """
-        profile = get_event_profile_by_id(profile_id)
+        # 已有事件按日期范围单独读取，这里不加载完整的生活轨迹
+        profile = get_event_profile_by_id(profile_id, life_path=LIFE_PATH_NONE)
         if not profile:
             raise ValueError(f"未找到事件配置ID为{profile_id}的配置")
 
@@ -185,27 +318,23 @@ class LifePathManager:
         Returns:
             list: 筛选并排序后的事件列表
         """
-        existing_events = []
-        if 'life_path' in profile and profile['life_path']:
-            start_date = datetime.strptime(start_time, "%Y-%m-%d")
-            end_date = datetime.strptime(end_time, "%Y-%m-%d")
-            for event_dict in profile['life_path']:
-                # 解析事件开始时间
-                if 'start_time' in event_dict:
-                    try:
-                        # 确保start_time是字符串类型
-                        start_time_str = event_dict['start_time']
-                        if not isinstance(start_time_str, str):
-                            start_time_str = str(start_time_str)
-                        event_start = datetime.fromisoformat(start_time_str)
-                        # 检查事件是否在指定日期范围内
-                        if start_date.date() <= event_start.date() <= end_date.date():
-                            existing_events.append(event_dict)
-                    except ValueError:
-                        pass
+        start_date = datetime.strptime(start_time, "%Y-%m-%d")
+        # 结束日期当天的事件也包含在内
+        end_date = datetime.strptime(end_time, "%Y-%m-%d") + timedelta(days=1) - timedelta(microseconds=1)
+
+        if profile.get('life_path'):
+            # 调用方已加载完整生活轨迹时直接在内存中筛选
+            existing_events = [event for event in profile['life_path']
+                               if event_in_range(event, start_date, end_date)]
+        else:
+            # 只读取日期范围覆盖的月份分桶
+            existing_events = life_path_dao.get_events_in_range(start_date, end_date, profile_ids=[profile['id']])
+            for event in existing_events:
+                event.pop('character_id', None)
+                event.pop('profile_id', None)
 
         # 按时间顺序排序已有事件
-        existing_events.sort(key=lambda x: x.get('start_time', ''))
+        existing_events.sort(key=lambda x: str(x.get('start_time', '')))
         return existing_events
 
     def _prepare_agent_context(self, profile: dict, existing_events: list) -> tuple:
@@ -261,6 +390,8 @@ class LifePathManager:
         Raises:
             ValueError: 当无法解析生成结果时抛出
         """
+        from autogen_agentchat.conditions import MaxMessageTermination
+        from autogen_agentchat.teams import RoundRobinGroupChat
         # 初始化日常事件生成agent和审查agent
         self.daily_event_agent = self._create_daily_event_generator_agent(
             character_info, existing_profile, start_time, end_time, max_events, existing_events_info
@@ -275,96 +406,196 @@ class LifePathManager:
             [self.daily_event_agent, self.daily_event_reviewer_agent],
             termination_condition=MaxMessageTermination(3)
         )
-        result = await team.run(task=task)
-
-        # 获取DailyEventGenerator的回复
-        original_result = result
-        result = None
-        if original_result and hasattr(original_result, 'messages') and original_result.messages:
-            # 查找DailyEventGenerator的消息
-            for message in original_result.messages:
-                if hasattr(message, 'source') and message.source == 'DailyEventGenerator':
-                    result = message
+        with track_llm_call("daily_life_path") as call:
+            result = await team.run(task=task)
+            call.record_result(result)
+
+        # 解析结果中的事件数据列表，优先使用DailyEventGenerator的输出
+        try:
+            return extract_json_from_messages(
+                result.messages if result else [],
+                preferred_source='DailyEventGenerator',
+                expected_type=(list, dict),
+                validator=_validate_events_data
+            )
+        except StructuredOutputError as e:
+            print(f"解析事件数据失败: {e}")
+            record_llm_parse_failure("daily_life_path")
+            raise ValueError(f"无法从生成结果中解析出有效的事件数据: {e}")
+
+    def _build_character_digest(self, profile: dict, existing_events: list) -> dict:
+        """构建用于批量生成的角色精简摘要
+
+        只保留影响日常事件生成的字段，避免把完整角色信息和整个life_path塞进批量请求
+
+        Args:
+            profile: 事件配置字典
+            existing_events: 指定日期范围内的已有事件列表
+
+        Returns:
+            dict: 角色摘要字典
+
+        Raises:
+            ValueError: 当角色不存在时抛出
+        """
+        character = get_character_by_id(profile['character_id'])
+        if not character:
+            raise ValueError(f"未找到角色ID为{profile['character_id']}的角色")
+
+        return {
+            'character_id': profile['character_id'],
+            'name': character.name,
+            'age': character.age,
+            'gender': character.gender,
+            'occupation': character.occupation,
+            'mbti_type': character.mbti_type,
+            'personality': character.personality,
+            'hobbies': character.hobbies,
+            'mood': character.mood,
+            'mood_swings': character.mood_swings,
+            'daily_routine': character.daily_routine,
+            'current_stage': profile.get('current_stage', ''),
+            'next_trend': profile.get('next_trend', ''),
+            'existing_events': [
+                {
+                    'start_time': str(event.get('start_time', '')),
+                    'description': event.get('description', '')
+                }
+                for event in existing_events
+            ]
+        }
+
+    async def _generate_batch_events_with_agents(self, digests: list, start_time: str, end_time: str, max_events: int) -> dict:
+        """使用单个agent为多个角色批量生成事件
+
+        Args:
+            digests: 角色摘要列表
+            start_time: 事件开始时间
+            end_time: 事件结束时间
+            max_events: 每个角色的最大事件数量
+
+        Returns:
+            dict: 以角色ID为键、事件JSON列表为值的字典
+
+        Raises:
+            ValueError: 当未收到有效响应时抛出
+        """
+        from autogen_agentchat.agents import AssistantAgent
+        from autogen_agentchat.conditions import MaxMessageTermination
+        from autogen_agentchat.teams import RoundRobinGroupChat
+        system_message = BATCH_DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE.format(
+            character_digests=json.dumps(digests, ensure_ascii=False, default=str),
+            start_time=start_time,
+            end_time=end_time,
+            max_events=max_events
+        )
+        batch_event_agent = AssistantAgent(
+            "BatchDailyEventGenerator",
+            model_client=self.model_client,
+            system_message=system_message
+        )
+
+        task = f"请在{start_time} 00:00:00至{end_time} 23:59:59期间为摘要中的{len(digests)}个角色分别生成0至{max_events}条合理的日常事件。"
+
+        # 批量模式只运行生成agent，未通过校验的角色由单角色流程兜底
+        team = RoundRobinGroupChat(
+            [batch_event_agent],
+            termination_condition=MaxMessageTermination(2)
+        )
+        with track_llm_call("daily_life_path_batch") as call:
+            result = await team.run(task=task)
+            call.record_result(result)
+
+        content = None
+        if result and hasattr(result, 'messages') and result.messages:
+            for message in result.messages:
+                if hasattr(message, 'source') and message.source == 'BatchDailyEventGenerator':
+                    content = message.content
                     break
-            # 如果没找到，使用最后一条消息
-            if not result:
-                result = original_result.messages[-1]
-        else:
-            result = None
 
-        # 解析结果中的事件数据列表
-        events_json = None
-        error_message = None
+        if not content or not isinstance(content, str):
+            raise ValueError("未收到批量事件生成agent的有效响应")
 
-        if result and hasattr(result, 'content') and result.content:
-            # 尝试提取JSON内容
-            try:
-                # 寻找JSON开始和结束位置
-                if '[' in result.content and ']' in result.content:
-                    start_idx = result.content.find('[')
-                    end_idx = result.content.rfind(']') + 1
-                    json_str = result.content[start_idx:end_idx]
-                    events_json = json.loads(json_str)
-                    # 验证是否为列表
-                    if not isinstance(events_json, list):
-                        error_message = "解析结果不是有效的列表"
-                        events_json = None
-                elif '{' in result.content and '}' in result.content:
-                    start_idx = result.content.find('{')
-                    end_idx = result.content.rfind('}') + 1
-                    json_str = result.content[start_idx:end_idx]
-                    single_event = json.loads(json_str)
-                    events_json = [single_event]
-                else:
-                    # 尝试直接解析整个content
-                    try:
-                        events_json = json.loads(result.content)
-                        if not isinstance(events_json, list):
-                            events_json = [events_json]
-                    except json.JSONDecodeError:
-                        error_message = "响应中未找到有效的JSON数据"
-            except json.JSONDecodeError as e:
-                error_message = f"解析JSON失败: {str(e)}"
-            except Exception as e:
-                error_message = f"处理响应时发生错误: {str(e)}"
-        else:
-            error_message = "未收到agent的有效响应"
+        return self._split_batch_result(content, [digest['character_id'] for digest in digests])
 
-        # 确保events_json始终是列表
-        events_json = events_json if isinstance(events_json, list) else []
+    def _split_batch_result(self, content: str, character_ids: list) -> dict:
+        """将批量生成的响应按角色拆分
 
-        # 如果解析失败，打印错误信息并抛出异常
-        if not events_json:
-            print(f"解析事件数据失败: {error_message}")
-            # 尝试从result.content中提取可能的JSON（更加宽松的方式）
-            if result and hasattr(result, 'content') and result.content:
-                try:
-                    # 移除所有非JSON字符
-                    json_str = re.search(r'\{.*\}|\[.*\]', result.content, re.DOTALL)
-                    if json_str:
-                        events_json = json.loads(json_str.group())
-                        if not isinstance(events_json, list):
-                            events_json = [events_json]
-                except Exception as e:
-                    pass
-            if not events_json:
-                raise ValueError(f"无法从生成结果中解析出有效的事件数据: {error_message}")
+        支持以character_id为键的对象，以及形如[{"character_id": ..., "events": [...]}]的列表
 
-        return events_json
+        Args:
+            content: agent响应内容
+            character_ids: 本批次的角色ID列表
 
-    async def _process_and_add_events(self, profile_id: str, events_json: list, max_events: int) -> int:
-        """处理并添加生成的事件
+        Returns:
+            dict: 以角色ID为键、事件数据为值的字典，仅包含本批次内的角色
+        """
+        try:
+            parsed = extract_json(content, expected_type=(dict, list))
+        except StructuredOutputError as e:
+            print(f"批量事件结果解析失败: {e}")
+            record_llm_parse_failure("daily_life_path_batch")
+            return {}
+
+        split_result = {}
+        if isinstance(parsed, dict):
+            for key, value in parsed.items():
+                split_result[str(key).strip()] = value
+        elif isinstance(parsed, list):
+            for item in parsed:
+                if isinstance(item, dict) and item.get('character_id'):
+                    split_result[str(item['character_id']).strip()] = item.get('events')
+
+        # 丢弃不属于本批次的键，避免把事件写到错误的角色上
+        return {character_id: split_result[character_id] for character_id in character_ids if character_id in split_result}
+
+    def _validate_batch_events(self, events, start_time: str, end_time: str) -> list:
+        """校验批量结果中单个角色的事件列表
+
+        Args:
+            events: 单个角色的事件数据
+            start_time: 事件开始时间 (格式: YYYY-MM-DD)
+            end_time: 事件结束时间 (格式: YYYY-MM-DD)
+
+        Returns:
+            list: 通过校验的事件列表，如果没有有效事件则返回空列表
+        """
+        if isinstance(events, dict):
+            events = [events]
+        if not isinstance(events, list):
+            return []
+
+        start_date = datetime.strptime(start_time, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end_time, "%Y-%m-%d").date()
+
+        valid_events = []
+        for event_json in events:
+            if not isinstance(event_json, dict) or not event_json.get('description'):
+                continue
+            event_start = event_json.get('start_time')
+            if not isinstance(event_start, str):
+                continue
+            try:
+                event_start_date = datetime.fromisoformat(event_start).date()
+            except ValueError:
+                continue
+            if start_date <= event_start_date <= end_date:
+                valid_events.append(event_json)
+
+        return valid_events
+
+    def _build_events_from_json(self, events_json: list, max_events: int) -> list:
+        """将生成的事件JSON列表转换为Event对象列表
 
         Args:
-            profile_id: 事件配置ID
             events_json: 事件JSON列表
             max_events: 最大事件数量
 
         Returns:
-            int: 成功添加的事件数量
+            list: Event对象列表
         """
-        events_to_add = []
-        
+        events = []
+
         for event_json in events_json[:max_events]:  # 确保不超过最大事件数
             # 确保event_id存在
             if 'event_id' not in event_json:
@@ -423,7 +654,22 @@ class LifePathManager:
                 dependencies=event_json.get('dependencies', [])
             )
             
-            events_to_add.append(event)
+            events.append(event)
+
+        return events
+
+    async def _process_and_add_events(self, profile_id: str, events_json: list, max_events: int) -> int:
+        """处理并添加生成的事件
+
+        Args:
+            profile_id: 事件配置ID
+            events_json: 事件JSON列表
+            max_events: 最大事件数量
+
+        Returns:
+            int: 成功添加的事件数量
+        """
+        events_to_add = self._build_events_from_json(events_json, max_events)
         
         # 批量添加事件
         if events_to_add:
@@ -437,19 +683,20 @@ class LifePathManager:
             
             # 更新内存中的事件配置（只更新一次）
             if result['success_count'] > 0:
-                await self._update_event_profile(profile_id)
+                await self._update_event_profile(profile_id, len(events_to_add))
             
             return len(events_to_add)  # 返回成功添加的事件数量
         
         return 0
 
-    async def _update_event_profile(self, profile_id: str) -> None:
+    async def _update_event_profile(self, profile_id: str, limit: int) -> None:
         """更新内存中的事件配置
 
         Args:
             profile_id: 事件配置ID
+            limit: 读取最近的事件数量，只需要加载刚写入的事件
         """
-        profile = get_event_profile_by_id(profile_id)
+        profile = get_event_profile_by_id(profile_id, life_path=LIFE_PATH_LATEST, limit=limit)
         if profile:
             # 确保profile是字典类型
             if isinstance(profile, dict):
@@ -562,6 +809,23 @@ async def add_event_to_life_path(profile_id: str, start_time: str, end_time: str
     """
     return await manager.add_event_to_life_path(profile_id, start_time, end_time, max_events)
 
+async def add_events_to_life_paths_batch(profile_ids: list, start_time: str, end_time: str, max_events: int = 3, batch_size: int = None) -> dict:
+    """批量向多个life_path添加事件的便捷函数
+
+    便捷函数，调用manager实例的add_events_to_life_paths_batch方法
+
+    Args:
+        profile_ids: 事件配置ID列表
+        start_time: 事件开始时间 (格式: YYYY-MM-DD)
+        end_time: 事件结束时间 (格式: YYYY-MM-DD)
+        max_events: 每个角色的最大事件数量 (默认: 3)
+        batch_size: 每次请求打包的角色数量
+
+    Returns:
+        dict: 以事件配置ID为键、是否添加成功为值的字典
+    """
+    return await manager.add_events_to_life_paths_batch(profile_ids, start_time, end_time, max_events, batch_size)
+
 async def remove_event_from_life_path(profile_id: str, event_id: str) -> bool:
     """从life_path移除事件的便捷函数
 
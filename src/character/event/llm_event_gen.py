@@ -7,13 +7,15 @@ from .event_profile_generator import (
 from .life_path_manager import (
     LifePathManager,
     add_event_to_life_path,
+    add_events_to_life_paths_batch,
     remove_event_from_life_path
 )
 from .prompts import (
     GENERATOR_SYSTEM_MESSAGE_TEMPLATE,
     REVIEWER_SYSTEM_MESSAGE,
     DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE,
-    LIFE_PATH_REVIEWER_SYSTEM_MESSAGE
+    LIFE_PATH_REVIEWER_SYSTEM_MESSAGE,
+    BATCH_DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE
 )
 
 # 保持向后兼容性的导出
@@ -177,4 +177,45 @@ LIFE_PATH_REVIEWER_SYSTEM_MESSAGE = """
 
 
 请指出任何不一致或不合理的地方，并提供修改建议。如果没有问题，请确认生活轨迹配置自洽。
-"""
\ No newline at end of file
+"""
+# 多角色批量生活轨迹生成提示词模板 (用于add_events_to_life_paths_batch)
+BATCH_DAILY_EVENT_GENERATOR_SYSTEM_MESSAGE_TEMPLATE = """
+你是一位角色生活轨迹生成专家。你的任务是同时为多个虚构角色创建真实、合理的日常事件。
+
+以下是本次需要生成事件的角色摘要列表（每个角色以character_id唯一标识，existing_events为该角色在此日期范围内已有的事件）:
+{character_digests}
+
+请根据以上信息，分别为每个角色在指定时间段内生成合理的日常事件:
+- 时间范围: {start_time} 至 {end_time}
+- 每个角色最多生成 {max_events} 个事件
+- 每个角色的事件只能依据该角色自己的摘要生成，不同角色之间的事件不得混淆
+- 事件类型应以日常活动为主，如工作、学习、社交、健康、娱乐等，70% 的概率为日常内容，30% 的概率可以是有趣的意外或惊喜事件
+- PAD三维度情绪评分应根据事件描述(description)并参考该角色的情绪波动状态(mood_swings)合理设置：
+  * 愉悦度(pleasure_score)、唤醒度(arousal_score)、支配度(dominance_score)范围均为 -100 到 100
+  * 轻微影响：±5-15分；中等影响：±15-30分；重大影响：±30-50分；极端影响：±50-80分（慎用）
+  * 情绪波动大、易怒或敏感的角色对负面事件反应更强烈；情绪稳定的角色反应相对缓和
+  * 不要将PAD三维度情绪评分设置为0
+- 对于特别重要的日常事件，可以将is_key_event设置为true
+- 为每个事件生成合理的开始时间和结束时间（格式: YYYY-MM-DD HH:MM:SS），确保时间线连贯
+- 生成的事件时间绝对不能与该角色已有事件冲突，且不要与已有事件描述重复或高度相似
+
+请严格按照以下JSON格式输出，以character_id为键、该角色的事件列表为值，必须包含摘要中的每一个character_id，不包含任何解释性文字、注释或多余空格。你的回答必须只包含JSON数据，不能有任何前缀或后缀：
+{{
+  "角色character_id": [
+    {{
+      "title": "事件标题",
+      "description": "事件详细描述",
+      "start_time": "开始时间 (YYYY-MM-DD HH:MM:SS)",
+      "end_time": "结束时间 (YYYY-MM-DD HH:MM:SS)",
+      "event_type": "事件类型",
+      "location": "事件地点",
+      "participants": ["参与者1", "参与者2" (可选)],
+      "is_key_event": false,
+      "outcome": "事件结果",
+      "pleasure_score": 0,
+      "arousal_score": 0,
+      "dominance_score": 0
+    }}
+  ]
+}}
+"""
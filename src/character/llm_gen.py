@@ -3,20 +3,28 @@ import sys
 import os
 # 添加项目根目录到Python路径
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.conditions import MaxMessageTermination
-from autogen_agentchat.teams import RoundRobinGroupChat
-from autogen_ext.models.openai import OpenAIChatCompletionClient
 from src.character.model.character import Character
 from dotenv import load_dotenv
-import json
 from src.character.prompts import GENERATOR_SYSTEM_MESSAGE_TEMPLATE, REVIEWER_SYSTEM_MESSAGE
 from src.character.utils import get_character_fields_description
+from src.utils.json_stream import IncrementalJSONObjectParser
+from src.utils.structured_output import StructuredOutputError, dataclass_validator, extract_json_from_messages
+from src.utils.llm_telemetry import record_llm_parse_failure, track_llm_call
 
 load_dotenv()
 
+# 角色数据校验：缺少必要字段时尝试下一个候选，未知字段被过滤
+CHARACTER_VALIDATOR = dataclass_validator(Character)
+
 class CharacterLLMGenerator:
-    def __init__(self):
+    def __init__(self, stream: bool = False):
+        # autogen导入较慢，在创建生成器时才导入
+        from autogen_agentchat.conditions import MaxMessageTermination
+        from autogen_agentchat.teams import RoundRobinGroupChat
+        from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+        # 是否以流式方式输出生成agent的token
+        self.stream = stream
         # 初始化模型客户端
         # 初始化模型客户端，添加超时设置
         self.model_client = OpenAIChatCompletionClient(
@@ -42,6 +50,7 @@ class CharacterLLMGenerator:
 
     def _create_generator_agent(self):
         """创建用于生成角色字段的agent"""
+        from autogen_agentchat.agents import AssistantAgent
         # 获取字段描述
         fields_description = get_character_fields_description()
         # 生成系统消息
@@ -50,20 +59,21 @@ class CharacterLLMGenerator:
         return AssistantAgent(
             "CharacterGenerator",
             model_client=self.model_client,
-            system_message=system_message
+            system_message=system_message,
+            model_client_stream=self.stream
         )
 
     def _create_reviewer_agent(self):
         """创建用于审查角色自洽性的agent"""
+        from autogen_agentchat.agents import AssistantAgent
         return AssistantAgent(
             "CharacterReviewer",
             model_client=self.model_client,
             system_message=REVIEWER_SYSTEM_MESSAGE
         )
 
-    async def generate_character(self, name: str = None, age: int = None, gender: str = None, occupation: str = None, language: str = "Chinese") -> Character:
-        """生成角色并审查其自洽性"""
-        # 准备初始提示
+    def _build_initial_task(self, name: str = None, age: int = None, gender: str = None, occupation: str = None, language: str = "Chinese") -> str:
+        """构建角色生成的初始提示"""
         initial_task = "生成一个详细的AI角色。"
         # 添加语言控制指令
         if language == "English":
@@ -78,27 +88,79 @@ class CharacterLLMGenerator:
             initial_task += f" 性别为{gender}。"
         if occupation:
             initial_task += f" 职业为{occupation}。"
+        return initial_task
+
+    def _parse_character_data(self, messages) -> dict:
+        """从团队消息中提取角色JSON数据，优先使用CharacterGenerator的输出"""
+        try:
+            return extract_json_from_messages(
+                messages,
+                preferred_source="CharacterGenerator",
+                expected_type=dict,
+                validator=CHARACTER_VALIDATOR
+            )
+        except StructuredOutputError as e:
+            print(f"解析角色数据失败: {e}")
+            record_llm_parse_failure("character_generation")
+            return None
+
+    async def generate_character(self, name: str = None, age: int = None, gender: str = None, occupation: str = None, language: str = "Chinese") -> Character:
+        """生成角色并审查其自洽性"""
+        # 准备初始提示
+        initial_task = self._build_initial_task(name, age, gender, occupation, language)
 
         # 运行团队生成人格
-        result = await self.team.run(task=initial_task)
+        with track_llm_call("character_generation") as call:
+            result = await self.team.run(task=initial_task)
+            call.record_result(result)
 
         # 解析结果中的JSON
-        character_data = None
-        # 检查所有消息以寻找JSON
-        for message in result.messages:
-            if message.content and isinstance(message.content, str) and '{' in message.content:
-                try:
-                    # 提取JSON部分
-                    start_idx = message.content.find('{')
-                    end_idx = message.content.rfind('}') + 1
-                    json_str = message.content[start_idx:end_idx]
-                    character_data = json.loads(json_str)
-                    break  # 找到有效JSON后跳出循环
-                except json.JSONDecodeError:
-                    pass
+        character_data = self._parse_character_data(result.messages)
 
         if not character_data:
             raise ValueError("未能从生成结果中提取有效的角色数据")
 
         # 创建Character对象
-        return Character(**character_data)
\ No newline at end of file
+        return Character(**character_data)
+
+    async def generate_character_stream(self, name: str = None, age: int = None, gender: str = None, occupation: str = None, language: str = "Chinese"):
+        """流式生成角色
+
+        逐token消费CharacterGenerator的输出并增量解析JSON，每当一个顶层字段完整时立即产出，
+        全部完成后校验为Character对象。需要以stream=True创建生成器才能获得token级输出。
+
+        Yields:
+            tuple: ("field", {"field": 字段名, "value": 字段值}) 或最终的 ("character", Character)
+
+        Raises:
+            ValueError: 当无法从生成结果中提取有效角色数据时抛出
+        """
+        from autogen_agentchat.base import TaskResult
+        from autogen_agentchat.messages import ModelClientStreamingChunkEvent
+        initial_task = self._build_initial_task(name, age, gender, occupation, language)
+        parser = IncrementalJSONObjectParser()
+        task_result = None
+
+        with track_llm_call("character_generation") as call:
+            async for item in self.team.run_stream(task=initial_task):
+                if isinstance(item, TaskResult):
+                    task_result = item
+                elif isinstance(item, ModelClientStreamingChunkEvent) and item.source == "CharacterGenerator":
+                    for field, value in parser.feed(item.content):
+                        yield "field", {"field": field, "value": value}
+            call.record_result(task_result)
+
+        # 流式解析完整时直接使用，否则回退到从完整消息中提取
+        character_data = None
+        if parser.done:
+            try:
+                character_data = CHARACTER_VALIDATOR(parser.result())
+            except StructuredOutputError:
+                character_data = None
+        if not character_data and task_result is not None:
+            character_data = self._parse_character_data(task_result.messages)
+
+        if not character_data:
+            raise ValueError("未能从生成结果中提取有效的角色数据")
+
+        yield "character", Character(**character_data)
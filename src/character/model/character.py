@@ -2,7 +2,6 @@ import json
 import uuid
 import random
 import time
-from pypinyin import lazy_pinyin
 from dataclasses import dataclass, asdict
 from typing import List, Dict, Optional, Any
 from .event_profile import EventProfile
@@ -65,7 +64,8 @@ class Character:
     def __post_init__(self):
         # 生成唯一ID
         if self.character_id is None:
-            # 将中文名字转换为拼音
+            # 将中文名字转换为拼音，pypinyin加载词典较慢，仅在需要生成ID时导入
+            from pypinyin import lazy_pinyin
             pinyin_name = ''.join(lazy_pinyin(self.name))
             # 使用时间戳生成唯一标识
             timestamp = int(time.time())
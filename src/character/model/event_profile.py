@@ -1,11 +1,16 @@
+import copy
 import uuid
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from typing import List, Dict, Optional, Any
 from datetime import datetime
+from .life_path_index import LifePathIndex
 
-@dataclass
+@dataclass(slots=True)
 class Event:
-    """事件类，表示生活轨迹中的一个事件"""
+    """事件类，表示生活轨迹中的一个事件
+
+    使用__slots__存储字段，不为每个事件创建__dict__，批量处理大量事件时占用更少内存
+    """
     event_id: str  # 事件唯一ID
     type: str  # 事件类型
     description: str  # 事件描述
@@ -31,8 +36,18 @@ class Event:
             self.dependencies = []
         
     def to_dict(self) -> Dict[str, Any]:
-        """转换为字典"""
-        return asdict(self)
+        """转换为字典
+
+        逐个读取字段，不像asdict那样递归深拷贝每个字段，只复制participants和dependencies两个列表
+        """
+        result = {name: getattr(self, name) for name in EVENT_FIELD_NAMES}
+        result['participants'] = list(self.participants) if self.participants is not None else None
+        result['dependencies'] = list(self.dependencies) if self.dependencies is not None else None
+        return result
+
+
+EVENT_FIELD_NAMES = tuple(field.name for field in fields(Event))
+
 
 @dataclass
 class EventProfile:
@@ -51,42 +66,79 @@ class EventProfile:
         self.current_stage = ''
         self.next_trend = ''
         self.event_triggers = {}
+        # 生活轨迹索引，首次查询时创建
+        self._index = None
+        self._indexed_list = None
 
-    def add_event(self, event: Event) -> None:
-        """添加事件到生活轨迹"""
-        self.life_path.append(event)
-        # 按时间排序
+    def _life_path_index(self) -> LifePathIndex:
+        """获取生活轨迹索引，life_path被替换或增删事件后自动重建
+
+        直接修改life_path中已有事件的时间等字段后，需要调用reindex()
+        """
+        index = self._index
+        if index is None or self._indexed_list is not self.life_path or len(index) != len(self.life_path):
+            index = self.reindex()
+        return index
+
+    def reindex(self) -> LifePathIndex:
+        """根据当前life_path重建索引，life_path会按开始时间排序以与索引保持相同顺序"""
         self.life_path.sort(key=lambda x: x.start_time)
+        index = LifePathIndex(self.life_path)
+        self._index = index
+        self._indexed_list = self.life_path
+        return index
+
+    def add_event(self, event: Event) -> None:
+        """添加事件到生活轨迹，按开始时间二分插入"""
+        position = self._life_path_index().insert(event)
+        self.life_path.insert(position, event)
 
     def update_event_status(self, event_id: str, status: str) -> bool:
         """更新事件状态"""
-        for event in self.life_path:
-            if event.event_id == event_id:
-                event.status = status
-                return True
-        return False
+        return self._life_path_index().update_status(event_id, status)
 
-    def get_current_events(self) -> List[Event]:
+    def get_event(self, event_id: str) -> Optional[Event]:
+        """根据事件ID获取事件"""
+        return self._life_path_index().get(event_id)
+
+    def get_current_events(self, now: Optional[datetime] = None) -> List[Event]:
         """获取当前正在发生的事件"""
-        now = datetime.now()
-        return [event for event in self.life_path
-                if event.status == 'in_progress' or 
-                (event.start_time <= now and (event.end_time is None or event.end_time >= now))]
+        now = now or datetime.now()
+        index = self._life_path_index()
+        events = index.at(now)
+        event_ids = {event.event_id for event in events}
+        in_progress = [event for event in index.with_status('in_progress') if event.event_id not in event_ids]
+        if not in_progress:
+            return events
+        return index.ordered(events + in_progress)
+
+    def get_events_overlapping(self, start_time: datetime, end_time: datetime) -> List[Event]:
+        """获取与时间段重叠的事件"""
+        return self._life_path_index().overlapping(start_time, end_time)
+
+    def get_events_starting_between(self, start_time: datetime, end_time: datetime) -> List[Event]:
+        """获取开始时间在指定范围内的事件"""
+        return self._life_path_index().starting_between(start_time, end_time)
 
     def get_completed_events(self) -> List[Event]:
         """获取已完成的事件"""
-        return [event for event in self.life_path if event.status == 'completed']
+        return self._life_path_index().with_status('completed')
 
     def get_key_events(self) -> List[Event]:
         """获取关键节点事件"""
-        return [event for event in self.life_path if event.is_key_event]
+        return self._life_path_index().key_events()
 
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        result = asdict(self)
-        # 转换life_path中的Event对象为字典
-        result['life_path'] = [event.to_dict() for event in self.life_path]
-        return result
+        return {
+            'id': self.id,
+            'character_id': self.character_id,
+            # 转换life_path中的Event对象为字典
+            'life_path': [event.to_dict() for event in self.life_path],
+            'current_stage': self.current_stage,
+            'next_trend': self.next_trend,
+            'event_triggers': copy.deepcopy(self.event_triggers),
+        }
 
     def to_json(self) -> str:
         """转换为JSON字符串"""
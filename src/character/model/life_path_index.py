@@ -0,0 +1,174 @@
+from bisect import bisect_left, bisect_right
+from typing import Dict, List, Optional, Iterable
+
+
+class LifePathIndex:
+    """生活轨迹的内存索引
+
+    事件按开始时间有序保存，另外维护:
+    - 事件ID -> 事件的字典，按ID查找和更新状态为O(1)
+    - 按状态和关键节点分组的事件，筛选时只访问匹配的事件
+    - 按开始时间排列的结束时间最大值线段树，"某一时刻正在发生"和"与时间段重叠"的查询
+      只访问可能重叠的区间，复杂度为O(log n + k log n)，k为结果数量
+
+    插入使用二分查找定位，不再对整个列表重新排序；追加到末尾时线段树增量更新，复杂度O(log n)，
+    插入到中间时线段树标记失效，下次区间查询时重建。
+    事件的开始/结束时间须为同一类型且可比较(通常为datetime)，结束时间为None表示尚未结束。
+    """
+
+    def __init__(self, events: Iterable = ()):
+        self._events = []
+        self._starts = []
+        self._by_id: Dict[str, object] = {}
+        self._by_status: Dict[str, Dict[str, object]] = {}
+        self._key_events: Dict[str, object] = {}
+        # 事件ID -> 插入序号，开始时间相同的事件按序号排序，与有序列表中的顺序一致
+        self._sequence: Dict[str, int] = {}
+        self._max_end_tree: Optional[list] = None
+        self._tree_size = 0
+        for event in sorted(events, key=lambda e: e.start_time):
+            self._events.append(event)
+            self._starts.append(event.start_time)
+            self._add_to_maps(event)
+
+    def __len__(self):
+        return len(self._events)
+
+    def __iter__(self):
+        return iter(self._events)
+
+    def _add_to_maps(self, event):
+        self._sequence[event.event_id] = len(self._sequence)
+        self._by_id[event.event_id] = event
+        self._by_status.setdefault(event.status, {})[event.event_id] = event
+        if event.is_key_event:
+            self._key_events[event.event_id] = event
+
+    def insert(self, event) -> int:
+        """按开始时间插入事件，开始时间相同的事件保持插入顺序
+
+        Returns:
+            int: 事件在有序列表中的位置
+        """
+        position = bisect_right(self._starts, event.start_time)
+        self._starts.insert(position, event.start_time)
+        self._events.insert(position, event)
+        self._add_to_maps(event)
+        if self._max_end_tree is not None:
+            if position == len(self._events) - 1 and position < self._tree_size:
+                self._update_leaf(position)
+            else:
+                # 插入到中间会使后续叶子整体后移，线段树容量不足时也需要扩容，均在下次查询时重建
+                self._max_end_tree = None
+        return position
+
+    def get(self, event_id: str):
+        """根据事件ID获取事件，不存在时返回None"""
+        return self._by_id.get(event_id)
+
+    def update_status(self, event_id: str, status: str) -> bool:
+        """更新事件状态并同步状态分组
+
+        Returns:
+            bool: 是否找到事件
+        """
+        event = self._by_id.get(event_id)
+        if event is None:
+            return False
+        self._by_status.get(event.status, {}).pop(event_id, None)
+        event.status = status
+        self._by_status.setdefault(status, {})[event_id] = event
+        return True
+
+    def ordered(self, events: Iterable) -> List:
+        """将索引中的事件按有序列表中的顺序排列"""
+        return sorted(events, key=lambda e: (e.start_time, self._sequence[e.event_id]))
+
+    def with_status(self, status: str) -> List:
+        """获取指定状态的事件，按开始时间排序"""
+        return self.ordered(self._by_status.get(status, {}).values())
+
+    def key_events(self) -> List:
+        """获取关键节点事件，按开始时间排序"""
+        return self.ordered(self._key_events.values())
+
+    def starting_between(self, start, end) -> List:
+        """获取开始时间在[start, end]内的事件"""
+        return self._events[bisect_left(self._starts, start):bisect_right(self._starts, end)]
+
+    def _build_tree(self):
+        """构建线段树，叶子为各事件的结束时间，结束时间为None的事件视为无限长"""
+        size = 1
+        while size < len(self._events):
+            size *= 2
+        tree = [None] * (2 * size)
+        for i, event in enumerate(self._events):
+            tree[size + i] = _OPEN_END if event.end_time is None else event.end_time
+        for node in range(size - 1, 0, -1):
+            tree[node] = _max_end(tree[2 * node], tree[2 * node + 1])
+        self._max_end_tree = tree
+        self._tree_size = size
+
+    def _update_leaf(self, position: int):
+        """更新线段树中指定位置的叶子，并沿路径更新祖先节点的最大值"""
+        tree = self._max_end_tree
+        event = self._events[position]
+        node = self._tree_size + position
+        tree[node] = _OPEN_END if event.end_time is None else event.end_time
+        node //= 2
+        while node:
+            tree[node] = _max_end(tree[2 * node], tree[2 * node + 1])
+            node //= 2
+
+    def overlapping(self, start, end) -> List:
+        """获取与时间段[start, end]重叠的事件，即开始时间<=end且结束时间>=start(或未结束)的事件"""
+        hi = bisect_right(self._starts, end)
+        if hi == 0:
+            return []
+        if self._max_end_tree is None:
+            self._build_tree()
+
+        tree, size = self._max_end_tree, self._tree_size
+        result = []
+        # 迭代遍历线段树，跳过结束时间最大值早于start的子树
+        stack = [(1, 0, size)]
+        while stack:
+            node, lo, node_hi = stack.pop()
+            if lo >= hi or not _ends_after(tree[node], start):
+                continue
+            if node >= size:
+                result.append(lo)
+                continue
+            mid = (lo + node_hi) // 2
+            stack.append((2 * node + 1, mid, node_hi))
+            stack.append((2 * node, lo, mid))
+        # 左子树先出栈，结果已按开始时间排序
+        return [self._events[i] for i in result]
+
+    def at(self, moment) -> List:
+        """获取在指定时刻正在发生的事件"""
+        return self.overlapping(moment, moment)
+
+
+class _OpenEnd:
+    """未结束事件的结束时间，大于任何时间"""
+
+    def __repr__(self):
+        return "OPEN_END"
+
+
+_OPEN_END = _OpenEnd()
+
+
+def _ends_after(end, moment) -> bool:
+    if end is None:
+        return False
+    return end is _OPEN_END or end >= moment
+
+
+def _max_end(left, right):
+    if left is None or right is _OPEN_END:
+        return right
+    if right is None or left is _OPEN_END:
+        return left
+    return left if left >= right else right
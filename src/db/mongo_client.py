@@ -1,12 +1,16 @@
 import os
+import threading
 import pymongo
 from dotenv import load_dotenv
+from src.utils.metrics import MongoPoolMetricsListener
+from src.db.query_monitor import MongoCommandMetricsListener
 
 # 加载环境变量
 load_dotenv()
 
 class MongoDBClient:
     _instance = None
+    _connect_lock = threading.Lock()
 
     @classmethod
     def get_instance(cls):
@@ -28,24 +32,56 @@ class MongoDBClient:
         else:
             self.mongo_uri = f'mongodb://{self.host}:{self.port}/'
 
-        # 建立连接
+        # 连接在首次使用时建立，避免导入模块时就访问数据库
+        self.client = None
+        self.db = None
+
+    def connect(self):
+        """建立MongoDB连接并测试连通性
+
+        Raises:
+            Exception: 当连接或ping失败时抛出
+        """
         try:
-            self.client = pymongo.MongoClient(self.mongo_uri, serverSelectionTimeoutMS=5000, directConnection=True)
-            # 测试连接
+            self.client = pymongo.MongoClient(
+                self.mongo_uri,
+                serverSelectionTimeoutMS=5000,
+                directConnection=True,
+                event_listeners=[MongoPoolMetricsListener(), MongoCommandMetricsListener()]
+            )
             # 测试连接
             self.client.admin.command('ping')
             self.db = self.client[self.database_name]
         except Exception as e:
             print(f"连接MongoDB失败: {e}")
+            if self.client:
+                self.client.close()
+            self.client = None
+            self.db = None
             raise
 
+    def is_connected(self):
+        return self.db is not None
+
     def get_database(self):
+        if self.db is None:
+            with self._connect_lock:
+                if self.db is None:
+                    self.connect()
         return self.db
 
     def close_connection(self):
         if self.client:
             self.client.close()
+            self.client = None
+            self.db = None
             print("MongoDB连接已关闭")
 
-# 创建单例实例
-mongo_client = MongoDBClient.get_instance()
\ No newline at end of file
+
+def get_mongo_client() -> MongoDBClient:
+    """获取MongoDB客户端单例，连接在首次调用get_database时建立"""
+    return MongoDBClient.get_instance()
+
+
+# 创建单例实例（不会立即连接数据库）
+mongo_client = get_mongo_client()
@@ -4,6 +4,8 @@ import time
 import logging
 from pymysql.cursors import DictCursor
 from dotenv import load_dotenv
+from src.db.query_monitor import MYSQL_RECONNECTS_TOTAL, record_sql
+from src.utils.logging_config import log_sampled
 
 # 加载环境变量
 load_dotenv()
@@ -32,14 +34,10 @@ class MySQLClient:
         self.database_name = os.getenv('MYSQL_DATABASE')
         self.charset = 'utf8mb4'
         
-        # 验证必要的配置是否存在
-        self._validate_config()
-        
-        # 初始化连接
+        # 连接在首次执行SQL时建立，配置也在那时校验，避免导入模块时就访问数据库
         self.connection = None
         self.cursor = None
         self._reconnect_count = 0
-        self.connect()
         
     def _validate_config(self):
         """验证必要的配置是否存在"""
@@ -63,6 +61,8 @@ class MySQLClient:
 
     def connect(self):
         """建立数据库连接"""
+        # 验证必要的配置是否存在
+        self._validate_config()
         try:
             self.connection = pymysql.connect(
                 host=self.host,
@@ -88,56 +88,73 @@ class MySQLClient:
 
     def execute_query(self, query, params=None):
         """执行SQL查询并返回结果，包含重连机制"""
-        return self._execute_with_retry(self.cursor.execute, query, params, fetch=True)
+        return self._execute_with_retry(self._cursor_execute, query, params, fetch=True)
 
     def execute_update(self, query, params=None):
         """执行SQL更新操作，包含重连机制"""
-        return self._execute_with_retry(self.cursor.execute, query, params, fetch=False)
+        return self._execute_with_retry(self._cursor_execute, query, params, fetch=False)
+
+    def _cursor_execute(self, query, params):
+        """使用当前游标执行SQL，游标可能在重连后被替换"""
+        return self.cursor.execute(query, params)
 
     def _execute_with_retry(self, execute_func, query, params=None, fetch=True):
-        """带重试机制的执行方法"""
-        for attempt in range(self._max_reconnect_attempts):
-            try:
-                # 检查连接是否有效
-                if not self._is_connection_valid():
-                    logger.warning(f"连接无效，尝试重新连接... (第{attempt + 1}次)")
-                    self.connect()
+        """带重试机制的执行方法，同时记录语句耗时、行数和重试次数"""
+        started = time.perf_counter()
+        rows = None
+        failed = True
+        attempt = 0
+        try:
+            for attempt in range(self._max_reconnect_attempts):
+                try:
+                    # 检查连接是否有效
+                    if not self._is_connection_valid():
+                        logger.warning("连接无效，尝试重新连接... (第%s次)", attempt + 1)
+                        self.connect()
                 
-                # 执行查询
-                result = execute_func(query, params or ())
+                    # 执行查询
+                    result = execute_func(query, params or ())
                 
-                if fetch:
-                    return self.cursor.fetchall()
-                else:
-                    self.connection.commit()
-                    return result
+                    if fetch:
+                        data = self.cursor.fetchall()
+                        rows = len(data)
+                        failed = False
+                        return data
+                    else:
+                        self.connection.commit()
+                        rows = result
+                        failed = False
+                        return result
                     
-            except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
-                error_code = e.args[0] if e.args else None
+                except (pymysql.err.OperationalError, pymysql.err.InterfaceError) as e:
+                    error_code = e.args[0] if e.args else None
                 
-                # MySQL连接丢失错误码
-                if error_code in (2006, 2013, 0):
-                    logger.warning(f"MySQL连接丢失，尝试重连... (第{attempt + 1}次): {e}")
-                    self._reconnect_count += 1
+                    # MySQL连接丢失错误码
+                    if error_code in (2006, 2013, 0):
+                        logger.warning("MySQL连接丢失，尝试重连... (第%s次): %s", attempt + 1, e)
+                        self._reconnect_count += 1
+                        MYSQL_RECONNECTS_TOTAL.inc()
                     
-                    if attempt < self._max_reconnect_attempts - 1:
-                        time.sleep(self._reconnect_delay * (attempt + 1))  # 指数退避
-                        continue
+                        if attempt < self._max_reconnect_attempts - 1:
+                            time.sleep(self._reconnect_delay * (attempt + 1))  # 指数退避
+                            continue
+                        else:
+                            logger.error("达到最大重连次数，放弃重连")
+                            raise
                     else:
-                        logger.error("达到最大重连次数，放弃重连")
+                        # 其他错误直接抛出
+                        logger.error("数据库操作失败: %s", e)
+                        if not fetch and self.connection:
+                            self.connection.rollback()
                         raise
-                else:
-                    # 其他错误直接抛出
+                    
+                except Exception as e:
                     logger.error(f"数据库操作失败: {e}")
                     if not fetch and self.connection:
                         self.connection.rollback()
                     raise
-                    
-            except Exception as e:
-                logger.error(f"数据库操作失败: {e}")
-                if not fetch and self.connection:
-                    self.connection.rollback()
-                raise
+        finally:
+            record_sql(query, started, rows, failed, attempt)
 
     def _is_connection_valid(self):
         """检查连接是否有效"""
@@ -165,9 +182,11 @@ class MySQLClient:
         """关闭数据库连接"""
         if self.cursor:
             self.cursor.close()
+            self.cursor = None
         if self.connection and self.connection.open:
             self.connection.close()
             logger.info("MySQL连接已关闭")
+        self.connection = None
 
     def execute_batch_update(self, query: str, data: list) -> int:
         """
@@ -184,6 +203,8 @@ class MySQLClient:
             return 0
             
         total_affected = 0
+        started = time.perf_counter()
+        failed = True
         try:
             # 检查连接是否有效
             if not self._is_connection_valid():
@@ -194,8 +215,9 @@ class MySQLClient:
             affected_rows = self.cursor.executemany(query, data)
             self.connection.commit()
             total_affected = affected_rows or 0
+            failed = False
             
-            logger.info(f"批量更新完成，影响行数: {total_affected}")
+            log_sampled(logger, logging.INFO, "mysql.batch_update", "批量更新完成，影响行数: %s", total_affected)
             return total_affected
             
         except Exception as e:
@@ -203,6 +225,8 @@ class MySQLClient:
             if self.connection:
                 self.connection.rollback()
             raise
+        finally:
+            record_sql(query, started, total_affected, failed)
 
     def execute_batch_insert(self, query: str, data: list) -> int:
         """
@@ -218,6 +242,9 @@ class MySQLClient:
         if not data:
             return 0
             
+        affected_rows = None
+        started = time.perf_counter()
+        failed = True
         try:
             # 检查连接是否有效
             if not self._is_connection_valid():
@@ -227,8 +254,9 @@ class MySQLClient:
             # 使用executemany进行批量操作
             affected_rows = self.cursor.executemany(query, data)
             self.connection.commit()
+            failed = False
             
-            logger.info(f"批量插入完成，影响行数: {affected_rows}")
+            log_sampled(logger, logging.INFO, "mysql.batch_insert", "批量插入完成，影响行数: %s", affected_rows)
             return affected_rows or 0
             
         except Exception as e:
@@ -236,6 +264,13 @@ class MySQLClient:
             if self.connection:
                 self.connection.rollback()
             raise
+        finally:
+            record_sql(query, started, affected_rows, failed)
+
+def get_mysql_client() -> MySQLClient:
+    """获取MySQL客户端单例，连接在首次执行SQL时建立"""
+    return MySQLClient.get_instance()
+
 
-# 创建单例实例
-mysql_client = MySQLClient.get_instance()
\ No newline at end of file
+# 创建单例实例（不会立即连接数据库）
+mysql_client = get_mysql_client()
\ No newline at end of file
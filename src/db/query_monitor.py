@@ -0,0 +1,294 @@
+"""
+数据库查询监控
+为MySQL语句和MongoDB命令生成归一化指纹，统计耗时、影响行数、重试次数，记录慢查询日志，
+并按指纹汇总供调试接口查看最耗时的语句
+"""
+
+import os
+import re
+import json
+import time
+import logging
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from prometheus_client import Counter, Histogram
+from pymongo import monitoring
+
+from src.utils.metrics import LATENCY_BUCKETS
+
+logger = logging.getLogger(__name__)
+
+# 慢查询阈值(毫秒)
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "200"))
+# 最多保留的指纹数量，超出后新指纹统一归入"other"
+MAX_FINGERPRINTS = int(os.getenv("QUERY_STATS_MAX_FINGERPRINTS", "1000"))
+
+DB_QUERY_DURATION_SECONDS = Histogram(
+    "soluna_db_query_duration_seconds",
+    "数据库查询耗时(秒)",
+    ["database", "operation"],
+    buckets=LATENCY_BUCKETS
+)
+DB_QUERY_ROWS_TOTAL = Counter(
+    "soluna_db_query_rows_total",
+    "数据库查询返回或影响的行数",
+    ["database", "operation"]
+)
+DB_QUERY_ERRORS_TOTAL = Counter(
+    "soluna_db_query_errors_total",
+    "数据库查询失败次数",
+    ["database", "operation"]
+)
+DB_QUERY_RETRIES_TOTAL = Counter(
+    "soluna_db_query_retries_total",
+    "数据库查询重试次数",
+    ["database"]
+)
+DB_SLOW_QUERIES_TOTAL = Counter(
+    "soluna_db_slow_queries_total",
+    "超过慢查询阈值的查询次数",
+    ["database", "operation"]
+)
+MYSQL_RECONNECTS_TOTAL = Counter(
+    "soluna_mysql_reconnects_total",
+    "MySQL连接丢失后的重连次数"
+)
+
+_SQL_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'|\"(?:[^\"\\]|\\.)*\"")
+_SQL_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_SQL_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_SQL_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# 连接、认证等内部命令不计入统计
+_IGNORED_MONGO_COMMANDS = {
+    "ping", "hello", "ismaster", "isMaster", "buildinfo", "buildInfo", "endSessions",
+    "saslStart", "saslContinue", "getnonce", "authenticate", "killCursors"
+}
+
+
+@lru_cache(maxsize=2048)
+def fingerprint_sql(query: str) -> str:
+    """将SQL语句归一化为指纹：字面量和占位符替换为?，IN列表折叠，空白合并
+
+    Args:
+        query: SQL语句
+
+    Returns:
+        str: 语句指纹
+    """
+    fingerprint = _SQL_STRING.sub("?", query)
+    fingerprint = _SQL_PLACEHOLDER.sub("?", fingerprint)
+    fingerprint = _SQL_NUMBER.sub("?", fingerprint)
+    fingerprint = _SQL_IN_LIST.sub("(?+)", fingerprint)
+    fingerprint = _WHITESPACE.sub(" ", fingerprint).strip()
+    return fingerprint[:500]
+
+
+def sql_operation(fingerprint: str) -> str:
+    """获取SQL语句的操作类型，如select、insert"""
+    return fingerprint.split(" ", 1)[0].lower() if fingerprint else "unknown"
+
+
+def _shape(value: Any, depth: int = 0) -> Any:
+    """保留查询条件的结构，值替换为?"""
+    if depth > 4:
+        return "?"
+    if isinstance(value, dict):
+        return {key: _shape(item, depth + 1) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_shape(value[0], depth + 1)] if value else []
+    return "?"
+
+
+def fingerprint_mongo(command_name: str, command: dict) -> str:
+    """将MongoDB命令归一化为指纹：命令名、集合名以及过滤条件/更新/管道的结构
+
+    Args:
+        command_name: 命令名，如find、update
+        command: 命令文档
+
+    Returns:
+        str: 命令指纹
+    """
+    collection = command.get(command_name)
+    shape = None
+    if command_name in ("find", "count", "distinct"):
+        shape = {"filter": _shape(command.get("filter") or command.get("query") or {})}
+        if command.get("projection"):
+            shape["projection"] = _shape(command["projection"])
+    elif command_name == "update" and command.get("updates"):
+        update = command["updates"][0]
+        shape = {"q": _shape(update.get("q", {})), "u": _shape(update.get("u", {}))}
+    elif command_name == "delete" and command.get("deletes"):
+        shape = {"q": _shape(command["deletes"][0].get("q", {}))}
+    elif command_name == "findAndModify":
+        shape = {"query": _shape(command.get("query", {})), "update": _shape(command.get("update", {}))}
+    elif command_name == "aggregate":
+        shape = {"pipeline": [next(iter(stage), "?") for stage in command.get("pipeline", []) if isinstance(stage, dict)]}
+
+    fingerprint = f"{command_name} {collection}" if isinstance(collection, str) else command_name
+    if shape is not None:
+        fingerprint += " " + json.dumps(shape, sort_keys=True, ensure_ascii=False, default=str)
+    return fingerprint[:500]
+
+
+class QueryStats:
+    """按指纹汇总的查询统计，线程安全"""
+
+    def __init__(self, max_fingerprints: int = MAX_FINGERPRINTS):
+        self.max_fingerprints = max_fingerprints
+        self._stats: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, database: str, fingerprint: str, duration: float, rows: Optional[int] = None,
+               error: bool = False, retries: int = 0):
+        key = (database, fingerprint)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                if len(self._stats) >= self.max_fingerprints:
+                    key = (database, "other")
+                    stats = self._stats.get(key)
+                if stats is None:
+                    stats = {"count": 0, "total_time": 0.0, "max_time": 0.0, "rows": 0, "errors": 0, "retries": 0}
+                    self._stats[key] = stats
+            stats["count"] += 1
+            stats["total_time"] += duration
+            stats["max_time"] = max(stats["max_time"], duration)
+            stats["rows"] += rows or 0
+            stats["errors"] += 1 if error else 0
+            stats["retries"] += retries
+
+    def top(self, limit: int = 20, sort_by: str = "total_time") -> List[Dict[str, Any]]:
+        """获取排名靠前的语句
+
+        Args:
+            limit: 返回数量
+            sort_by: 排序字段，total_time、max_time、count、avg_time、errors
+
+        Returns:
+            List[Dict[str, Any]]: 语句统计列表，时间单位为毫秒
+        """
+        with self._lock:
+            items = [(key, dict(stats)) for key, stats in self._stats.items()]
+
+        result = []
+        for (database, fingerprint), stats in items:
+            result.append({
+                "database": database,
+                "fingerprint": fingerprint,
+                "count": stats["count"],
+                "total_time_ms": round(stats["total_time"] * 1000, 3),
+                "avg_time_ms": round(stats["total_time"] * 1000 / stats["count"], 3),
+                "max_time_ms": round(stats["max_time"] * 1000, 3),
+                "rows": stats["rows"],
+                "errors": stats["errors"],
+                "retries": stats["retries"]
+            })
+
+        sort_key = {
+            "total_time": "total_time_ms",
+            "max_time": "max_time_ms",
+            "avg_time": "avg_time_ms",
+            "count": "count",
+            "errors": "errors"
+        }.get(sort_by, "total_time_ms")
+        result.sort(key=lambda item: item[sort_key], reverse=True)
+        return result[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats()
+
+
+def record_query(database: str, operation: str, fingerprint: str, duration: float,
+                 rows: Optional[int] = None, error: bool = False, retries: int = 0):
+    """记录一次查询的指标、汇总统计和慢查询日志
+
+    Args:
+        database: 数据库类型，mysql或mongodb
+        operation: 操作类型
+        fingerprint: 语句指纹
+        duration: 耗时(秒)
+        rows: 返回或影响的行数
+        error: 是否失败
+        retries: 本次执行的重试次数
+    """
+    DB_QUERY_DURATION_SECONDS.labels(database=database, operation=operation).observe(duration)
+    if rows:
+        DB_QUERY_ROWS_TOTAL.labels(database=database, operation=operation).inc(rows)
+    if error:
+        DB_QUERY_ERRORS_TOTAL.labels(database=database, operation=operation).inc()
+    if retries:
+        DB_QUERY_RETRIES_TOTAL.labels(database=database).inc(retries)
+    query_stats.record(database, fingerprint, duration, rows, error, retries)
+
+    duration_ms = duration * 1000
+    if duration_ms >= SLOW_QUERY_THRESHOLD_MS:
+        DB_SLOW_QUERIES_TOTAL.labels(database=database, operation=operation).inc()
+        logger.warning("慢查询[%s] %.1fms rows=%s retries=%s: %s", database, duration_ms, rows, retries, fingerprint)
+
+
+def record_sql(query: str, started: float, rows: Optional[int] = None, error: bool = False, retries: int = 0):
+    """记录一条MySQL语句的执行情况
+
+    Args:
+        query: SQL语句
+        started: 开始时间(time.perf_counter)
+        rows: 返回或影响的行数
+        error: 是否失败
+        retries: 重试次数
+    """
+    fingerprint = fingerprint_sql(query)
+    record_query("mysql", sql_operation(fingerprint), fingerprint, time.perf_counter() - started, rows, error, retries)
+
+
+class MongoCommandMetricsListener(monitoring.CommandListener):
+    """MongoDB命令监听器，记录每条命令的指纹、耗时和返回行数"""
+
+    def __init__(self):
+        self._pending: Dict[tuple, str] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(event):
+        return event.connection_id, event.request_id
+
+    def started(self, event):
+        if event.command_name in _IGNORED_MONGO_COMMANDS:
+            return
+        fingerprint = fingerprint_mongo(event.command_name, event.command)
+        with self._lock:
+            self._pending[self._key(event)] = fingerprint
+
+    def succeeded(self, event):
+        with self._lock:
+            fingerprint = self._pending.pop(self._key(event), None)
+        if fingerprint is None:
+            return
+        record_query("mongodb", event.command_name, fingerprint, event.duration_micros / 1e6, self._rows(event.reply))
+
+    def failed(self, event):
+        with self._lock:
+            fingerprint = self._pending.pop(self._key(event), None)
+        if fingerprint is None:
+            return
+        record_query("mongodb", event.command_name, fingerprint, event.duration_micros / 1e6, error=True)
+
+    @staticmethod
+    def _rows(reply) -> Optional[int]:
+        """从命令响应中获取返回或影响的文档数"""
+        if not isinstance(reply, dict):
+            return None
+        cursor = reply.get("cursor")
+        if isinstance(cursor, dict):
+            batch = cursor.get("firstBatch", cursor.get("nextBatch"))
+            return len(batch) if isinstance(batch, list) else None
+        n = reply.get("n")
+        return n if isinstance(n, int) else None
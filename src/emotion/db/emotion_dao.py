@@ -5,18 +5,32 @@
 
 from typing import Optional, Dict, Any, List
 from datetime import datetime
-from src.db.mysql_client import mysql_client
+from src.db.mysql_client import MySQLClient, mysql_client
+from src.emotion.model.emotion_decay import apply_decay, calculate_emotion_score
+from src.emotion.model.emotion_history import SOURCE_EVENT, history_entry
+from src.emotion.db.emotion_history_dao import EmotionHistoryDAO, emotion_history_dao
+from src.utils.tracing import traced_class
+
+# 读取情绪时查询的列，基线、半衰期倍率和pad_updated_at用于在读取时计算时间衰减
+EMOTION_COLUMNS = """
+    character_id, pleasure_score, arousal_score, dominance_score, current_emotion_score,
+    baseline_pleasure, baseline_arousal, baseline_dominance, half_life_scale, pad_updated_at,
+    updated_at, created_at
+"""
 
 
+@traced_class()
 class EmotionDAO:
     """情绪数据访问对象"""
     
-    def __init__(self):
-        self.db = mysql_client
+    def __init__(self, db_client: Optional[MySQLClient] = None):
+        # 不传时使用进程内共享的连接，后台线程中使用时需传入独立的连接，历史记录也写入同一连接
+        self.db = db_client or mysql_client
+        self.history_dao = EmotionHistoryDAO(db_client) if db_client else emotion_history_dao
     
     def get_emotion_by_character_id(self, character_id: str) -> Optional[Dict[str, Any]]:
         """
-        根据角色ID获取情绪状态
+        根据角色ID获取情绪状态，PAD值为按时间衰减到当前时刻的值
         
         Args:
             character_id: 角色ID
@@ -24,14 +38,13 @@ class EmotionDAO:
         Returns:
             角色情绪数据或None
         """
-        query = """
-            SELECT character_id, pleasure_score, arousal_score, dominance_score, 
-                   current_emotion_score, updated_at, created_at
+        query = f"""
+            SELECT {EMOTION_COLUMNS}
             FROM emotions 
             WHERE character_id = %s
         """
         result = self.db.execute_query(query, (character_id,))
-        return result[0] if result else None
+        return apply_decay(result[0]) if result else None
     
     def create_emotion(self, emotion_data: Dict[str, Any]) -> bool:
         """
@@ -45,15 +58,16 @@ class EmotionDAO:
         """
         query = """
             INSERT INTO emotions (character_id, pleasure_score, arousal_score, 
-                              dominance_score, current_emotion_score)
-            VALUES (%s, %s, %s, %s, %s)
+                              dominance_score, current_emotion_score, pad_updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s)
         """
         params = (
             emotion_data.get('character_id'),
             emotion_data.get('pleasure_score', 0),
             emotion_data.get('arousal_score', 0),
             emotion_data.get('dominance_score', 0),
-            emotion_data.get('current_emotion_score', 0)
+            emotion_data.get('current_emotion_score', 0),
+            datetime.now()
         )
         try:
             self.db.execute_update(query, params)
@@ -84,6 +98,11 @@ class EmotionDAO:
         
         if not set_clauses:
             return False
+        
+        # PAD值变化时记录写入时间，之后的读取从这一时刻开始计算衰减
+        if any(field in emotion_data for field in valid_fields[:3]):
+            set_clauses.append("pad_updated_at = %s")
+            params.append(datetime.now())
             
         params.append(character_id)
         query = f"""
@@ -99,19 +118,21 @@ class EmotionDAO:
             print(f"更新情绪状态失败: {e}")
             return False
     
-    def update_emotion_from_event(self, character_id: str, pad_impact: Dict[str, int]) -> bool:
+    def update_emotion_from_event(self, character_id: str, pad_impact: Dict[str, int],
+                                  source: str = SOURCE_EVENT) -> bool:
         """
-        根据事件影响更新情绪状态
+        根据事件影响更新情绪状态，更新成功后追加一条情绪历史
         
         Args:
             character_id: 角色ID
             pad_impact: PAD三维变化值
+            source: 历史记录的来源，如event、interaction
             
         Returns:
             是否更新成功
         """
         try:
-            # 获取当前情绪状态
+            # 获取当前情绪状态(已衰减到当前时刻)
             current = self.get_emotion_by_character_id(character_id)
             if not current:
                 # 如果不存在，创建新的情绪记录
@@ -122,7 +143,10 @@ class EmotionDAO:
                     'dominance_score': pad_impact.get('dominance', 0),
                     'current_emotion_score': self._calculate_emotion_score(pad_impact)
                 }
-                return self.create_emotion(initial_data)
+                success = self.create_emotion(initial_data)
+                if success:
+                    self._record_history([initial_data], source)
+                return success
             
             # 计算新的情绪值，限制在-100到100范围内
             new_pleasure = max(-100, min(100, current['pleasure_score'] + pad_impact.get('pleasure', 0)))
@@ -144,7 +168,10 @@ class EmotionDAO:
                 'current_emotion_score': new_emotion_score
             }
             
-            return self.update_emotion(character_id, update_data)
+            success = self.update_emotion(character_id, update_data)
+            if success:
+                self._record_history([dict(update_data, character_id=character_id)], source)
+            return success
             
         except Exception as e:
             print(f"根据事件更新情绪失败: {e}")
@@ -184,7 +211,7 @@ class EmotionDAO:
     
     def get_emotions_batch(self, character_ids: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
         """
-        批量获取角色情绪状态
+        批量获取角色情绪状态，PAD值为按时间衰减到当前时刻的值
         
         Args:
             character_ids: 角色ID列表
@@ -197,8 +224,7 @@ class EmotionDAO:
         
         placeholders = ','.join(['%s'] * len(character_ids))
         query = f"""
-            SELECT character_id, pleasure_score, arousal_score, dominance_score, 
-                   current_emotion_score, updated_at, created_at
+            SELECT {EMOTION_COLUMNS}
             FROM emotions 
             WHERE character_id IN ({placeholders})
         """
@@ -207,8 +233,10 @@ class EmotionDAO:
             results = self.db.execute_query(query, character_ids)
             emotions_dict = {}
             
+            # 所有角色衰减到同一时刻
+            now = datetime.now()
             for row in results:
-                emotions_dict[row['character_id']] = row
+                emotions_dict[row['character_id']] = apply_decay(row, now)
             
             # 确保返回所有请求的character_id
             for char_id in character_ids:
@@ -231,20 +259,36 @@ class EmotionDAO:
         Returns:
             综合情绪分数 (-100到100)
         """
-        pleasure = pad_values.get('pleasure', 0)
-        arousal = pad_values.get('arousal', 0)
-        dominance = pad_values.get('dominance', 0)
-        
-        # 使用权重公式计算综合分数
-        score = int(pleasure * 0.4 + arousal * 0.35 + dominance * 0.25)
-        return max(-100, min(100, score))
+        return calculate_emotion_score(
+            pad_values.get('pleasure', 0),
+            pad_values.get('arousal', 0),
+            pad_values.get('dominance', 0)
+        )
     
-    def batch_update_emotions_from_events(self, updates: List[Dict[str, Any]]) -> Dict[str, bool]:
+    def _record_history(self, emotions: List[Dict[str, Any]], source: str, recorded_at: Optional[datetime] = None):
+        """把写入后的情绪值批量追加到情绪历史"""
+        recorded_at = recorded_at or datetime.now()
+        self.history_dao.record_history([
+            history_entry(
+                emotion['character_id'],
+                emotion['pleasure_score'],
+                emotion['arousal_score'],
+                emotion['dominance_score'],
+                emotion['current_emotion_score'],
+                source,
+                recorded_at
+            )
+            for emotion in emotions
+        ])
+    
+    def batch_update_emotions_from_events(self, updates: List[Dict[str, Any]],
+                                          source: str = SOURCE_EVENT) -> Dict[str, bool]:
         """
-        批量更新角色情绪状态 - 数据库层面批量操作
+        批量更新角色情绪状态 - 数据库层面批量操作，更新后批量追加情绪历史
         
         Args:
             updates: 更新数据列表，每项包含character_id和pad_impact
+            source: 历史记录的来源
             
         Returns:
             每个角色的更新结果
@@ -259,11 +303,17 @@ class EmotionDAO:
             # 获取当前所有角色的情绪状态
             placeholders = ','.join(['%s'] * len(character_ids))
             query = f"""
-                SELECT character_id, pleasure_score, arousal_score, dominance_score
+                SELECT character_id, pleasure_score, arousal_score, dominance_score,
+                       baseline_pleasure, baseline_arousal, baseline_dominance, half_life_scale, pad_updated_at
                 FROM emotions 
                 WHERE character_id IN ({placeholders})
             """
-            current_states = {row['character_id']: row for row in self.db.execute_query(query, character_ids)}
+            # 先把当前情绪衰减到本次写入时刻，再叠加事件影响
+            now = datetime.now()
+            current_states = {
+                row['character_id']: apply_decay(row, now)
+                for row in self.db.execute_query(query, character_ids)
+            }
             
             # 准备批量更新数据
             update_data = []
@@ -289,7 +339,7 @@ class EmotionDAO:
                         'dominance': new_dominance
                     })
                     
-                    update_data.append((new_pleasure, new_arousal, new_dominance, new_emotion_score, character_id))
+                    update_data.append((new_pleasure, new_arousal, new_dominance, new_emotion_score, now, character_id))
                     results[character_id] = True
                 else:
                     # 创建新记录
@@ -302,7 +352,7 @@ class EmotionDAO:
                         'dominance': new_dominance
                     })
                     
-                    new_records.append((character_id, new_pleasure, new_arousal, new_dominance, new_emotion_score))
+                    new_records.append((character_id, new_pleasure, new_arousal, new_dominance, new_emotion_score, now))
                     results[character_id] = True
             
             # 执行批量更新
@@ -310,7 +360,7 @@ class EmotionDAO:
                 update_query = """
                     UPDATE emotions 
                     SET pleasure_score = %s, arousal_score = %s, 
-                        dominance_score = %s, current_emotion_score = %s
+                        dominance_score = %s, current_emotion_score = %s, pad_updated_at = %s
                     WHERE character_id = %s
                 """
                 self.db.execute_batch_update(update_query, update_data)
@@ -319,11 +369,21 @@ class EmotionDAO:
             if new_records:
                 insert_query = """
                     INSERT INTO emotions (character_id, pleasure_score, arousal_score, 
-                                      dominance_score, current_emotion_score)
-                    VALUES (%s, %s, %s, %s, %s)
+                                      dominance_score, current_emotion_score, pad_updated_at)
+                    VALUES (%s, %s, %s, %s, %s, %s)
                 """
                 self.db.execute_batch_insert(insert_query, new_records)
             
+            # 更新和插入的行都记为一条历史
+            self._record_history(
+                [{'character_id': row[-1], 'pleasure_score': row[0], 'arousal_score': row[1],
+                  'dominance_score': row[2], 'current_emotion_score': row[3]} for row in update_data] +
+                [{'character_id': row[0], 'pleasure_score': row[1], 'arousal_score': row[2],
+                  'dominance_score': row[3], 'current_emotion_score': row[4]} for row in new_records],
+                source,
+                now
+            )
+            
             return results
             
         except Exception as e:
@@ -361,20 +421,22 @@ class EmotionDAO:
             
             # 构建批量插入数据
             insert_data = []
+            now = datetime.now()
             for character_id in new_character_ids:
                 insert_data.append((
                     character_id,
                     random.randint(-50, 50),
                     random.randint(-50, 50),
                     random.randint(-50, 50),
-                    random.randint(-50, 50)
+                    random.randint(-50, 50),
+                    now
                 ))
             
             # 执行批量插入
             insert_query = """
                 INSERT INTO emotions (character_id, pleasure_score, arousal_score, 
-                                  dominance_score, current_emotion_score)
-                VALUES (%s, %s, %s, %s, %s)
+                                  dominance_score, current_emotion_score, pad_updated_at)
+                VALUES (%s, %s, %s, %s, %s, %s)
             """
             self.db.execute_batch_insert(insert_query, insert_data)
             
@@ -385,6 +447,68 @@ class EmotionDAO:
             print(f"批量初始化角色情绪失败: {e}")
             return {cid: False for cid in character_ids}
 
+    def set_emotion_baselines(self, baselines: Dict[str, Dict[str, Any]]) -> int:
+        """
+        批量设置角色的基线情绪和半衰期倍率
+        
+        先把当前情绪按旧基线衰减到当前时刻并写回，之后的衰减从这一时刻开始按新基线计算
+        
+        Args:
+            baselines: 以角色ID为键，值包含baseline_pleasure、baseline_arousal、
+                       baseline_dominance和half_life_scale
+            
+        Returns:
+            更新的记录数
+        """
+        if not baselines:
+            return 0
+        
+        try:
+            character_ids = list(baselines)
+            placeholders = ','.join(['%s'] * len(character_ids))
+            query = f"""
+                SELECT character_id, pleasure_score, arousal_score, dominance_score,
+                       baseline_pleasure, baseline_arousal, baseline_dominance, half_life_scale, pad_updated_at
+                FROM emotions 
+                WHERE character_id IN ({placeholders})
+            """
+            now = datetime.now()
+            update_data = []
+            for row in self.db.execute_query(query, character_ids):
+                current = apply_decay(row, now)
+                baseline = baselines[row['character_id']]
+                update_data.append((
+                    current['pleasure_score'],
+                    current['arousal_score'],
+                    current['dominance_score'],
+                    calculate_emotion_score(
+                        current['pleasure_score'], current['arousal_score'], current['dominance_score']
+                    ),
+                    baseline['baseline_pleasure'],
+                    baseline['baseline_arousal'],
+                    baseline['baseline_dominance'],
+                    baseline['half_life_scale'],
+                    now,
+                    row['character_id']
+                ))
+            
+            if not update_data:
+                return 0
+            
+            update_query = """
+                UPDATE emotions 
+                SET pleasure_score = %s, arousal_score = %s, dominance_score = %s, current_emotion_score = %s,
+                    baseline_pleasure = %s, baseline_arousal = %s, baseline_dominance = %s,
+                    half_life_scale = %s, pad_updated_at = %s
+                WHERE character_id = %s
+            """
+            self.db.execute_batch_update(update_query, update_data)
+            return len(update_data)
+            
+        except Exception as e:
+            print(f"设置情绪基线失败: {e}")
+            return 0
+
 
 # 创建单例实例
 emotion_dao = EmotionDAO()
@@ -396,4 +520,5 @@ update_emotion = emotion_dao.update_emotion
 update_emotion_from_event = emotion_dao.update_emotion_from_event
 initialize_character_emotion = emotion_dao.initialize_character_emotion
 get_emotions_batch = emotion_dao.get_emotions_batch
-batch_initialize_characters = emotion_dao.batch_initialize_characters
\ No newline at end of file
+batch_initialize_characters = emotion_dao.batch_initialize_characters
+set_emotion_baselines = emotion_dao.set_emotion_baselines
@@ -0,0 +1,149 @@
+"""
+情绪历史数据访问对象
+追加写入emotion_history表，并增量维护emotion_rollup_hourly和emotion_rollup_daily汇总表
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from src.db.mysql_client import MySQLClient, mysql_client
+from src.emotion.model.emotion_history import (
+    RESOLUTION_AUTO, RESOLUTION_RAW, ROLLUP_TABLES,
+    bucket_start, build_rollup_rows, choose_resolution, downsample_series, history_to_point, rollup_to_point
+)
+from src.utils.tracing import traced_class
+
+# 是否记录情绪历史
+EMOTION_HISTORY_ENABLED = os.getenv("EMOTION_HISTORY_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# 查询原始历史记录时的最大行数
+RAW_HISTORY_LIMIT = int(os.getenv("EMOTION_HISTORY_RAW_LIMIT", "5000"))
+
+# 汇总行upsert：计数和累加值增量累加，最小/最大值取较小/较大者
+ROLLUP_UPSERT = """
+    INSERT INTO {table} (character_id, bucket_start, sample_count,
+                         sum_pleasure, sum_arousal, sum_dominance, sum_emotion_score,
+                         min_emotion_score, max_emotion_score)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        sample_count = sample_count + VALUES(sample_count),
+        sum_pleasure = sum_pleasure + VALUES(sum_pleasure),
+        sum_arousal = sum_arousal + VALUES(sum_arousal),
+        sum_dominance = sum_dominance + VALUES(sum_dominance),
+        sum_emotion_score = sum_emotion_score + VALUES(sum_emotion_score),
+        min_emotion_score = LEAST(min_emotion_score, VALUES(min_emotion_score)),
+        max_emotion_score = GREATEST(max_emotion_score, VALUES(max_emotion_score))
+"""
+
+ROLLUP_COLUMNS = (
+    'character_id', 'bucket_start', 'sample_count',
+    'sum_pleasure', 'sum_arousal', 'sum_dominance', 'sum_emotion_score',
+    'min_emotion_score', 'max_emotion_score'
+)
+
+
+@traced_class()
+class EmotionHistoryDAO:
+    """情绪历史数据访问对象"""
+
+    def __init__(self, db_client: Optional[MySQLClient] = None):
+        # 不传时使用进程内共享的连接，后台线程中使用时需传入独立的连接
+        self.db = db_client or mysql_client
+
+    def record_history(self, entries: List[Dict[str, Any]]) -> int:
+        """
+        批量追加情绪历史记录并累加到小时、天汇总表
+
+        历史写入失败只记录日志，不影响情绪本身的更新
+
+        Args:
+            entries: 历史记录列表，由emotion_history.history_entry构建
+
+        Returns:
+            写入的历史记录数
+        """
+        if not EMOTION_HISTORY_ENABLED or not entries:
+            return 0
+
+        try:
+            insert_query = """
+                INSERT INTO emotion_history (character_id, pleasure_score, arousal_score,
+                                             dominance_score, emotion_score, source, recorded_at)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """
+            self.db.execute_batch_insert(insert_query, [
+                (entry['character_id'], entry['pleasure'], entry['arousal'], entry['dominance'],
+                 entry['emotion_score'], entry['source'], entry['recorded_at'])
+                for entry in entries
+            ])
+
+            for resolution, table in ROLLUP_TABLES.items():
+                rows = build_rollup_rows(entries, resolution)
+                self.db.execute_batch_insert(
+                    ROLLUP_UPSERT.format(table=table),
+                    [tuple(row[column] for column in ROLLUP_COLUMNS) for row in rows]
+                )
+            return len(entries)
+
+        except Exception as e:
+            print(f"记录情绪历史失败: {e}")
+            return 0
+
+    def get_emotion_series(self, character_id: str, start_time: datetime, end_time: datetime,
+                           resolution: str = RESOLUTION_AUTO,
+                           max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        获取角色在时间范围内的情绪变化曲线
+
+        小时、天粒度从汇总表读取，raw粒度读取原始历史记录(最多RAW_HISTORY_LIMIT条)
+
+        Args:
+            character_id: 角色ID
+            start_time: 开始时间
+            end_time: 结束时间
+            resolution: 粒度，auto/raw/hour/day，auto按时间范围自动选择
+            max_points: 返回的最大点数，超过时合并相邻的点
+
+        Returns:
+            包含resolution和按时间排序的points
+
+        Raises:
+            ValueError: 粒度不合法
+        """
+        resolution = choose_resolution(start_time, end_time, resolution)
+
+        if resolution == RESOLUTION_RAW:
+            query = """
+                SELECT recorded_at, pleasure_score AS pleasure, arousal_score AS arousal,
+                       dominance_score AS dominance, emotion_score
+                FROM emotion_history
+                WHERE character_id = %s AND recorded_at BETWEEN %s AND %s
+                ORDER BY recorded_at
+                LIMIT %s
+            """
+            rows = self.db.execute_query(query, (character_id, start_time, end_time, RAW_HISTORY_LIMIT))
+            points = [history_to_point(row) for row in rows]
+        else:
+            query = f"""
+                SELECT {', '.join(ROLLUP_COLUMNS[1:9])}
+                FROM {ROLLUP_TABLES[resolution]}
+                WHERE character_id = %s AND bucket_start BETWEEN %s AND %s
+                ORDER BY bucket_start
+            """
+            # 包含开始时间所在的时间桶
+            rows = self.db.execute_query(query, (character_id, bucket_start(start_time, resolution), end_time))
+            points = [rollup_to_point(row) for row in rows]
+
+        return {
+            'resolution': resolution,
+            'points': downsample_series(points, max_points)
+        }
+
+
+# 创建单例实例
+emotion_history_dao = EmotionHistoryDAO()
+
+# 便捷函数
+record_history = emotion_history_dao.record_history
+get_emotion_series = emotion_history_dao.get_emotion_series
@@ -0,0 +1,121 @@
+"""
+情绪时间衰减模型
+情绪在没有新事件时按半衰期向角色的基线情绪回归。数据库只保存最后一次写入的PAD值和写入时间(pad_updated_at)，
+读取时根据经过的时间计算当前值，衰减本身不产生任何数据库写入
+"""
+
+import os
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+DIMENSIONS = ('pleasure', 'arousal', 'dominance')
+
+# 是否在读取时计算衰减
+EMOTION_DECAY_ENABLED = os.getenv("EMOTION_DECAY_ENABLED", "true").lower() in ("1", "true", "yes")
+
+# 各维度的半衰期(小时)：激活度消退最快，支配感最慢
+HALF_LIFE_HOURS = {
+    'pleasure': float(os.getenv("EMOTION_HALF_LIFE_HOURS_PLEASURE", "6")),
+    'arousal': float(os.getenv("EMOTION_HALF_LIFE_HOURS_AROUSAL", "2")),
+    'dominance': float(os.getenv("EMOTION_HALF_LIFE_HOURS_DOMINANCE", "12")),
+}
+
+# 情绪波动类型对半衰期的倍率：稳定的角色很快回到基线，敏感、缓慢的角色情绪持续更久
+MOOD_SWINGS_HALF_LIFE_SCALE = {
+    '稳定': 0.5,
+    '多变': 0.75,
+    '敏感': 1.5,
+    '缓慢': 2.0,
+}
+
+# 基线情绪的绝对值上限，避免人格特质把基线推到极端情绪
+BASELINE_LIMIT = 50
+
+
+def calculate_emotion_score(pleasure: float, arousal: float, dominance: float) -> int:
+    """综合情绪分数 = P*0.4 + A*0.35 + D*0.25，限制在-100到100之间"""
+    score = int(pleasure * 0.4 + arousal * 0.35 + dominance * 0.25)
+    return max(-100, min(100, score))
+
+
+def compute_baseline(big5: Optional[Dict[str, float]], mood_swings: Optional[str]) -> Dict[str, Any]:
+    """根据大五人格和情绪波动类型计算角色的基线情绪和半衰期倍率
+
+    使用Mehrabian的大五人格到PAD气质映射，情绪稳定性取1-神经质。
+    特质得分以0.5为中性，缺失的特质按中性处理
+
+    Args:
+        big5: 大五人格得分，取值0到1
+        mood_swings: 情绪波动类型，如'稳定'、'敏感'
+
+    Returns:
+        Dict[str, Any]: baseline_pleasure、baseline_arousal、baseline_dominance和half_life_scale
+    """
+    big5 = big5 or {}
+
+    def trait(name: str) -> float:
+        try:
+            return (float(big5.get(name, 0.5)) - 0.5) * 2
+        except (TypeError, ValueError):
+            return 0.0
+
+    openness = trait('开放性')
+    conscientiousness = trait('尽责性')
+    extraversion = trait('外倾性')
+    agreeableness = trait('宜人性')
+    stability = -trait('神经质')
+
+    pad = {
+        'pleasure': 0.21 * extraversion + 0.59 * agreeableness + 0.19 * stability,
+        'arousal': 0.15 * openness + 0.30 * agreeableness - 0.57 * stability,
+        'dominance': 0.25 * openness + 0.17 * conscientiousness + 0.60 * extraversion - 0.32 * agreeableness,
+    }
+    baseline = {
+        f'baseline_{dimension}': max(-BASELINE_LIMIT, min(BASELINE_LIMIT, int(round(value * BASELINE_LIMIT))))
+        for dimension, value in pad.items()
+    }
+    baseline['half_life_scale'] = MOOD_SWINGS_HALF_LIFE_SCALE.get(mood_swings, 1.0)
+    return baseline
+
+
+def decay_value(value: float, baseline: float, elapsed_seconds: float, half_life_hours: float) -> float:
+    """按半衰期计算经过elapsed_seconds后的情绪值"""
+    if elapsed_seconds <= 0 or half_life_hours <= 0:
+        return value
+    return baseline + (value - baseline) * 0.5 ** (elapsed_seconds / (half_life_hours * 3600))
+
+
+def apply_decay(row: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """计算一条情绪记录在now时刻衰减后的PAD值和综合分数
+
+    没有pad_updated_at的记录(迁移前的数据)或未启用衰减时原样返回
+
+    Args:
+        row: emotions表中的一行，需包含PAD值、基线、half_life_scale和pad_updated_at
+        now: 计算时刻，默认为当前时间
+
+    Returns:
+        Dict[str, Any]: 新的字典，PAD值和current_emotion_score为衰减后的值
+    """
+    updated_at = row.get('pad_updated_at')
+    if not EMOTION_DECAY_ENABLED or updated_at is None:
+        return row
+
+    elapsed = ((now or datetime.now()) - updated_at).total_seconds()
+    if elapsed <= 0:
+        return row
+
+    scale = row.get('half_life_scale') or 1.0
+    decayed = dict(row)
+    for dimension in DIMENSIONS:
+        value = decay_value(
+            row[f'{dimension}_score'],
+            row.get(f'baseline_{dimension}') or 0,
+            elapsed,
+            HALF_LIFE_HOURS[dimension] * scale
+        )
+        decayed[f'{dimension}_score'] = int(round(value))
+    decayed['current_emotion_score'] = calculate_emotion_score(
+        decayed['pleasure_score'], decayed['arousal_score'], decayed['dominance_score']
+    )
+    return decayed
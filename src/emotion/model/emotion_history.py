@@ -0,0 +1,156 @@
+"""
+情绪历史时间序列
+情绪每次写入时追加一条历史记录，并增量累加到按小时、按天聚合的汇总表中。
+查询情绪变化曲线时从汇总表读取，点数过多时再合并相邻时间桶进行降采样
+"""
+
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional
+
+RESOLUTION_RAW = 'raw'
+RESOLUTION_HOUR = 'hour'
+RESOLUTION_DAY = 'day'
+RESOLUTION_AUTO = 'auto'
+RESOLUTIONS = (RESOLUTION_AUTO, RESOLUTION_RAW, RESOLUTION_HOUR, RESOLUTION_DAY)
+
+# 汇总表按粒度划分
+ROLLUP_TABLES = {
+    RESOLUTION_HOUR: 'emotion_rollup_hourly',
+    RESOLUTION_DAY: 'emotion_rollup_daily',
+}
+
+# auto粒度下，时间范围不超过该值时使用小时汇总，否则使用天汇总
+HOURLY_RANGE_LIMIT = timedelta(days=3)
+
+# 历史记录的来源
+SOURCE_EVENT = 'event'
+SOURCE_INTERACTION = 'interaction'
+SOURCE_MANUAL = 'manual'
+
+
+def bucket_start(moment: datetime, resolution: str) -> datetime:
+    """时间所在汇总桶的起始时间"""
+    if resolution == RESOLUTION_DAY:
+        return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+def choose_resolution(start_time: datetime, end_time: datetime, resolution: str = RESOLUTION_AUTO) -> str:
+    """根据查询时间范围选择汇总粒度"""
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"不支持的粒度: {resolution}，可选值: {', '.join(RESOLUTIONS)}")
+    if resolution != RESOLUTION_AUTO:
+        return resolution
+    return RESOLUTION_HOUR if end_time - start_time <= HOURLY_RANGE_LIMIT else RESOLUTION_DAY
+
+
+def history_entry(character_id: str, pleasure: int, arousal: int, dominance: int, emotion_score: int,
+                  source: str, recorded_at: datetime) -> Dict[str, Any]:
+    """构建一条情绪历史记录"""
+    return {
+        'character_id': character_id,
+        'pleasure': pleasure,
+        'arousal': arousal,
+        'dominance': dominance,
+        'emotion_score': emotion_score,
+        'source': source,
+        'recorded_at': recorded_at,
+    }
+
+
+def build_rollup_rows(entries: Iterable[Dict[str, Any]], resolution: str) -> List[Dict[str, Any]]:
+    """把一批历史记录按(角色, 时间桶)预先聚合，每个时间桶只需一次upsert
+
+    Returns:
+        List[Dict[str, Any]]: 每项包含character_id、bucket_start、sample_count、各维度之和、
+                              综合分数的最小/最大值
+    """
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for entry in entries:
+        key = (entry['character_id'], bucket_start(entry['recorded_at'], resolution))
+        row = rows.get(key)
+        if row is None:
+            row = rows[key] = {
+                'character_id': key[0],
+                'bucket_start': key[1],
+                'sample_count': 0,
+                'sum_pleasure': 0,
+                'sum_arousal': 0,
+                'sum_dominance': 0,
+                'sum_emotion_score': 0,
+                'min_emotion_score': entry['emotion_score'],
+                'max_emotion_score': entry['emotion_score'],
+            }
+        row['sample_count'] += 1
+        row['sum_pleasure'] += entry['pleasure']
+        row['sum_arousal'] += entry['arousal']
+        row['sum_dominance'] += entry['dominance']
+        row['sum_emotion_score'] += entry['emotion_score']
+        row['min_emotion_score'] = min(row['min_emotion_score'], entry['emotion_score'])
+        row['max_emotion_score'] = max(row['max_emotion_score'], entry['emotion_score'])
+    return list(rows.values())
+
+
+def rollup_to_point(row: Dict[str, Any]) -> Dict[str, Any]:
+    """汇总行转换为曲线上的一个点，PAD为时间桶内的平均值"""
+    count = row['sample_count'] or 1
+    return {
+        'time': row['bucket_start'],
+        'pleasure': round(row['sum_pleasure'] / count, 2),
+        'arousal': round(row['sum_arousal'] / count, 2),
+        'dominance': round(row['sum_dominance'] / count, 2),
+        'emotion_score': round(row['sum_emotion_score'] / count, 2),
+        'min_emotion_score': row['min_emotion_score'],
+        'max_emotion_score': row['max_emotion_score'],
+        'count': row['sample_count'],
+    }
+
+
+def history_to_point(row: Dict[str, Any]) -> Dict[str, Any]:
+    """原始历史记录转换为曲线上的一个点"""
+    return {
+        'time': row['recorded_at'],
+        'pleasure': row['pleasure'],
+        'arousal': row['arousal'],
+        'dominance': row['dominance'],
+        'emotion_score': row['emotion_score'],
+        'min_emotion_score': row['emotion_score'],
+        'max_emotion_score': row['emotion_score'],
+        'count': 1,
+    }
+
+
+def downsample_series(points: List[Dict[str, Any]], max_points: Optional[int]) -> List[Dict[str, Any]]:
+    """点数超过max_points时按顺序合并相邻的点，PAD按样本数加权平均
+
+    Args:
+        points: 按时间排序的点
+        max_points: 返回的最大点数，为空或不超过0时不降采样
+
+    Returns:
+        List[Dict[str, Any]]: 降采样后的点，time为每组第一个点的时间
+    """
+    if not max_points or max_points <= 0 or len(points) <= max_points:
+        return points
+
+    size = math.ceil(len(points) / max_points)
+    merged = []
+    for offset in range(0, len(points), size):
+        group = points[offset:offset + size]
+        count = sum(point['count'] for point in group) or 1
+
+        def weighted(key: str) -> float:
+            return round(sum(point[key] * point['count'] for point in group) / count, 2)
+
+        merged.append({
+            'time': group[0]['time'],
+            'pleasure': weighted('pleasure'),
+            'arousal': weighted('arousal'),
+            'dominance': weighted('dominance'),
+            'emotion_score': weighted('emotion_score'),
+            'min_emotion_score': min(point['min_emotion_score'] for point in group),
+            'max_emotion_score': max(point['max_emotion_score'] for point in group),
+            'count': count,
+        })
+    return merged
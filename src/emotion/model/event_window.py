@@ -0,0 +1,172 @@
+"""
+列式事件窗口
+将一个时间窗口内的生活轨迹事件按列保存为NumPy数组(角色下标、开始时间、P/A/D评分)，
+按角色汇总PAD时使用np.bincount一次完成，不再逐个事件循环累加
+"""
+
+from array import array
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _to_timestamp(moment: Optional[datetime]) -> float:
+    if moment is None:
+        return np.nan
+    try:
+        return moment.timestamp()
+    except (ValueError, OverflowError, OSError):
+        return np.nan
+
+
+class EventWindowBuilder:
+    """从数据库游标逐条追加事件，构建EventWindow"""
+
+    def __init__(self):
+        self._character_index: Dict[str, int] = {}
+        self._character_ids: List[str] = []
+        self._event_ids: List[Optional[str]] = []
+        self._event_types: List[str] = []
+        self._characters = array('q')
+        self._timestamps = array('d')
+        self._pad = array('q')
+        self._valid = array('b')
+
+    def add(self, character_id: str, event: Dict[str, Any], start_time: Optional[datetime] = None):
+        """追加一个事件
+
+        Args:
+            character_id: 事件所属角色ID
+            event: 事件文档，只读取event_id、event_type和PAD评分
+            start_time: 已解析的事件开始时间
+        """
+        index = self._character_index.get(character_id)
+        if index is None:
+            index = len(self._character_ids)
+            self._character_index[character_id] = index
+            self._character_ids.append(character_id)
+
+        try:
+            pad = (int(event.get('pleasure_score', 0)),
+                   int(event.get('arousal_score', 0)),
+                   int(event.get('dominance_score', 0)))
+            valid = 1
+        except (ValueError, TypeError):
+            # PAD数值无效的事件不参与汇总，但仍计入窗口并被标记为已处理
+            pad = (0, 0, 0)
+            valid = 0
+
+        self._characters.append(index)
+        self._event_ids.append(event.get('event_id'))
+        self._event_types.append(event.get('event_type', 'unknown'))
+        self._timestamps.append(_to_timestamp(start_time))
+        self._pad.extend(pad)
+        self._valid.append(valid)
+
+    def build(self) -> 'EventWindow':
+        """构建窗口，构建后不能再追加事件"""
+        return EventWindow(
+            character_ids=self._character_ids,
+            characters=np.frombuffer(self._characters, dtype=np.int64) if self._characters else np.empty(0, np.int64),
+            event_ids=self._event_ids,
+            event_types=self._event_types,
+            timestamps=np.frombuffer(self._timestamps, dtype=np.float64) if self._timestamps else np.empty(0),
+            pad=(np.frombuffer(self._pad, dtype=np.int64).reshape(-1, 3) if self._pad
+                 else np.empty((0, 3), np.int64)),
+            valid=np.frombuffer(self._valid, dtype=np.int8).astype(bool) if self._valid else np.empty(0, bool),
+        )
+
+
+class EventWindow:
+    """列式事件窗口
+
+    Attributes:
+        character_ids: 角色下标 -> 角色ID
+        characters: 每个事件的角色下标
+        event_ids: 每个事件的ID
+        event_types: 每个事件的类型
+        timestamps: 每个事件的开始时间(Unix时间戳，无法解析时为NaN)
+        pad: 每个事件的P/A/D评分，形状为(n, 3)
+        valid: 每个事件的PAD评分是否有效
+    """
+
+    def __init__(self, character_ids: List[str], characters: np.ndarray, event_ids: List[Optional[str]],
+                 event_types: List[str], timestamps: np.ndarray, pad: np.ndarray, valid: np.ndarray):
+        self.character_ids = character_ids
+        self.characters = characters
+        self.event_ids = event_ids
+        self.event_types = event_types
+        self.timestamps = timestamps
+        self.pad = pad
+        self.valid = valid
+
+    def __len__(self):
+        return len(self.characters)
+
+    def character_of(self, row: int) -> str:
+        return self.character_ids[self.characters[row]]
+
+    def select(self, mask: np.ndarray) -> 'EventWindow':
+        """按布尔掩码筛选事件，返回新的窗口"""
+        rows = np.flatnonzero(mask)
+        return EventWindow(
+            character_ids=self.character_ids,
+            characters=self.characters[rows],
+            event_ids=[self.event_ids[row] for row in rows],
+            event_types=[self.event_types[row] for row in rows],
+            timestamps=self.timestamps[rows],
+            pad=self.pad[rows],
+            valid=self.valid[rows],
+        )
+
+    def with_character(self) -> 'EventWindow':
+        """去掉没有角色ID的事件"""
+        known = np.array([bool(character_id) for character_id in self.character_ids], dtype=bool)
+        if known.all():
+            return self
+        return self.select(known[self.characters])
+
+    def event_counts(self) -> np.ndarray:
+        """每个角色下标的事件数量"""
+        return np.bincount(self.characters, minlength=len(self.character_ids))
+
+    def pad_sums(self) -> np.ndarray:
+        """按角色汇总有效事件的PAD评分，返回形状为(角色数, 3)的数组"""
+        size = len(self.character_ids)
+        sums = np.zeros((size, 3), dtype=np.int64)
+        if len(self):
+            characters = self.characters[self.valid]
+            pad = self.pad[self.valid]
+            # bincount按下标分组求和，比np.add.at快一个数量级
+            for dimension in range(3):
+                sums[:, dimension] = np.bincount(characters, weights=pad[:, dimension], minlength=size)
+        return sums
+
+    def cumulative_pad_impact(self, limit: int = 80) -> Dict[str, Dict[str, int]]:
+        """计算窗口内每个角色累积的PAD影响
+
+        Args:
+            limit: 每个维度累积值的绝对值上限，避免极端值
+
+        Returns:
+            Dict[str, Dict[str, int]]: 以角色ID为键，pleasure/arousal/dominance为值的字典，只包含窗口内有事件的角色
+        """
+        present = np.flatnonzero(self.event_counts())
+        clipped = np.clip(self.pad_sums()[present], -limit, limit)
+        return {
+            self.character_ids[index]: {
+                "pleasure": int(row[0]),
+                "arousal": int(row[1]),
+                "dominance": int(row[2])
+            }
+            for index, row in zip(present.tolist(), clipped)
+        }
+
+    def event_records(self) -> List[Dict[str, Any]]:
+        """以字典列表返回窗口内事件的角色ID、事件ID和类型，用于去重检查和标记"""
+        character_ids = self.character_ids
+        return [
+            {'character_id': character_ids[index], 'event_id': event_id, 'event_type': event_type}
+            for index, event_id, event_type in zip(self.characters.tolist(), self.event_ids, self.event_types)
+        ]
@@ -0,0 +1,313 @@
+"""
+情绪统计分析
+把情绪记录保存为NumPy数组(PAD形状为(n, 3))，均值、波动、情绪分布、趋势斜率和滑动窗口都在数组上一次计算完成，
+可用于单个角色一年的情绪历史，也可以按角色分组统计全部角色
+"""
+
+from collections import Counter
+from datetime import datetime
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.emotion.model.emotion_mapping import EmotionMappings
+
+DIMENSIONS = ('pleasure', 'arousal', 'dominance')
+
+SECONDS_PER_DAY = 86400
+
+# 情绪分类按块计算，(块大小, 映射数)的中间数组可以留在CPU缓存中
+CLASSIFY_CHUNK_SIZE = 2048
+
+_get_pad = itemgetter(*DIMENSIONS)
+_get_state_pad = attrgetter(*DIMENSIONS)
+
+# 回退匹配时按愉悦度从高到低对应的情绪，与EmotionMappings.find_matching_emotion保持一致
+_FALLBACK_THRESHOLDS = ((60, "开心"), (20, "平静"), (-20, "无聊"), (-50, "焦虑"))
+_FALLBACK_LOWEST = "愤怒"
+
+
+def _to_timestamp(value: Any) -> float:
+    if value is None:
+        return np.nan
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return np.nan
+    if isinstance(value, datetime):
+        return value.timestamp()
+    return float(value)
+
+
+def _mapping_arrays():
+    """把情绪映射表的PAD范围展开为(3, m)的下限和上限数组，以及回退匹配使用的映射下标"""
+    mappings = EmotionMappings.MAPPINGS
+    lower = np.array([[m.pleasure_range[0], m.arousal_range[0], m.dominance_range[0]] for m in mappings], float).T
+    upper = np.array([[m.pleasure_range[1], m.arousal_range[1], m.dominance_range[1]] for m in mappings], float).T
+    index = {m.traditional: i for i, m in reversed(list(enumerate(mappings)))}
+    fallback = [(threshold, index[label]) for threshold, label in _FALLBACK_THRESHOLDS]
+    return mappings, lower, upper, fallback, index[_FALLBACK_LOWEST]
+
+
+def classify_emotion_indices(pad: np.ndarray) -> np.ndarray:
+    """批量计算PAD值最匹配的情绪在EmotionMappings.MAPPINGS中的下标
+
+    与EmotionMappings.find_matching_emotion的打分规则一致，逐维度在(n, 映射数)的数组上计算
+
+    Args:
+        pad: 形状为(n, 3)的PAD数组
+
+    Returns:
+        np.ndarray: 长度为n的映射下标数组
+    """
+    pad = np.asarray(pad, dtype=float).reshape(-1, 3)
+    if not len(pad):
+        return np.empty(0, dtype=np.int64)
+    _, lower, upper, fallback, lowest = _mapping_arrays()
+    if len(pad) > CLASSIFY_CHUNK_SIZE:
+        return np.concatenate([
+            _classify_chunk(pad[offset:offset + CLASSIFY_CHUNK_SIZE], lower, upper, fallback, lowest)
+            for offset in range(0, len(pad), CLASSIFY_CHUNK_SIZE)
+        ])
+    return _classify_chunk(pad, lower, upper, fallback, lowest)
+
+
+def _classify_chunk(pad: np.ndarray, lower: np.ndarray, upper: np.ndarray, fallback, lowest: int) -> np.ndarray:
+    """计算一块PAD值的匹配分数并取最高分，分数过低时按愉悦度回退"""
+    total = np.zeros((len(pad), lower.shape[1]))
+    for dimension, weight in enumerate((0.4, 0.35, 0.25)):
+        values = pad[:, dimension:dimension + 1]
+        low, high = lower[dimension], upper[dimension]
+        center = (low + high) / 2
+        inside = (values >= low) & (values <= high)
+        in_range = 1.0 - (np.abs(values - center) / ((high - low) / 2)) * 0.5
+        outside = np.maximum(0, 1.0 - np.maximum(low - values, values - high) / 50)
+        total += np.where(inside, in_range, outside) * weight
+
+    # argmax在分数相同时取第一个，与max()的行为一致
+    best = np.argmax(total, axis=1)
+
+    weak = total[np.arange(len(pad)), best] < 0.3
+    if weak.any():
+        pleasure = pad[weak, 0]
+        replacement = np.full(len(pleasure), lowest)
+        for threshold, index in reversed(fallback):
+            replacement[pleasure >= threshold] = index
+        best[weak] = replacement
+    return best
+
+
+def classify_emotions(pad: np.ndarray) -> np.ndarray:
+    """批量计算PAD值对应的传统情绪标签"""
+    labels = np.array([m.traditional for m in EmotionMappings.MAPPINGS], dtype=object)
+    return labels[classify_emotion_indices(pad)]
+
+
+class EmotionSeries:
+    """情绪序列
+
+    Attributes:
+        pad: 形状为(n, 3)的PAD数组
+        times: 每条记录的Unix时间戳，未知时为NaN
+        weights: 每条记录代表的样本数，汇总点为时间桶内的记录数，原始记录为1
+        labels: 每条记录的传统情绪标签，为空时按PAD计算
+    """
+
+    def __init__(self, pad: np.ndarray, times: Optional[np.ndarray] = None,
+                 weights: Optional[np.ndarray] = None, labels: Optional[Sequence[str]] = None):
+        self.pad = np.asarray(pad, dtype=float).reshape(-1, 3)
+        size = len(self.pad)
+        self.times = np.full(size, np.nan) if times is None else np.asarray(times, dtype=float)
+        self.weights = np.ones(size) if weights is None else np.asarray(weights, dtype=float)
+        self._labels = None if labels is None else list(labels)
+        self._unit_weights = weights is None
+
+    @classmethod
+    def from_records(cls, records: Iterable[Dict[str, Any]]) -> 'EmotionSeries':
+        """从字典列表创建，读取pleasure/arousal/dominance，以及可选的traditional_emotion、timestamp和count
+
+        可选字段以第一条记录为准，只有第一条记录包含时才读取
+        """
+        records = list(records)
+        if not records:
+            return cls(np.empty((0, 3)))
+        pad = np.array(list(map(_get_pad, records)), dtype=float)
+        first = records[0]
+        labels = times = weights = None
+        if "traditional_emotion" in first:
+            labels = [r.get("traditional_emotion") for r in records]
+        time_key = "timestamp" if "timestamp" in first else "time" if "time" in first else None
+        if time_key:
+            times = [_to_timestamp(r.get(time_key)) for r in records]
+        if "count" in first:
+            weights = [r.get("count", 1) for r in records]
+        return cls(pad, times, weights, labels)
+
+    @classmethod
+    def from_states(cls, states: Iterable[Any]) -> 'EmotionSeries':
+        """从EmotionState列表创建"""
+        states = list(states)
+        if not states:
+            return cls(np.empty((0, 3)))
+        pad = np.array(list(map(_get_state_pad, states)), dtype=float)
+        times = [_to_timestamp(s.timestamp) for s in states]
+        return cls(pad, times, labels=[s.traditional_emotion for s in states])
+
+    @classmethod
+    def from_points(cls, points: Iterable[Dict[str, Any]]) -> 'EmotionSeries':
+        """从情绪历史曲线的点创建，每个点按其样本数加权"""
+        return cls.from_records(points)
+
+    def __len__(self):
+        return len(self.pad)
+
+    @property
+    def labels(self) -> list:
+        if self._labels is None:
+            self._labels = classify_emotions(self.pad).tolist()
+        return self._labels
+
+    @property
+    def total_weight(self) -> float:
+        return float(self.weights.sum())
+
+    def mean(self) -> np.ndarray:
+        """各维度的加权平均值"""
+        if not len(self):
+            return np.zeros(3)
+        return self.weights @ self.pad / self.total_weight
+
+    def volatility(self) -> np.ndarray:
+        """各维度相对平均值的加权平均绝对偏差"""
+        if not len(self):
+            return np.zeros(3)
+        return self.weights @ np.abs(self.pad - self.mean()) / self.total_weight
+
+    def stability(self) -> float:
+        """情绪稳定性 = 100 - 三个维度平均绝对偏差的均值"""
+        return float(100 - self.volatility().mean())
+
+    def distribution(self) -> Dict[str, int]:
+        """各情绪出现的次数，按首次出现的顺序排列"""
+        if not len(self):
+            return {}
+        if self._labels is None:
+            # 没有标签时直接按映射下标计数，不生成字符串标签
+            indices = classify_emotion_indices(self.pad)
+            counts = np.bincount(indices, weights=self.weights, minlength=len(EmotionMappings.MAPPINGS))
+            present, first = np.unique(indices, return_index=True)
+            return {
+                EmotionMappings.MAPPINGS[index].traditional: int(round(counts[index]))
+                for index in present[np.argsort(first)].tolist()
+            }
+        if self._unit_weights:
+            # Counter在C中计数，并保留首次出现的顺序
+            return dict(Counter(self.labels))
+        codes: Dict[str, int] = {}
+        inverse = np.fromiter((codes.setdefault(label, len(codes)) for label in self.labels),
+                              dtype=np.int64, count=len(self))
+        counts = np.bincount(inverse, weights=self.weights, minlength=len(codes))
+        return {label: int(round(counts[code])) for label, code in codes.items()}
+
+    def dominant_emotion(self) -> Optional[Tuple[str, int]]:
+        """出现次数最多的情绪及其次数，次数相同时取先出现的"""
+        distribution = self.distribution()
+        if not distribution:
+            return None
+        return max(distribution.items(), key=lambda item: item[1])
+
+    def trend_slope(self) -> np.ndarray:
+        """各维度随时间变化的加权最小二乘斜率(每天变化量)，时间未知或不足两个时间点时为0"""
+        known = ~np.isnan(self.times)
+        if known.sum() < 2:
+            return np.zeros(3)
+        t = self.times[known] / SECONDS_PER_DAY
+        w = self.weights[known]
+        x = self.pad[known]
+        t_centered = t - (w @ t) / w.sum()
+        variance = w @ (t_centered ** 2)
+        if variance == 0:
+            return np.zeros(3)
+        return (w * t_centered) @ (x - (w @ x) / w.sum()) / variance
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """按记录顺序计算窗口大小为window的加权滑动平均，返回形状为(n - window + 1, 3)的数组"""
+        if window <= 0:
+            raise ValueError("窗口大小必须大于0")
+        if len(self) < window:
+            return np.empty((0, 3))
+        weighted = np.cumsum(np.vstack([np.zeros(3), self.pad * self.weights[:, None]]), axis=0)
+        weights = np.cumsum(np.concatenate([[0.0], self.weights]))
+        return (weighted[window:] - weighted[:-window]) / (weights[window:] - weights[:-window])[:, None]
+
+    def summary(self, rolling_window: Optional[int] = None) -> Dict[str, Any]:
+        """汇总平均值、波动、稳定性、情绪分布、主要情绪和趋势斜率
+
+        Args:
+            rolling_window: 需要滑动平均时的窗口大小
+        """
+        if not len(self):
+            return {"total_records": 0}
+        mean = self.mean()
+        volatility = self.volatility()
+        distribution = self.distribution()
+        dominant = max(distribution.items(), key=lambda item: item[1])
+        total = int(round(self.total_weight))
+        result = {
+            "total_records": total,
+            "average": _dimension_dict(mean),
+            "volatility": _dimension_dict(volatility),
+            "stability": round(float(100 - volatility.mean()), 2),
+            "trend_slope_per_day": _dimension_dict(self.trend_slope(), digits=4),
+            "main_emotion": dominant[0],
+            "main_emotion_count": dominant[1],
+            "main_emotion_percentage": round(dominant[1] / total * 100, 1) if total else 0,
+            "emotion_distribution": distribution,
+        }
+        if rolling_window:
+            result["rolling_mean"] = [_dimension_dict(row) for row in self.rolling_mean(rolling_window)]
+        return result
+
+
+def _dimension_dict(values: np.ndarray, digits: int = 2) -> Dict[str, float]:
+    return {dim: round(float(value), digits) for dim, value in zip(DIMENSIONS, values)}
+
+
+def summarize_by_character(character_ids: Sequence[str], pad: np.ndarray,
+                           weights: Optional[np.ndarray] = None) -> Dict[str, Dict[str, Any]]:
+    """按角色分组统计全部角色的平均值和波动
+
+    Args:
+        character_ids: 每条记录所属的角色ID
+        pad: 形状为(n, 3)的PAD数组
+        weights: 每条记录代表的样本数
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 以角色ID为键，包含count、average、volatility和stability
+    """
+    pad = np.asarray(pad, dtype=float).reshape(-1, 3)
+    if not len(pad):
+        return {}
+    weights = np.ones(len(pad)) if weights is None else np.asarray(weights, dtype=float)
+    ids, inverse = np.unique(np.asarray(character_ids, dtype=str), return_inverse=True)
+    size = len(ids)
+
+    totals = np.bincount(inverse, weights=weights, minlength=size)
+    sums = np.column_stack([np.bincount(inverse, weights=weights * pad[:, d], minlength=size) for d in range(3)])
+    means = sums / totals[:, None]
+    deviation = np.abs(pad - means[inverse]) * weights[:, None]
+    volatility = np.column_stack([
+        np.bincount(inverse, weights=deviation[:, d], minlength=size) for d in range(3)
+    ]) / totals[:, None]
+
+    return {
+        str(character_id): {
+            "count": int(round(totals[i])),
+            "average": _dimension_dict(means[i]),
+            "volatility": _dimension_dict(volatility[i]),
+            "stability": round(float(100 - volatility[i].mean()), 2),
+        }
+        for i, character_id in enumerate(ids)
+    }
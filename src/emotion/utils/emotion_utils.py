@@ -121,36 +121,29 @@ def generate_emotion_summary(emotions: list) -> Dict:
     if not emotions:
         return {"message": "暂无情绪数据"}
     
-    # 计算平均值
-    avg_pleasure = sum(e["pleasure"] for e in emotions) / len(emotions)
-    avg_arousal = sum(e["arousal"] for e in emotions) / len(emotions)
-    avg_dominance = sum(e["dominance"] for e in emotions) / len(emotions)
+    # NumPy在首次统计时才导入
+    from src.emotion.utils.emotion_analytics import EmotionSeries
     
-    # 情绪分布
-    emotion_counts = {}
-    for e in emotions:
-        emotion = e["traditional_emotion"]
-        emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
+    # 平均值、波动和情绪分布在数组上一次计算
+    series = EmotionSeries.from_records(emotions)
+    average = series.mean()
+    emotion_counts = series.distribution()
     
     # 主要情绪
     main_emotion = max(emotion_counts.items(), key=lambda x: x[1])
     
     # 情绪稳定性
-    stability = 100 - (
-        sum(abs(e["pleasure"] - avg_pleasure) for e in emotions) +
-        sum(abs(e["arousal"] - avg_arousal) for e in emotions) +
-        sum(abs(e["dominance"] - avg_dominance) for e in emotions)
-    ) / (len(emotions) * 3)
+    stability = series.stability()
     
     return {
         "summary": {
             "total_records": len(emotions),
             "main_emotion": main_emotion[0],
             "main_emotion_percentage": round(main_emotion[1] / len(emotions) * 100, 1),
-            "average_pleasure": round(avg_pleasure, 2),
-            "average_arousal": round(avg_arousal, 2),
-            "average_dominance": round(avg_dominance, 2),
+            "average_pleasure": round(float(average[0]), 2),
+            "average_arousal": round(float(average[1]), 2),
+            "average_dominance": round(float(average[2]), 2),
             "emotional_stability": round(stability, 2)
         },
         "emotion_distribution": emotion_counts
-    }
\ No newline at end of file
+    }
@@ -1,199 +1,283 @@
+import os
+import time
 import logging
-from datetime import datetime, timedelta
+import threading
 from typing import List, Dict, Any, Optional
 from src.db.mysql_client import MySQLClient
+from src.utils.ttl_set import RotatingTTLSet
 
 logger = logging.getLogger(__name__)
 
+# 去重窗口(分钟)
+DEDUP_TTL_MINUTES = int(os.getenv("EMOTION_DEDUP_TTL_MINUTES", "30"))
+# 关闭时保存已处理事件的快照文件，为空时不保存
+DEDUP_SNAPSHOT_PATH = os.getenv("EMOTION_DEDUP_SNAPSHOT_PATH", "")
+# 是否同时写入emotion_thirty_min_temp表，用于进程崩溃后恢复去重状态
+DEDUP_TABLE_FALLBACK = os.getenv("EMOTION_DEDUP_TABLE_FALLBACK", "true").lower() == "true"
+
+
 class EventDeduplicator:
-    """事件去重处理器 - 防止30分钟内重复处理同一生活轨迹事件"""
-    
-    def __init__(self, db_client: MySQLClient):
+    """事件去重处理器 - 防止30分钟内重复处理同一生活轨迹事件
+
+    已处理的事件保存在进程内按分钟分桶轮转的TTL集合中，检查和标记都不访问数据库。
+    emotion_thirty_min_temp表只作为崩溃恢复的后备：标记时一并写入，进程启动后内存中还没有
+    完整的去重窗口时，内存未命中的事件再查表确认。只有上次正常关闭时在去重窗口内保存的快照
+    才能跳过查表，快照加载后即删除。
+    多个进程同时运行情绪更新时各自的内存集合互不可见，应只在一个进程中运行更新任务
+    """
+
+    def __init__(self, db_client: MySQLClient, ttl_minutes: int = DEDUP_TTL_MINUTES,
+                 snapshot_path: str = DEDUP_SNAPSHOT_PATH, table_fallback: bool = DEDUP_TABLE_FALLBACK):
         self.db = db_client
-        
+        self.ttl_minutes = ttl_minutes
+        self.snapshot_path = snapshot_path
+        self.table_fallback = table_fallback
+        self.processed = RotatingTTLSet(ttl_minutes * 60, bucket_count=ttl_minutes)
+        # 内存集合覆盖完整去重窗口的时间，之前内存未命中时需要查表
+        self._warm_at: Optional[float] = None
+        self._last_cleanup = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(character_id: str, event_id: str) -> str:
+        return f"{character_id}:{event_id}"
+
+    def _ensure_loaded(self):
+        """首次使用时从快照恢复去重状态"""
+        if self._warm_at is not None:
+            return
+        with self._lock:
+            if self._warm_at is not None:
+                return
+            now = time.time()
+            # 没有快照时，启动后一个去重窗口内的记录只存在于表中
+            warm_at = now + self.ttl_minutes * 60
+            if self.snapshot_path:
+                try:
+                    saved_at = self.processed.load(self.snapshot_path)
+                    if saved_at is not None:
+                        # 快照只使用一次，之后崩溃重启时不会再加载这份旧快照而跳过查表
+                        os.remove(self.snapshot_path)
+                        logger.info("从快照恢复了 %s 条已处理事件", len(self.processed))
+                        # 快照在去重窗口内保存时，保存之后到现在没有其他进程标记过事件，内存状态完整
+                        if 0 <= now - saved_at < self.ttl_minutes * 60:
+                            warm_at = now
+                except Exception as e:
+                    logger.error("加载去重快照失败: %s", e)
+            self._warm_at = warm_at
+
+    def is_warm(self) -> bool:
+        """内存集合是否已覆盖完整的去重窗口"""
+        self._ensure_loaded()
+        return time.time() >= self._warm_at
+
     def is_event_processed(self, character_id: str, event_id: str) -> bool:
         """
         检查事件是否在最近30分钟内已处理
-        
+
         Args:
             character_id: 角色ID
             event_id: 事件ID
-            
+
         Returns:
             bool: 如果事件已处理返回True，否则返回False
         """
-        try:
-            query = """
-                SELECT 1 FROM emotion_thirty_min_temp 
-                WHERE character_id = %s 
-                AND event_id = %s 
-                AND processed_at > DATE_SUB(NOW(), INTERVAL 30 MINUTE)
-                LIMIT 1
-            """
-            
-            result = self.db.execute_query(query, (character_id, event_id))
-            return len(result) > 0
-            
-        except Exception as e:
-            logger.error(f"检查事件处理状态时出错: {e}")
-            return False
-    
+        result = self.batch_check_events([{'character_id': character_id, 'event_id': event_id}])
+        return result.get(self._key(character_id, event_id), False)
+
     def mark_event_processed(self, character_id: str, event_id: str, event_type: str) -> bool:
         """
         标记事件为已处理
-        
+
         Args:
             character_id: 角色ID
             event_id: 事件ID
             event_type: 事件类型
-            
+
         Returns:
             bool: 操作是否成功
         """
-        try:
-            query = """
-                INSERT IGNORE INTO emotion_thirty_min_temp 
-                (character_id, event_id, event_type, processed_at)
-                VALUES (%s, %s, %s, NOW())
-            """
-            
-            self.db.execute_update(query, (character_id, event_id, event_type))
-            return True
-            
-        except Exception as e:
-            logger.error(f"标记事件为已处理时出错: {e}")
-            return False
-    
+        events = [{'character_id': character_id, 'event_id': event_id, 'event_type': event_type}]
+        return self.batch_mark_processed(events) > 0
+
     def batch_check_events(self, events: List[Dict[str, str]]) -> Dict[str, bool]:
         """
         批量检查多个事件的处理状态
-        
+
         Args:
             events: 事件列表，每个事件包含character_id和event_id
-            
+
         Returns:
             Dict[str, bool]: 事件标识符到处理状态的映射
         """
         if not events:
             return {}
-            
+
+        self._ensure_loaded()
+        keys = [self._key(event['character_id'], event['event_id']) for event in events]
+        result = self.processed.contains_many(keys)
+
+        misses = [event for event, key in zip(events, keys) if not result[key]]
+        if misses and self.table_fallback and not self.is_warm():
+            found = self._check_table(misses)
+            # 表中找到的记录写入内存，之后的检查不再查表
+            self.processed.add_many(found)
+            for key in found:
+                result[key] = True
+
+        return result
+
+    def _check_table(self, events: List[Dict[str, str]]) -> List[str]:
+        """在后备表中查询最近30分钟内已处理的事件，返回事件标识符列表"""
         try:
             # 构建查询条件
             conditions = []
             params = []
-            
+
             for event in events:
                 conditions.append("(character_id = %s AND event_id = %s)")
                 params.extend([event['character_id'], event['event_id']])
-            
+
             where_clause = " OR ".join(conditions)
             query = f"""
-                SELECT character_id, event_id 
-                FROM emotion_thirty_min_temp 
-                WHERE ({where_clause}) 
-                AND processed_at > DATE_SUB(NOW(), INTERVAL 30 MINUTE)
+                SELECT character_id, event_id
+                FROM emotion_thirty_min_temp
+                WHERE ({where_clause})
+                AND processed_at > DATE_SUB(NOW(), INTERVAL {int(self.ttl_minutes)} MINUTE)
             """
-            
+
             processed_events = self.db.execute_query(query, params)
-            
-            # 构建结果字典
-            processed_set = {
-                f"{row['character_id']}:{row['event_id']}" 
-                for row in processed_events
-            }
-            
-            result = {}
-            for event in events:
-                key = f"{event['character_id']}:{event['event_id']}"
-                result[key] = key in processed_set
-                
-            return result
-            
+            return [self._key(row['character_id'], row['event_id']) for row in processed_events]
+
         except Exception as e:
             logger.error(f"批量检查事件状态时出错: {e}")
-            return {}
-    
+            return []
+
     def batch_mark_processed(self, events: List[Dict[str, str]]) -> int:
         """
         批量标记多个事件为已处理
-        
+
         Args:
             events: 事件列表，每个事件包含character_id, event_id, event_type
-            
+
         Returns:
             int: 成功标记的事件数量
         """
         if not events:
             return 0
-            
+
+        self._ensure_loaded()
+        self.processed.add_many(self._key(event['character_id'], event['event_id']) for event in events)
+
+        if self.table_fallback:
+            self._write_table(events)
+        return len(events)
+
+    def _write_table(self, events: List[Dict[str, str]]):
+        """把已处理的事件写入后备表，写入失败不影响内存中的去重状态"""
         try:
             values = []
             params = []
-            
+
             for event in events:
                 values.append("(%s, %s, %s, NOW())")
                 params.extend([
-                    event['character_id'], 
-                    event['event_id'], 
+                    event['character_id'],
+                    event['event_id'],
                     event.get('event_type', 'unknown')
                 ])
-            
+
             query = f"""
-                INSERT IGNORE INTO emotion_thirty_min_temp 
+                INSERT IGNORE INTO emotion_thirty_min_temp
                 (character_id, event_id, event_type, processed_at)
                 VALUES {','.join(values)}
             """
-            
-            result = self.db.execute_update(query, params)
-            return result
-            
+
+            self.db.execute_update(query, params)
+
         except Exception as e:
             logger.error(f"批量标记事件为已处理时出错: {e}")
-            return 0
-    
-    def cleanup_expired_records(self) -> int:
+
+    def cleanup_expired_records(self, force: bool = False) -> int:
         """
-        清理30分钟前的过期记录
-        
+        清理后备表中30分钟前的过期记录
+
+        内存中的记录随时间桶自动过期，不需要清理；后备表每个去重窗口最多清理一次
+
+        Args:
+            force: 忽略清理间隔，立即清理
+
         Returns:
             int: 清理的记录数量
         """
+        if not self.table_fallback:
+            return 0
+        now = time.time()
+        if not force and now - self._last_cleanup < self.ttl_minutes * 60:
+            return 0
+        self._last_cleanup = now
+
         try:
-            query = """
-                DELETE FROM emotion_thirty_min_temp 
-                WHERE processed_at < DATE_SUB(NOW(), INTERVAL 30 MINUTE)
+            query = f"""
+                DELETE FROM emotion_thirty_min_temp
+                WHERE processed_at < DATE_SUB(NOW(), INTERVAL {int(self.ttl_minutes)} MINUTE)
             """
-            
+
             result = self.db.execute_update(query)
             logger.info(f"清理了 {result} 条过期的事件处理记录")
             return result
-            
+
         except Exception as e:
             logger.error(f"清理过期记录时出错: {e}")
             return 0
-    
+
+    def save_snapshot(self) -> int:
+        """
+        把内存中未过期的已处理事件保存到快照文件，在进程关闭时调用
+
+        Returns:
+            int: 保存的事件数量，未配置快照路径时为0
+        """
+        if not self.snapshot_path or self._warm_at is None:
+            return 0
+        try:
+            count = self.processed.save(self.snapshot_path)
+            logger.info("保存了 %s 条已处理事件到去重快照", count)
+            return count
+        except Exception as e:
+            logger.error("保存去重快照失败: %s", e)
+            return 0
+
     def get_processing_stats(self) -> Dict[str, Any]:
         """
         获取处理统计信息
-        
+
         Returns:
             Dict[str, Any]: 包含统计信息的字典
         """
+        stats = {
+            "memory_records": len(self.processed),
+            "memory_warm": self.is_warm(),
+            "table_fallback": self.table_fallback,
+        }
+        if not self.table_fallback:
+            return stats
+
         try:
             query = """
-                SELECT 
+                SELECT
                     COUNT(*) as total_records,
                     COUNT(DISTINCT character_id) as unique_characters,
-                    COUNT(CASE WHEN processed_at > DATE_SUB(NOW(), INTERVAL 30 MINUTE) 
+                    COUNT(CASE WHEN processed_at > DATE_SUB(NOW(), INTERVAL 30 MINUTE)
                           THEN 1 END) as recent_records,
                     MIN(processed_at) as oldest_record,
                     MAX(processed_at) as latest_record
                 FROM emotion_thirty_min_temp
             """
-            
+
             result = self.db.execute_query(query)
-            return result[0] if result else {}
-            
+            stats.update(result[0] if result else {})
+
         except Exception as e:
             logger.error(f"获取处理统计信息时出错: {e}")
-            return {}
\ No newline at end of file
+        return stats
@@ -9,7 +9,9 @@ sys.path.append(project_root)
 
 from src.db.mysql_client import mysql_client
 from src.interaction.model.interaction_models import InteractionRecord, InteractionStats
+from src.utils.tracing import traced_class
 
+@traced_class()
 class InteractionDAO:
     """互动功能MySQL数据访问对象"""
     
@@ -2,7 +2,9 @@
 from typing import List, Dict, Optional, Any
 from datetime import datetime
 from src.db.mysql_client import mysql_client
+from src.utils.tracing import traced_class
 
+@traced_class()
 class InviteCodeDAO:
     """邀请码数据访问对象，负责所有数据库操作"""
     
@@ -7,7 +7,9 @@ from src.character.llm_gen import CharacterLLMGenerator
 from src.character.db.character_dao import save_character, get_character_by_id as get_character_by_id_dao, get_all_characters as get_all_characters_dao, delete_character as delete_character_dao
 from src.character.db.event_profile_dao import delete_event_profile_by_character_id
 from src.service.event.service import event_service
+from src.utils.tracing import traced_class
 
+@traced_class()
 class CharacterService:
     @staticmethod
     async def generate_character(name: str = None, age: int = None, gender: str = None, occupation: str = None, language: str = "Chinese"):
@@ -27,6 +29,23 @@ class CharacterService:
             print(f"生成角色时出错: {e}")
             return None
     
+    @staticmethod
+    async def generate_character_stream(name: str = None, age: int = None, gender: str = None, occupation: str = None, language: str = "Chinese"):
+        """使用LLM流式生成角色，逐个产出已完成的字段，最后产出Character对象"""
+        generator = CharacterLLMGenerator(stream=True)
+        try:
+            async for event, data in generator.generate_character_stream(
+                name=name,
+                age=age,
+                gender=gender,
+                occupation=occupation,
+                language=language
+            ):
+                yield event, data
+        except Exception as e:
+            print(f"流式生成角色时出错: {e}")
+            yield "error", None
+
     @staticmethod
     def submit_character(character: Character) -> bool:
         """保存角色到数据库"""
@@ -160,16 +160,14 @@ class EmotionService:
         if not emotions:
             return {"message": "暂无情绪数据"}
         
-        # 计算平均情绪
-        avg_pleasure = sum(e.pleasure for e in emotions) / len(emotions)
-        avg_arousal = sum(e.arousal for e in emotions) / len(emotions)
-        avg_dominance = sum(e.dominance for e in emotions) / len(emotions)
-        
-        # 统计情绪分布
-        emotion_counts = {}
-        for emotion in emotions:
-            key = emotion.traditional_emotion
-            emotion_counts[key] = emotion_counts.get(key, 0) + 1
+        # NumPy在首次统计时才导入
+        from src.emotion.utils.emotion_analytics import EmotionSeries
+        
+        # 平均情绪和情绪分布在数组上一次计算
+        series = EmotionSeries.from_states(emotions)
+        average = series.mean()
+        avg_pleasure, avg_arousal, avg_dominance = (float(value) for value in average)
+        emotion_counts = series.distribution()
         
         # 找出最频繁的情绪
         most_frequent = max(emotion_counts.items(), key=lambda x: x[1])
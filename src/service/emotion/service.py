@@ -7,10 +7,17 @@ from typing import Dict, List, Optional, Any
 from datetime import datetime
 
 from src.emotion.db.emotion_dao import emotion_dao
+from src.emotion.db.emotion_history_dao import emotion_history_dao
+from src.emotion.model.emotion_history import RESOLUTION_AUTO, SOURCE_EVENT
+from src.emotion.utils.emotion_utils import get_emotion_trend
+from src.emotion.model.emotion_decay import compute_baseline
+from src.character.db.character_dao import get_personality_traits
 from src.service.emotion.emotion_service import EmotionService
 from src.emotion.model.emotion_mapping import EmotionMappings
 from src.service.emotion.emotion_service import EmotionService
+from src.utils.tracing import traced_class
 
+@traced_class()
 class EmotionBusinessService:
     """情绪业务服务类 - 集成DAO层和业务逻辑"""
     
@@ -28,7 +35,10 @@ class EmotionBusinessService:
             是否初始化成功
         """
         try:
-            return emotion_dao.initialize_character_emotion(character_id)
+            success = emotion_dao.initialize_character_emotion(character_id)
+            if success:
+                self.refresh_emotion_baselines([character_id])
+            return success
         except Exception as e:
             raise Exception(f"初始化角色情绪失败: {e}")
     
@@ -43,14 +53,42 @@ class EmotionBusinessService:
             每个角色的初始化结果
         """
         try:
-            return emotion_dao.batch_initialize_characters(character_ids)
+            results = emotion_dao.batch_initialize_characters(character_ids)
+            self.refresh_emotion_baselines([cid for cid, success in results.items() if success])
+            return results
         except Exception as e:
             raise Exception(f"批量初始化角色情绪失败: {e}")
     
+    def refresh_emotion_baselines(self, character_ids: List[str]) -> int:
+        """
+        根据角色的大五人格和情绪波动类型计算并保存基线情绪
+        
+        基线决定情绪在没有新事件时回归的目标，计算失败不影响情绪初始化
+        
+        Args:
+            character_ids: 角色ID列表
+            
+        Returns:
+            更新的记录数
+        """
+        if not character_ids:
+            return 0
+        try:
+            traits = get_personality_traits(character_ids)
+            baselines = {
+                character_id: compute_baseline(doc.get('big5'), doc.get('mood_swings'))
+                for character_id, doc in traits.items()
+            }
+            return emotion_dao.set_emotion_baselines(baselines)
+        except Exception as e:
+            print(f"刷新情绪基线失败: {e}")
+            return 0
+    
     def update_emotion_from_event(self, character_id: str, 
                                 pleasure_change: int,
                                 arousal_change: int,
-                                dominance_change: int) -> bool:
+                                dominance_change: int,
+                                source: str = SOURCE_EVENT) -> bool:
         """
         3. 更新角色情绪状态
         
@@ -59,6 +97,7 @@ class EmotionBusinessService:
             pleasure_change: 愉悦度变化
             arousal_change: 激活度变化
             dominance_change: 支配感变化
+            source: 情绪历史记录的来源
             
         Returns:
             是否更新成功
@@ -70,7 +109,7 @@ class EmotionBusinessService:
                 "dominance": dominance_change
             }
             
-            return emotion_dao.update_emotion_from_event(character_id, pad_impact)
+            return emotion_dao.update_emotion_from_event(character_id, pad_impact, source)
             
         except Exception as e:
             raise Exception(f"更新角色情绪失败: {e}")
@@ -92,7 +131,7 @@ class EmotionBusinessService:
     
     def get_character_emotion(self, character_id: str) -> Optional[Dict[str, Any]]:
         """
-        5. 获取角色情绪完整信息
+        5. 获取角色情绪完整信息，PAD值在读取时按时间向基线衰减
         
         Args:
             character_id: 角色ID
@@ -161,6 +200,51 @@ class EmotionBusinessService:
         except Exception as e:
             raise Exception(f"批量获取角色情绪失败: {e}")
     
+    def get_emotion_history(self, character_id: str, start_time: datetime, end_time: datetime,
+                            resolution: str = RESOLUTION_AUTO,
+                            max_points: Optional[int] = None) -> Dict[str, Any]:
+        """
+        获取角色在时间范围内的情绪变化曲线
+        
+        曲线从小时/天汇总表读取，附带区间内的平均PAD、波动、情绪分布、趋势斜率和首尾两点之间的趋势
+        
+        Args:
+            character_id: 角色ID
+            start_time: 开始时间
+            end_time: 结束时间
+            resolution: 粒度，auto/raw/hour/day
+            max_points: 返回的最大点数
+            
+        Returns:
+            包含resolution、points、average、analytics和trend的字典
+            
+        Raises:
+            ValueError: 时间范围或粒度不合法
+        """
+        if start_time > end_time:
+            raise ValueError("开始时间不能晚于结束时间")
+        
+        series = emotion_history_dao.get_emotion_series(character_id, start_time, end_time, resolution, max_points)
+        points = series["points"]
+        
+        analytics = None
+        trend = None
+        if points:
+            # NumPy在首次统计时才导入
+            from src.emotion.utils.emotion_analytics import EmotionSeries
+            analytics = EmotionSeries.from_points(points).summary()
+            if len(points) > 1:
+                trend = get_emotion_trend(points[-1], points[0])
+        
+        return {
+            "character_id": character_id,
+            "resolution": series["resolution"],
+            "points": points,
+            "average": analytics["average"] if analytics else None,
+            "analytics": analytics,
+            "trend": trend
+        }
+    
     def calculate_and_get_emotion(self, character_id: str) -> Optional[Dict[str, Any]]:
         """
         7. 计算并获取完整的情绪状态
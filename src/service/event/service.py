@@ -1,17 +1,21 @@
 import os
 import sys
 import asyncio
+import contextvars
 import time
 import logging
 from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any
-from datetime import datetime
+from datetime import datetime, timedelta
 from src.character.model.event_profile import EventProfile, Event
 from src.character.event.life_path_manager import manager as life_path_manager
 from src.character.event.event_profile_generator import EventProfileLLMGenerator
-from src.character.db.event_profile_dao import EventProfileDAO
+from src.character.db.event_profile_dao import (
+    EventProfileDAO, LIFE_PATH_FULL, LIFE_PATH_NONE, LIFE_PATH_LATEST, LIFE_PATH_RANGE, LIFE_PATH_VIEWS
+)
 from src.character.db.character_dao import get_character_by_id, get_all_characters
-from src.character.utils import convert_object_id
+from src.utils.llm_telemetry import llm_usage_scope
+from src.utils.tracing import traced_class
 
 
 # 初始化DAO
@@ -21,6 +25,7 @@ generator = EventProfileLLMGenerator()
 # 初始化logger
 logger = logging.getLogger(__name__)
 
+@traced_class()
 class EventService:
     @staticmethod
     async def generate_life_path(character_id: str, start_date: str, end_date: str, max_events: int = 3) -> Dict[str, Any]:
@@ -33,7 +38,7 @@ class EventService:
                 return {"success": False, "message": "角色不存在"}
 
             # 检查事件配置是否存在
-            event_profiles = event_profile_dao.get_event_profiles_by_character_id(character_id)
+            event_profiles = event_profile_dao.get_event_profiles_by_character_id(character_id, life_path=LIFE_PATH_NONE)
             if not event_profiles or len(event_profiles) == 0:
                 print(f"未找到角色{character.name}的事件配置，请先创建事件配置")
                 return {"success": False, "message": "事件配置不存在，请先创建"}
@@ -108,25 +113,66 @@ class EventService:
             return False
 
     @staticmethod
-    def get_event_profiles_by_character_id(character_id: str) -> Optional[List[dict]]:
-        """根据角色ID获取事件配置列表"""
+    def _life_path_options(life_path: str, limit: Optional[int], start_date: Optional[str], end_date: Optional[str]) -> Dict[str, Any]:
+        """校验并转换生活轨迹加载参数
+
+        Args:
+            life_path: 加载方式，full/none/latest/range
+            limit: latest方式下返回的事件数量
+            start_date: range方式下的开始日期 (格式: YYYY-MM-DD)
+            end_date: range方式下的结束日期 (格式: YYYY-MM-DD)，包含当天
+
+        Returns:
+            Dict[str, Any]: 传给DAO的加载参数
+
+        Raises:
+            ValueError: 参数不合法时抛出
+        """
+        if life_path not in LIFE_PATH_VIEWS:
+            raise ValueError(f"life_path只能是{'/'.join(LIFE_PATH_VIEWS)}")
+        options = {'life_path': life_path}
+        if life_path == LIFE_PATH_LATEST:
+            if not limit or limit <= 0:
+                raise ValueError("life_path为latest时limit必须大于0")
+            options['limit'] = limit
+        elif life_path == LIFE_PATH_RANGE:
+            if not start_date or not end_date:
+                raise ValueError("life_path为range时必须提供start_date和end_date")
+            try:
+                options['start_time'] = datetime.strptime(start_date, "%Y-%m-%d")
+                options['end_time'] = datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1) - timedelta(microseconds=1)
+            except ValueError:
+                raise ValueError("日期格式应为YYYY-MM-DD")
+        return options
+
+    @staticmethod
+    def get_event_profiles_by_character_id(character_id: str, life_path: str = LIFE_PATH_FULL, limit: Optional[int] = None,
+                                           start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[List[dict]]:
+        """根据角色ID获取事件配置列表
+
+        Raises:
+            ValueError: 生活轨迹加载参数不合法时抛出
+        """
+        options = EventService._life_path_options(life_path, limit, start_date, end_date)
         try:
             # 调用DAO层获取事件配置
-            return event_profile_dao.get_event_profiles_by_character_id(character_id)
+            return event_profile_dao.get_event_profiles_by_character_id(character_id, **options)
         except Exception as e:
             print(f"获取事件配置时出错: {e}")
             return None
 
     @staticmethod
-    def get_event_profiles_by_character_ids(character_ids: List[str]) -> Optional[Dict[str, List[dict]]]:
-        """根据角色ID数组批量获取事件配置列表"""
+    def get_event_profiles_by_character_ids(character_ids: List[str], life_path: str = LIFE_PATH_FULL, limit: Optional[int] = None,
+                                            start_date: Optional[str] = None, end_date: Optional[str] = None) -> Optional[Dict[str, List[dict]]]:
+        """根据角色ID数组批量获取事件配置列表
+
+        Raises:
+            ValueError: 生活轨迹加载参数不合法时抛出
+        """
+        options = EventService._life_path_options(life_path, limit, start_date, end_date)
         try:
-            # 调用DAO层的批量查询方法
-            result = event_profile_dao.get_event_profiles_by_character_ids(character_ids)
-            # 使用convert_object_id函数处理结果中的ObjectId
-            if result:
-                result = convert_object_id(result)
-            return result
+            # 调用DAO层的批量查询方法，ObjectId在响应序列化时处理
+            return event_profile_dao.get_event_profiles_by_character_ids(character_ids, **options)
         except Exception as e:
             print(f"批量获取事件配置时出错: {e}")
             return None
@@ -142,7 +188,7 @@ class EventService:
                 return False
 
             # 获取角色关联的所有事件配置
-            event_profiles = event_profile_dao.get_event_profiles_by_character_id(character_id)
+            event_profiles = event_profile_dao.get_event_profiles_by_character_id(character_id, life_path=LIFE_PATH_NONE)
             if not event_profiles or len(event_profiles) == 0:
                 print(f"未找到角色{character.name}的事件配置")
                 return False
@@ -165,7 +211,7 @@ class EventService:
 
 
     @staticmethod
-    async def batch_generate_life_paths(start_date: str, end_date: str, max_events: int = 3, limit: int = 0) -> Dict[str, Any]:
+    async def batch_generate_life_paths(start_date: str, end_date: str, max_events: int = 3, limit: int = 0, batch_size: int = 1) -> Dict[str, Any]:
         """批量为多个角色生成生活轨迹
 
         Args:
@@ -173,21 +219,32 @@ class EventService:
             end_date: 结束日期
             max_events: 每个角色的最大事件数
             limit: 处理的角色数量限制，0表示不限制
+            batch_size: 每次LLM请求打包的角色数量，1表示逐个角色生成
 
         Returns:
-            Dict[str, Any]: 包含成功/失败统计的结果
+            Dict[str, Any]: 包含成功/失败统计以及大模型用量(llm_usage)的结果
         """
+        with llm_usage_scope() as llm_usage:
+            result = await EventService._batch_generate_life_paths(start_date, end_date, max_events, limit, batch_size)
+        # 附加本次任务的大模型调用耗时、token用量和费用
+        result["llm_usage"] = llm_usage.to_dict()
+        logger.info("批量生成生活轨迹大模型用量: %s", result['llm_usage']['total'])
+        return result
+
+    @staticmethod
+    async def _batch_generate_life_paths(start_date: str, end_date: str, max_events: int, limit: int, batch_size: int) -> Dict[str, Any]:
+        """批量为多个角色生成生活轨迹的具体实现，参数同batch_generate_life_paths"""
         try:
-            logger.info(f"开始批量生成角色生活轨迹: 开始日期={start_date}, 结束日期={end_date}, 最大事件数={max_events}, 限制数量={limit}")
+            logger.info("开始批量生成角色生活轨迹: 开始日期=%s, 结束日期=%s, 最大事件数=%s, 限制数量=%s, 批大小=%s", start_date, end_date, max_events, limit, batch_size)
             start_time = time.time()
 
             # 获取所有角色
             all_characters = []
-            batch_size = 100  # 每次获取的角色数量
+            page_size = 100  # 每次获取的角色数量
             offset = 0
             
             while True:
-                result = get_all_characters(limit=batch_size, offset=offset)
+                result = get_all_characters(limit=page_size, offset=offset)
                 if not result or not result.get('data'):
                     break
                 
@@ -200,10 +257,10 @@ class EventService:
                     break
                 
                 # 如果没有更多角色，退出循环
-                if len(batch_characters) < batch_size:
+                if len(batch_characters) < page_size:
                     break
                 
-                offset += batch_size
+                offset += page_size
                 await asyncio.sleep(0.1)  # 避免请求过于频繁
 
             total_characters = len(all_characters)
@@ -214,25 +271,32 @@ class EventService:
             failed_count = 0
             failed_characters = []
             
-            # 使用ThreadPoolExecutor进行多线程处理
-            with ThreadPoolExecutor(max_workers=10) as executor:
-                # 创建任务列表
-                loop = asyncio.get_event_loop()
-                tasks = []
-                
-                for character in all_characters:
-                    # 为每个角色创建一个异步任务
-                    tasks.append(
-                        loop.run_in_executor(
-                            executor,
-                            lambda c=character: EventService._process_character_life_path(
-                                c.get('character_id'), start_date, end_date, max_events
+            if batch_size > 1:
+                # 多角色批量模式：每batch_size个角色共用一次LLM请求
+                results = await EventService._run_batched_life_paths(
+                    all_characters, start_date, end_date, max_events, batch_size
+                )
+            else:
+                # 使用ThreadPoolExecutor进行多线程处理
+                with ThreadPoolExecutor(max_workers=10) as executor:
+                    # 创建任务列表
+                    loop = asyncio.get_event_loop()
+                    tasks = []
+                    
+                    for character in all_characters:
+                        # 为每个角色创建一个异步任务
+                        tasks.append(
+                            loop.run_in_executor(
+                                executor,
+                                contextvars.copy_context().run,
+                                lambda c=character: EventService._process_character_life_path(
+                                    c.get('character_id'), start_date, end_date, max_events
+                                )
                             )
                         )
-                    )
-                
-                # 等待所有任务完成
-                results = await asyncio.gather(*tasks, return_exceptions=True)
+                    
+                    # 等待所有任务完成
+                    results = await asyncio.gather(*tasks, return_exceptions=True)
             
             # 处理结果
             for i, result in enumerate(results):
@@ -301,7 +365,7 @@ class EventService:
                 return {"success": False, "message": "角色不存在"}
 
             # 检查事件配置是否存在
-            event_profiles = event_profile_dao.get_event_profiles_by_character_id(character_id)
+            event_profiles = event_profile_dao.get_event_profiles_by_character_id(character_id, life_path=LIFE_PATH_NONE)
             if not event_profiles or len(event_profiles) == 0:
                 return {"success": False, "message": "事件配置不存在，请先创建"}
             else:
@@ -323,5 +387,87 @@ class EventService:
         except Exception as e:
             return {"success": False, "message": str(e)}
 
+    @staticmethod
+    async def _run_batched_life_paths(all_characters: List[dict], start_date: str, end_date: str, max_events: int, batch_size: int) -> List[Any]:
+        """按批次为角色生成生活轨迹，返回与all_characters顺序一致的结果列表"""
+        character_ids = [character.get('character_id') for character in all_characters]
+        chunks = [character_ids[i:i + batch_size] for i in range(0, len(character_ids), batch_size)]
+
+        # 使用ThreadPoolExecutor并发处理各批次
+        with ThreadPoolExecutor(max_workers=10) as executor:
+            loop = asyncio.get_event_loop()
+            tasks = [
+                loop.run_in_executor(
+                    executor,
+                    contextvars.copy_context().run,
+                    lambda ids=chunk: EventService._process_character_batch_life_path(
+                        ids, start_date, end_date, max_events, batch_size
+                    )
+                )
+                for chunk in chunks
+            ]
+            chunk_results = await asyncio.gather(*tasks, return_exceptions=True)
+
+        # 展开为逐角色结果
+        merged = {}
+        for chunk, chunk_result in zip(chunks, chunk_results):
+            if isinstance(chunk_result, Exception):
+                for character_id in chunk:
+                    merged[character_id] = chunk_result
+            else:
+                merged.update(chunk_result)
+
+        return [
+            merged.get(character_id, {"success": False, "message": "未返回生成结果"})
+            for character_id in character_ids
+        ]
+
+    @staticmethod
+    def _process_character_batch_life_path(character_ids: List[str], start_date: str, end_date: str, max_events: int, batch_size: int) -> Dict[str, Dict[str, Any]]:
+        """处理一批角色的生活轨迹生成（在线程池中执行）"""
+        try:
+            # 在子线程中运行异步函数
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            result = loop.run_until_complete(
+                EventService._generate_character_batch_life_path(character_ids, start_date, end_date, max_events, batch_size)
+            )
+            loop.close()
+            return result
+        except Exception as e:
+            return {character_id: {"success": False, "message": str(e)} for character_id in character_ids}
+
+    @staticmethod
+    async def _generate_character_batch_life_path(character_ids: List[str], start_date: str, end_date: str, max_events: int, batch_size: int) -> Dict[str, Dict[str, Any]]:
+        """生成一批角色的生活轨迹"""
+        results = {}
+
+        # 一次查询获取本批次所有角色的事件配置
+        profiles = event_profile_dao.get_event_profiles_by_character_ids(character_ids, life_path=LIFE_PATH_NONE)
+        profile_character_map = {}
+        for character_id in character_ids:
+            profile_list = profiles.get(character_id) or []
+            if not profile_list:
+                results[character_id] = {"success": False, "message": "事件配置不存在，请先创建"}
+            else:
+                # 取第一个事件配置
+                profile_character_map[profile_list[0].get('id')] = character_id
+
+        if profile_character_map:
+            outcomes = await life_path_manager.add_events_to_life_paths_batch(
+                profile_ids=list(profile_character_map.keys()),
+                start_time=start_date,
+                end_time=end_date,
+                max_events=max_events,
+                batch_size=batch_size
+            )
+            for profile_id, character_id in profile_character_map.items():
+                if outcomes.get(profile_id):
+                    results[character_id] = {"success": True, "message": "事件生成成功"}
+                else:
+                    results[character_id] = {"success": False, "message": "事件生成失败"}
+
+        return results
+
 # 创建服务实例
 event_service = EventService()
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import sys
+import logging
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 
@@ -12,10 +13,16 @@ from src.interaction.model.interaction_models import InteractionRecord, Interact
 from src.emotion.config.interaction_emotion_config import InteractionEmotionConfig
 from src.service.emotion.service import emotion_service
 from src.emotion.model.emotion_mapping import EmotionMappings
+from src.emotion.model.emotion_history import SOURCE_INTERACTION
+from src.utils.tracing import traced_class
+from src.utils.logging_config import log_sampled
+
+logger = logging.getLogger(__name__)
 
 # 初始化DAO
 interaction_dao = InteractionDAO()
 
+@traced_class()
 class InteractionService:
     """互动功能服务类"""
     
@@ -64,11 +71,14 @@ class InteractionService:
                         character_id=character_id,
                         pleasure_change=pleasure_change,
                         arousal_change=arousal_change,
-                        dominance_change=dominance_change
+                        dominance_change=dominance_change,
+                        source=SOURCE_INTERACTION
                     )
-                    print(f"角色 {character_id} 情绪更新结果: {emotion_updated}, 调整值: P={pleasure_change}, A={arousal_change}, D={dominance_change}")
+                    log_sampled(logger, logging.INFO, "interaction.emotion_update",
+                                "角色 %s 情绪更新结果: %s, 调整值: P=%s, A=%s, D=%s",
+                                character_id, emotion_updated, pleasure_change, arousal_change, dominance_change)
                 except Exception as e:
-                    print(f"更新角色情绪时出错: {e}")
+                    logger.error("更新角色情绪时出错: %s", e)
                     # 情绪更新失败不影响互动成功
             
             # 获取更新后的统计数据
@@ -107,7 +117,7 @@ class InteractionService:
                             "emotion_type": emotion_mapping.emotion_type
                         })
                 except Exception as e:
-                    print(f"获取完整情绪信息失败: {e}")
+                    logger.error("获取完整情绪信息失败: %s", e)
                     current_emotion = None
             
             return {
@@ -125,7 +135,7 @@ class InteractionService:
             }
             
         except Exception as e:
-            print(f"执行互动操作失败: {e}")
+            logger.error("执行互动操作失败: %s", e)
             return {
                 "success": False,
                 "message": f"互动失败: {str(e)}"
@@ -174,7 +184,7 @@ class InteractionService:
             return stats_data
             
         except Exception as e:
-            print(f"获取互动统计数据失败: {e}")
+            logger.error("获取互动统计数据失败: %s", e)
             return {
                 "error": str(e)
             }
@@ -212,7 +222,7 @@ class InteractionService:
 
             return result
         except Exception as e:
-            print(f"批量获取互动统计数据失败: {e}")
+            logger.error("批量获取互动统计数据失败: %s", e)
             return {
                 "error": str(e)
             }
@@ -254,7 +264,7 @@ class InteractionService:
                 }
                 
         except Exception as e:
-            print(f"检查今日互动状态失败: {e}")
+            logger.error("检查今日互动状态失败: %s", e)
             return {
                 "error": str(e)
             }
@@ -280,7 +290,7 @@ class InteractionService:
             }
             
         except Exception as e:
-            print(f"获取用户互动历史失败: {e}")
+            logger.error("获取用户互动历史失败: %s", e)
             return {
                 "error": str(e)
             }
@@ -3,7 +3,9 @@ from typing import List, Dict, Optional, Any
 from datetime import datetime
 from src.invited_code.generation import generator
 from src.invited_code.db.invited_code_dao import invited_code_dao
+from src.utils.tracing import traced_class
 
+@traced_class()
 class InviteCodeService:
     """邀请码服务类，提供邀请码的生成、验证、绑定等功能"""
     
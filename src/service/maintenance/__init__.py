@@ -0,0 +1 @@
+"""维护任务模块"""
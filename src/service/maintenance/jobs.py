@@ -0,0 +1,73 @@
+"""
+后台维护任务
+在API进程内周期执行30分钟情绪更新和各类过期数据清理，不再依赖外部调度服务调用HTTP接口，
+也不在请求处理过程中顺带清理。多个worker中只有持有MySQL命名锁的一个执行任务
+
+任务在线程中执行，清理任务使用独立的MySQL连接，情绪更新使用情绪更新服务自己的连接，都不与请求处理共用连接
+
+通过环境变量配置:
+- MAINTENANCE_SCHEDULER_ENABLED: 是否启动调度，默认true
+- MAINTENANCE_LOCK_NAME: leader选举使用的MySQL命名锁，默认soluna_maintenance
+- EMOTION_UPDATE_INTERVAL_MINUTES: 情绪更新间隔(分钟)，默认30，设为0时不在进程内更新情绪
+"""
+
+import logging
+import os
+from datetime import datetime
+from typing import List
+
+from src.db.mysql_client import MySQLClient
+from src.utils.scheduler import MySQLLeaderLock, PeriodicJob, PeriodicScheduler
+
+logger = logging.getLogger(__name__)
+
+MAINTENANCE_SCHEDULER_ENABLED = os.getenv("MAINTENANCE_SCHEDULER_ENABLED", "true").lower() == "true"
+MAINTENANCE_LOCK_NAME = os.getenv("MAINTENANCE_LOCK_NAME", "soluna_maintenance")
+EMOTION_UPDATE_INTERVAL_MINUTES = int(os.getenv("EMOTION_UPDATE_INTERVAL_MINUTES", "30"))
+
+# 清理任务使用的独立连接，任务依次执行，同一时间只有一个线程使用；连接在首次执行SQL时建立
+maintenance_db = MySQLClient()
+
+
+def update_recent_emotions():
+    """根据最近30分钟的生活轨迹事件更新角色情绪"""
+    from src.service.emotion.emotion_update_service import emotion_update_service
+    emotion_update_service.update_emotions_sync(datetime.now())
+
+
+def cleanup_emotion_dedup_records():
+    """清理情绪事件去重后备表中的过期记录"""
+    from src.service.emotion.emotion_update_service import emotion_update_service
+    emotion_update_service.cleanup_dedup_records()
+
+
+def purge_expired_tokens():
+    """清理已过期的登录令牌"""
+    from src.user.db.user_dao import TokenDAO
+    deleted_count = TokenDAO(maintenance_db).purge_expired_tokens()
+    logger.info("清理过期令牌完成，共删除 %s 条", deleted_count)
+
+
+def purge_stale_verification_codes():
+    """清理已使用或已过期的验证码"""
+    from src.user.db.verification_code_dao import VerificationCodeDAO
+    deleted_count = VerificationCodeDAO(maintenance_db).purge_stale_codes()
+    logger.info("清理验证码完成，共删除 %s 条", deleted_count)
+
+
+def build_maintenance_jobs() -> List[PeriodicJob]:
+    """创建维护任务列表，清理任务错开启动，避免同时执行"""
+    jobs = []
+    if EMOTION_UPDATE_INTERVAL_MINUTES > 0:
+        jobs.append(PeriodicJob("emotion_update", EMOTION_UPDATE_INTERVAL_MINUTES * 60, update_recent_emotions,
+                                initial_delay=60))
+    jobs.extend([
+        PeriodicJob("emotion_dedup_cleanup", 30 * 60, cleanup_emotion_dedup_records, initial_delay=5 * 60),
+        PeriodicJob("expired_token_purge", 60 * 60, purge_expired_tokens, initial_delay=10 * 60),
+        PeriodicJob("verification_code_purge", 60 * 60, purge_stale_verification_codes, initial_delay=15 * 60),
+    ])
+    return jobs
+
+
+# 创建调度器实例，在应用生命周期中启动和停止
+maintenance_scheduler = PeriodicScheduler(build_maintenance_jobs(), lock=MySQLLeaderLock(MAINTENANCE_LOCK_NAME))
@@ -3,18 +3,21 @@ import uuid
 import jwt
 import time
 import random
-import json
 import os
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any
 from src.user.db.user_dao import user_dao, token_dao
+from src.user.token_cache import token_validation_cache
 from src.user.db.verification_code_dao import verification_code_dao
 from src.user.model.user import User
 from src.utils.security import security_utils
 from src.service.invited_code.service import invite_code_service
-from src.character.utils import convert_object_id
-from src.user.yunpian_service import yunpian_service
+from src.utils.json_encoding import dumps
+from src.user.yunpian_service import sms_dispatcher, SmsQueueUnavailable
+from src.utils.tracing import traced_class
+from src.utils.rate_limit import check_rate_limit, release_rate_limit, RateLimitExceeded
 
+@traced_class()
 class UserService:
     """用户服务层，处理用户相关的业务逻辑"""
     
@@ -32,41 +35,43 @@ class UserService:
         return str(uuid.uuid4())
     
     def send_verification_code(self, phone_number: str, ip_address: str = "unknown") -> Dict[str, Any]:
-        """发送验证码，包含频率限制"""
-        # 检查手机号频率限制（60秒内只能请求一次）
-        last_code = verification_code_dao.get_last_code_by_phone(phone_number)
-        if last_code:
-            last_request_time = last_code['created_at']
-            if isinstance(last_request_time, str):
-                last_request_time = datetime.fromisoformat(last_request_time)
-            time_diff = (datetime.now() - last_request_time).total_seconds()
-            if time_diff < self.phone_rate_limit_seconds:
-                wait_time = int(self.phone_rate_limit_seconds - time_diff)
-                raise Exception(f"请求过于频繁，请{wait_time}秒后再试")
-        
-        # 检查IP地址频率限制（24小时内不超过10次）
-        ip_request_count = verification_code_dao.get_ip_request_count(ip_address)
-        if ip_request_count >= self.ip_rate_limit_count:
-            raise Exception("今日验证码请求次数已达上限，请明天再试")
-        
-        # 生成随机验证码
-        verification_code = ''.join(random.choices('0123456789', k=6))
+        """发送验证码，包含频率限制
 
-        # 云片发送验证码
-        send_result = yunpian_service.send_verification_code(phone_number, verification_code)
-        
-        if not send_result['success']:
-            raise Exception(f"发送验证码失败: {send_result['message']}")
+        频率限制在进程内计数，不查询数据库，超过限制时抛出RateLimitExceeded。
+        先原子地预占IP和手机号的次数，手机号被拒绝、验证码保存失败或短信入队失败时归还已预占的次数，
+        并发请求不会同时通过最后一个名额，失败的请求也不占用次数。
+        验证码保存后即加入后台短信队列并返回，短信由队列异步发送；
+        队列未启动或已满时抛出SmsQueueUnavailable，不在请求中同步发送
+        """
+        # 预占IP地址次数（24小时内不超过10次）
+        check_rate_limit("verification_code_ip", ip_address, self.ip_rate_limit_count, 24 * 3600)
         
-        # 计算过期时间
-        expire_time = datetime.now() + timedelta(minutes=self.code_expire_minutes)
-        
-        # 保存验证码到数据库
-        if not verification_code_dao.save_code(phone_number, verification_code, expire_time, ip_address):
-            raise Exception("保存验证码失败")
+        # 预占手机号次数（60秒内只能请求一次），被拒绝时归还IP的次数
+        try:
+            check_rate_limit("verification_code_phone", phone_number, 1, self.phone_rate_limit_seconds)
+        except RateLimitExceeded:
+            release_rate_limit("verification_code_ip", ip_address)
+            raise
         
-        # 记录成功日志
-        print(f"向手机号 {phone_number} 发送验证码成功: {verification_code}, 短信ID: {send_result.get('sid', 'N/A')}")
+        try:
+            # 生成随机验证码
+            verification_code = ''.join(random.choices('0123456789', k=6))
+
+            # 计算过期时间
+            expire_time = datetime.now() + timedelta(minutes=self.code_expire_minutes)
+            
+            # 保存验证码到数据库
+            if not verification_code_dao.save_code(phone_number, verification_code, expire_time, ip_address):
+                raise Exception("保存验证码失败")
+            
+            # 云片发送验证码，加入后台队列
+            if not sms_dispatcher.enqueue(phone_number, verification_code):
+                raise SmsQueueUnavailable()
+        except Exception:
+            release_rate_limit("verification_code_phone", phone_number)
+            release_rate_limit("verification_code_ip", ip_address)
+            raise
+        print(f"向手机号 {phone_number} 的验证码已加入发送队列")
         
         # 返回验证码信息（不包含验证码本身）
         return {
@@ -94,33 +99,37 @@ class UserService:
         # 生成JWT令牌
         token = jwt.encode(payload, self.jwt_secret, algorithm='HS256')
         
-        # 保存令牌到数据库
+        # 保存令牌到数据库，该用户之前的令牌会被删除，需同时清除其缓存
         token_dao.save_token(user_id, token, expire_time)
+        token_validation_cache.invalidate_user(user_id)
         
         return token
     
     def verify_jwt_token(self, token: str) -> Optional[Dict[str, Any]]:
-        """验证JWT令牌"""
+        """验证JWT令牌
+
+        先在本地校验签名和过期时间，再检查令牌是否已被撤销；
+        撤销状态优先从缓存读取，缓存未命中时才查询数据库
+        """
         try:
-            # 验证令牌是否存在且有效
-            if not token_dao.validate_token(token):
-                return None
-            
-            # 解码JWT令牌
+            # 解码JWT令牌，同时校验签名和过期时间
             payload = jwt.decode(token, self.jwt_secret, algorithms=['HS256'])
-            
-            # 检查令牌是否过期
-            if payload.get('exp') < time.time():
-                return None
-            
-            return payload
         except jwt.ExpiredSignatureError:
             # 令牌已过期
+            token_validation_cache.invalidate(token)
             token_dao.delete_token(token)
             return None
         except jwt.InvalidTokenError:
             # 令牌无效
             return None
+
+        # 验证令牌是否存在（登出或重新登录后旧令牌会被删除）
+        valid = token_validation_cache.get(token)
+        if valid is None:
+            valid = token_dao.validate_token(token)
+            token_validation_cache.set(token, valid, payload.get('user_id'), payload.get('exp'))
+
+        return payload if valid else None
     
     def generate_login_result(self, user: User) -> Dict[str, Any]:
         """生成登录结果数据 - 将所有信息都加密传输"""
@@ -139,8 +148,6 @@ class UserService:
         except Exception as e:
             user_invite_status_data = {'has_used_codes': False, 'used_codes': []}
         
-        processed_invite_status = convert_object_id(user_invite_status_data)
-        
         user_data = {
             "user_id": user.user_id,
             "phone_number": user.phone_number,
@@ -148,14 +155,11 @@ class UserService:
             "avatar_url": user.avatar_url,
             "token": token,
             "expire_time": expire_time,
-            "invite_status": processed_invite_status
+            "invite_status": user_invite_status_data
         }
 
-        # 使用convert_object_id函数确保所有数据可JSON序列化（包括datetime）
-        serializable_data = convert_object_id(user_data)
-        
-        # 将数据转换为JSON字符串 - 添加ensure_ascii=False和indent参数以确保正确处理中文
-        json_str = json.dumps(serializable_data, ensure_ascii=False, indent=2)
+        # 将数据转换为JSON字符串，ObjectId和datetime由orjson直接处理，中文不转义
+        json_str = dumps(user_data, indent=True).decode('utf-8')
         
         # 加密JSON字符串
         encrypted_user_data = security_utils.encrypt(json_str)
@@ -232,6 +236,7 @@ class UserService:
             
             # 直接删除令牌，不验证其有效性
             # 无论令牌是否有效、是否过期，都执行删除操作
+            token_validation_cache.invalidate(token)
             delete_result = token_dao.delete_token(token)
             
             if delete_result:
@@ -248,6 +253,12 @@ class UserService:
             # 记录异常但不抛出，避免500错误
             return True  # 即使出现异常，也让用户登出成功
     
+    def purge_expired_tokens(self, batch_size: int = 1000) -> Dict[str, Any]:
+        """清理已过期的令牌，供定时任务调用"""
+        deleted_count = token_dao.purge_expired_tokens(batch_size=batch_size)
+        print(f"清理过期令牌完成，共删除 {deleted_count} 条")
+        return {'deleted_count': deleted_count}
+    
     def get_user_info(self, user_id: str) -> Optional[Dict[str, Any]]:
         """获取用户信息"""
         user_data = user_dao.get_user_by_id(user_id)
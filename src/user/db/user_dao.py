@@ -1,7 +1,10 @@
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
-from src.db.mysql_client import mysql_client
+from src.db.mysql_client import MySQLClient, mysql_client
+from src.user.token_cache import hash_token
+from src.utils.tracing import traced_class
 
+@traced_class()
 class UserDAO:
     """用户数据访问对象，处理用户表的CRUD操作"""
     
@@ -74,11 +77,16 @@ class UserDAO:
             print(f"更新最后登录时间失败: {e}")
             return False
 
+@traced_class()
 class TokenDAO:
-    """令牌数据访问对象，处理令牌表的CRUD操作"""
+    """令牌数据访问对象，处理令牌表的CRUD操作
+
+    表中只保存令牌的SHA-256摘要(token_hash)，所有按令牌的查询都走token_hash唯一索引
+    """
     
-    def __init__(self):
-        self.db = mysql_client
+    def __init__(self, db_client: Optional[MySQLClient] = None):
+        # 不传时使用进程内共享的连接，后台线程中使用时需传入独立的连接
+        self.db = db_client or mysql_client
     
     def save_token(self, user_id: str, token: str, expire_time: datetime) -> bool:
         """保存用户令牌"""
@@ -86,10 +94,10 @@ class TokenDAO:
         self.delete_token_by_user_id(user_id)
         
         query = """
-            INSERT INTO user_tokens (user_id, token, expire_time)
+            INSERT INTO user_tokens (user_id, token_hash, expire_time)
             VALUES (%s, %s, %s)
         """
-        params = (user_id, token, expire_time)
+        params = (user_id, hash_token(token), expire_time)
         
         try:
             self.db.execute_update(query, params)
@@ -109,16 +117,16 @@ class TokenDAO:
         query = """
             SELECT u.* FROM users u 
             JOIN user_tokens t ON u.user_id = t.user_id 
-            WHERE t.token = %s AND u.deleted = FALSE
+            WHERE t.token_hash = %s AND u.deleted = FALSE
         """
-        result = self.db.execute_query(query, (token,))
+        result = self.db.execute_query(query, (hash_token(token),))
         return result[0] if result else None
     
     def delete_token(self, token: str) -> bool:
         """删除指定令牌"""
-        query = """DELETE FROM user_tokens WHERE token = %s"""
+        query = """DELETE FROM user_tokens WHERE token_hash = %s"""
         try:
-            self.db.execute_update(query, (token,))
+            self.db.execute_update(query, (hash_token(token),))
             return True
         except Exception as e:
             print(f"删除令牌失败: {e}")
@@ -137,11 +145,38 @@ class TokenDAO:
     def validate_token(self, token: str) -> bool:
         """验证令牌是否有效"""
         query = """
-            SELECT COUNT(*) as count FROM user_tokens 
-            WHERE token = %s AND expire_time > CURRENT_TIMESTAMP
+            SELECT 1 FROM user_tokens
+            WHERE token_hash = %s AND expire_time > CURRENT_TIMESTAMP
+            LIMIT 1
+        """
+        result = self.db.execute_query(query, (hash_token(token),))
+        return bool(result)
+
+    def purge_expired_tokens(self, batch_size: int = 1000, max_batches: int = 100) -> int:
+        """分批删除已过期的令牌
+
+        每批按expire_time索引删除最多batch_size行，避免长时间持有大量行锁
+
+        Args:
+            batch_size: 每批删除的行数
+            max_batches: 单次调用最多执行的批数
+
+        Returns:
+            int: 删除的令牌数量
+        """
+        query = """
+            DELETE FROM user_tokens
+            WHERE expire_time <= CURRENT_TIMESTAMP
+            ORDER BY expire_time
+            LIMIT %s
         """
-        result = self.db.execute_query(query, (token,))
-        return result[0]['count'] > 0 if result else False
+        total_deleted = 0
+        for _ in range(max_batches):
+            deleted = self.db.execute_update(query, (batch_size,)) or 0
+            total_deleted += deleted
+            if deleted < batch_size:
+                break
+        return total_deleted
 
 # 创建单例实例
 user_dao = UserDAO()
@@ -1,12 +1,15 @@
 from typing import Optional, Dict, Any
 from datetime import datetime, timedelta
-from src.db.mysql_client import mysql_client
+from src.db.mysql_client import MySQLClient, mysql_client
+from src.utils.tracing import traced_class
 
+@traced_class()
 class VerificationCodeDAO:
     """验证码数据访问对象，处理验证码的存储和验证"""
     
-    def __init__(self):
-        self.db = mysql_client
+    def __init__(self, db_client: Optional[MySQLClient] = None):
+        # 不传时使用进程内共享的连接，后台线程中使用时需传入独立的连接
+        self.db = db_client or mysql_client
     
     def save_code(self, phone_number: str, code: str, expire_time: datetime, ip_address: str = "unknown") -> bool:
         """保存验证码到数据库"""
@@ -95,5 +98,32 @@ class VerificationCodeDAO:
         # 所以这里暂时不需要单独的保存IP请求记录的方法
         return True
 
+    def purge_stale_codes(self, retention_hours: int = 24, batch_size: int = 1000, max_batches: int = 100) -> int:
+        """分批删除已使用或已过期、且创建时间早于保留期的验证码
+        
+        保留期内的记录仍用于按手机号和IP统计请求次数，保留期应不短于get_ip_request_count的统计窗口
+        
+        Args:
+            retention_hours: 保留时长(小时)
+            batch_size: 每批删除的行数
+            max_batches: 单次调用最多执行的批数
+            
+        Returns:
+            int: 删除的验证码数量
+        """
+        query = """
+            DELETE FROM verification_codes 
+            WHERE created_at < DATE_SUB(CURRENT_TIMESTAMP, INTERVAL %s HOUR)
+              AND (is_used = 1 OR expire_time <= CURRENT_TIMESTAMP)
+            LIMIT %s
+        """
+        total_deleted = 0
+        for _ in range(max_batches):
+            deleted = self.db.execute_update(query, (retention_hours, batch_size)) or 0
+            total_deleted += deleted
+            if deleted < batch_size:
+                break
+        return total_deleted
+
 # 创建单例实例
 verification_code_dao = VerificationCodeDAO()
\ No newline at end of file
@@ -0,0 +1,108 @@
+"""
+令牌校验缓存
+JWT的签名和过期时间在本地校验，令牌是否已被撤销(登出或重新登录后旧令牌被删除)的查询结果缓存在进程内，
+有效期内的重复请求无需访问MySQL。缓存以令牌的SHA-256摘要为key，不在内存中保存令牌原文。
+
+本进程内的登出和重新登录会立即清除对应缓存；多进程部署时，其他进程最多在TOKEN_CACHE_TTL_SECONDS秒内
+仍认为已撤销的令牌有效。
+
+通过环境变量配置:
+- TOKEN_CACHE_TTL_SECONDS: 缓存有效期(秒)，默认60，设为0时每次都查询数据库
+- TOKEN_CACHE_MAX_SIZE: 最多缓存的令牌数量，默认10000
+"""
+
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from prometheus_client import Counter
+
+TOKEN_CACHE_TTL_SECONDS = float(os.getenv("TOKEN_CACHE_TTL_SECONDS", "60"))
+TOKEN_CACHE_MAX_SIZE = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+
+TOKEN_CACHE_REQUESTS_TOTAL = Counter(
+    "soluna_token_cache_requests_total",
+    "令牌撤销状态缓存的查询次数",
+    ["result"]
+)
+
+
+def hash_token(token: str) -> str:
+    """计算令牌的SHA-256摘要"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+class TokenValidationCache:
+    """令牌撤销状态的TTL缓存，线程安全，超出容量时淘汰最早写入的条目"""
+
+    def __init__(self, ttl_seconds: float = TOKEN_CACHE_TTL_SECONDS, max_size: int = TOKEN_CACHE_MAX_SIZE):
+        self.ttl_seconds = ttl_seconds
+        self.max_size = max_size
+        # 令牌摘要 -> (是否有效, 缓存过期时间, 用户ID)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[bool]:
+        """获取缓存的令牌状态
+
+        Args:
+            token: JWT令牌
+
+        Returns:
+            Optional[bool]: 令牌是否有效，未缓存或缓存已过期时返回None
+        """
+        key = hash_token(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+        TOKEN_CACHE_REQUESTS_TOTAL.labels(result="miss" if entry is None else "hit").inc()
+        return None if entry is None else entry[0]
+
+    def set(self, token: str, valid: bool, user_id: Optional[str] = None, token_exp: Optional[float] = None):
+        """缓存令牌状态
+
+        Args:
+            token: JWT令牌
+            valid: 令牌是否有效
+            user_id: 令牌所属用户ID，用于按用户清除
+            token_exp: 令牌的过期时间戳，缓存不会超过令牌本身的有效期
+        """
+        if self.ttl_seconds <= 0:
+            return
+        ttl = self.ttl_seconds
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+            if ttl <= 0:
+                return
+
+        key = hash_token(token)
+        with self._lock:
+            self._entries[key] = (valid, time.monotonic() + ttl, user_id)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        """清除指定令牌的缓存"""
+        with self._lock:
+            self._entries.pop(hash_token(token), None)
+
+    def invalidate_user(self, user_id: str):
+        """清除指定用户所有令牌的缓存"""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if entry[2] == user_id]
+            for key in keys:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_validation_cache = TokenValidationCache()
@@ -5,33 +5,88 @@
 用于发送手机验证码到真实手机
 """
 
+import asyncio
+import random
 import requests
 import json
 import logging
 import os
 from typing import Dict, Any, Optional
 
+from prometheus_client import Counter
+
 # 配置日志
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# 异步发送配置
+SMS_MAX_CONCURRENCY = int(os.getenv("SMS_MAX_CONCURRENCY", "10"))  # 同时进行的短信请求数
+SMS_QUEUE_SIZE = int(os.getenv("SMS_QUEUE_SIZE", "1000"))  # 待发送队列容量
+SMS_MAX_RETRIES = int(os.getenv("SMS_MAX_RETRIES", "3"))  # 网络错误时的最大重试次数
+SMS_RETRY_BASE_DELAY = float(os.getenv("SMS_RETRY_BASE_DELAY", "1"))  # 重试的基础等待时间（秒），按指数增长
+SMS_REQUEST_TIMEOUT = float(os.getenv("SMS_REQUEST_TIMEOUT", "10"))  # 单次请求超时（秒）
+
+# 网络层面的失败可以重试，云片返回的业务错误（如手机号格式错误）重试无意义
+RETRYABLE_ERROR_CODES = {"TIMEOUT", "NETWORK_ERROR", "HTTP_ERROR"}
+
+SMS_SEND_TOTAL = Counter(
+    "soluna_sms_send_total",
+    "短信发送次数",
+    ["outcome"]
+)
+
+
 class YunpianService:
     """云片网短信服务类"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, base_url: Optional[str] = None):
         """
         初始化云片服务
         
         Args:
             api_key: 云片网API密钥
+            base_url: 接口地址，默认为云片网正式地址，测试时可指向本地模拟服务
         """
         self.api_key = api_key
-        self.base_url = "https://sms.yunpian.com/v2"
+        self.base_url = base_url or os.getenv("YUNPIAN_BASE_URL", "https://sms.yunpian.com/v2")
         self.tpl_send_url = f"{self.base_url}/sms/tpl_single_send.json"
+        # 异步客户端在首次异步发送时创建，复用keep-alive连接
+        self._async_client = None
+        self._semaphore = None
+
+    def _build_send_params(self, phone_number: str, verification_code: str) -> Dict[str, str]:
+        # 使用模板ID发送（模板ID: 6269322）
+        # 模板内容: 【天津信之鸥】Soluna AI，验证码#code#，用于手机验证码登录，5分钟内有效。验证码提供给他人可能导致账号被盗，请勿泄露，谨防被骗。
+        return {
+            'apikey': self.api_key,
+            'mobile': phone_number,
+            'tpl_id': '6269322',
+            'tpl_value': f'#code#={verification_code}'
+        }
+
+    def _parse_send_result(self, phone_number: str, verification_code: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """将云片接口的响应转换为统一的发送结果"""
+        if result.get('code') == 0:
+            logger.info("验证码发送成功: 手机号=%s, 验证码=%s, 短信ID=%s", phone_number, verification_code, result.get('sid'))
+            return {
+                'success': True,
+                'message': '验证码发送成功',
+                'sid': result.get('sid'),
+                'count': result.get('count'),
+                'fee': result.get('fee')
+            }
+        error_msg = result.get('msg', '未知错误')
+        logger.error("验证码发送失败: 手机号=%s, 错误=%s, 完整响应=%s", phone_number, error_msg, result)
+        return {
+            'success': False,
+            'message': f'发送失败: {error_msg}',
+            'error_code': result.get('code'),
+            'error_msg': error_msg
+        }
         
     def send_verification_code(self, phone_number: str, verification_code: str) -> Dict[str, Any]:
         """
-        发送验证码短信
+        发送验证码短信（同步）
         
         Args:
             phone_number: 接收验证码的手机号
@@ -41,69 +96,106 @@ class YunpianService:
             Dict: 包含发送结果的响应信息
         """
         try:
-            # 使用模板ID发送（模板ID: 6269322）
-            # 模板内容: 【天津信之鸥】Soluna AI，验证码#code#，用于手机验证码登录，5分钟内有效。验证码提供给他人可能导致账号被盗，请勿泄露，谨防被骗。
-            params = {
-                'apikey': self.api_key,
-                'mobile': phone_number,
-                'tpl_id': '6269322',
-                'tpl_value': f'#code#={verification_code}'
-            }
-            
             # 发送请求（使用模板发送接口）
             response = requests.post(
                 self.tpl_send_url,
-                data=params,
-                timeout=10,
+                data=self._build_send_params(phone_number, verification_code),
+                timeout=SMS_REQUEST_TIMEOUT,
                 headers={
                     'Content-Type': 'application/x-www-form-urlencoded;charset=utf-8'
                 }
             )
             
             # 解析响应
-            result = response.json()
+            return self._parse_send_result(phone_number, verification_code, response.json())
+                
+        except requests.exceptions.Timeout:
+            logger.error("请求超时: 手机号=%s", phone_number)
+            return {
+                'success': False,
+                'message': '网络超时，请稍后重试',
+                'error_code': 'TIMEOUT'
+            }
+        except requests.exceptions.RequestException as e:
+            logger.error("网络请求异常: 手机号=%s, 错误=%s", phone_number, str(e))
+            return {
+                'success': False,
+                'message': f'网络异常: {str(e)}',
+                'error_code': 'NETWORK_ERROR'
+            }
+        except Exception as e:
+            logger.error("发送验证码异常: 手机号=%s, 错误=%s", phone_number, str(e))
+            return {
+                'success': False,
+                'message': f'系统异常: {str(e)}',
+                'error_code': 'SYSTEM_ERROR'
+            }
+
+    def _get_async_client(self):
+        """获取异步HTTP客户端，连接池大小与并发上限一致"""
+        if self._async_client is None:
+            import httpx
+            self._async_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(SMS_REQUEST_TIMEOUT, connect=3.0),
+                limits=httpx.Limits(max_connections=SMS_MAX_CONCURRENCY,
+                                    max_keepalive_connections=SMS_MAX_CONCURRENCY),
+                headers={'Content-Type': 'application/x-www-form-urlencoded;charset=utf-8'}
+            )
+            self._semaphore = asyncio.Semaphore(SMS_MAX_CONCURRENCY)
+        return self._async_client
+
+    async def send_verification_code_async(self, phone_number: str, verification_code: str) -> Dict[str, Any]:
+        """
+        发送验证码短信（异步），不阻塞事件循环
+        
+        Args:
+            phone_number: 接收验证码的手机号
+            verification_code: 6位数字验证码
             
-            # 记录日志
-            if result.get('code') == 0:
-                logger.info(f"验证码发送成功: 手机号={phone_number}, 验证码={verification_code}, 短信ID={result.get('sid')}")
-                return {
-                    'success': True,
-                    'message': '验证码发送成功',
-                    'sid': result.get('sid'),
-                    'count': result.get('count'),
-                    'fee': result.get('fee')
-                }
-            else:
-                error_msg = result.get('msg', '未知错误')
-                logger.error(f"验证码发送失败: 手机号={phone_number}, 错误={error_msg}, 完整响应={result}")
+        Returns:
+            Dict: 包含发送结果的响应信息，格式与send_verification_code相同
+        """
+        import httpx
+        client = self._get_async_client()
+        try:
+            async with self._semaphore:
+                response = await client.post(self.tpl_send_url, data=self._build_send_params(phone_number, verification_code))
+            if response.status_code >= 500 or response.status_code == 429:
+                logger.error("短信接口返回错误状态: 手机号=%s, 状态码=%s", phone_number, response.status_code)
                 return {
                     'success': False,
-                    'message': f'发送失败: {error_msg}',
-                    'error_code': result.get('code'),
-                    'error_msg': error_msg
+                    'message': f'短信接口异常: HTTP {response.status_code}',
+                    'error_code': 'HTTP_ERROR'
                 }
-                
-        except requests.exceptions.Timeout:
-            logger.error(f"请求超时: 手机号={phone_number}")
+            return self._parse_send_result(phone_number, verification_code, response.json())
+        except httpx.TimeoutException:
+            logger.error("请求超时: 手机号=%s", phone_number)
             return {
                 'success': False,
                 'message': '网络超时，请稍后重试',
                 'error_code': 'TIMEOUT'
             }
-        except requests.exceptions.RequestException as e:
-            logger.error(f"网络请求异常: 手机号={phone_number}, 错误={str(e)}")
+        except httpx.TransportError as e:
+            logger.error("网络请求异常: 手机号=%s, 错误=%s", phone_number, str(e))
             return {
                 'success': False,
                 'message': f'网络异常: {str(e)}',
                 'error_code': 'NETWORK_ERROR'
             }
         except Exception as e:
-            logger.error(f"发送验证码异常: 手机号={phone_number}, 错误={str(e)}")
+            logger.error("发送验证码异常: 手机号=%s, 错误=%s", phone_number, str(e))
             return {
                 'success': False,
                 'message': f'系统异常: {str(e)}',
                 'error_code': 'SYSTEM_ERROR'
             }
+
+    async def close(self):
+        """关闭异步HTTP客户端"""
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+            self._semaphore = None
     
     def get_balance(self) -> Dict[str, Any]:
         """
@@ -138,5 +230,110 @@ class YunpianService:
                 'message': f'获取余额异常: {str(e)}'
             }
 
+
+class SmsQueueUnavailable(Exception):
+    """短信发送队列未启动或已满，请求应稍后重试"""
+
+    def __init__(self):
+        super().__init__("短信服务繁忙，请稍后再试")
+
+
+class SmsDispatcher:
+    """后台短信发送队列
+
+    请求线程只负责入队，由事件循环中的工作协程通过异步客户端发送，网络错误按指数退避重试
+    """
+
+    def __init__(self, service: YunpianService, workers: int = SMS_MAX_CONCURRENCY,
+                 max_retries: int = SMS_MAX_RETRIES, retry_base_delay: float = SMS_RETRY_BASE_DELAY):
+        self.service = service
+        self.workers = workers
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self._queue = None
+        self._loop = None
+        self._tasks = []
+
+    def is_running(self) -> bool:
+        return self._loop is not None and not self._loop.is_closed()
+
+    async def start(self):
+        """在当前事件循环中启动工作协程"""
+        if self.is_running():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(SMS_QUEUE_SIZE)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self, timeout: float = 10):
+        """等待队列中的短信发送完成（最多timeout秒），然后停止工作协程并关闭客户端"""
+        if not self.is_running():
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("短信队列未在%s秒内发送完成，剩余%s条将被丢弃", timeout, self._queue.qsize())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.service.close()
+        self._tasks = []
+        self._queue = None
+        self._loop = None
+
+    def enqueue(self, phone_number: str, verification_code: str) -> bool:
+        """将验证码短信加入发送队列，可在任意线程中调用
+
+        Returns:
+            bool: 是否成功入队，未启动或队列已满时返回False
+        """
+        if not self.is_running() or self._queue.full():
+            return False
+        job = (phone_number, verification_code)
+        try:
+            running_loop = asyncio.get_running_loop()
+        except RuntimeError:
+            running_loop = None
+        if running_loop is self._loop:
+            self._queue.put_nowait(job)
+        else:
+            self._loop.call_soon_threadsafe(self._put_job, job)
+        return True
+
+    def _put_job(self, job):
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            SMS_SEND_TOTAL.labels(outcome="dropped").inc()
+            logger.error("短信队列已满，丢弃发送任务: 手机号=%s", job[0])
+
+    async def _worker(self):
+        while True:
+            phone_number, verification_code = await self._queue.get()
+            try:
+                await self._send_with_retry(phone_number, verification_code)
+            except Exception as e:
+                logger.error("短信发送任务异常: 手机号=%s, 错误=%s", phone_number, str(e))
+            finally:
+                self._queue.task_done()
+
+    async def _send_with_retry(self, phone_number: str, verification_code: str) -> Dict[str, Any]:
+        result = None
+        for attempt in range(self.max_retries + 1):
+            result = await self.service.send_verification_code_async(phone_number, verification_code)
+            if result['success']:
+                SMS_SEND_TOTAL.labels(outcome="success").inc()
+                return result
+            if result.get('error_code') not in RETRYABLE_ERROR_CODES or attempt == self.max_retries:
+                break
+            SMS_SEND_TOTAL.labels(outcome="retry").inc()
+            delay = self.retry_base_delay * (2 ** attempt)
+            await asyncio.sleep(delay + random.uniform(0, delay / 2))
+        SMS_SEND_TOTAL.labels(outcome="failure").inc()
+        logger.error("验证码短信最终发送失败: 手机号=%s, 结果=%s", phone_number, result)
+        return result
+
+
 # 创建全局实例
-yunpian_service = YunpianService(os.getenv("YUNPIAN_API_KEY", "1670a9f2365d0aab56f6a50c3723ac96"))
\ No newline at end of file
+yunpian_service = YunpianService(os.getenv("YUNPIAN_API_KEY", "1670a9f2365d0aab56f6a50c3723ac96"))
+sms_dispatcher = SmsDispatcher(yunpian_service)
\ No newline at end of file
@@ -0,0 +1,52 @@
+"""
+JSON编码
+统一处理MongoDB ObjectId、datetime等非标准类型，序列化由pydantic-core和orjson完成，
+不再需要逐层重建字典的convert_object_id
+"""
+
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from pydantic_core import to_jsonable_python
+
+
+def json_default(obj: Any) -> Any:
+    """orjson和pydantic-core无法直接序列化的类型的转换函数
+
+    Args:
+        obj: 待转换的对象
+
+    Returns:
+        可JSON序列化的对象
+
+    Raises:
+        TypeError: 不支持的类型
+    """
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_jsonable(obj: Any) -> Any:
+    """将对象转换为可JSON序列化的结构，ObjectId转换为字符串，datetime转换为ISO格式字符串"""
+    return to_jsonable_python(obj, fallback=json_default)
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """使用orjson序列化对象，中文不转义
+
+    Args:
+        obj: 待序列化的对象
+        indent: 是否使用2空格缩进
+
+    Returns:
+        bytes: UTF-8编码的JSON
+    """
+    option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_INDENT_2 if indent else 0)
+    return orjson.dumps(obj, default=json_default, option=option)
@@ -0,0 +1,153 @@
+"""
+流式JSON解析工具
+用于在大模型逐token输出时增量解析JSON对象，顶层字段一旦完整即可返回
+"""
+
+import json
+from bisect import bisect_right
+from typing import Any, Dict, List, Tuple
+
+
+class IncrementalJSONObjectParser:
+    """增量JSON对象解析器
+
+    每次feed只扫描新到达的字符，跟踪字符串、转义和括号深度，
+    当顶层对象中某个字段的值完整（遇到顶层的','或'}'）时解析并返回该字段。
+    第一个'{'之前的内容（如说明文字、代码块标记）会被忽略。
+
+    输入片段保存在列表中，不逐次拼接整段文本，只在字段完整时拼接该字段覆盖的片段；
+    没有未完成的键或值时丢弃已扫描的片段
+    """
+
+    def __init__(self):
+        # 尚需保留的输入片段及其在整段输入中的起始位置
+        self._chunks: List[str] = []
+        self._chunk_starts: List[int] = []
+        self._length = 0
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        # 顶层对象内的解析状态: 'key' -> 'colon' -> 'value'
+        self._state = "key"
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self.fields: Dict[str, Any] = {}
+        self.done = False
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        """输入新的文本片段
+
+        Args:
+            chunk: 模型输出的文本片段
+
+        Returns:
+            List[Tuple[str, Any]]: 本次新解析完成的(字段名, 字段值)列表
+        """
+        if self.done or not chunk:
+            return []
+
+        self._chunks.append(chunk)
+        self._chunk_starts.append(self._length)
+        self._length += len(chunk)
+        completed = []
+
+        for char in chunk:
+            if self.done:
+                break
+            i = self._pos
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    # 顶层的键读取完毕
+                    if self._depth == 1 and self._state == "key" and self._key_start is not None:
+                        try:
+                            self._key = json.loads(self._slice(self._key_start, i + 1))
+                        except json.JSONDecodeError:
+                            self._key = self._slice(self._key_start + 1, i)
+                        self._key_start = None
+                        self._state = "colon"
+                continue
+
+            if self._depth == 0:
+                # 等待顶层对象开始
+                if char == "{":
+                    self._depth = 1
+                    self._state = "key"
+                continue
+
+            if char == '"':
+                self._in_string = True
+                if self._depth == 1 and self._state == "key":
+                    self._key_start = i
+                elif self._depth == 1 and self._state == "value" and self._value_start is None:
+                    self._value_start = i
+                continue
+
+            if self._depth == 1 and self._state == "colon":
+                if char == ":":
+                    self._state = "value"
+                    self._value_start = None
+                continue
+
+            if self._depth == 1 and self._state == "value" and char in ",}":
+                field = self._complete_value(self._slice(self._value_start, i) if self._value_start is not None else "")
+                if field is not None:
+                    completed.append(field)
+                self._state = "key"
+                self._key = None
+                self._value_start = None
+                if char == "}":
+                    self._depth = 0
+                    self.done = True
+                continue
+
+            if self._depth == 1 and char == "}":
+                # 空对象或末尾多余逗号
+                self._depth = 0
+                self.done = True
+                continue
+
+            if self._depth == 1 and self._state == "value" and self._value_start is None and not char.isspace():
+                self._value_start = i
+
+            if char in "{[":
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+
+        if self._key_start is None and self._value_start is None:
+            self._chunks.clear()
+            self._chunk_starts.clear()
+        return completed
+
+    def _slice(self, start: int, end: int) -> str:
+        """拼接整段输入中[start, end)范围内的文本"""
+        first = bisect_right(self._chunk_starts, start) - 1
+        last = bisect_right(self._chunk_starts, end - 1) - 1 if end > start else first
+        text = "".join(self._chunks[first:last + 1])
+        offset = self._chunk_starts[first]
+        return text[start - offset:end - offset]
+
+    def _complete_value(self, value_text: str):
+        """解析已完整的顶层字段值，解析失败时返回None"""
+        value_text = value_text.strip()
+        if self._key is None or not value_text:
+            return None
+        try:
+            value = json.loads(value_text)
+        except json.JSONDecodeError:
+            return None
+        self.fields[self._key] = value
+        return self._key, value
+
+    def result(self) -> Dict[str, Any]:
+        """获取目前已解析出的所有顶层字段"""
+        return dict(self.fields)
@@ -0,0 +1,202 @@
+"""
+大模型调用遥测
+记录每次agent团队调用的耗时、token用量、估算费用、重试和解析失败次数，
+以Prometheus指标暴露，并可在批量任务中按业务流程汇总后附加到任务结果中
+
+费用按环境变量 LLM_PROMPT_PRICE_PER_1K_TOKENS / LLM_COMPLETION_PRICE_PER_1K_TOKENS 估算，未配置时为0
+"""
+
+import os
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Tuple
+
+from prometheus_client import Counter, Histogram
+
+from src.utils.metrics import LATENCY_BUCKETS, LLM_CALLS_IN_PROGRESS
+from src.utils.tracing import start_span
+
+PROMPT_PRICE_PER_1K_TOKENS = float(os.getenv("LLM_PROMPT_PRICE_PER_1K_TOKENS", "0"))
+COMPLETION_PRICE_PER_1K_TOKENS = float(os.getenv("LLM_COMPLETION_PRICE_PER_1K_TOKENS", "0"))
+
+LLM_CALLS_TOTAL = Counter(
+    "soluna_llm_calls_total",
+    "大模型调用次数",
+    ["workflow", "outcome"]
+)
+LLM_CALL_DURATION_SECONDS = Histogram(
+    "soluna_llm_call_duration_seconds",
+    "大模型调用耗时(秒)",
+    ["workflow"],
+    buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS_TOTAL = Counter(
+    "soluna_llm_tokens_total",
+    "大模型token用量",
+    ["workflow", "type"]
+)
+LLM_COST_TOTAL = Counter(
+    "soluna_llm_cost_total",
+    "按配置单价估算的大模型费用",
+    ["workflow"]
+)
+LLM_RETRIES_TOTAL = Counter(
+    "soluna_llm_retries_total",
+    "因结果无效而重新调用大模型的次数",
+    ["workflow"]
+)
+LLM_PARSE_FAILURES_TOTAL = Counter(
+    "soluna_llm_parse_failures_total",
+    "无法从大模型输出中解析出有效数据的次数",
+    ["workflow"]
+)
+
+
+@dataclass
+class LLMUsage:
+    """单个业务流程的大模型用量汇总"""
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    parse_failures: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+    cost: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["total_tokens"] = self.prompt_tokens + self.completion_tokens
+        data["latency_seconds"] = round(self.latency_seconds, 3)
+        data["avg_latency_seconds"] = round(self.latency_seconds / self.calls, 3) if self.calls else 0.0
+        data["cost"] = round(self.cost, 6)
+        return data
+
+
+class LLMUsageSummary:
+    """按业务流程汇总的大模型用量，可被线程池中的多个任务同时写入"""
+
+    def __init__(self):
+        self._usage: Dict[str, LLMUsage] = {}
+        self._lock = threading.Lock()
+
+    def add(self, workflow: str, **values):
+        with self._lock:
+            usage = self._usage.setdefault(workflow, LLMUsage())
+            for key, value in values.items():
+                setattr(usage, key, getattr(usage, key) + value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        total = LLMUsage()
+        with self._lock:
+            workflows = {workflow: usage.to_dict() for workflow, usage in self._usage.items()}
+            for usage in self._usage.values():
+                for key in asdict(total):
+                    setattr(total, key, getattr(total, key) + getattr(usage, key))
+        return {"workflows": workflows, "total": total.to_dict()}
+
+
+# 当前上下文中生效的汇总对象，支持嵌套
+_usage_scopes: ContextVar[Tuple[LLMUsageSummary, ...]] = ContextVar("llm_usage_scopes", default=())
+
+
+@contextmanager
+def llm_usage_scope():
+    """在代码块内汇总所有大模型调用的用量
+
+    线程池中的任务需要通过contextvars.copy_context().run执行才能记录到当前汇总中
+
+    Yields:
+        LLMUsageSummary: 用量汇总对象
+    """
+    summary = LLMUsageSummary()
+    token = _usage_scopes.set(_usage_scopes.get() + (summary,))
+    try:
+        yield summary
+    finally:
+        _usage_scopes.reset(token)
+
+
+def _add_to_scopes(workflow: str, **values):
+    for summary in _usage_scopes.get():
+        summary.add(workflow, **values)
+
+
+class LLMCallRecord:
+    """单次大模型调用的记录，由track_llm_call创建"""
+
+    def __init__(self, workflow: str):
+        self.workflow = workflow
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record_result(self, task_result):
+        """从TaskResult的消息中累计token用量
+
+        Args:
+            task_result: agent团队的运行结果
+        """
+        for message in getattr(task_result, "messages", None) or []:
+            usage = getattr(message, "models_usage", None)
+            if usage is not None:
+                self.prompt_tokens += usage.prompt_tokens or 0
+                self.completion_tokens += usage.completion_tokens or 0
+
+
+@contextmanager
+def track_llm_call(workflow: str):
+    """记录一次大模型调用的并发数、耗时、结果和token用量，并创建llm.<workflow> span
+
+    Args:
+        workflow: 调用所属的业务流程，如character_generation、event_profile、daily_life_path
+
+    Yields:
+        LLMCallRecord: 调用结束前通过record_result传入TaskResult以记录token用量
+    """
+    record = LLMCallRecord(workflow)
+    in_progress = LLM_CALLS_IN_PROGRESS.labels(workflow=workflow)
+    in_progress.inc()
+    started = time.perf_counter()
+    failed = True
+    try:
+        with start_span(f"llm.{workflow}", {"llm.workflow": workflow}) as span:
+            yield record
+            failed = False
+            span.set_attribute("llm.prompt_tokens", record.prompt_tokens)
+            span.set_attribute("llm.completion_tokens", record.completion_tokens)
+    finally:
+        in_progress.dec()
+        duration = time.perf_counter() - started
+        cost = (record.prompt_tokens * PROMPT_PRICE_PER_1K_TOKENS
+                + record.completion_tokens * COMPLETION_PRICE_PER_1K_TOKENS) / 1000
+
+        LLM_CALLS_TOTAL.labels(workflow=workflow, outcome="error" if failed else "success").inc()
+        LLM_CALL_DURATION_SECONDS.labels(workflow=workflow).observe(duration)
+        LLM_TOKENS_TOTAL.labels(workflow=workflow, type="prompt").inc(record.prompt_tokens)
+        LLM_TOKENS_TOTAL.labels(workflow=workflow, type="completion").inc(record.completion_tokens)
+        LLM_COST_TOTAL.labels(workflow=workflow).inc(cost)
+
+        _add_to_scopes(
+            workflow,
+            calls=1,
+            errors=1 if failed else 0,
+            prompt_tokens=record.prompt_tokens,
+            completion_tokens=record.completion_tokens,
+            latency_seconds=duration,
+            cost=cost
+        )
+
+
+def record_llm_retry(workflow: str, count: int = 1):
+    """记录因结果无效而重新调用大模型"""
+    LLM_RETRIES_TOTAL.labels(workflow=workflow).inc(count)
+    _add_to_scopes(workflow, retries=count)
+
+
+def record_llm_parse_failure(workflow: str):
+    """记录一次大模型输出解析失败"""
+    LLM_PARSE_FAILURES_TOTAL.labels(workflow=workflow).inc()
+    _add_to_scopes(workflow, parse_failures=1)
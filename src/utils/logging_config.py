@@ -0,0 +1,202 @@
+"""
+日志配置
+根日志只挂载一个QueueHandler，格式化和写入由后台QueueListener线程完成，请求线程上的日志调用不再阻塞在I/O上。
+日志记录在入队前补充request_id、trace_id和span_id，可输出为JSON或文本格式；逐条记录的日志可通过log_sampled按key采样。
+
+通过环境变量配置:
+- LOG_LEVEL: 日志级别，默认INFO
+- LOG_OUTPUT_FORMAT: json或text(默认)
+- LOG_FILE: 额外写入的日志文件路径，默认只输出到标准错误
+- LOG_SAMPLE_EVERY: 采样日志每N条输出1条，默认100
+- LOG_QUEUE_SIZE: 日志队列容量，默认10000，队列满时丢弃日志并计数
+"""
+
+import os
+import sys
+import copy
+import json
+import queue
+import logging
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, WatchedFileHandler
+from typing import Dict, Optional
+
+from src.utils.metrics import LOG_RECORDS_DROPPED_TOTAL
+from src.utils.tracing import TraceIdLogFilter
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_OUTPUT_FORMAT = os.getenv("LOG_OUTPUT_FORMAT", "text").lower()
+LOG_SAMPLE_EVERY = max(int(os.getenv("LOG_SAMPLE_EVERY", "100")), 1)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+TEXT_LOG_FORMAT = ("%(asctime)s %(levelname)s [request_id=%(request_id)s trace_id=%(trace_id)s "
+                   "span_id=%(span_id)s] %(name)s: %(message)s")
+
+# 当前请求的ID，由RequestIdMiddleware设置
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# LogRecord自带的属性，其余属性视为通过extra传入的结构化字段
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {
+    "message", "asctime", "request_id", "trace_id", "span_id"
+}
+
+_setup_lock = threading.Lock()
+_listener: Optional[QueueListener] = None
+_previous_handlers = []
+
+
+def get_request_id() -> Optional[str]:
+    """获取当前请求的ID，不在请求中时返回None"""
+    return request_id_var.get()
+
+
+class RequestIdLogFilter(logging.Filter):
+    """为日志记录添加request_id字段"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get() or "-"
+        return True
+
+
+class JSONLogFormatter(logging.Formatter):
+    """将日志记录格式化为单行JSON，通过extra传入的字段会原样输出"""
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "trace_id": getattr(record, "trace_id", "-"),
+            "span_id": getattr(record, "span_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith("_"):
+                data[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exception"] = record.exc_text
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """入队不阻塞的QueueHandler，队列满时丢弃日志并计数"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED_TOTAL.inc()
+
+    def prepare(self, record):
+        # 在请求线程中完成消息拼接，异常堆栈单独保存在exc_text中，由后台线程的格式化器输出
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class LogSampler:
+    """按key计数的日志采样器，每个key的第1条以及之后每N条输出1条"""
+
+    def __init__(self, every: int = LOG_SAMPLE_EVERY):
+        self.every = max(every, 1)
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def should_log(self, key: str) -> bool:
+        with self._lock:
+            count = self._counts.get(key, 0)
+            self._counts[key] = count + 1
+        return count % self.every == 0
+
+    def reset(self):
+        with self._lock:
+            self._counts.clear()
+
+
+log_sampler = LogSampler()
+
+
+def log_sampled(logger: logging.Logger, level: int, key: str, msg: str, *args, **kwargs):
+    """按key采样输出逐条记录类的日志，如单条数据的保存成功信息
+
+    Args:
+        logger: 日志记录器
+        level: 日志级别
+        key: 采样key，同一类日志使用相同的key
+        msg: 日志消息
+    """
+    if logger.isEnabledFor(level) and log_sampler.should_log(key):
+        extra = kwargs.pop("extra", None) or {}
+        extra.setdefault("sample_every", log_sampler.every)
+        logger.log(level, msg, *args, extra=extra, **kwargs)
+
+
+def _create_formatter() -> logging.Formatter:
+    if LOG_OUTPUT_FORMAT == "json":
+        return JSONLogFormatter()
+    return logging.Formatter(TEXT_LOG_FORMAT)
+
+
+def setup_logging():
+    """将根日志替换为队列日志并启动后台写入线程，重复调用无副作用"""
+    global _listener, _previous_handlers
+    if _listener is not None:
+        return
+
+    with _setup_lock:
+        if _listener is not None:
+            return
+
+        formatter = _create_formatter()
+        handlers = [logging.StreamHandler(sys.stderr)]
+        log_file = os.getenv("LOG_FILE")
+        if log_file:
+            directory = os.path.dirname(log_file)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handlers.append(WatchedFileHandler(log_file, encoding="utf-8"))
+        for handler in handlers:
+            handler.setFormatter(formatter)
+
+        # request_id和trace_id依赖请求上下文，必须在入队前添加
+        queue_handler = NonBlockingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+        queue_handler.addFilter(RequestIdLogFilter())
+        queue_handler.addFilter(TraceIdLogFilter())
+
+        root = logging.getLogger()
+        _previous_handlers = list(root.handlers)
+        for handler in _previous_handlers:
+            root.removeHandler(handler)
+        root.addHandler(queue_handler)
+        root.setLevel(LOG_LEVEL)
+
+        _listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+        _listener.start()
+
+
+def shutdown_logging():
+    """写出队列中剩余的日志，停止后台线程并恢复原有的日志处理器"""
+    global _listener, _previous_handlers
+    with _setup_lock:
+        if _listener is None:
+            return
+        _listener.stop()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            if isinstance(handler, NonBlockingQueueHandler):
+                root.removeHandler(handler)
+        for handler in _previous_handlers:
+            root.addHandler(handler)
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+        _previous_handlers = []
@@ -0,0 +1,181 @@
+"""
+Prometheus监控指标
+集中定义HTTP请求、数据库连接、大模型调用和日志相关的指标，供中间件、数据库客户端和生成器使用
+
+多进程部署(如uvicorn --workers)时设置PROMETHEUS_MULTIPROC_DIR环境变量，/metrics会汇总所有worker的数据
+"""
+
+import os
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+
+# 请求耗时分桶：覆盖普通查询到大模型生成的长尾
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# HTTP请求指标
+HTTP_REQUESTS_TOTAL = Counter(
+    "soluna_http_requests_total",
+    "HTTP请求总数",
+    ["method", "route", "status"]
+)
+HTTP_REQUEST_DURATION_SECONDS = Histogram(
+    "soluna_http_request_duration_seconds",
+    "HTTP请求耗时(秒)，流式响应包含完整的推送时间",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "soluna_http_requests_in_progress",
+    "正在处理的HTTP请求数",
+    ["method", "route"],
+    multiprocess_mode="livesum"
+)
+HTTP_REQUEST_ERRORS_TOTAL = Counter(
+    "soluna_http_request_errors_total",
+    "HTTP请求错误数(5xx或未处理异常)",
+    ["method", "route", "error"]
+)
+
+# MongoDB连接池指标
+MONGO_POOL_CONNECTIONS = Gauge(
+    "soluna_mongo_pool_connections",
+    "MongoDB连接池中已打开的连接数",
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "soluna_mongo_pool_checked_out_connections",
+    "MongoDB连接池中正在使用的连接数",
+    multiprocess_mode="livesum"
+)
+MONGO_POOL_CHECKOUT_FAILURES_TOTAL = Counter(
+    "soluna_mongo_pool_checkout_failures_total",
+    "MongoDB获取连接失败次数",
+    ["reason"]
+)
+
+# 大模型调用指标
+LLM_CALLS_IN_PROGRESS = Gauge(
+    "soluna_llm_calls_in_progress",
+    "正在进行的大模型调用数",
+    ["workflow"],
+    multiprocess_mode="livesum"
+)
+
+# 日志指标
+LOG_RECORDS_DROPPED_TOTAL = Counter(
+    "soluna_log_records_dropped_total",
+    "日志队列已满而被丢弃的日志条数"
+)
+
+
+class MongoPoolMetricsListener(monitoring.ConnectionPoolListener):
+    """MongoDB连接池事件监听器，维护连接数和使用中连接数"""
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        MONGO_POOL_CONNECTIONS.inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        MONGO_POOL_CONNECTIONS.dec()
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILURES_TOTAL.labels(reason=str(event.reason)).inc()
+
+    def connection_checked_out(self, event):
+        MONGO_POOL_CHECKED_OUT.inc()
+
+    def connection_checked_in(self, event):
+        MONGO_POOL_CHECKED_OUT.dec()
+
+
+class DatabaseStatusCollector:
+    """采集时读取数据库客户端状态，不会主动建立连接"""
+
+    def describe(self):
+        # 注册时只需要指标名称，避免在导入阶段访问数据库客户端
+        yield GaugeMetricFamily("soluna_db_connected", "数据库客户端是否已建立连接", labels=["database"])
+        yield GaugeMetricFamily("soluna_mysql_pending_reconnects", "MySQL客户端当前的连续重连次数")
+
+    def collect(self):
+        from src.db.mongo_client import get_mongo_client
+        from src.db.mysql_client import get_mysql_client
+
+        connected = GaugeMetricFamily(
+            "soluna_db_connected",
+            "数据库客户端是否已建立连接",
+            labels=["database"]
+        )
+        mysql_client = get_mysql_client()
+        mysql_connected = bool(mysql_client.connection and mysql_client.connection.open)
+        connected.add_metric(["mongodb"], 1 if get_mongo_client().is_connected() else 0)
+        connected.add_metric(["mysql"], 1 if mysql_connected else 0)
+        yield connected
+
+        yield GaugeMetricFamily(
+            "soluna_mysql_pending_reconnects",
+            "MySQL客户端当前的连续重连次数",
+            value=mysql_client.get_reconnect_count()
+        )
+
+
+REGISTRY.register(DatabaseStatusCollector())
+
+
+def render_metrics():
+    """生成Prometheus文本格式的指标数据
+
+    Returns:
+        tuple: (指标内容, Content-Type)
+    """
+    multiproc_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=multiproc_dir)
+        registry.register(DatabaseStatusCollector())
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def observe_http_request(method: str, route: str, status: int, duration: float, error: str = None):
+    """记录一次HTTP请求的结果
+
+    Args:
+        method: 请求方法
+        route: 路由模板，如/api/characters/{character_id}
+        status: 响应状态码
+        duration: 耗时(秒)
+        error: 异常类型名，没有异常时为None
+    """
+    HTTP_REQUESTS_TOTAL.labels(method=method, route=route, status=str(status)).inc()
+    HTTP_REQUEST_DURATION_SECONDS.labels(method=method, route=route).observe(duration)
+    if error or status >= 500:
+        HTTP_REQUEST_ERRORS_TOTAL.labels(method=method, route=route, error=error or str(status)).inc()
+
@@ -0,0 +1,133 @@
+"""
+请求限流
+基于滑动窗口日志的限流器，默认在进程内计数，不访问数据库。多进程部署需要全局一致的限流时，
+可通过set_rate_limit_backend替换为共享存储(如Redis)实现的后端，接口与InMemorySlidingWindowBackend相同。
+
+通过环境变量配置:
+- RATE_LIMIT_ENABLED: 是否启用限流，默认true
+- RATE_LIMIT_MAX_KEYS: 内存后端最多跟踪的key数量，默认100000，超出时淘汰最久未访问的key
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict, deque
+from typing import Tuple
+
+from prometheus_client import Counter
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+RATE_LIMIT_REJECTIONS_TOTAL = Counter(
+    "soluna_rate_limit_rejections_total",
+    "被限流拒绝的请求数",
+    ["name"]
+)
+
+
+class RateLimitExceeded(Exception):
+    """请求超过限流阈值"""
+
+    def __init__(self, name: str, retry_after: float):
+        self.name = name
+        self.retry_after = max(int(retry_after + 0.999), 1)
+        super().__init__(f"请求过于频繁，请{self.retry_after}秒后再试")
+
+
+class InMemorySlidingWindowBackend:
+    """进程内的滑动窗口计数后端，记录每个key在窗口内被允许的请求时间，线程安全"""
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS):
+        self.max_keys = max_keys
+        self._windows: "OrderedDict[str, deque]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, limit: int, window_seconds: float) -> Tuple[bool, float]:
+        """尝试记录一次请求
+
+        Args:
+            key: 限流key，如"verification_code:ip:1.2.3.4"
+            limit: 窗口内允许的最大请求数
+            window_seconds: 窗口长度(秒)
+
+        Returns:
+            Tuple[bool, float]: (是否允许, 被拒绝时需要等待的秒数)
+        """
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = deque()
+                self._windows[key] = window
+                while len(self._windows) > self.max_keys:
+                    self._windows.popitem(last=False)
+            else:
+                self._windows.move_to_end(key)
+
+            while window and window[0] <= now - window_seconds:
+                window.popleft()
+
+            if len(window) >= limit:
+                return False, window[0] + window_seconds - now
+
+            window.append(now)
+            return True, 0.0
+
+    def release(self, key: str):
+        """撤销key最近一次被允许的请求，用于请求在后续步骤失败时归还预占的次数"""
+        with self._lock:
+            window = self._windows.get(key)
+            if window:
+                window.pop()
+
+    def reset(self, key: str = None):
+        """清除指定key的计数，不传key时清除全部"""
+        with self._lock:
+            if key is None:
+                self._windows.clear()
+            else:
+                self._windows.pop(key, None)
+
+
+_backend = InMemorySlidingWindowBackend()
+
+
+def get_rate_limit_backend():
+    return _backend
+
+
+def set_rate_limit_backend(backend):
+    """替换限流后端，backend需实现hit(key, limit, window_seconds)、release(key)和reset(key)"""
+    global _backend
+    _backend = backend
+
+
+def check_rate_limit(name: str, key: str, limit: int, window_seconds: float):
+    """检查并记录一次请求，超过阈值时抛出RateLimitExceeded
+
+    检查和记录在后端中一步完成，并发请求不会同时通过最后一个名额；
+    请求在后续步骤失败时可调用release_rate_limit归还本次记录
+
+    Args:
+        name: 限流规则名称，用于指标和日志
+        key: 限流对象，如IP地址、手机号
+        limit: 窗口内允许的最大请求数
+        window_seconds: 窗口长度(秒)
+
+    Raises:
+        RateLimitExceeded: 超过限流阈值
+    """
+    if not RATE_LIMIT_ENABLED:
+        return
+    allowed, retry_after = _backend.hit(f"{name}:{key}", limit, window_seconds)
+    if not allowed:
+        RATE_LIMIT_REJECTIONS_TOTAL.labels(name=name).inc()
+        raise RateLimitExceeded(name, retry_after)
+
+
+def release_rate_limit(name: str, key: str):
+    """归还check_rate_limit记录的最近一次请求"""
+    if not RATE_LIMIT_ENABLED:
+        return
+    _backend.release(f"{name}:{key}")
@@ -0,0 +1,188 @@
+"""
+进程内的周期任务调度器
+在FastAPI的事件循环中按固定间隔运行维护任务。多个worker或多个实例同时运行时，通过MySQL命名锁(GET_LOCK)
+选出一个leader，只有持有锁的进程执行任务；leader退出或连接断开后锁自动释放，其他进程在下一次检查时接管。
+
+普通函数任务在线程中依次执行，不阻塞事件循环；进程内共享的MySQL连接不是线程安全的，任务需使用独立的连接。
+协程任务直接在事件循环中await，不应包含阻塞操作。leader检查同样使用独立的连接，在线程中执行
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from src.db.mysql_client import MySQLClient
+
+logger = logging.getLogger(__name__)
+
+SCHEDULER_JOB_RUNS_TOTAL = Counter(
+    "soluna_scheduler_job_runs_total",
+    "周期任务执行次数",
+    ["job", "status"]
+)
+SCHEDULER_JOB_DURATION_SECONDS = Histogram(
+    "soluna_scheduler_job_duration_seconds",
+    "周期任务执行耗时(秒)",
+    ["job"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+)
+
+
+@dataclass
+class PeriodicJob:
+    """周期任务"""
+    name: str  # 任务名称，用于日志和指标
+    interval_seconds: float  # 执行间隔
+    func: Callable[[], Any]  # 任务函数，普通函数在线程中执行，协程函数在事件循环中执行
+    initial_delay: float = 0  # 成为leader后首次执行前的等待时间
+    next_run: Optional[float] = None  # 下次执行的时间(time.monotonic)，为空表示尚未安排
+
+
+class MySQLLeaderLock:
+    """基于MySQL命名锁的leader选举
+
+    锁绑定在独立的数据库连接上，连接断开时MySQL自动释放锁；每次检查时确认锁仍由当前连接持有
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._client: Optional[MySQLClient] = None
+
+    def _db(self) -> MySQLClient:
+        if self._client is None:
+            # 不使用单例，锁连接与业务连接分开
+            self._client = MySQLClient()
+        return self._client
+
+    def ensure(self) -> bool:
+        """确认或尝试获取锁，返回当前进程是否为leader"""
+        db = self._db()
+        rows = db.execute_query("SELECT IS_USED_LOCK(%s) = CONNECTION_ID() AS held", (self.name,))
+        if rows and rows[0]['held']:
+            return True
+        rows = db.execute_query("SELECT GET_LOCK(%s, 0) AS acquired", (self.name,))
+        return bool(rows and rows[0]['acquired'] == 1)
+
+    def release(self):
+        """释放锁并关闭锁连接"""
+        if self._client is None:
+            return
+        try:
+            self._client.execute_query("SELECT RELEASE_LOCK(%s) AS released", (self.name,))
+        except Exception as e:
+            logger.warning("释放调度锁失败: %s", e)
+        finally:
+            self._client.close_connection()
+            self._client = None
+
+
+class PeriodicScheduler:
+    """周期任务调度器
+
+    Args:
+        jobs: 周期任务列表
+        lock: leader锁，为空时当前进程总是执行任务
+        tick_seconds: 检查leader和到期任务的间隔
+    """
+
+    def __init__(self, jobs: List[PeriodicJob], lock: Optional[MySQLLeaderLock] = None,
+                 tick_seconds: float = 30):
+        self.jobs = jobs
+        self.lock = lock
+        self.tick_seconds = tick_seconds
+        self.is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._stopping: Optional[asyncio.Event] = None
+
+    async def _check_leader(self) -> bool:
+        if self.lock is None:
+            return True
+        try:
+            leader = await asyncio.to_thread(self.lock.ensure)
+        except Exception as e:
+            if self.is_leader:
+                logger.error("检查调度锁失败，暂停执行周期任务: %s", e)
+            else:
+                logger.debug("检查调度锁失败: %s", e)
+            leader = False
+        return leader
+
+    async def run_pending(self, now: Optional[float] = None) -> List[str]:
+        """检查leader身份并执行所有到期的任务
+
+        Returns:
+            List[str]: 本次执行的任务名称
+        """
+        leader = await self._check_leader()
+        now = time.monotonic() if now is None else now
+        if leader != self.is_leader:
+            logger.info("成为周期任务leader" if leader else "不再是周期任务leader")
+            self.is_leader = leader
+            # 新成为leader时重新安排任务，从初始延迟开始计时
+            for job in self.jobs:
+                job.next_run = None
+        if not leader:
+            return []
+
+        executed = []
+        for job in self.jobs:
+            if job.next_run is None:
+                job.next_run = now + job.initial_delay
+            if now < job.next_run:
+                continue
+            await self._run_job(job)
+            job.next_run = now + job.interval_seconds
+            executed.append(job.name)
+        return executed
+
+    async def _run_job(self, job: PeriodicJob):
+        started = time.perf_counter()
+        status = "success"
+        try:
+            if inspect.iscoroutinefunction(job.func):
+                await job.func()
+            else:
+                await asyncio.to_thread(job.func)
+        except Exception as e:
+            status = "error"
+            logger.error("周期任务 %s 执行失败: %s", job.name, e)
+        finally:
+            SCHEDULER_JOB_RUNS_TOTAL.labels(job=job.name, status=status).inc()
+            SCHEDULER_JOB_DURATION_SECONDS.labels(job=job.name).observe(time.perf_counter() - started)
+
+    async def _loop(self):
+        while not self._stopping.is_set():
+            await self.run_pending()
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.tick_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def start(self):
+        """在当前事件循环中启动调度"""
+        if self._task is not None:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self, timeout: float = 30):
+        """停止调度，等待正在执行的任务完成后释放leader锁"""
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("等待周期任务结束超时，取消执行")
+            self._task.cancel()
+        except Exception as e:
+            logger.error("停止周期任务调度失败: %s", e)
+        self._task = None
+        self.is_leader = False
+        if self.lock is not None:
+            await asyncio.to_thread(self.lock.release)
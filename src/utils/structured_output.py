@@ -0,0 +1,345 @@
+"""
+大模型结构化输出提取工具
+从LLM响应文本中提取JSON数据，供角色、事件配置、生活轨迹等生成器共用
+
+- 线性扫描：一次遍历找出所有顶层平衡的{...}/[...]片段，优先使用```代码块中的内容
+- 容错修复：修复末尾多余逗号、注释、Python字面量、单引号/中文引号、字符串内换行、输出被截断等常见问题
+- 字段校验：校验必要字段并过滤未知字段，校验失败时继续尝试下一个候选片段
+"""
+
+import json
+import dataclasses
+from typing import Any, Callable, Iterable, Iterator, Optional, Sequence, Tuple, Union
+
+
+class StructuredOutputError(ValueError):
+    """无法从大模型输出中提取出符合要求的结构化数据"""
+
+
+_OPENERS = {'{': '}', '[': ']'}
+_CLOSERS = {'}': '{', ']': '['}
+_PYTHON_LITERALS = {'True': 'true', 'False': 'false', 'None': 'null'}
+_QUOTE_PAIRS = {'"': '"', "'": "'", '“': '”'}
+
+
+def _iter_fenced_blocks(text: str) -> Iterator[str]:
+    """依次返回```代码块中的内容（忽略语言标记）"""
+    pos = 0
+    while True:
+        start = text.find('```', pos)
+        if start == -1:
+            return
+        content_start = text.find('\n', start + 3)
+        if content_start == -1:
+            return
+        end = text.find('```', content_start)
+        if end == -1:
+            # 代码块未闭合（输出被截断），取到文本末尾
+            yield text[content_start + 1:]
+            return
+        yield text[content_start + 1:end]
+        pos = end + 3
+
+
+def _iter_balanced_spans(text: str) -> Iterator[str]:
+    """一次线性扫描返回所有顶层平衡的JSON片段
+
+    只在片段内部跟踪字符串，避免正文中的引号干扰；文本末尾未闭合的片段也会返回，交给修复逻辑补全
+    """
+    stack = []
+    start = None
+    in_string = False
+    escape = False
+
+    for i, char in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif char == '\\':
+                escape = True
+            elif char == '"':
+                in_string = False
+            continue
+
+        if char == '"' and stack:
+            in_string = True
+        elif char in _OPENERS:
+            if not stack:
+                start = i
+            stack.append(char)
+        elif char in _CLOSERS and stack:
+            if stack[-1] == _CLOSERS[char]:
+                stack.pop()
+                if not stack:
+                    yield text[start:i + 1]
+            else:
+                # 括号不匹配，放弃当前片段
+                stack = []
+
+    if stack:
+        yield text[start:]
+
+
+def iter_json_candidates(text: str) -> Iterator[str]:
+    """按优先级返回文本中可能的JSON片段：先代码块内，再全文"""
+    for block in _iter_fenced_blocks(text):
+        yield from _iter_balanced_spans(block)
+    yield from _iter_balanced_spans(text)
+
+
+def repair_json(text: str) -> str:
+    """修复大模型输出中常见的JSON格式问题
+
+    单次遍历完成以下修复：
+    - 删除//和/* */注释
+    - 删除对象/数组末尾多余的逗号
+    - 将True/False/None替换为true/false/null
+    - 将单引号和中文引号包裹的字符串转换为标准双引号字符串
+    - 转义字符串中的原始换行和制表符
+    - 补全被截断的字符串和括号
+
+    Args:
+        text: 待修复的JSON片段
+
+    Returns:
+        str: 修复后的JSON文本
+    """
+    out = []
+    stack = []
+    quote = None  # 当前字符串的结束引号
+    escape = False
+    i = 0
+    length = len(text)
+
+    def strip_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ',':
+            out.pop()
+
+    while i < length:
+        char = text[i]
+
+        if quote is not None:
+            if escape:
+                escape = False
+                out.append(char)
+            elif char == '\\':
+                escape = True
+                out.append(char)
+            elif char == quote:
+                quote = None
+                out.append('"')
+            elif char == '"':
+                # 非双引号字符串中的双引号需要转义
+                out.append('\\"')
+            elif char == '\n':
+                out.append('\\n')
+            elif char == '\r':
+                out.append('\\r')
+            elif char == '\t':
+                out.append('\\t')
+            else:
+                out.append(char)
+            i += 1
+            continue
+
+        if char in _QUOTE_PAIRS:
+            quote = _QUOTE_PAIRS[char]
+            out.append('"')
+            i += 1
+            continue
+
+        if char == '/' and i + 1 < length and text[i + 1] == '/':
+            newline = text.find('\n', i)
+            i = length if newline == -1 else newline
+            continue
+
+        if char == '/' and i + 1 < length and text[i + 1] == '*':
+            comment_end = text.find('*/', i + 2)
+            i = length if comment_end == -1 else comment_end + 2
+            continue
+
+        if char in _OPENERS:
+            stack.append(_OPENERS[char])
+            out.append(char)
+        elif char in _CLOSERS:
+            strip_trailing_comma()
+            if stack and stack[-1] == char:
+                stack.pop()
+            out.append(char)
+        elif char.isalpha() or char == '_':
+            word_end = i
+            while word_end < length and (text[word_end].isalnum() or text[word_end] == '_'):
+                word_end += 1
+            word = text[i:word_end]
+            out.append(_PYTHON_LITERALS.get(word, word))
+            i = word_end
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    # 补全被截断的内容
+    if quote is not None:
+        if escape:
+            out.pop()
+        out.append('"')
+    while out and out[-1].isspace():
+        out.pop()
+    if out and out[-1] == ':':
+        out.append('null')
+    for closer in reversed(stack):
+        strip_trailing_comma()
+        out.append(closer)
+
+    return ''.join(out)
+
+
+def _loads_candidate(candidate: str) -> Tuple[bool, Any]:
+    """解析候选片段，失败时修复后再试一次"""
+    try:
+        return True, json.loads(candidate)
+    except json.JSONDecodeError:
+        pass
+    try:
+        return True, json.loads(repair_json(candidate))
+    except json.JSONDecodeError:
+        return False, None
+
+
+def extract_json(text: str,
+                 expected_type: Union[type, Tuple[type, ...], None] = None,
+                 validator: Optional[Callable[[Any], Any]] = None) -> Any:
+    """从大模型输出文本中提取JSON数据
+
+    Args:
+        text: 大模型输出文本
+        expected_type: 期望的顶层类型，如dict、list或(dict, list)
+        validator: 可选的校验函数，返回清洗后的数据；抛出StructuredOutputError时尝试下一个候选片段
+
+    Returns:
+        Any: 第一个解析成功且通过校验的JSON数据
+
+    Raises:
+        StructuredOutputError: 当没有任何候选片段满足要求时抛出
+    """
+    if not text or not isinstance(text, str):
+        raise StructuredOutputError("响应内容为空")
+
+    last_error = "响应中未找到有效的JSON数据"
+    for candidate in iter_json_candidates(text):
+        ok, data = _loads_candidate(candidate)
+        if not ok:
+            last_error = f"JSON解析失败: {candidate[:100]}..."
+            continue
+        if expected_type is not None and not isinstance(data, expected_type):
+            last_error = f"JSON类型不符合预期: {type(data).__name__}"
+            continue
+        if validator is not None:
+            try:
+                data = validator(data)
+            except StructuredOutputError as e:
+                last_error = str(e)
+                continue
+        return data
+
+    raise StructuredOutputError(last_error)
+
+
+def extract_json_from_messages(messages: Sequence[Any],
+                               preferred_source: Optional[str] = None,
+                               expected_type: Union[type, Tuple[type, ...], None] = None,
+                               validator: Optional[Callable[[Any], Any]] = None) -> Any:
+    """从agent团队的消息列表中提取JSON数据
+
+    优先使用preferred_source发出的消息，其次按从新到旧的顺序尝试其他agent的消息；
+    用户任务消息(source为user)是输入而非输出，始终跳过
+
+    Args:
+        messages: TaskResult.messages
+        preferred_source: 优先使用的agent名称
+        expected_type: 期望的顶层类型
+        validator: 可选的校验函数
+
+    Returns:
+        Any: 提取出的JSON数据
+
+    Raises:
+        StructuredOutputError: 当所有消息都无法提取出有效数据时抛出
+    """
+    candidates = [
+        message for message in (messages or [])
+        if isinstance(getattr(message, 'content', None), str) and getattr(message, 'source', None) != 'user'
+    ]
+    preferred = [message for message in candidates if preferred_source and message.source == preferred_source]
+    others = [message for message in reversed(candidates) if message not in preferred]
+
+    last_error = "未收到agent的有效响应"
+    for message in preferred + others:
+        try:
+            return extract_json(message.content, expected_type=expected_type, validator=validator)
+        except StructuredOutputError as e:
+            last_error = str(e)
+
+    raise StructuredOutputError(last_error)
+
+
+def validate_fields(data: Any,
+                    required_fields: Iterable[str] = (),
+                    allowed_fields: Optional[Iterable[str]] = None,
+                    any_of_fields: Iterable[str] = ()) -> dict:
+    """校验JSON对象的字段
+
+    Args:
+        data: 待校验的数据
+        required_fields: 必须存在的字段
+        allowed_fields: 允许的字段，提供时会过滤掉其他字段
+        any_of_fields: 至少需要存在其中之一的字段
+
+    Returns:
+        dict: 过滤后的数据
+
+    Raises:
+        StructuredOutputError: 当数据不是对象或缺少字段时抛出
+    """
+    if not isinstance(data, dict):
+        raise StructuredOutputError(f"期望JSON对象，实际为{type(data).__name__}")
+
+    missing = [field for field in required_fields if field not in data]
+    if missing:
+        raise StructuredOutputError(f"缺少必要字段: {missing}")
+
+    any_of_fields = list(any_of_fields)
+    if any_of_fields and not any(field in data for field in any_of_fields):
+        raise StructuredOutputError(f"至少需要包含以下字段之一: {any_of_fields}")
+
+    if allowed_fields is not None:
+        allowed = set(allowed_fields)
+        data = {key: value for key, value in data.items() if key in allowed}
+
+    return data
+
+
+def dataclass_validator(cls, exclude: Iterable[str] = ()) -> Callable[[Any], dict]:
+    """根据dataclass字段生成校验函数：无默认值的字段为必要字段，未知字段被过滤
+
+    Args:
+        cls: dataclass类
+        exclude: 不允许由大模型填充的字段（如系统字段）
+
+    Returns:
+        Callable[[Any], dict]: 可传给extract_json的校验函数
+    """
+    exclude = set(exclude)
+    fields = [field for field in dataclasses.fields(cls) if field.name not in exclude]
+    required = [
+        field.name for field in fields
+        if field.default is dataclasses.MISSING and field.default_factory is dataclasses.MISSING
+    ]
+    allowed = [field.name for field in fields]
+
+    def validator(data: Any) -> dict:
+        return validate_fields(data, required_fields=required, allowed_fields=allowed)
+
+    return validator
@@ -0,0 +1,227 @@
+"""
+分布式追踪
+基于OpenTelemetry为HTTP请求、服务层、DAO层和大模型调用创建span，日志中的trace_id由TraceIdLogFilter添加
+
+通过环境变量配置:
+- TRACING_EXPORTER: none(默认，不创建span)、otlp(发送到OTLP collector)、json(写入JSON Lines文件)、console
+- TRACING_JSON_FILE: json导出的文件路径，默认logs/traces.jsonl
+- OTEL_EXPORTER_OTLP_ENDPOINT: otlp导出的collector地址，如http://localhost:4318
+- TRACING_SERVICE_NAME: 服务名，默认soluna-api
+"""
+
+import os
+import json
+import logging
+import functools
+import inspect
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Optional
+
+from opentelemetry import trace
+from opentelemetry.trace import Status, StatusCode
+
+TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none").lower()
+TRACING_ENABLED = TRACING_EXPORTER != "none"
+
+_tracer = trace.get_tracer("soluna")
+_setup_lock = threading.Lock()
+_provider = None
+
+
+class JSONFileSpanExporter:
+    """将span以JSON Lines格式追加写入文件，便于本地分析或离线导入collector"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans):
+        from opentelemetry.sdk.trace.export import SpanExportResult
+        lines = [json.dumps(json.loads(span.to_json()), ensure_ascii=False) for span in spans]
+        try:
+            with self._lock, open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            return SpanExportResult.SUCCESS
+        except OSError as e:
+            print(f"写入追踪文件失败: {e}")
+            return SpanExportResult.FAILURE
+
+    def shutdown(self):
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000):
+        return True
+
+
+def _create_exporter():
+    """根据TRACING_EXPORTER创建span导出器"""
+    if TRACING_EXPORTER == "otlp":
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        return OTLPSpanExporter()
+    if TRACING_EXPORTER == "json":
+        return JSONFileSpanExporter(os.getenv("TRACING_JSON_FILE", "logs/traces.jsonl"))
+    if TRACING_EXPORTER == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    raise ValueError(f"不支持的TRACING_EXPORTER: {TRACING_EXPORTER}")
+
+
+def setup_tracing():
+    """初始化TracerProvider，未启用追踪时不做任何操作"""
+    global _provider
+    if not TRACING_ENABLED or _provider is not None:
+        return
+
+    with _setup_lock:
+        if _provider is not None:
+            return
+        try:
+            from opentelemetry.sdk.resources import Resource
+            from opentelemetry.sdk.trace import TracerProvider
+            from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+            provider = TracerProvider(resource=Resource.create({
+                "service.name": os.getenv("TRACING_SERVICE_NAME", "soluna-api")
+            }))
+            provider.add_span_processor(BatchSpanProcessor(_create_exporter()))
+            trace.set_tracer_provider(provider)
+            _provider = provider
+        except Exception as e:
+            print(f"初始化追踪失败，将不导出span: {e}")
+
+
+def shutdown_tracing():
+    """导出剩余的span并关闭TracerProvider"""
+    global _provider
+    if _provider is not None:
+        _provider.shutdown()
+        _provider = None
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict[str, Any]] = None, kind=trace.SpanKind.INTERNAL, context=None):
+    """创建一个span，异常会被记录到span上并继续抛出
+
+    Args:
+        name: span名称
+        attributes: span属性
+        kind: span类型
+        context: 父上下文，默认为当前上下文
+
+    Yields:
+        Span: 当前span
+    """
+    if not TRACING_ENABLED:
+        yield trace.INVALID_SPAN
+        return
+    with _tracer.start_as_current_span(name, context=context, kind=kind, attributes=attributes,
+                                       record_exception=True, set_status_on_exception=True) as span:
+        yield span
+
+
+def traced(name: str = None):
+    """为函数创建span的装饰器，支持同步函数、协程和异步生成器
+
+    Args:
+        name: span名称，默认为函数的限定名
+    """
+    def decorator(func):
+        if not TRACING_ENABLED:
+            return func
+        span_name = name or func.__qualname__
+
+        if inspect.isasyncgenfunction(func):
+            @functools.wraps(func)
+            async def async_gen_wrapper(*args, **kwargs):
+                # span覆盖整个生成过程，但只在每次取下一个元素时设为当前span，yield前就恢复上下文，
+                # 消费方切换上下文或中途放弃生成器时不会出现上下文错乱
+                span = _tracer.start_span(span_name)
+                agen = func(*args, **kwargs)
+                try:
+                    while True:
+                        with trace.use_span(span, record_exception=True, set_status_on_exception=True):
+                            try:
+                                item = await agen.__anext__()
+                            except StopAsyncIteration:
+                                break
+                        yield item
+                finally:
+                    try:
+                        await agen.aclose()
+                    finally:
+                        span.end()
+            return async_gen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with start_span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with start_span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def traced_class(prefix: str = None):
+    """为类中所有公开方法创建span的类装饰器，适用于服务层和DAO层
+
+    Args:
+        prefix: span名称前缀，默认为类名
+    """
+    def decorator(cls):
+        if not TRACING_ENABLED:
+            return cls
+        class_prefix = prefix or cls.__name__
+        for attr_name, attr in list(vars(cls).items()):
+            if attr_name.startswith("_"):
+                continue
+            span_name = f"{class_prefix}.{attr_name}"
+            if isinstance(attr, staticmethod):
+                setattr(cls, attr_name, staticmethod(traced(span_name)(attr.__func__)))
+            elif isinstance(attr, classmethod):
+                setattr(cls, attr_name, classmethod(traced(span_name)(attr.__func__)))
+            elif inspect.isfunction(attr):
+                setattr(cls, attr_name, traced(span_name)(attr))
+        return cls
+
+    return decorator
+
+
+def current_trace_id() -> Optional[str]:
+    """获取当前trace_id的十六进制字符串，没有活动span时返回None"""
+    span_context = trace.get_current_span().get_span_context()
+    if not span_context.is_valid:
+        return None
+    return format(span_context.trace_id, "032x")
+
+
+def mark_span_error(message: str):
+    """将当前span标记为错误，用于返回错误响应但未抛出异常的分支"""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_status(Status(StatusCode.ERROR, message))
+
+
+class TraceIdLogFilter(logging.Filter):
+    """为日志记录添加trace_id和span_id字段"""
+
+    def filter(self, record):
+        span_context = trace.get_current_span().get_span_context()
+        if span_context.is_valid:
+            record.trace_id = format(span_context.trace_id, "032x")
+            record.span_id = format(span_context.span_id, "016x")
+        else:
+            record.trace_id = "-"
+            record.span_id = "-"
+        return True
+
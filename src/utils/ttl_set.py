@@ -0,0 +1,110 @@
+"""
+按时间分桶轮转的TTL集合
+元素写入当前时间桶，查询时检查所有未过期的桶，整桶过期后直接丢弃，不需要逐个元素清理。
+元素的实际保留时间在ttl到ttl加一个桶宽之间。可以快照到磁盘，进程重启后恢复未过期的元素
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Hashable, Iterable, Optional
+
+
+class RotatingTTLSet:
+    """按时间分桶轮转的TTL集合，线程安全
+
+    时间使用Unix时间戳(time.time)，快照恢复后仍能按写入时间判断是否过期
+    """
+
+    def __init__(self, ttl_seconds: float, bucket_count: int = 30):
+        if ttl_seconds <= 0 or bucket_count <= 0:
+            raise ValueError("ttl_seconds和bucket_count必须大于0")
+        self.ttl_seconds = ttl_seconds
+        self.bucket_seconds = ttl_seconds / bucket_count
+        # (桶起始时间, 元素集合)，按起始时间从旧到新排列
+        self._buckets: "deque[tuple]" = deque()
+        self._lock = threading.Lock()
+
+    def _bucket_start(self, now: float) -> float:
+        return now - now % self.bucket_seconds
+
+    def _expire(self, now: float):
+        # 桶内最新的元素也已超过ttl时丢弃整个桶
+        while self._buckets and self._buckets[0][0] + self.bucket_seconds <= now - self.ttl_seconds:
+            self._buckets.popleft()
+
+    def add_many(self, keys: Iterable[Hashable], now: Optional[float] = None) -> int:
+        """把元素写入当前时间桶，返回写入的元素数"""
+        now = time.time() if now is None else now
+        start = self._bucket_start(now)
+        with self._lock:
+            self._expire(now)
+            if not self._buckets or self._buckets[-1][0] < start:
+                self._buckets.append((start, set()))
+            bucket = self._buckets[-1][1]
+            count = len(bucket)
+            bucket.update(keys)
+            return len(bucket) - count
+
+    def add(self, key: Hashable, now: Optional[float] = None):
+        self.add_many((key,), now)
+
+    def contains_many(self, keys: Iterable[Hashable], now: Optional[float] = None) -> dict:
+        """批量检查元素是否在未过期的桶中"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._expire(now)
+            buckets = [bucket for _, bucket in self._buckets]
+        return {key: any(key in bucket for bucket in buckets) for key in keys}
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.contains_many((key,))[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._expire(time.time())
+            return len(set().union(*(bucket for _, bucket in self._buckets)))
+
+    def save(self, path: str) -> int:
+        """把未过期的元素写入快照文件，先写临时文件再替换，返回写入的元素数
+
+        快照使用JSON保存，元素必须是字符串
+        """
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            buckets = [[start, sorted(bucket)] for start, bucket in self._buckets]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"saved_at": now, "ttl_seconds": self.ttl_seconds, "buckets": buckets}, f)
+        os.replace(tmp_path, path)
+        return sum(len(keys) for _, keys in buckets)
+
+    def load(self, path: str) -> Optional[float]:
+        """从快照文件恢复未过期的元素
+
+        Returns:
+            Optional[float]: 快照的保存时间，文件不存在时返回None
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        now = time.time()
+        with self._lock:
+            merged = {start: bucket for start, bucket in self._buckets}
+            for start, keys in snapshot.get("buckets", []):
+                # 快照和当前配置的桶宽可能不同，按当前桶宽重新归入
+                merged.setdefault(self._bucket_start(start), set()).update(keys)
+            self._buckets = deque(sorted(merged.items(), key=lambda item: item[0]))
+            self._expire(now)
+        return snapshot.get("saved_at")
+
+    def clear(self):
+        with self._lock:
+            self._buckets.clear()
@@ -0,0 +1,105 @@
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.emotion.model.emotion_mapping import EmotionMappings
+from src.emotion.model.emotion_state import EmotionState
+from src.emotion.utils.emotion_analytics import EmotionSeries, classify_emotions, summarize_by_character
+from src.emotion.utils.emotion_utils import generate_emotion_summary
+from src.service.emotion.emotion_service import EmotionService
+
+
+def random_records(count=300, seed=11):
+    random.seed(seed)
+    base = datetime(2024, 1, 1)
+    return [{
+        'pleasure': random.randint(-100, 100),
+        'arousal': random.randint(-100, 100),
+        'dominance': random.randint(-100, 100),
+        'traditional_emotion': random.choice(['开心', '平静', '焦虑', '无聊']),
+        'timestamp': (base + timedelta(hours=i)).isoformat(),
+    } for i in range(count)]
+
+
+def loop_summary(emotions):
+    """原有逐个生成器遍历的实现，用于对照"""
+    n = len(emotions)
+    avg = {d: sum(e[d] for e in emotions) / n for d in ('pleasure', 'arousal', 'dominance')}
+    counts = {}
+    for e in emotions:
+        counts[e['traditional_emotion']] = counts.get(e['traditional_emotion'], 0) + 1
+    main = max(counts.items(), key=lambda x: x[1])
+    stability = 100 - sum(abs(e[d] - avg[d]) for e in emotions for d in avg) / (n * 3)
+    return avg, counts, main, stability
+
+
+# 测试向量化摘要与原有逐个遍历的结果一致，包括情绪分布的顺序
+def test_generate_emotion_summary_matches_loop():
+    emotions = random_records()
+    result = generate_emotion_summary(emotions)
+    avg, counts, main, stability = loop_summary(emotions)
+    assert result['emotion_distribution'] == counts
+    assert list(result['emotion_distribution']) == list(counts)
+    assert result['summary']['main_emotion'] == main[0]
+    assert result['summary']['average_pleasure'] == round(avg['pleasure'], 2)
+    assert result['summary']['emotional_stability'] == round(stability, 2)
+    assert generate_emotion_summary([]) == {"message": "暂无情绪数据"}
+
+    states = [EmotionState('c1', datetime.fromisoformat(e['timestamp']), e['pleasure'], e['arousal'],
+                           e['dominance'], e['traditional_emotion'], '', '', '', '', '', 1.0, 0.0)
+              for e in emotions]
+    history = EmotionService().get_emotion_history_summary(states)
+    assert history['emotion_distribution'] == counts
+    assert history['most_frequent_emotion']['emotion'] == main[0]
+    assert history['average_emotion']['arousal'] == round(avg['arousal'], 2)
+
+
+# 测试批量情绪分类与逐个匹配的结果一致
+def test_classify_emotions_matches_find_matching_emotion():
+    random.seed(2)
+    pad = np.array([[random.uniform(-100, 100) for _ in range(3)] for _ in range(5000)])
+    pad[:20] = np.round(pad[:20])
+    expected = [EmotionMappings.find_matching_emotion(*row).traditional for row in pad]
+    assert classify_emotions(pad).tolist() == expected
+
+
+# 测试趋势斜率、滑动平均和按样本数加权
+def test_trend_slope_rolling_mean_and_weights():
+    base = datetime(2024, 1, 1)
+    points = [{'time': base + timedelta(days=i), 'pleasure': 2 * i, 'arousal': -i, 'dominance': 5, 'count': 1}
+              for i in range(10)]
+    series = EmotionSeries.from_points(points)
+    assert np.allclose(series.trend_slope(), [2, -1, 0])
+    assert np.allclose(series.rolling_mean(3)[0], [2, -1, 5])
+    assert len(series.rolling_mean(3)) == 8
+
+    weighted = EmotionSeries.from_points([
+        {'time': base, 'pleasure': 10, 'arousal': 0, 'dominance': 0, 'count': 3},
+        {'time': base, 'pleasure': -10, 'arousal': 0, 'dominance': 0, 'count': 1},
+    ])
+    assert weighted.mean()[0] == 5
+    summary = weighted.summary()
+    assert summary['total_records'] == 4
+    assert summary['trend_slope_per_day'] == {'pleasure': 0, 'arousal': 0, 'dominance': 0}
+    assert sum(summary['emotion_distribution'].values()) == 4
+
+
+# 测试按角色分组统计与逐个角色计算一致
+def test_summarize_by_character_matches_per_series():
+    random.seed(4)
+    ids = [f'c{random.randint(0, 20)}' for _ in range(3000)]
+    pad = np.random.default_rng(4).integers(-100, 101, size=(3000, 3))
+    grouped = summarize_by_character(ids, pad)
+    for character_id in ('c0', 'c7', 'c20'):
+        rows = pad[[i for i, cid in enumerate(ids) if cid == character_id]]
+        series = EmotionSeries(rows)
+        assert grouped[character_id]['count'] == len(rows)
+        assert grouped[character_id]['stability'] == round(series.stability(), 2)
+        assert grouped[character_id]['average']['dominance'] == round(float(series.mean()[2]), 2)
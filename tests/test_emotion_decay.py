@@ -0,0 +1,122 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.emotion.model.emotion_decay import (
+    HALF_LIFE_HOURS, apply_decay, compute_baseline, calculate_emotion_score
+)
+from src.emotion.db.emotion_dao import EmotionDAO
+from src.emotion.db.emotion_history_dao import EmotionHistoryDAO
+
+
+class FakeDB:
+    """记录批量更新参数的MySQL客户端替身"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.batch_updates = []
+        self.batch_inserts = []
+
+    def execute_query(self, query, params=None):
+        ids = set(params or [])
+        return [dict(row) for row in self.rows if row['character_id'] in ids]
+
+    def execute_batch_update(self, query, data):
+        self.batch_updates.append((query, data))
+        return len(data)
+
+    def execute_batch_insert(self, query, data):
+        self.batch_inserts.append((query, data))
+        return len(data)
+
+
+def make_row(character_id='c1', pleasure=80, arousal=60, dominance=-40, hours_ago=0.0, **extra):
+    row = {
+        'character_id': character_id,
+        'pleasure_score': pleasure,
+        'arousal_score': arousal,
+        'dominance_score': dominance,
+        'current_emotion_score': calculate_emotion_score(pleasure, arousal, dominance),
+        'baseline_pleasure': 0,
+        'baseline_arousal': 0,
+        'baseline_dominance': 0,
+        'half_life_scale': 1.0,
+        'pad_updated_at': datetime.now() - timedelta(hours=hours_ago),
+    }
+    row.update(extra)
+    return row
+
+
+# 测试经过一个半衰期后与基线的差值减半，未记录写入时间的数据不衰减
+def test_apply_decay_halves_distance_to_baseline():
+    now = datetime(2024, 5, 1, 12)
+    row = make_row(baseline_pleasure=20, pad_updated_at=now - timedelta(hours=HALF_LIFE_HOURS['pleasure']))
+    decayed = apply_decay(row, now)
+    assert decayed['pleasure_score'] == 50
+    assert decayed['current_emotion_score'] == calculate_emotion_score(
+        decayed['pleasure_score'], decayed['arousal_score'], decayed['dominance_score'])
+    assert row['pleasure_score'] == 80
+
+    slow = apply_decay(dict(row, half_life_scale=2.0), now)
+    assert slow['pleasure_score'] > decayed['pleasure_score']
+    assert apply_decay(row, now + timedelta(days=30))['pleasure_score'] == 20
+
+    legacy = dict(row, pad_updated_at=None)
+    assert apply_decay(legacy, now) is legacy
+
+
+# 测试大五人格得出的基线：外向宜人的角色基线愉悦度为正，情绪波动类型决定半衰期倍率
+def test_compute_baseline_from_personality():
+    cheerful = compute_baseline({'开放性': 0.6, '尽责性': 0.5, '外倾性': 0.9, '宜人性': 0.9, '神经质': 0.1}, '稳定')
+    gloomy = compute_baseline({'开放性': 0.4, '尽责性': 0.5, '外倾性': 0.1, '宜人性': 0.1, '神经质': 0.9}, '敏感')
+    assert cheerful['baseline_pleasure'] > 0 > gloomy['baseline_pleasure']
+    assert gloomy['baseline_arousal'] > cheerful['baseline_arousal']
+    assert cheerful['half_life_scale'] < 1 < gloomy['half_life_scale']
+    for baseline in (cheerful, gloomy):
+        assert all(-50 <= baseline[f'baseline_{d}'] <= 50 for d in ('pleasure', 'arousal', 'dominance'))
+
+    neutral = compute_baseline(None, None)
+    assert neutral == {'baseline_pleasure': 0, 'baseline_arousal': 0, 'baseline_dominance': 0,
+                       'half_life_scale': 1.0}
+
+
+# 测试读取时计算衰减而不写库，写入时先衰减再叠加事件影响并记录写入时间
+def test_dao_reads_decay_lazily_and_writes_from_decayed_value():
+    dao = EmotionDAO()
+    dao.db = FakeDB([make_row('c1', pleasure=80, hours_ago=HALF_LIFE_HOURS['pleasure']),
+                     make_row('c2', pleasure=-60, hours_ago=0)])
+    dao.history_dao = EmotionHistoryDAO()
+    dao.history_dao.db = dao.db
+
+    assert dao.get_emotion_by_character_id('c1')['pleasure_score'] == 40
+    batch = dao.get_emotions_batch(['c1', 'c2', 'c3'])
+    assert batch['c1']['pleasure_score'] == 40 and batch['c2']['pleasure_score'] == -60
+    assert batch['c3'] is None
+    assert dao.db.batch_updates == []
+
+    results = dao.batch_update_emotions_from_events([
+        {'character_id': 'c1', 'pad_impact': {'pleasure': 10, 'arousal': 0, 'dominance': 0}},
+        {'character_id': 'c3', 'pad_impact': {'pleasure': 5, 'arousal': 0, 'dominance': 0}},
+    ])
+    assert results == {'c1': True, 'c3': True}
+    (_, update_data), = dao.db.batch_updates
+    pleasure, _, _, _, written_at, character_id = update_data[0]
+    assert (character_id, pleasure) == ('c1', 50)
+    assert datetime.now() - written_at < timedelta(seconds=5)
+    insert_data, = [data for query, data in dao.db.batch_inserts if 'INSERT INTO emotions' in query]
+    assert insert_data[0][:2] == ('c3', 5)
+
+
+# 测试更换基线时先按旧基线衰减到当前时刻再保存
+def test_set_emotion_baselines_rebases_current_value():
+    dao = EmotionDAO()
+    dao.db = FakeDB([make_row('c1', pleasure=80, hours_ago=HALF_LIFE_HOURS['pleasure'])])
+    baseline = {'baseline_pleasure': 30, 'baseline_arousal': 10, 'baseline_dominance': -5, 'half_life_scale': 1.5}
+    assert dao.set_emotion_baselines({'c1': baseline, 'missing': baseline}) == 1
+    (_, update_data), = dao.db.batch_updates
+    row = update_data[0]
+    assert row[0] == 40 and row[4:8] == (30, 10, -5, 1.5) and row[-1] == 'c1'
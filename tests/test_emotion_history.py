@@ -0,0 +1,112 @@
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.emotion.model.emotion_history import (
+    build_rollup_rows, choose_resolution, downsample_series, history_entry, rollup_to_point
+)
+from src.emotion.db.emotion_history_dao import EmotionHistoryDAO
+from src.emotion.db.emotion_dao import EmotionDAO
+
+
+class FakeDB:
+    """记录SQL参数的MySQL客户端替身"""
+
+    def __init__(self, query_rows=None):
+        self.query_rows = query_rows or []
+        self.queries = []
+        self.batch_inserts = []
+        self.batch_updates = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append((query, params))
+        return [dict(row) for row in self.query_rows]
+
+    def execute_batch_insert(self, query, data):
+        self.batch_inserts.append((query, data))
+        return len(data)
+
+    def execute_batch_update(self, query, data):
+        self.batch_updates.append((query, data))
+        return len(data)
+
+
+def random_entries(count=500, seed=5):
+    random.seed(seed)
+    base = datetime(2024, 6, 1)
+    return [
+        history_entry(f'c{random.randint(0, 3)}', random.randint(-100, 100), random.randint(-100, 100),
+                      random.randint(-100, 100), random.randint(-100, 100), 'event',
+                      base + timedelta(minutes=random.randint(0, 60 * 24 * 3)))
+        for _ in range(count)
+    ]
+
+
+# 测试按小时、按天预聚合的结果与逐条统计一致
+def test_build_rollup_rows_matches_raw_aggregation():
+    entries = random_entries()
+    for resolution in ('hour', 'day'):
+        rows = build_rollup_rows(entries, resolution)
+        assert sum(row['sample_count'] for row in rows) == len(entries)
+        for row in rows:
+            members = [e for e in entries if e['character_id'] == row['character_id'] and
+                       row['bucket_start'] <= e['recorded_at'] <
+                       row['bucket_start'] + (timedelta(hours=1) if resolution == 'hour' else timedelta(days=1))]
+            assert row['sample_count'] == len(members)
+            assert row['sum_pleasure'] == sum(e['pleasure'] for e in members)
+            assert row['min_emotion_score'] == min(e['emotion_score'] for e in members)
+            assert row['max_emotion_score'] == max(e['emotion_score'] for e in members)
+
+
+# 测试合并相邻点时按样本数加权平均，auto粒度按时间范围选择
+def test_downsample_and_choose_resolution():
+    entries = random_entries()
+    points = [rollup_to_point(row) for row in sorted(build_rollup_rows(
+        [e for e in entries if e['character_id'] == 'c1'], 'hour'), key=lambda r: r['bucket_start'])]
+    merged = downsample_series(points, 10)
+    assert len(merged) <= 10
+    assert sum(p['count'] for p in merged) == sum(p['count'] for p in points)
+    assert merged[0]['time'] == points[0]['time']
+    assert downsample_series(points, None) is points
+
+    start = datetime(2024, 6, 1)
+    assert choose_resolution(start, start + timedelta(days=1)) == 'hour'
+    assert choose_resolution(start, start + timedelta(days=30)) == 'day'
+    try:
+        choose_resolution(start, start, 'minute')
+        assert False
+    except ValueError:
+        pass
+
+
+# 测试情绪批量更新后写入历史和两张汇总表，范围查询从汇总表读取
+def test_batch_update_records_history_and_series_reads_rollups():
+    dao = EmotionDAO()
+    dao.db = FakeDB()
+    history_dao = EmotionHistoryDAO()
+    history_dao.db = dao.db
+    dao.history_dao = history_dao
+
+    dao.batch_update_emotions_from_events([
+        {'character_id': 'c1', 'pad_impact': {'pleasure': 10, 'arousal': 5, 'dominance': 0}},
+        {'character_id': 'c2', 'pad_impact': {'pleasure': -20, 'arousal': 0, 'dominance': 3}},
+    ])
+    tables = [query.split('INSERT INTO')[1].split()[0] for query, _ in dao.db.batch_inserts]
+    assert tables == ['emotions', 'emotion_history', 'emotion_rollup_hourly', 'emotion_rollup_daily']
+    history = dao.db.batch_inserts[1][1]
+    assert [(row[0], row[1], row[5]) for row in history] == [('c1', 10, 'event'), ('c2', -20, 'event')]
+
+    history_dao.db = FakeDB([{
+        'bucket_start': datetime(2024, 6, 1), 'sample_count': 4, 'sum_pleasure': 40, 'sum_arousal': -8,
+        'sum_dominance': 0, 'sum_emotion_score': 12, 'min_emotion_score': -3, 'max_emotion_score': 9,
+    }])
+    series = history_dao.get_emotion_series('c1', datetime(2024, 5, 1, 7, 30), datetime(2024, 6, 20))
+    assert series['resolution'] == 'day'
+    assert series['points'][0]['pleasure'] == 10 and series['points'][0]['count'] == 4
+    query, params = history_dao.db.queries[0]
+    assert 'emotion_rollup_daily' in query and params[1] == datetime(2024, 5, 1)
@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.ttl_set import RotatingTTLSet
+from src.emotion.utils.event_deduplicator import EventDeduplicator
+
+
+class FakeDB:
+    """记录SQL的MySQL客户端替身，查询返回预设的已处理事件"""
+
+    def __init__(self, processed_rows=None):
+        self.processed_rows = processed_rows or []
+        self.queries = []
+        self.updates = []
+
+    def execute_query(self, query, params=None):
+        self.queries.append(query)
+        return list(self.processed_rows)
+
+    def execute_update(self, query, params=None):
+        self.updates.append(query)
+        return len(params or []) // 3
+
+
+# 测试元素在ttl内可查到，整桶超过ttl后过期
+def test_rotating_ttl_set_expires_whole_buckets():
+    ttl_set = RotatingTTLSet(ttl_seconds=60, bucket_count=6)
+    ttl_set.add_many(['a', 'b'], now=1000)
+    ttl_set.add('c', now=1035)
+    assert ttl_set.contains_many(['a', 'c', 'x'], now=1059) == {'a': True, 'c': True, 'x': False}
+    # a所在的桶[1000, 1010)在1070时整桶过期
+    assert ttl_set.contains_many(['a', 'c'], now=1070) == {'a': False, 'c': True}
+    assert ttl_set.contains_many(['c'], now=1100) == {'c': False}
+
+
+# 测试快照保存后恢复未过期的元素
+def test_rotating_ttl_set_snapshot_roundtrip(tmp_path):
+    path = str(tmp_path / 'dedup' / 'snapshot.json')
+    ttl_set = RotatingTTLSet(ttl_seconds=600, bucket_count=10)
+    now = time.time()
+    ttl_set.add_many(['old'], now=now - 900)
+    ttl_set.add_many(['recent'], now=now - 120)
+    ttl_set.add('new')
+    assert ttl_set.save(path) == 2
+
+    restored = RotatingTTLSet(ttl_seconds=600, bucket_count=5)
+    restored.add('live')
+    assert restored.load(path) is not None
+    assert restored.contains_many(['old', 'recent', 'new', 'live']) == {
+        'old': False, 'recent': True, 'new': True, 'live': True}
+    assert RotatingTTLSet(60).load(str(tmp_path / 'missing.json')) is None
+
+
+# 测试冷启动时内存未命中才查表，预热后检查和标记只写一次后备表
+def test_deduplicator_uses_memory_and_table_only_as_fallback(tmp_path):
+    db = FakeDB([{'character_id': 'c1', 'event_id': 'e0'}])
+    dedup = EventDeduplicator(db, ttl_minutes=30, snapshot_path='', table_fallback=True)
+    events = [{'character_id': 'c1', 'event_id': 'e0'}, {'character_id': 'c1', 'event_id': 'e1'}]
+
+    assert dedup.batch_check_events(events) == {'c1:e0': True, 'c1:e1': False}
+    assert len(db.queries) == 1
+    assert dedup.batch_check_events(events[:1]) == {'c1:e0': True}
+    assert len(db.queries) == 1
+
+    assert dedup.batch_mark_processed([dict(events[1], event_type='work')]) == 1
+    assert len(db.updates) == 1
+    dedup._warm_at = time.time()
+    assert dedup.batch_check_events(events + [{'character_id': 'c2', 'event_id': 'e9'}]) == {
+        'c1:e0': True, 'c1:e1': True, 'c2:e9': False}
+    assert len(db.queries) == 1
+
+    # 后备表每个去重窗口最多清理一次
+    dedup.cleanup_expired_records()
+    dedup.cleanup_expired_records()
+    assert len(db.updates) == 2 and 'DELETE' in db.updates[-1]
+
+
+# 测试关闭时保存快照，重启后直接预热不再查表
+def test_deduplicator_snapshot_restores_warm_state(tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    dedup = EventDeduplicator(FakeDB(), snapshot_path=path, table_fallback=False)
+    assert dedup.save_snapshot() == 0
+    dedup.batch_mark_processed([{'character_id': 'c1', 'event_id': 'e1'}])
+    assert dedup.save_snapshot() == 1
+
+    db = FakeDB()
+    restarted = EventDeduplicator(db, snapshot_path=path, table_fallback=True)
+    assert restarted.is_warm()
+    assert restarted.is_event_processed('c1', 'e1')
+    assert not restarted.is_event_processed('c1', 'e2')
+    assert db.queries == []
+
+
+# 测试快照加载后删除，之后崩溃重启时回退到查表；超过去重窗口的快照不跳过查表
+def test_deduplicator_snapshot_is_consumed_once(tmp_path):
+    path = str(tmp_path / 'snapshot.json')
+    dedup = EventDeduplicator(FakeDB(), snapshot_path=path, table_fallback=True)
+    dedup.batch_mark_processed([{'character_id': 'c1', 'event_id': 'e1'}])
+    assert dedup.save_snapshot() == 1
+
+    restarted = EventDeduplicator(FakeDB(), snapshot_path=path, table_fallback=True)
+    assert restarted.is_warm()
+    assert not os.path.exists(path)
+    restarted.batch_mark_processed([{'character_id': 'c1', 'event_id': 'e2'}])
+
+    # 未保存快照就崩溃，重启后e2只能从后备表中查到
+    db = FakeDB([{'character_id': 'c1', 'event_id': 'e2'}])
+    crashed = EventDeduplicator(db, snapshot_path=path, table_fallback=True)
+    assert not crashed.is_warm()
+    assert crashed.batch_check_events([{'character_id': 'c1', 'event_id': 'e2'}]) == {'c1:e2': True}
+    assert len(db.queries) == 1
+
+    stale = RotatingTTLSet(ttl_seconds=30 * 60)
+    stale.add('c1:e3')
+    stale.save(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    snapshot['saved_at'] -= 31 * 60
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f)
+    assert not EventDeduplicator(FakeDB(), snapshot_path=path, table_fallback=True).is_warm()
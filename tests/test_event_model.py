@@ -0,0 +1,41 @@
+import os
+import sys
+from dataclasses import asdict
+from datetime import datetime
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.character.model.event_profile import Event, EventProfile
+
+
+def make_event(event_id='e1'):
+    return Event(
+        event_id=event_id, type='daily', description='散步', start_time=datetime(2024, 3, 1, 8), status='completed',
+        is_key_event=False, impact='', location='公园', participants=['朋友'], outcome='',
+        pleasure_score=10, arousal_score=-5, dominance_score=3, end_time=datetime(2024, 3, 1, 9)
+    )
+
+
+# 测试事件使用__slots__且to_dict结果与asdict一致，列表字段不与原对象共享
+def test_event_slots_and_to_dict():
+    event = make_event()
+    assert not hasattr(event, '__dict__')
+    data = event.to_dict()
+    assert data == asdict(event)
+    data['participants'].append('陌生人')
+    assert event.participants == ['朋友']
+
+
+# 测试事件配置的to_dict不经过asdict深拷贝也能得到相同结构
+def test_event_profile_to_dict():
+    profile = EventProfile('c1')
+    profile.event_triggers = {'career': {'age': 30}}
+    profile.add_event(make_event())
+    data = profile.to_dict()
+    assert set(data) == {'id', 'character_id', 'life_path', 'current_stage', 'next_trend', 'event_triggers'}
+    assert data['life_path'] == [make_event().to_dict()]
+    data['event_triggers']['career']['age'] = 40
+    assert profile.event_triggers['career']['age'] == 30
+
@@ -0,0 +1,125 @@
+import os
+import sys
+import random
+import asyncio
+from datetime import datetime, timedelta
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.emotion.model.event_window import EventWindowBuilder
+from src.service.emotion import emotion_update_service as update_module
+
+
+def build_window(rows):
+    builder = EventWindowBuilder()
+    for character_id, event in rows:
+        builder.add(character_id, event, datetime(2024, 3, 1, 10))
+    return builder.build()
+
+
+def random_rows(count=5000, seed=3):
+    random.seed(seed)
+    rows = []
+    for i in range(count):
+        event = {
+            'event_id': f'e{i}',
+            'pleasure_score': random.randint(-30, 30),
+            'arousal_score': random.randint(-30, 30),
+            'dominance_score': random.randint(-30, 30),
+        }
+        if i % 97 == 0:
+            event['pleasure_score'] = 'invalid'
+        rows.append((f'c{random.randint(0, 200)}', event))
+    return rows
+
+
+def loop_impact(rows):
+    """原有逐个事件累加的实现，用于对照"""
+    totals = {}
+    for character_id, event in rows:
+        total = totals.setdefault(character_id, [0, 0, 0])
+        try:
+            values = [int(event.get(key, 0)) for key in ('pleasure_score', 'arousal_score', 'dominance_score')]
+        except (ValueError, TypeError):
+            continue
+        for i, value in enumerate(values):
+            total[i] += value
+    return {
+        character_id: {
+            'pleasure': max(-80, min(80, total[0])),
+            'arousal': max(-80, min(80, total[1])),
+            'dominance': max(-80, min(80, total[2]))
+        }
+        for character_id, total in totals.items()
+    }
+
+
+# 测试向量化汇总结果与逐个事件累加一致，无效PAD不计入汇总
+def test_cumulative_pad_impact_matches_loop():
+    rows = random_rows()
+    window = build_window(rows)
+    assert len(window) == len(rows)
+    assert window.cumulative_pad_impact(limit=80) == loop_impact(rows)
+    assert int(window.valid.sum()) == len(rows) - len(range(0, len(rows), 97))
+
+
+# 测试按掩码筛选以及去掉没有角色ID的事件
+def test_select_and_with_character():
+    rows = [('c1', {'event_id': 'e1', 'pleasure_score': 5}),
+            (None, {'event_id': 'e2', 'pleasure_score': 50}),
+            ('c2', {'event_id': 'e3', 'arousal_score': -7, 'event_type': 'work'})]
+    window = build_window(rows)
+
+    selected = window.select([False, True, True])
+    assert [record['event_id'] for record in selected.event_records()] == ['e2', 'e3']
+
+    known = window.with_character()
+    assert known.event_records() == [
+        {'character_id': 'c1', 'event_id': 'e1', 'event_type': 'unknown'},
+        {'character_id': 'c2', 'event_id': 'e3', 'event_type': 'work'},
+    ]
+    assert known.cumulative_pad_impact() == {
+        'c1': {'pleasure': 5, 'arousal': 0, 'dominance': 0},
+        'c2': {'pleasure': 0, 'arousal': -7, 'dominance': 0},
+    }
+    assert build_window([]).cumulative_pad_impact() == {}
+
+
+# 测试30分钟情绪更新使用事件窗口，只更新和标记未处理的事件
+def test_update_emotions_uses_event_window(monkeypatch):
+    rows = [('c1', {'event_id': 'e1', 'pleasure_score': 10}),
+            ('c1', {'event_id': 'e2', 'pleasure_score': 100}),
+            ('c2', {'event_id': 'e3', 'dominance_score': -4})]
+
+    class FakeDeduplicator:
+        def __init__(self):
+            self.marked = []
+
+        def batch_check_events(self, events):
+            return {f"{e['character_id']}:{e['event_id']}": e['event_id'] == 'e3' for e in events}
+
+        def batch_mark_processed(self, events):
+            self.marked.extend(events)
+            return len(events)
+
+        def cleanup_expired_records(self):
+            return 0
+
+    updates = []
+
+    def fake_batch_update(batch):
+        updates.extend(batch)
+        return {item['character_id']: True for item in batch}
+
+    monkeypatch.setattr(update_module, 'get_event_window_by_time_range', lambda start, end: build_window(rows))
+    service = update_module.EmotionUpdateService()
+    monkeypatch.setattr(service.emotion_dao, 'batch_update_emotions_from_events', fake_batch_update)
+    service.deduplicator = FakeDeduplicator()
+
+    result = asyncio.run(service.update_emotions_from_recent_events(datetime.now()))
+    assert updates == [{'character_id': 'c1', 'pad_impact': {'pleasure': 80, 'arousal': 0, 'dominance': 0}}]
+    assert [event['event_id'] for event in service.deduplicator.marked] == ['e1', 'e2']
+    assert result['total_events'] == 3 and result['unprocessed_events'] == 2
+    assert result['affected_characters'] == 1 and result['updated_count'] == 1
@@ -0,0 +1,16 @@
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from scripts.benchmark_import_time import DEFERRED_MODULES, measure_import
+
+
+# 测试导入API入口时不会加载autogen、openai、pypinyin等重型依赖
+def test_api_main_defers_heavy_imports():
+    result = measure_import("src.api.main")
+    assert result["total_us"] > 0
+    loaded = {name.split(".")[0] for name in result["modules"]}
+    assert not loaded & set(DEFERRED_MODULES)
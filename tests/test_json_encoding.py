@@ -0,0 +1,48 @@
+import json
+import os
+import sys
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.api.responds.base_response import ApiResponse
+from src.api.responds.orjson_response import ORJSONApiResponse
+from src.character.utils import convert_object_id
+from src.utils.json_encoding import dumps
+
+OBJECT_ID = ObjectId("65a1b2c3d4e5f60718293a4b")
+PROFILE = {
+    "_id": OBJECT_ID,
+    "id": "profile-1",
+    "created_at": datetime(2024, 1, 1, 8, 30, 0, 123456),
+    "life_path": [{"event_id": "e1", "start_time": datetime(2024, 1, 1, 9, 0), "description": "早餐"}],
+}
+
+
+# 测试序列化结果与convert_object_id + json.dumps一致
+def test_dumps_matches_convert_object_id():
+    expected = json.loads(json.dumps(convert_object_id(PROFILE), ensure_ascii=False))
+    assert json.loads(dumps(PROFILE)) == expected
+    assert "早餐" in dumps(PROFILE, indent=True).decode("utf-8")
+
+
+# 测试ApiResponse中的ObjectId和datetime无需预处理即可返回
+def test_api_response_serializes_object_id():
+    app = FastAPI(default_response_class=ORJSONApiResponse)
+
+    @app.post("/profiles", response_model=ApiResponse)
+    async def profiles():
+        return ApiResponse.success(data={"character-1": [PROFILE]})
+
+    body = TestClient(app).post("/profiles").json()
+    profile = body["data"]["character-1"][0]
+    assert body["recode"] == 200
+    assert profile["_id"] == str(OBJECT_ID)
+    assert profile["created_at"] == "2024-01-01T08:30:00.123456"
+    assert profile["life_path"][0]["start_time"] == "2024-01-01T09:00:00"
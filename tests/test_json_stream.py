@@ -0,0 +1,68 @@
+import json
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.json_stream import IncrementalJSONObjectParser
+
+
+def _feed_in_chunks(parser, text, size):
+    fields = []
+    for i in range(0, len(text), size):
+        fields.extend(parser.feed(text[i:i + size]))
+    return fields
+
+
+# 测试按任意切分输入时都能按顺序产出完整字段
+def test_fields_emitted_in_order_for_any_chunking():
+    obj = {
+        "name": "张三 \"小张\"",
+        "age": 25,
+        "big5": {"开放性": 0.8, "nested": [1, {"brace": "}"}]},
+        "hobbies": ["读书,写作", "跑步"],
+        "is_preset": False,
+        "memory": None
+    }
+    text = "好的，以下是角色：\n```json\n" + json.dumps(obj, ensure_ascii=False, indent=2) + "\n```"
+
+    for size in (1, 3, 7, len(text)):
+        parser = IncrementalJSONObjectParser()
+        fields = _feed_in_chunks(parser, text, size)
+        assert parser.done
+        assert [name for name, _ in fields] == list(obj.keys())
+        assert parser.result() == obj
+
+
+# 测试字段在其值完整之前不会被产出
+def test_field_not_emitted_before_complete():
+    parser = IncrementalJSONObjectParser()
+    assert parser.feed('{"name": "李') == []
+    assert parser.feed('四", "age": 3') == [("name", "李四")]
+    assert parser.feed('0}') == [("age", 30)]
+    assert parser.done
+    # 对象结束后的内容被忽略
+    assert parser.feed('{"x": 1}') == []
+
+
+# 测试无法解析的字段值被跳过而不中断后续解析
+def test_invalid_value_is_skipped():
+    parser = IncrementalJSONObjectParser()
+    fields = parser.feed('{"a": undefined, "b": 2}')
+    assert fields == [("b", 2)]
+    assert parser.done
+
+
+# 测试长字段逐字符输入时解析正确，字段完成后不再保留已扫描的片段
+def test_long_value_streamed_without_keeping_text():
+    parser = IncrementalJSONObjectParser()
+    long_text = "很长的背景故事，" * 2000
+    text = json.dumps({"name": "林", "background": long_text, "age": 18}, ensure_ascii=False)
+    fields = _feed_in_chunks(parser, text[:-1], 1)
+    assert fields == [("name", "林"), ("background", long_text)]
+    # 只保留尚未完成的age字段值"18"所在的片段
+    assert parser._chunks == ["1", "8"]
+    assert parser.feed("}") == [("age", 18)]
+    assert parser._chunks == []
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import os
+import sys
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.character.event import life_path_manager as manager_module
+from src.character.event.life_path_manager import LifePathManager
+
+
+def make_event(description, start_time):
+    return {'description': description, 'start_time': start_time, 'type': 'daily'}
+
+
+# 测试批量响应按character_id拆分，支持对象和列表两种格式，丢弃不属于本批次的角色
+def test_split_batch_result_formats():
+    manager = LifePathManager()
+    content = "```json\n" + json.dumps({
+        'c1': [make_event('散步', '2024-03-01T08:00:00')],
+        ' c2 ': [make_event('读书', '2024-03-01T20:00:00')],
+        'c9': [make_event('不属于本批次', '2024-03-01T09:00:00')],
+    }, ensure_ascii=False) + "\n```"
+    result = manager._split_batch_result(content, ['c1', 'c2', 'c3'])
+    assert set(result) == {'c1', 'c2'}
+    assert result['c2'][0]['description'] == '读书'
+
+    content = json.dumps([
+        {'character_id': 'c1', 'events': [make_event('散步', '2024-03-01T08:00:00')]},
+        {'events': [make_event('没有角色ID', '2024-03-01T08:00:00')]},
+        'not an object',
+    ], ensure_ascii=False)
+    assert list(manager._split_batch_result(content, ['c1', 'c2'])) == ['c1']
+    assert manager._split_batch_result('模型没有返回JSON', ['c1']) == {}
+
+
+# 测试单个角色的事件校验：丢弃时间范围外、缺少描述或时间格式错误的事件
+def test_validate_batch_events():
+    manager = LifePathManager()
+    events = [
+        make_event('范围内', '2024-03-01T08:00:00'),
+        make_event('结束日当天', '2024-03-02T23:00:00'),
+        make_event('范围外', '2024-03-03T08:00:00'),
+        make_event('早于开始', '2024-02-29T23:59:59'),
+        make_event('', '2024-03-01T09:00:00'),
+        {'description': '缺少时间'},
+        make_event('时间格式错误', '3月1日早上'),
+        'not an object',
+    ]
+    valid = manager._validate_batch_events(events, '2024-03-01', '2024-03-02')
+    assert [event['description'] for event in valid] == ['范围内', '结束日当天']
+    assert manager._validate_batch_events(make_event('单个对象', '2024-03-01T08:00:00'),
+                                          '2024-03-01', '2024-03-01')[0]['description'] == '单个对象'
+    assert manager._validate_batch_events(None, '2024-03-01', '2024-03-01') == []
+    assert manager._validate_batch_events('text', '2024-03-01', '2024-03-01') == []
+
+
+# 测试批量结果中缺失或无效的角色回退到单角色生成，有效角色一次写入
+def test_batch_chunk_falls_back_for_missing_characters(monkeypatch):
+    manager = LifePathManager()
+    profiles = {'p1': 'c1', 'p2': 'c2', 'p3': 'c3'}
+    written = []
+    fallback = []
+
+    monkeypatch.setattr(manager, '_validate_and_get_profile',
+                        lambda profile_id: {'id': profile_id, 'character_id': profiles[profile_id]})
+    monkeypatch.setattr(manager, '_filter_and_sort_existing_events', lambda profile, start, end: [])
+    monkeypatch.setattr(manager, '_build_character_digest',
+                        lambda profile, events: {'character_id': profile['character_id']})
+
+    async def generate_batch(digests, start_time, end_time, max_events):
+        assert [digest['character_id'] for digest in digests] == ['c1', 'c2', 'c3']
+        content = json.dumps({
+            'c1': [make_event('散步', '2024-03-01T08:00:00'), make_event('跑步', '2024-03-01T18:00:00')],
+            'c2': [make_event('范围外', '2024-04-01T08:00:00')],
+        }, ensure_ascii=False)
+        return manager._split_batch_result(content, [digest['character_id'] for digest in digests])
+
+    async def add_single(profile_id, start_time, end_time, max_events):
+        fallback.append(profile_id)
+        return True
+
+    def batch_add(profile_events_map):
+        written.append(profile_events_map)
+        return {'failed_profiles': []}
+
+    monkeypatch.setattr(manager, '_generate_batch_events_with_agents', generate_batch)
+    monkeypatch.setattr(manager, 'add_event_to_life_path', add_single)
+    monkeypatch.setattr(manager_module, 'batch_add_events_to_profiles', batch_add)
+
+    results = asyncio.run(manager.add_events_to_life_paths_batch(
+        ['p1', 'p2', 'p3'], '2024-03-01', '2024-03-01', max_events=1, batch_size=3))
+    assert results == {'p1': True, 'p2': True, 'p3': True}
+    assert len(written) == 1 and list(written[0]) == ['p1']
+    assert [event.description for event in written[0]['p1']] == ['散步']
+    assert fallback == ['p2', 'p3']
+
+
+# 测试整批生成失败时所有角色回退到单角色生成
+def test_batch_chunk_falls_back_when_generation_fails(monkeypatch):
+    manager = LifePathManager()
+    fallback = []
+
+    monkeypatch.setattr(manager, '_validate_and_get_profile',
+                        lambda profile_id: {'id': profile_id, 'character_id': f'c-{profile_id}'})
+    monkeypatch.setattr(manager, '_filter_and_sort_existing_events', lambda profile, start, end: [])
+    monkeypatch.setattr(manager, '_build_character_digest',
+                        lambda profile, events: {'character_id': profile['character_id']})
+
+    async def generate_batch(digests, start_time, end_time, max_events):
+        raise ValueError("未收到批量事件生成agent的有效响应")
+
+    async def add_single(profile_id, start_time, end_time, max_events):
+        fallback.append(profile_id)
+        return profile_id == 'p1'
+
+    monkeypatch.setattr(manager, '_generate_batch_events_with_agents', generate_batch)
+    monkeypatch.setattr(manager, 'add_event_to_life_path', add_single)
+
+    results = asyncio.run(manager.add_events_to_life_paths_batch(['p1', 'p2'], '2024-03-01', '2024-03-01', batch_size=5))
+    assert results == {'p1': True, 'p2': False}
+    assert fallback == ['p1', 'p2']
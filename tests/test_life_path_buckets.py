@@ -0,0 +1,242 @@
+import os
+import sys
+from datetime import datetime
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.character.db.life_path_dao import (
+    LifePathDAO, UNKNOWN_MONTH, event_in_range, event_month, months_between, sort_events_by_time
+)
+
+
+class FakeCollection:
+    def __init__(self, documents=None):
+        self.documents = documents or []
+        self.operations = []
+        self.queries = []
+        self.projections = []
+
+    def bulk_write(self, operations, ordered=True):
+        self.operations.extend(operations)
+
+        class Result:
+            modified_count = 0
+            upserted_count = len(operations)
+        return Result()
+
+    def find(self, query, projection=None):
+        self.queries.append(query)
+        self.projections.append(projection)
+        documents = [dict(doc) for doc in self.documents if self._matches(doc, query)]
+        if projection and projection.get('life_path') == 0:
+            for doc in documents:
+                doc.pop('life_path', None)
+        return FakeCursor(documents)
+
+    def find_one(self, query, projection=None):
+        self.projections.append(projection)
+        return None
+
+    @staticmethod
+    def _matches(doc, query):
+        for key, condition in query.items():
+            if isinstance(condition, dict) and '$in' in condition:
+                if doc.get(key) not in condition['$in']:
+                    return False
+            elif isinstance(condition, dict):
+                continue
+            elif doc.get(key) != condition:
+                return False
+        return True
+
+
+class FakeCursor(list):
+    def sort(self, key, direction):
+        return FakeCursor(sorted(self, key=lambda doc: doc[key], reverse=direction < 0))
+
+
+def make_dao(buckets=None, profiles=None):
+    dao = LifePathDAO()
+    dao._indexes_ensured = True
+    dao._db = {'life_path_buckets': FakeCollection(buckets), 'event_profiles': FakeCollection(profiles)}
+    return dao
+
+
+# 测试事件按开始时间划分月份以及时间范围覆盖的月份
+def test_event_month_and_months_between():
+    assert event_month({'start_time': '2024-03-05T08:00:00'}) == '2024-03'
+    assert event_month({'start_time': '2024/12/31 23:59'}) == '2024-12'
+    assert event_month({'start_time': 1706745600}) == datetime.fromtimestamp(1706745600).strftime('%Y-%m')
+    assert event_month({'start_time': 'not a time'}) == UNKNOWN_MONTH
+    assert event_month({}) == UNKNOWN_MONTH
+
+    assert months_between(datetime(2024, 11, 20), datetime(2025, 2, 1)) == ['2024-11', '2024-12', '2025-01', '2025-02']
+    assert months_between(datetime(2024, 5, 1), datetime(2024, 5, 31)) == ['2024-05']
+
+
+# 测试时间范围判断和按时间排序
+def test_event_in_range_and_sort():
+    start, end = datetime(2024, 3, 1), datetime(2024, 3, 31, 23, 59)
+    assert event_in_range({'start_time': '2024-03-05 10:00:00'}, start, end)
+    assert not event_in_range({'start_time': '2024-04-01 00:00:00'}, start, end)
+    assert not event_in_range({'start_time': None}, start, end)
+
+    events = [{'start_time': 'bad'}, {'start_time': '2024-03-02T00:00:00'}, {'start_time': '2024-03-01 09:00'}]
+    assert [event['start_time'] for event in sort_events_by_time(events)] == ['2024-03-01 09:00', '2024-03-02T00:00:00', 'bad']
+
+
+# 测试批量写入时按事件配置和月份拆分为分桶upsert
+def test_add_events_groups_by_month():
+    dao = make_dao()
+    dao.add_events_bulk({
+        'p1': ('c1', [{'event_id': 'e1', 'start_time': '2024-01-31T22:00:00'},
+                      {'event_id': 'e2', 'start_time': '2024-02-01T08:00:00'},
+                      {'event_id': 'e3', 'start_time': '2024-02-03T08:00:00'}]),
+        'p2': ('c2', [{'event_id': 'e4'}]),
+    })
+
+    operations = {op._filter['_id']: op._doc for op in dao.life_path_buckets_collection.operations}
+    assert set(operations) == {'p1:2024-01', 'p1:2024-02', f'p2:{UNKNOWN_MONTH}'}
+    february = operations['p1:2024-02']
+    assert [event['event_id'] for event in february['$push']['events']['$each']] == ['e2', 'e3']
+    assert february['$inc'] == {'count': 2}
+    assert february['$setOnInsert'] == {'profile_id': 'p1', 'month': '2024-02'}
+    assert february['$set'] == {'character_id': 'c1'}
+
+    dao.life_path_buckets_collection.operations.clear()
+    dao.add_events('p1', 'c1', [{'event_id': 'e1', 'start_time': '2024-01-31T22:00:00'}], deduplicate=True)
+    update = dao.life_path_buckets_collection.operations[0]._doc
+    assert '$addToSet' in update and '$inc' not in update
+
+
+# 测试按时间范围读取只查询覆盖的月份，并合并尚未迁移的life_path数组
+def test_get_events_in_range_reads_overlapping_months_and_legacy():
+    buckets = [
+        {'_id': 'p1:2024-03', 'profile_id': 'p1', 'character_id': 'c1', 'month': '2024-03',
+         'events': [{'event_id': 'e1', 'start_time': '2024-03-30T10:00:00'},
+                    {'event_id': 'e2', 'start_time': '2024-03-01T10:00:00'}]},
+        {'_id': 'p1:2024-04', 'profile_id': 'p1', 'character_id': 'c1', 'month': '2024-04',
+         'events': [{'event_id': 'e3', 'start_time': '2024-04-02T10:00:00'}]},
+    ]
+    profiles = [{'id': 'p2', 'character_id': 'c2',
+                 'life_path': [{'event_id': 'legacy', 'start_time': '2024-03-31T12:00:00'}]}]
+    dao = make_dao(buckets, profiles)
+
+    events = dao.get_events_in_range(datetime(2024, 3, 15), datetime(2024, 4, 30))
+    assert dao.life_path_buckets_collection.queries[0]['month'] == {'$in': ['2024-03', '2024-04']}
+    assert [event['event_id'] for event in events] == ['e1', 'legacy', 'e3']
+    assert events[1]['character_id'] == 'c2' and events[1]['profile_id'] == 'p2'
+
+    by_character = dao.get_life_paths_by_character_and_time_range(['c1'], datetime(2024, 3, 15), datetime(2024, 4, 30))
+    assert [event['event_id'] for event in by_character['c1']] == ['e1', 'e3']
+    assert 'character_id' not in by_character['c1'][0]
+
+
+# 测试读取最近N个事件时从最新的月份向前读取
+def test_get_latest_events():
+    buckets = [
+        {'_id': f'p1:2024-0{month}', 'profile_id': 'p1', 'month': f'2024-0{month}',
+         'events': [{'event_id': f'e{month}{day}', 'start_time': f'2024-0{month}-0{day}T08:00:00'} for day in (1, 2)]}
+        for month in (1, 2, 3)
+    ]
+    dao = make_dao(buckets)
+    assert [event['event_id'] for event in dao.get_latest_events('p1', 3)] == ['e22', 'e31', 'e32']
+    assert dao.get_latest_events('p1', 0) == []
+
+
+# 测试情绪计算遍历的事件只投影需要的字段，事件文档不复制
+def test_iter_pad_events():
+    buckets = [
+        {'_id': 'p1:2024-03', 'profile_id': 'p1', 'character_id': 'c1', 'month': '2024-03',
+         'events': [{'event_id': 'e1', 'start_time': '2024-03-01T10:20:00', 'pleasure_score': 5},
+                    {'event_id': 'e2', 'start_time': '2024-03-01T09:00:00', 'pleasure_score': 7}]},
+    ]
+    dao = make_dao(buckets)
+    events = list(dao.iter_pad_events(datetime(2024, 3, 1, 10), datetime(2024, 3, 1, 10, 30)))
+    assert [(character_id, event['event_id'], start_time) for character_id, event, start_time in events] == [
+        ('c1', 'e1', datetime(2024, 3, 1, 10, 20))]
+    assert 'character_id' not in events[0][1]
+    projection = dao.life_path_buckets_collection.projections[0]
+    assert projection['events.pleasure_score'] == 1 and 'events.description' not in projection
+
+
+# 测试事件配置按加载方式读取生活轨迹，只需要配置本身时不读取life_path
+def test_event_profile_life_path_views():
+    from src.character.db.event_profile_dao import EventProfileDAO
+    from src.service.event.service import EventService
+
+    buckets = [
+        {'_id': 'p1:2024-03', 'profile_id': 'p1', 'character_id': 'c1', 'month': '2024-03',
+         'events': [{'event_id': 'e1', 'start_time': '2024-03-01T10:00:00'},
+                    {'event_id': 'e2', 'start_time': '2024-03-20T10:00:00'}]},
+    ]
+    profiles = [{'id': 'p1', 'character_id': 'c1', 'current_stage': 'stage',
+                 'life_path': [{'event_id': 'legacy', 'start_time': '2024-02-01T10:00:00'}]}]
+    dao = EventProfileDAO()
+    dao.life_path_dao = make_dao(buckets, profiles)
+    dao._db = dao.life_path_dao._db
+    profiles_collection = dao.event_profiles_collection
+
+    header = dao.get_event_profile_by_id('p1', life_path='none')
+    assert header['current_stage'] == 'stage' and 'life_path' not in header
+    assert profiles_collection.projections[-1] == {'life_path': 0}
+
+    full = dao.get_event_profile_by_id('p1')
+    assert [event['event_id'] for event in full['life_path']] == ['legacy', 'e1', 'e2']
+
+    latest = dao.get_event_profiles_by_character_id('c1', life_path='latest', limit=1)
+    assert [event['event_id'] for event in latest[0]['life_path']] == ['e2']
+    assert profiles_collection.projections[-1] == {'life_path': {'$slice': -1}}
+
+    options = EventService._life_path_options('range', None, '2024-03-01', '2024-03-01')
+    ranged = dao.get_event_profiles_by_character_ids(['c1'], **options)
+    assert [event['event_id'] for event in ranged['c1'][0]['life_path']] == ['e1']
+    assert 'profile_id' not in ranged['c1'][0]['life_path'][0]
+
+    for args in (('all', None, None, None), ('latest', 0, None, None), ('range', None, '2024-03-01', None),
+                 ('range', None, '2024/03/01', '2024-03-02')):
+        try:
+            EventService._life_path_options(*args)
+        except ValueError:
+            continue
+        raise AssertionError(f"参数应被拒绝: {args}")
+
+
+# 测试只更新配置时保留尚未迁移的life_path数组，传入生活轨迹时写入分桶后再删除
+def test_save_event_profile_keeps_legacy_life_path_without_events():
+    from src.character.db.event_profile_dao import EventProfileDAO
+
+    class ProfilesCollection(FakeCollection):
+        def find_one(self, query, projection=None):
+            return next((doc for doc in self.documents if self._matches(doc, query)), None)
+
+        def update_one(self, query, update):
+            self.operations.append(update)
+
+    class BucketsCollection(FakeCollection):
+        def delete_many(self, query):
+            self.operations.append(('delete_many', query))
+
+            class Result:
+                deleted_count = 0
+            return Result()
+
+    profiles = ProfilesCollection([{'id': 'p1', 'character_id': 'c1',
+                                    'life_path': [{'event_id': 'legacy', 'start_time': '2024-02-01T10:00:00'}]}])
+    buckets = BucketsCollection()
+    dao = EventProfileDAO()
+    dao.life_path_dao = make_dao()
+    dao.life_path_dao._db = {'life_path_buckets': buckets, 'event_profiles': profiles}
+    dao._db = dao.life_path_dao._db
+
+    dao.save_event_profile({'id': 'p1', 'character_id': 'c1', 'current_stage': 'stage'})
+    assert profiles.operations == [{'$set': {'id': 'p1', 'character_id': 'c1', 'current_stage': 'stage'}}]
+    assert buckets.operations == []
+
+    dao.save_event_profile({'id': 'p1', 'character_id': 'c1',
+                            'life_path': [{'event_id': 'e1', 'start_time': '2024-03-01T10:00:00'}]})
+    assert profiles.operations[-1] == {'$unset': {'life_path': ''}}
+    assert buckets.operations[0] == ('delete_many', {'profile_id': {'$in': ['p1']}})
+    assert len(buckets.operations) == 2
@@ -0,0 +1,121 @@
+import os
+import sys
+import random
+from datetime import datetime, timedelta
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.character.model.event_profile import EventProfile, Event
+
+
+def make_event(event_id, start_time, end_time=None, status='completed', is_key_event=False):
+    return Event(
+        event_id=event_id, type='daily', description='', start_time=start_time, status=status,
+        is_key_event=is_key_event, impact='', location='', participants=[], outcome='',
+        pleasure_score=0, arousal_score=0, dominance_score=0, end_time=end_time
+    )
+
+
+def make_profile(count=2000, seed=7):
+    random.seed(seed)
+    base = datetime(2024, 1, 1)
+    profile = EventProfile('c1')
+    for i in range(count):
+        start_time = base + timedelta(hours=random.randint(0, 20000))
+        end_time = None if random.random() < 0.05 else start_time + timedelta(hours=random.randint(0, 300))
+        status = random.choice(['completed', 'in_progress', 'not_started'])
+        profile.add_event(make_event(f'e{i}', start_time, end_time, status, random.random() < 0.1))
+    return profile, base
+
+
+def ids(events):
+    return [event.event_id for event in events]
+
+
+# 测试二分插入后生活轨迹保持有序，且开始时间相同的事件保持插入顺序
+def test_add_event_keeps_life_path_sorted():
+    profile, _ = make_profile()
+    starts = [event.start_time for event in profile.life_path]
+    assert starts == sorted(starts)
+
+    same_time = datetime(2030, 1, 1)
+    profile.add_event(make_event('first', same_time))
+    profile.add_event(make_event('second', same_time))
+    assert ids(profile.life_path[-2:]) == ['first', 'second']
+
+
+# 测试区间索引的查询结果与线性扫描一致
+def test_interval_queries_match_linear_scan():
+    profile, base = make_profile()
+    for _ in range(100):
+        now = base + timedelta(hours=random.randint(0, 20000))
+        expected = [event for event in profile.life_path if event.status == 'in_progress' or
+                    (event.start_time <= now and (event.end_time is None or event.end_time >= now))]
+        assert ids(profile.get_current_events(now)) == ids(expected)
+
+        end = now + timedelta(hours=48)
+        expected = [event for event in profile.life_path
+                    if event.start_time <= end and (event.end_time is None or event.end_time >= now)]
+        assert ids(profile.get_events_overlapping(now, end)) == ids(expected)
+        expected = [event for event in profile.life_path if now <= event.start_time <= end]
+        assert ids(profile.get_events_starting_between(now, end)) == ids(expected)
+
+    assert ids(profile.get_completed_events()) == ids(e for e in profile.life_path if e.status == 'completed')
+    assert ids(profile.get_key_events()) == ids(e for e in profile.life_path if e.is_key_event)
+
+
+# 测试状态更新同步到索引，直接修改life_path后索引自动重建
+def test_status_update_and_direct_list_changes():
+    profile, base = make_profile(count=50)
+    event_id = profile.get_completed_events()[0].event_id
+    assert profile.update_event_status(event_id, 'in_progress')
+    assert event_id not in ids(profile.get_completed_events())
+    assert event_id in ids(profile.get_current_events(base - timedelta(days=1)))
+    assert not profile.update_event_status('missing', 'completed')
+
+    profile.life_path.append(make_event('appended', base - timedelta(days=10), base - timedelta(days=9)))
+    assert profile.get_event('appended') is not None
+    assert ids(profile.get_current_events(base - timedelta(days=10)))[0] == 'appended'
+
+    profile.life_path = [make_event('only', base)]
+    assert ids(profile.get_completed_events()) == ['only']
+    assert 'life_path' in profile.to_dict() and '_index' not in profile.to_dict()
+
+
+# 测试插入和重叠查询交替进行时结果正确，追加到末尾时线段树增量更新而不重建
+def test_interleaved_inserts_and_overlap_queries(monkeypatch):
+    from src.character.model.life_path_index import LifePathIndex
+
+    random.seed(11)
+    base = datetime(2024, 1, 1)
+    index = LifePathIndex()
+    builds = [0]
+    build_tree = LifePathIndex._build_tree
+
+    def counting_build_tree(self):
+        builds[0] += 1
+        build_tree(self)
+
+    monkeypatch.setattr(LifePathIndex, "_build_tree", counting_build_tree)
+
+    appended_builds = 0
+    for i in range(500):
+        # 大部分事件按时间顺序追加，少量插入到中间
+        offset = i * 10 if random.random() < 0.9 else random.randint(0, i * 10)
+        start_time = base + timedelta(hours=offset)
+        end_time = None if random.random() < 0.05 else start_time + timedelta(hours=random.randint(0, 50))
+        before = builds[0]
+        position = index.insert(make_event(f'e{i}', start_time, end_time))
+
+        now = base + timedelta(hours=random.randint(0, i * 10 + 10))
+        end = now + timedelta(hours=24)
+        expected = [event for event in index
+                    if event.start_time <= end and (event.end_time is None or event.end_time >= now)]
+        assert ids(index.overlapping(now, end)) == ids(expected)
+        if position == len(index) - 1:
+            appended_builds += builds[0] - before
+
+    # 追加到末尾只在线段树容量翻倍时重建
+    assert appended_builds <= 10
@@ -0,0 +1,66 @@
+import contextvars
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.llm_telemetry import llm_usage_scope, record_llm_parse_failure, record_llm_retry, track_llm_call
+from src.utils.metrics import REGISTRY
+
+
+def _task_result(*usages):
+    messages = [SimpleNamespace(source="user", models_usage=None)]
+    for prompt, completion in usages:
+        messages.append(SimpleNamespace(models_usage=SimpleNamespace(prompt_tokens=prompt, completion_tokens=completion)))
+    return SimpleNamespace(messages=messages)
+
+
+def _run_call(workflow, usages):
+    with track_llm_call(workflow) as call:
+        call.record_result(_task_result(*usages))
+
+
+# 测试调用的token用量、重试和解析失败按业务流程汇总
+def test_usage_scope_aggregates_by_workflow():
+    before = REGISTRY.get_sample_value("soluna_llm_tokens_total", {"workflow": "test_workflow", "type": "prompt"}) or 0
+
+    with llm_usage_scope() as usage:
+        _run_call("test_workflow", [(100, 20), (50, 10)])
+        with pytest.raises(RuntimeError):
+            with track_llm_call("test_workflow"):
+                raise RuntimeError("timeout")
+        record_llm_retry("test_workflow", 2)
+        record_llm_parse_failure("other_workflow")
+
+    summary = usage.to_dict()
+    workflow = summary["workflows"]["test_workflow"]
+    assert workflow["calls"] == 2 and workflow["errors"] == 1 and workflow["retries"] == 2
+    assert workflow["prompt_tokens"] == 150 and workflow["completion_tokens"] == 30
+    assert summary["workflows"]["other_workflow"]["parse_failures"] == 1
+    assert summary["total"]["total_tokens"] == 180
+    assert REGISTRY.get_sample_value("soluna_llm_tokens_total", {"workflow": "test_workflow", "type": "prompt"}) == before + 150
+
+    # 离开作用域后的调用不再计入
+    _run_call("test_workflow", [(1, 1)])
+    assert usage.to_dict()["total"]["calls"] == 2
+
+
+# 测试线程池中通过copy_context执行的调用计入当前汇总
+def test_usage_scope_propagates_to_threads():
+    with llm_usage_scope() as usage:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [
+                executor.submit(contextvars.copy_context().run, _run_call, "threaded", [(10, 5)])
+                for _ in range(8)
+            ]
+            for future in futures:
+                future.result()
+
+    assert usage.to_dict()["workflows"]["threaded"]["calls"] == 8
+    assert usage.to_dict()["workflows"]["threaded"]["total_tokens"] == 120
@@ -0,0 +1,62 @@
+import json
+import logging
+import os
+import queue
+import sys
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.logging_config import (
+    JSONLogFormatter,
+    LogSampler,
+    NonBlockingQueueHandler,
+    RequestIdLogFilter,
+    request_id_var,
+)
+from src.utils.metrics import REGISTRY
+
+
+def _record(msg, *args, **attributes):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, msg, args, None)
+    for key, value in attributes.items():
+        setattr(record, key, value)
+    return record
+
+
+# 测试采样器每个key输出第1条以及之后每N条中的1条
+def test_log_sampler_counts_per_key():
+    sampler = LogSampler(every=3)
+    assert [sampler.should_log("a") for _ in range(7)] == [True, False, False, True, False, False, True]
+    assert sampler.should_log("b")
+
+
+# 测试JSON格式包含请求ID和extra字段
+def test_json_formatter_includes_request_id_and_extra():
+    token = request_id_var.set("req-1")
+    try:
+        record = _record("角色 %s 保存成功", "c1", character_id="c1")
+        RequestIdLogFilter().filter(record)
+    finally:
+        request_id_var.reset(token)
+
+    data = json.loads(JSONLogFormatter().format(record))
+    assert data["message"] == "角色 c1 保存成功"
+    assert data["request_id"] == "req-1"
+    assert data["character_id"] == "c1"
+    assert data["level"] == "INFO"
+
+
+# 测试入队前完成消息拼接，队列满时丢弃并计数
+def test_queue_handler_prepares_and_drops_when_full():
+    handler = NonBlockingQueueHandler(queue.Queue(1))
+    before = REGISTRY.get_sample_value("soluna_log_records_dropped_total") or 0
+
+    handler.handle(_record("影响行数: %s", 10))
+    handler.handle(_record("影响行数: %s", 20))
+
+    queued = handler.queue.get_nowait()
+    assert queued.msg == "影响行数: 10"
+    assert queued.args is None
+    assert REGISTRY.get_sample_value("soluna_log_records_dropped_total") == before + 1
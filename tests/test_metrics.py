@@ -0,0 +1,57 @@
+import os
+import sys
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.api.metrics.middleware import PrometheusMiddleware
+from src.api.metrics.routes import router as metrics_router
+from src.utils.metrics import REGISTRY
+
+
+def _create_app():
+    app = FastAPI()
+    app.add_middleware(PrometheusMiddleware)
+    app.include_router(metrics_router)
+
+    @app.get("/test-metrics/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"item_id": item_id}
+
+    @app.get("/test-metrics/fail")
+    async def fail():
+        raise RuntimeError("boom")
+
+    return app
+
+
+# 测试按路由模板统计请求数、耗时和错误数
+def test_requests_recorded_by_route_template():
+    client = TestClient(_create_app(), raise_server_exceptions=False)
+    labels = {"method": "GET", "route": "/test-metrics/items/{item_id}"}
+    before = REGISTRY.get_sample_value("soluna_http_requests_total", {**labels, "status": "200"}) or 0
+
+    client.get("/test-metrics/items/1")
+    client.get("/test-metrics/items/2")
+    client.get("/test-metrics/fail")
+
+    assert REGISTRY.get_sample_value("soluna_http_requests_total", {**labels, "status": "200"}) == before + 2
+    assert REGISTRY.get_sample_value("soluna_http_request_duration_seconds_count", labels) >= 2
+    assert REGISTRY.get_sample_value("soluna_http_requests_in_progress", labels) == 0
+    assert REGISTRY.get_sample_value(
+        "soluna_http_request_errors_total",
+        {"method": "GET", "route": "/test-metrics/fail", "error": "RuntimeError"}
+    ) >= 1
+
+
+# 测试/metrics接口输出Prometheus文本格式且不统计自身
+def test_metrics_endpoint():
+    client = TestClient(_create_app())
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "soluna_db_connected" in response.text
+    assert 'route="/metrics"' not in response.text
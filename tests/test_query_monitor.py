@@ -0,0 +1,64 @@
+import os
+import sys
+from types import SimpleNamespace
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.db.query_monitor import QueryStats, fingerprint_mongo, fingerprint_sql, query_stats
+from src.db.mysql_client import MySQLClient
+
+
+# 测试SQL指纹会归一化字面量、占位符、IN列表和空白
+def test_fingerprint_sql():
+    assert fingerprint_sql("SELECT *  FROM users\n WHERE id = 12 AND name = 'a''b'") == \
+        "SELECT * FROM users WHERE id = ? AND name = ?"
+    assert fingerprint_sql("DELETE FROM t WHERE id IN (%s, %s, %s)") == "DELETE FROM t WHERE id IN (?+)"
+    assert fingerprint_sql("SELECT * FROM t1 WHERE id IN (1, 2)") == fingerprint_sql("SELECT * FROM t1 WHERE id IN (3,4,5)")
+
+
+# 测试Mongo指纹只保留命令结构而不包含具体值
+def test_fingerprint_mongo():
+    a = fingerprint_mongo("find", {"find": "event_profiles", "filter": {"character_id": "a"}})
+    b = fingerprint_mongo("find", {"find": "event_profiles", "filter": {"character_id": "b"}})
+    assert a == b
+    assert a.startswith("find event_profiles")
+    assert '"a"' not in a
+
+
+# 测试按指纹汇总并排序，超过上限的指纹归入other
+def test_query_stats_top():
+    stats = QueryStats(max_fingerprints=2)
+    stats.record("mysql", "SELECT ?", 0.01, rows=1)
+    stats.record("mysql", "SELECT ?", 0.03, rows=2)
+    stats.record("mysql", "UPDATE t SET a = ?", 0.035, error=True, retries=1)
+    stats.record("mysql", "DELETE FROM t", 0.001)
+
+    top = stats.top(10)
+    assert [item["fingerprint"] for item in top] == ["SELECT ?", "UPDATE t SET a = ?", "other"]
+    assert top[0]["count"] == 2 and top[0]["rows"] == 3 and top[0]["max_time_ms"] == 30.0
+    assert top[1]["errors"] == 1 and top[1]["retries"] == 1
+    assert stats.top(1, sort_by="max_time")[0]["fingerprint"] == "UPDATE t SET a = ?"
+
+
+# 测试MySQLClient执行语句时记录统计
+def test_mysql_client_records_queries():
+    class FakeCursor:
+        def execute(self, query, params):
+            return 1
+
+        def fetchall(self):
+            return [{"id": 1}, {"id": 2}]
+
+    client = MySQLClient()
+    client.connection = SimpleNamespace(open=True, ping=lambda reconnect: None, commit=lambda: None)
+    client.cursor = FakeCursor()
+    query_stats.reset()
+
+    assert len(client.execute_query("SELECT id FROM emotions WHERE character_id = %s", ("a",))) == 2
+    client.execute_update("UPDATE emotions SET mood = %s WHERE id = %s", ("x", 1))
+
+    top = {item["fingerprint"]: item for item in query_stats.top(10)}
+    assert top["SELECT id FROM emotions WHERE character_id = ?"]["rows"] == 2
+    assert top["UPDATE emotions SET mood = ? WHERE id = ?"]["count"] == 1
@@ -0,0 +1,128 @@
+import os
+import sys
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.api.rate_limit.dependencies import rate_limit, rate_limit_exceeded_handler
+from src.utils.rate_limit import (
+    InMemorySlidingWindowBackend,
+    RateLimitExceeded,
+    check_rate_limit,
+    get_rate_limit_backend,
+)
+
+
+# 测试滑动窗口在窗口内达到上限后拒绝，并返回需要等待的时间
+def test_sliding_window_backend(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.utils.rate_limit.time.monotonic", lambda: now[0])
+    backend = InMemorySlidingWindowBackend(max_keys=2)
+
+    assert backend.hit("a", 2, 60) == (True, 0.0)
+    now[0] += 10
+    assert backend.hit("a", 2, 60) == (True, 0.0)
+    now[0] += 10
+    allowed, retry_after = backend.hit("a", 2, 60)
+    assert not allowed
+    assert retry_after == pytest.approx(40)
+
+    # 最早的请求滑出窗口后重新允许
+    now[0] += 41
+    assert backend.hit("a", 2, 60)[0]
+
+    # 归还最近一次请求后重新允许
+    assert not backend.hit("a", 2, 60)[0]
+    backend.release("a")
+    assert backend.hit("a", 2, 60)[0]
+
+    # 超过key数量上限时淘汰最久未访问的key
+    backend.hit("b", 1, 60)
+    backend.hit("c", 1, 60)
+    assert backend.hit("a", 2, 60)[0]
+
+
+# 测试限流依赖和异常处理返回统一的ApiResponse
+def test_rate_limit_dependency_returns_429():
+    get_rate_limit_backend().reset()
+    app = FastAPI()
+    app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+    @app.post("/expensive", dependencies=[Depends(rate_limit("test_expensive", 2, 60))])
+    async def expensive():
+        return {"recode": 200}
+
+    client = TestClient(app)
+    assert client.post("/expensive").json()["recode"] == 200
+    assert client.post("/expensive").json()["recode"] == 200
+    response = client.post("/expensive")
+    assert response.json()["recode"] == 429
+    assert int(response.headers["retry-after"]) >= 1
+
+    with pytest.raises(RateLimitExceeded):
+        check_rate_limit("test_phone", "13800000000", 1, 60)
+        check_rate_limit("test_phone", "13800000000", 1, 60)
+
+
+# 测试验证码限流先检查IP，被拒绝或保存失败的请求不占用次数
+def test_verification_code_limits_count_only_saved_codes(monkeypatch):
+    from src.service.user.service import UserService, verification_code_dao, sms_dispatcher
+
+    get_rate_limit_backend().reset()
+    saved = []
+    save_ok = [False]
+
+    def save_code(phone_number, code, expire_time, ip_address):
+        if save_ok[0]:
+            saved.append(phone_number)
+        return save_ok[0]
+
+    monkeypatch.setattr(verification_code_dao, "save_code", save_code)
+    monkeypatch.setattr(sms_dispatcher, "enqueue", lambda phone, code: True)
+    service = UserService()
+    service.ip_rate_limit_count = 2
+
+    # 保存失败不占用手机号和IP的次数
+    with pytest.raises(Exception, match="保存验证码失败"):
+        service.send_verification_code("13800000001", "10.0.0.1")
+    save_ok[0] = True
+    service.send_verification_code("13800000001", "10.0.0.1")
+    with pytest.raises(RateLimitExceeded):
+        service.send_verification_code("13800000001", "10.0.0.1")
+
+    # IP超过限制时拒绝，不占用新手机号的次数
+    service.send_verification_code("13800000002", "10.0.0.1")
+    with pytest.raises(RateLimitExceeded):
+        service.send_verification_code("13800000003", "10.0.0.1")
+    service.send_verification_code("13800000003", "10.0.0.2")
+    assert saved == ["13800000001", "13800000002", "13800000003"]
+
+
+# 测试验证码次数在保存前预占，保存过程中同一手机号的并发请求被拒绝
+def test_verification_code_reserves_limit_before_saving(monkeypatch):
+    from src.service.user.service import UserService, verification_code_dao, sms_dispatcher
+
+    get_rate_limit_backend().reset()
+    service = UserService()
+    concurrent_errors = []
+
+    def save_code(phone_number, code, expire_time, ip_address):
+        # 模拟保存期间到达的同一手机号请求
+        try:
+            service.send_verification_code(phone_number, "10.0.0.9")
+        except RateLimitExceeded as e:
+            concurrent_errors.append(e)
+        return True
+
+    monkeypatch.setattr(verification_code_dao, "save_code", save_code)
+    monkeypatch.setattr(sms_dispatcher, "enqueue", lambda phone, code: True)
+
+    service.send_verification_code("13800000004", "10.0.0.8")
+    assert len(concurrent_errors) == 1
+    # 被拒绝的并发请求归还了预占的IP次数
+    assert get_rate_limit_backend().hit("verification_code_ip:10.0.0.9", 1, 60)[0]
@@ -0,0 +1,115 @@
+import asyncio
+import os
+import sys
+import threading
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.scheduler import PeriodicJob, PeriodicScheduler
+
+
+class FakeLock:
+    """可切换leader身份的锁替身"""
+
+    def __init__(self, leader=True):
+        self.leader = leader
+        self.released = False
+
+    def ensure(self):
+        if isinstance(self.leader, Exception):
+            raise self.leader
+        return self.leader
+
+    def release(self):
+        self.released = True
+
+
+def make_job(name, interval, initial_delay=0, calls=None):
+    calls = calls if calls is not None else []
+    return PeriodicJob(name, interval, lambda: calls.append(name), initial_delay=initial_delay), calls
+
+
+# 测试任务在初始延迟后首次执行，之后按间隔执行
+def test_initial_delay_and_interval():
+    job, calls = make_job("cleanup", 60, initial_delay=10)
+    scheduler = PeriodicScheduler([job], lock=FakeLock())
+
+    assert asyncio.run(scheduler.run_pending(now=0)) == []
+    assert asyncio.run(scheduler.run_pending(now=10)) == ["cleanup"]
+    assert asyncio.run(scheduler.run_pending(now=30)) == []
+    assert asyncio.run(scheduler.run_pending(now=70)) == ["cleanup"]
+    assert calls == ["cleanup", "cleanup"]
+
+
+# 测试非leader进程不执行任务，锁检查失败按非leader处理
+def test_non_leader_skips_jobs():
+    job, calls = make_job("cleanup", 60)
+    lock = FakeLock(leader=False)
+    scheduler = PeriodicScheduler([job], lock=lock)
+
+    assert asyncio.run(scheduler.run_pending(now=0)) == []
+    lock.leader = ConnectionError("mysql unavailable")
+    assert asyncio.run(scheduler.run_pending(now=100)) == []
+    assert calls == []
+    assert scheduler.is_leader is False
+
+
+# 测试重新成为leader后从初始延迟开始重新安排任务
+def test_leadership_change_reschedules_jobs():
+    job, calls = make_job("cleanup", 60, initial_delay=5)
+    lock = FakeLock()
+    scheduler = PeriodicScheduler([job], lock=lock)
+
+    assert asyncio.run(scheduler.run_pending(now=5)) == []
+    assert asyncio.run(scheduler.run_pending(now=10)) == ["cleanup"]
+
+    lock.leader = False
+    assert asyncio.run(scheduler.run_pending(now=70)) == []
+
+    lock.leader = True
+    assert asyncio.run(scheduler.run_pending(now=200)) == []
+    assert asyncio.run(scheduler.run_pending(now=205)) == ["cleanup"]
+    assert calls == ["cleanup", "cleanup"]
+
+
+# 测试普通函数任务在线程中执行，协程任务在事件循环中执行，任务失败不影响其他任务和后续调度
+def test_async_and_failing_jobs():
+    calls = []
+    threads = []
+
+    async def update():
+        calls.append("update")
+        threads.append(threading.get_ident())
+
+    def broken():
+        threads.append(threading.get_ident())
+        raise RuntimeError("boom")
+
+    scheduler = PeriodicScheduler([
+        PeriodicJob("broken", 30, broken),
+        PeriodicJob("update", 30, update),
+    ])
+
+    assert asyncio.run(scheduler.run_pending(now=0)) == ["broken", "update"]
+    assert asyncio.run(scheduler.run_pending(now=30)) == ["broken", "update"]
+    assert calls == ["update", "update"]
+    assert threads[0] != threading.get_ident() and threads[1] == threading.get_ident()
+
+
+# 测试启动后立即执行到期任务，停止时释放leader锁
+def test_start_and_stop_release_lock():
+    job, calls = make_job("cleanup", 60)
+    lock = FakeLock()
+    scheduler = PeriodicScheduler([job], lock=lock, tick_seconds=0.01)
+
+    async def run():
+        await scheduler.start()
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+
+    asyncio.run(run())
+    assert calls == ["cleanup"]
+    assert lock.released is True
+    assert scheduler.is_leader is False
@@ -0,0 +1,127 @@
+import asyncio
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.user.yunpian_service import SmsDispatcher, YunpianService
+
+
+class StubYunpianHandler(BaseHTTPRequestHandler):
+    """本地模拟的云片接口，前fail_times次返回500，之后返回发送成功"""
+
+    fail_times = 0
+    requests = []
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        form = parse_qs(self.rfile.read(length).decode("utf-8"))
+        StubYunpianHandler.requests.append(form)
+        if len(StubYunpianHandler.requests) <= StubYunpianHandler.fail_times:
+            self.send_response(500)
+            self.end_headers()
+            return
+        body = json.dumps({"code": 0, "msg": "发送成功", "count": 1, "fee": 0.05, "sid": len(StubYunpianHandler.requests)})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body.encode("utf-8"))))
+        self.end_headers()
+        self.wfile.write(body.encode("utf-8"))
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _start_stub_server(fail_times):
+    StubYunpianHandler.fail_times = fail_times
+    StubYunpianHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubYunpianHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# 测试异步发送遇到5xx时重试，发送队列在停止前处理完所有任务
+def test_dispatcher_retries_and_drains_queue():
+    server = _start_stub_server(fail_times=1)
+    service = YunpianService("test-key", base_url=f"http://127.0.0.1:{server.server_port}")
+    dispatcher = SmsDispatcher(service, workers=2, max_retries=2, retry_base_delay=0.01)
+
+    async def run():
+        assert not dispatcher.enqueue("13800000000", "123456")
+        await dispatcher.start()
+        assert dispatcher.enqueue("13800000000", "123456")
+        # 线程池中的调用通过call_soon_threadsafe入队
+        await asyncio.get_running_loop().run_in_executor(None, dispatcher.enqueue, "13900000000", "654321")
+        await asyncio.sleep(0)
+        await dispatcher.stop()
+
+    try:
+        asyncio.run(run())
+    finally:
+        server.shutdown()
+
+    assert len(StubYunpianHandler.requests) == 3
+    mobiles = sorted(form["mobile"][0] for form in StubYunpianHandler.requests[1:])
+    assert mobiles == ["13800000000", "13900000000"]
+    assert StubYunpianHandler.requests[-1]["tpl_value"][0].startswith("#code#=")
+
+
+# 测试同步和异步发送返回相同格式的结果
+def test_async_send_matches_sync_result():
+    server = _start_stub_server(fail_times=0)
+    service = YunpianService("test-key", base_url=f"http://127.0.0.1:{server.server_port}")
+
+    async def run():
+        try:
+            return await service.send_verification_code_async("13800000000", "123456")
+        finally:
+            await service.close()
+
+    try:
+        async_result = asyncio.run(run())
+        sync_result = service.send_verification_code("13800000000", "123456")
+    finally:
+        server.shutdown()
+
+    assert async_result["success"] and sync_result["success"]
+    assert set(async_result) == set(sync_result)
+
+
+# 测试短信队列未启动或已满时接口返回503，不在请求中同步调用云片接口
+def test_send_verification_code_returns_503_when_queue_unavailable(monkeypatch):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from src.api.user.routes import router
+    from src.service.user import service as user_service_module
+    from src.user import yunpian_service as yunpian_module
+    from src.utils.rate_limit import get_rate_limit_backend
+
+    get_rate_limit_backend().reset()
+    sync_calls = []
+    monkeypatch.setattr(user_service_module.verification_code_dao, "save_code", lambda *args: True)
+    monkeypatch.setattr(yunpian_module.yunpian_service, "send_verification_code",
+                        lambda *args: sync_calls.append(args) or {"success": True})
+    dispatcher = SmsDispatcher(yunpian_module.yunpian_service)
+    monkeypatch.setattr(user_service_module, "sms_dispatcher", dispatcher)
+
+    app = FastAPI()
+    app.include_router(router)
+    client = TestClient(app)
+
+    # 队列未启动
+    response = client.post("/api/user/send-verification-code", json={"phone_number": "13800000000"})
+    assert response.json()["recode"] == 503
+
+    # 队列已满
+    monkeypatch.setattr(dispatcher, "is_running", lambda: True)
+    dispatcher._queue = asyncio.Queue(1)
+    dispatcher._queue.put_nowait(("13900000000", "000000"))
+    response = client.post("/api/user/send-verification-code", json={"phone_number": "13800000001"})
+    assert response.json()["recode"] == 503
+    assert sync_calls == []
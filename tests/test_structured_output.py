@@ -0,0 +1,67 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.structured_output import (
+    StructuredOutputError,
+    extract_json,
+    extract_json_from_messages,
+    repair_json,
+    validate_fields
+)
+
+
+# 测试优先使用代码块中的JSON，且不会被正文中的括号干扰
+def test_extract_prefers_fenced_block():
+    text = '说明[注意]：{不是JSON}\n```json\n{"name": "张三", "tags": ["a}"]}\n```\n以上{完毕}'
+    assert extract_json(text, expected_type=dict) == {"name": "张三", "tags": ["a}"]}
+
+
+# 测试同一响应中多个顶层片段时，按校验结果选择
+def test_extract_skips_candidates_failing_validation():
+    text = '审查意见：{"问题": "无"}\n修正后的结果：{"current_stage": "大学", "next_trend": "毕业"}'
+    data = extract_json(text, validator=lambda d: validate_fields(d, required_fields=["current_stage"]))
+    assert data == {"current_stage": "大学", "next_trend": "毕业"}
+
+
+# 测试常见格式错误的修复
+def test_repair_common_defects():
+    text = """{
+        // 角色信息
+        'name': '张三',
+        "quote": “他说"你好"”,
+        "active": True, "memory": None,
+        "note": "第一行
+第二行",
+        "hobbies": ["读书", "跑步",],
+    }"""
+    assert extract_json(text) == {
+        "name": "张三",
+        "quote": '他说"你好"',
+        "active": True,
+        "memory": None,
+        "note": "第一行\n第二行",
+        "hobbies": ["读书", "跑步"]
+    }
+    # 被截断的输出会补全括号
+    assert extract_json('[{"description": "晨跑", "tags": ["运动"') == [{"description": "晨跑", "tags": ["运动"]}]
+    assert repair_json('{"a": 1, "b":') == '{"a": 1, "b":null}'
+
+
+# 测试从消息列表提取时跳过用户任务消息并优先使用指定agent
+def test_extract_from_messages():
+    messages = [
+        SimpleNamespace(source="user", content='当前配置：{"current_stage": "旧"}'),
+        SimpleNamespace(source="Generator", content='{"current_stage": "新"}'),
+        SimpleNamespace(source="Reviewer", content='{"current_stage": "审查"}')
+    ]
+    assert extract_json_from_messages(messages, preferred_source="Generator") == {"current_stage": "新"}
+    assert extract_json_from_messages(messages[:1] + messages[2:], preferred_source="Generator") == {"current_stage": "审查"}
+    with pytest.raises(StructuredOutputError):
+        extract_json_from_messages(messages[:1])
@@ -0,0 +1,93 @@
+import os
+import sys
+import time
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+import jwt
+
+from src.service.user import service as user_service_module
+from src.user.token_cache import TokenValidationCache, token_validation_cache
+
+
+# 测试缓存过期、按用户清除以及容量淘汰
+def test_token_cache_ttl_and_invalidation():
+    cache = TokenValidationCache(ttl_seconds=60, max_size=2)
+    cache.set("token-a", True, "user-1")
+    cache.set("token-b", False, "user-2")
+    assert cache.get("token-a") is True
+    assert cache.get("token-b") is False
+
+    cache.invalidate_user("user-1")
+    assert cache.get("token-a") is None
+
+    cache.set("token-c", True, "user-3")
+    cache.set("token-d", True, "user-3")
+    assert cache.get("token-b") is None
+
+    # 缓存不超过令牌本身的有效期
+    cache.set("token-e", True, "user-4", token_exp=time.time() - 1)
+    assert cache.get("token-e") is None
+
+
+# 测试签名校验在本地完成，撤销状态只在缓存未命中时查询数据库
+def test_verify_jwt_token_uses_cache(monkeypatch):
+    service = user_service_module.UserService()
+    calls = []
+
+    def validate_token(token):
+        calls.append(token)
+        return True
+
+    monkeypatch.setattr(user_service_module.token_dao, "validate_token", validate_token)
+    monkeypatch.setattr(user_service_module.token_dao, "delete_token", lambda token: True)
+    token_validation_cache.clear()
+
+    token = jwt.encode({"user_id": "user-1", "exp": int(time.time()) + 3600}, service.jwt_secret, algorithm="HS256")
+    assert service.verify_jwt_token(token)["user_id"] == "user-1"
+    assert service.verify_jwt_token(token)["user_id"] == "user-1"
+    assert len(calls) == 1
+
+    # 签名无效和已过期的令牌不会查询数据库
+    forged = jwt.encode({"user_id": "user-1", "exp": int(time.time()) + 3600}, "wrong-secret", algorithm="HS256")
+    expired = jwt.encode({"user_id": "user-1", "exp": int(time.time()) - 10}, service.jwt_secret, algorithm="HS256")
+    assert service.verify_jwt_token(forged) is None
+    assert service.verify_jwt_token(expired) is None
+    assert len(calls) == 1
+
+    # 登出后立即失效
+    monkeypatch.setattr(user_service_module.token_dao, "validate_token", lambda token: False)
+    service.logout(token)
+    assert service.verify_jwt_token(token) is None
+
+
+# 测试令牌表按摘要查询，过期令牌分批删除
+def test_token_dao_uses_hash_and_purges_in_batches():
+    from src.user.db.user_dao import TokenDAO
+    from src.user.token_cache import hash_token
+
+    class FakeDB:
+        def __init__(self):
+            self.statements = []
+            self.batches = [1000, 1000, 10]
+
+        def execute_query(self, query, params=None):
+            self.statements.append((query, params))
+            return [{"1": 1}]
+
+        def execute_update(self, query, params=None):
+            self.statements.append((query, params))
+            return self.batches.pop(0) if "expire_time <=" in query else 1
+
+    dao = TokenDAO()
+    dao.db = FakeDB()
+
+    assert dao.validate_token("token-a")
+    query, params = dao.db.statements[-1]
+    assert "token_hash = %s" in query
+    assert params == (hash_token("token-a"),)
+    assert len(params[0]) == 64
+
+    assert dao.purge_expired_tokens(batch_size=1000) == 2010
@@ -0,0 +1,107 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+
+# 将项目根目录添加到Python路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.utils.tracing import TraceIdLogFilter, current_trace_id, start_span
+
+# 启用json导出后发送一个带traceparent的请求，输出响应头中的trace_id
+TRACED_REQUEST_SCRIPT = """
+from fastapi.testclient import TestClient
+import src.api.main as main
+
+with TestClient(main.app) as client:
+    response = client.get("/", headers={"traceparent": "00-0af7651916cd43dd8448eb211c80319c-b7ad6b7169203331-01"})
+    print(response.headers["x-trace-id"])
+"""
+
+
+# 异步生成器的span只在生成元素时为当前span，消费方的span不会挂到生成器span下
+TRACED_ASYNC_GEN_SCRIPT = """
+import asyncio
+from src.utils.tracing import setup_tracing, shutdown_tracing, start_span, traced
+
+setup_tracing()
+
+@traced("gen")
+async def gen():
+    for i in range(3):
+        with start_span(f"inner{i}"):
+            pass
+        yield i
+
+async def main():
+    with start_span("consumer"):
+        stream = gen()
+        async for i in stream:
+            with start_span(f"body{i}"):
+                pass
+            if i == 1:
+                break
+        await stream.aclose()
+    with start_span("after"):
+        pass
+
+asyncio.run(main())
+shutdown_tracing()
+"""
+
+
+def _run_traced_script(script, trace_file):
+    env = dict(os.environ)
+    env.update({
+        "PYTHONPATH": project_root + os.pathsep + env.get("PYTHONPATH", ""),
+        "TRACING_EXPORTER": "json",
+        "TRACING_JSON_FILE": str(trace_file),
+        "OPENAI_API_KEY": "test",
+    })
+    return subprocess.run([sys.executable, "-c", script], cwd=project_root, env=env,
+                          capture_output=True, text=True)
+
+
+# 测试未启用追踪时不创建span，日志字段使用占位符
+def test_tracing_disabled_by_default():
+    with start_span("test.span") as span:
+        assert not span.is_recording()
+        assert current_trace_id() is None
+
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "message", None, None)
+    assert TraceIdLogFilter().filter(record)
+    assert record.trace_id == "-"
+    assert record.span_id == "-"
+
+
+# 测试json导出时HTTP请求的span沿用上游traceparent并写入文件
+def test_json_exporter_writes_request_span(tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    result = _run_traced_script(TRACED_REQUEST_SCRIPT, trace_file)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "0af7651916cd43dd8448eb211c80319c"
+
+    spans = [json.loads(line) for line in trace_file.read_text(encoding="utf-8").splitlines()]
+    server_span = next(span for span in spans if span["name"] == "GET /")
+    assert server_span["context"]["trace_id"] == "0x0af7651916cd43dd8448eb211c80319c"
+    assert server_span["kind"] == "SpanKind.SERVER"
+    assert server_span["attributes"]["http.status_code"] == 200
+
+
+# 测试中途放弃的异步生成器正常结束span，消费方和之后创建的span的父span正确
+def test_async_generator_span_does_not_leak_context(tmp_path):
+    trace_file = tmp_path / "traces.jsonl"
+    result = _run_traced_script(TRACED_ASYNC_GEN_SCRIPT, trace_file)
+    assert result.returncode == 0, result.stderr
+    assert "Failed to detach context" not in result.stderr
+
+    spans = {span["name"]: span for span in
+             (json.loads(line) for line in trace_file.read_text(encoding="utf-8").splitlines())}
+    span_ids = {name: span["context"]["span_id"] for name, span in spans.items()}
+    assert spans["gen"]["parent_id"] == span_ids["consumer"]
+    assert spans["inner0"]["parent_id"] == spans["inner1"]["parent_id"] == span_ids["gen"]
+    assert spans["body0"]["parent_id"] == spans["body1"]["parent_id"] == span_ids["consumer"]
+    assert "inner2" not in spans
+    assert spans["after"]["parent_id"] is None